@@ -0,0 +1,9 @@
+# app.py
+import os
+
+from web.service import app
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get("PORT", 5000)))
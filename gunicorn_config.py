@@ -1,6 +1,25 @@
+# gunicorn -c gunicorn_config.py app:app
+import multiprocessing
+import os
+
 bind = "0.0.0.0:5000"
-workers = 4
-worker_class = "sync"
-worker_connections = 1000
-timeout = 300
-keepalive = 2
\ No newline at end of file
+workers = int(os.environ.get("WEB_CONCURRENCY", min(4, multiprocessing.cpu_count() * 2)))
+# Async workers: one slow translation no longer ties up a whole worker
+worker_class = "uvicorn.workers.UvicornWorker"
+# Modules are imported once before forking; each worker warms its engines at startup
+preload_app = True
+# Requests are size-limited and EPUBs / subtitle zips run as background jobs
+# (web/job_queue.py), so nothing legitimate needs the old 300 s
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+
+
+def on_starting(server):
+    # With TRANSLITERATION_METRICS_DIR set, every worker writes its samples there and
+    # /metrics merges them; snapshots left by a previous run would be counted again
+    directory = os.environ.get("TRANSLITERATION_METRICS_DIR")
+    if directory and os.path.isdir(directory):
+        for name in os.listdir(directory):
+            if name.endswith(".json"):
+                os.remove(os.path.join(directory, name))
@@ -0,0 +1,373 @@
+import io
+import math
+import os
+import re
+import sys
+import time
+import zipfile
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from functools import lru_cache
+from statistics import median
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from subtitles.srt_ingest import decode_subtitle_bytes, read_subtitle_text
+from subtitles.timeline import Timeline, assign_by_overlap, format_timestamp_line, merge_tracks
+from subtitles.zip2zipMultilingual import (
+    select_output_combinations,
+    transliterate_translated_line,
+)
+from transliteration.translationFunctions import LANGUAGE_CODE_MAP
+
+# CJK, Cyrillic, Devanagari and Arabic tracks get a romanized line under each cue
+ALIGNED_TRANSLITERATED_LANGUAGES = ("zh-ch", "zh-CN", "ja", "ko", "ru", "hi", "ar")
+
+# Below this share of well-overlapping cues the track is treated as drifting
+MIN_ALIGNED_SHARE = 0.6
+# A constant offset larger than this is removed before matching by overlap;
+# head and tail offsets further apart than this mean the track drifts
+MAX_OFFSET_MS = 250
+# Offsets are searched up to this far, in bins of OFFSET_BIN_MS
+MAX_SEARCH_MS = 10000
+OFFSET_BIN_MS = 50
+# Half-width of the DTW band, as a share of the cue count (at least MIN_BAND_CUES)
+DTW_BAND = 0.03
+MIN_BAND_CUES = 25
+
+TRACK_FILENAME_PATTERN = re.compile(
+    r"^(?P<base>.+?)[._-](?P<lang>[A-Za-z]{2}(?:-[A-Za-z]{2})?)\.srt$", re.IGNORECASE
+)
+
+
+def track_language(filename):
+    """'Episode01-de.srt' / 'Episode01.zh-ch.srt' -> ('Episode01', 'de'), or None"""
+    match = TRACK_FILENAME_PATTERN.match(os.path.basename(filename))
+    if not match:
+        return None
+    lang = match.group("lang")
+    for code in (lang, lang.lower()):
+        if code in LANGUAGE_CODE_MAP:
+            return match.group("base"), code
+    return None
+
+
+def load_track(content):
+    """Timeline of one language track, multi-line cues joined into one line"""
+    timeline = Timeline.from_srt(content)
+    timeline.texts = [" ".join(text.split()) for text in timeline.texts]
+    return timeline
+
+
+def well_aligned_share(anchor, track, assignment):
+    """Share of track cues overlapping their anchor cue for most of the longer cue"""
+    if not len(track):
+        return 1.0
+    aligned = 0
+    for (start, end, _), anchor_index in zip(track, assignment):
+        if anchor_index is None:
+            continue
+        anchor_start, anchor_end = anchor.starts[anchor_index], anchor.ends[anchor_index]
+        overlap = min(end, anchor_end) - max(start, anchor_start)
+        longer = max(end - start, anchor_end - anchor_start) or 1
+        if overlap * 2 >= longer:
+            aligned += 1
+    return aligned / len(track)
+
+
+def estimate_offset(anchor, track, first=0, last=None):
+    """
+    Constant offset (ms) of track cues first..last against the anchor, or None.
+
+    Every start difference within MAX_SEARCH_MS is binned; the fullest bin wins
+    and its differences give the median. Unlike matching cues by overlap first,
+    this still works when the offset exceeds the gap between cues.
+    """
+    starts = anchor.starts
+    differences = []
+    for start in track.starts[first:last]:
+        lo = bisect_left(starts, start - MAX_SEARCH_MS)
+        hi = bisect_right(starts, start + MAX_SEARCH_MS)
+        differences.extend(start - starts[i] for i in range(lo, hi))
+    if not differences:
+        return None
+    bins = Counter(difference // OFFSET_BIN_MS for difference in differences)
+    best = max(bins, key=lambda key: bins[key] + bins[key - 1] + bins[key + 1])
+    return median(
+        difference
+        for difference in differences
+        if best - 1 <= difference // OFFSET_BIN_MS <= best + 1
+    )
+
+
+def normalized_midpoints(timeline):
+    first, last = timeline.duration
+    span = (last - first) or 1
+    return [
+        ((start + end) / 2 - first) / span for start, end in zip(timeline.starts, timeline.ends)
+    ]
+
+
+def assign_by_dtw(anchor, track, band=DTW_BAND):
+    """
+    Monotonic alignment of track cues to anchor cues for tracks whose timing drifts.
+
+    Runs dynamic time warping over cue midpoints normalized to each track's own
+    span, so a constant offset and a frame-rate drift both disappear. Only a band
+    around the diagonal is filled (O(n * band) cells). Each track cue goes to the
+    closest anchor cue on the warping path; cues the path does not reach get None.
+    """
+    a = normalized_midpoints(anchor)
+    b = normalized_midpoints(track)
+    n, m = len(a), len(b)
+    if not n or not m:
+        return [None] * m
+
+    # The band is at least as wide as the diagonal's slope, so consecutive rows
+    # always overlap however unequal the track lengths are
+    width = max(MIN_BAND_CUES, int(band * max(n, m)), math.ceil(n / max(1, m - 1)))
+    infinity = float("inf")
+    row_starts, rows, moves = [], [], []
+    previous, previous_start = None, 0
+
+    for j in range(m):
+        center = j * (n - 1) // max(1, m - 1)
+        lo, hi = max(0, center - width), min(n - 1, center + width)
+        row = [infinity] * (hi - lo + 1)
+        move = [0] * (hi - lo + 1)
+        bj = b[j]
+        for i in range(lo, hi + 1):
+            cost = abs(a[i] - bj)
+            if i == 0 and j == 0:
+                row[0] = cost
+                continue
+            best, best_move = infinity, 0
+            if previous is not None:
+                k = i - previous_start
+                if 0 < k <= len(previous) and previous[k - 1] < best:  # diagonal
+                    best, best_move = previous[k - 1], 0
+                if 0 <= k < len(previous) and previous[k] < best:  # same anchor cue
+                    best, best_move = previous[k], 1
+            if i > lo and row[i - lo - 1] < best:  # same track cue
+                best, best_move = row[i - lo - 1], 2
+            row[i - lo] = cost + best
+            move[i - lo] = best_move
+        row_starts.append(lo)
+        rows.append(row)
+        moves.append(move)
+        previous, previous_start = row, lo
+
+    # Walk the path back, keeping the closest anchor cue for every track cue
+    assignment = [None] * m
+    best_cost = [infinity] * m
+    i, j = n - 1, m - 1
+    while True:
+        k = i - row_starts[j]
+        if not 0 <= k < len(rows[j]) or rows[j][k] == infinity:
+            # Outside the band: leave the cues not yet reached unassigned
+            break
+        cost = abs(a[i] - b[j])
+        if cost < best_cost[j]:
+            best_cost[j], assignment[j] = cost, i
+        if i == 0 and j == 0:
+            break
+        step = moves[j][k]
+        if step == 0:
+            i, j = i - 1, j - 1
+        elif step == 1:
+            j -= 1
+        else:
+            i -= 1
+    return assignment
+
+
+def assign_with_drift_fallback(anchor, track):
+    """
+    Matches track cues to anchor cues by time overlap through the interval index.
+
+    A constant offset is measured and removed first. If the offsets of the first
+    and last third of the track disagree, or the cues still do not line up
+    (e.g. a 25 vs 23.976 fps drift), falls back to assign_by_dtw.
+
+    Returns:
+        (anchor index or None per track cue, track with the offset removed)
+    """
+    third = len(track) // 3
+    head = estimate_offset(anchor, track, 0, third or None)
+    tail = estimate_offset(anchor, track, -third or 0)
+    if head is None or tail is None or abs(head - tail) > MAX_OFFSET_MS:
+        return assign_by_dtw(anchor, track), track
+
+    offset = estimate_offset(anchor, track)
+    shifted = track.shift(-round(offset)) if abs(offset) > MAX_OFFSET_MS else track
+    assignment = assign_by_overlap(anchor, shifted)
+    if well_aligned_share(anchor, shifted, assignment) >= MIN_ALIGNED_SHARE:
+        return assignment, shifted
+    return assign_by_dtw(anchor, track), track
+
+
+def align_tracks(tracks, anchor_language=None):
+    """
+    Aligns per-language tracks of one episode on the anchor track's timing.
+
+    Args:
+        tracks: Dict of language -> Timeline
+        anchor_language: Track providing the timing (default: the first one)
+
+    Returns:
+        (languages, Timeline whose texts are tuples in the order of languages)
+    """
+    languages = list(tracks)
+    if anchor_language in tracks:
+        languages.remove(anchor_language)
+        languages.insert(0, anchor_language)
+    merged = merge_tracks([tracks[lang] for lang in languages], assign_with_drift_fallback)
+    merged.texts = [tuple(" ".join(text.split()) for text in texts) for texts in merged.texts]
+    return languages, merged
+
+
+@lru_cache(maxsize=20000)
+def cached_aligned_transliteration(text, lang):
+    return transliterate_translated_line(text, lang)
+
+
+def build_transliteration_maps(merged, languages, enable_transliteration=True):
+    """lang -> {cue text: transliteration} for the scripts that get one"""
+    maps = {}
+    if not enable_transliteration:
+        return maps
+    for position, lang in enumerate(languages):
+        if lang not in ALIGNED_TRANSLITERATED_LANGUAGES:
+            continue
+        texts = {texts[position] for texts in merged.texts if texts[position]}
+        maps[lang] = {text: cached_aligned_transliteration(text, lang) for text in texts}
+    return maps
+
+
+def write_aligned_outputs(merged, languages, transliteration_maps, combos, streams):
+    """
+    Writes every language combination in one pass over the aligned cues.
+
+    Each output lists, per cue, the text of each of its languages followed by
+    its transliteration; cues with no text in an output's languages are left
+    out and the rest are numbered densely.
+    """
+    positions = {lang: position for position, lang in enumerate(languages)}
+    outputs = [(combo, f, [0]) for combo, f in zip(combos, streams)]
+
+    for start, end, texts in zip(merged.starts, merged.ends, merged.texts):
+        fragments = {}
+        for lang, position in positions.items():
+            text = texts[position]
+            if not text:
+                fragments[lang] = ""
+                continue
+            fragment = text + "\n"
+            transliterated = transliteration_maps.get(lang, {}).get(text)
+            if transliterated and transliterated != text:
+                fragment += transliterated + "\n"
+            fragments[lang] = fragment
+
+        timestamp = None
+        for combo, f, counter in outputs:
+            body = "".join(fragments[lang] for lang in combo)
+            if not body:
+                continue
+            if timestamp is None:
+                timestamp = f"{format_timestamp_line(start, end)}\n"
+            counter[0] += 1
+            f.write(f"{counter[0]}\n{timestamp}{body}\n")
+
+
+def build_aligned_outputs(
+    base_name,
+    tracks,
+    enable_transliteration=True,
+    combination_sizes=None,
+    anchor_language=None,
+):
+    """
+    Renders the single-language and combination SRTs of one episode from its
+    native per-language tracks, the same set generate_combination_output
+    produces for translated subtitles.
+
+    Returns:
+        List of (archive name, SRT content)
+    """
+    languages, merged = align_tracks(tracks, anchor_language)
+    transliteration_maps = build_transliteration_maps(merged, languages, enable_transliteration)
+    combos = select_output_combinations(languages, combination_sizes)
+    streams = [io.StringIO() for _ in combos]
+    write_aligned_outputs(merged, languages, transliteration_maps, combos, streams)
+    return [
+        (f"{base_name}_{'_'.join(combo)}.srt", stream.getvalue())
+        for combo, stream in zip(combos, streams)
+    ]
+
+
+def build_aligned_srt_files(srt_paths, output_dir=None, **options):
+    """
+    Aligns SRT files of one episode given as {language: path} and writes the outputs.
+
+    Returns:
+        Paths of the written SRT files
+    """
+    tracks = {lang: load_track(read_subtitle_text(path)) for lang, path in srt_paths.items()}
+    first_path = next(iter(srt_paths.values()))
+    output_dir = output_dir or os.path.dirname(os.path.abspath(first_path))
+    base_name = track_language(first_path)[0] if track_language(first_path) else "aligned"
+
+    written = []
+    for name, content in build_aligned_outputs(base_name, tracks, **options):
+        path = os.path.join(output_dir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        written.append(path)
+    return written
+
+
+def process_aligned_zip(
+    input_zip_path,
+    enable_transliteration=True,
+    combination_sizes=None,
+    anchor_language=None,
+):
+    """
+    Builds multilingual SRTs from a zip of native per-language SRTs.
+
+    Files are grouped into episodes by name without the language code
+    (Episode01-de.srt, Episode01-ja.srt, ...). All outputs are streamed into
+    <input>_aligned.zip.
+    """
+    episodes = {}
+    with zipfile.ZipFile(input_zip_path, "r") as zip_ref:
+        for file_info in zip_ref.infolist():
+            parsed = track_language(file_info.filename)
+            if file_info.is_dir() or parsed is None:
+                continue
+            base_name, lang = parsed
+            content, _ = decode_subtitle_bytes(zip_ref.read(file_info))
+            episodes.setdefault(base_name, {})[lang] = load_track(content)
+
+    if not episodes:
+        raise ValueError("No <name>-<language>.srt files found in the input zip")
+
+    output_zip_path = input_zip_path.replace(".zip", "_aligned.zip")
+    with zipfile.ZipFile(output_zip_path, "w", zipfile.ZIP_DEFLATED) as output_zip:
+        for base_name, tracks in episodes.items():
+            start = time.perf_counter()
+            outputs = build_aligned_outputs(
+                base_name, tracks, enable_transliteration, combination_sizes, anchor_language
+            )
+            for name, content in outputs:
+                output_zip.writestr(name, content)
+            print(
+                f"Aligned {base_name}: {len(tracks)} tracks, {len(outputs)} outputs "
+                f"in {time.perf_counter() - start:.2f}s"
+            )
+
+    return output_zip_path
+
+
+if __name__ == "__main__":
+    input_zip_path = "/home/zaya/Downloads/Zayas/ZayasTransliteration/tests/subtitles/aligned.zip"
+    print(f"Created: {process_aligned_zip(input_zip_path, combination_sizes=(2,))}")
@@ -0,0 +1,98 @@
+import argparse
+import glob
+import io
+import os
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from subtitles.srt_ingest import read_subtitle_text
+from subtitles.zip2zipMultilingual import merge_subtitle_content, process_zip_of_srts
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "..", "tests", "More-tests", "all_subtitles")
+
+
+class StubTranslator:
+    """Local stand-in for the translation service: fixed latency per batch, CJK output"""
+
+    def __init__(self, latency=0.05):
+        self.latency = latency
+        self.requests = 0
+
+    def __call__(self, texts, lang, failed=None):
+        self.requests += 1
+        time.sleep(self.latency)
+        return [
+            "".join(chr(0x4E00 + (ord(c) * 31) % 3000) for c in text if not c.isspace())
+            for text in texts
+        ]
+
+
+def build_episode_zip(zip_path, episodes=100, cues_per_episode=300, credit_cues=20):
+    """Builds a zip of synthetic episodes from the fixture SRTs
+
+    Every episode shares the same opening credits and overlaps its neighbours,
+    like a real series.
+    """
+    blocks = []
+    for srt_path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.srt"))):
+        content = merge_subtitle_content(read_subtitle_text(srt_path))
+        for block in content.split("\n\n"):
+            parts = block.split("\n")
+            if len(parts) >= 3:
+                blocks.append(parts[2])
+
+    credits = blocks[:credit_cues]
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
+        for episode in range(episodes):
+            start = (episode * cues_per_episode // 2) % max(1, len(blocks) - cues_per_episode)
+            texts = credits + blocks[start : start + cues_per_episode]
+            srt = io.StringIO()
+            for number, text in enumerate(texts, 1):
+                seconds = number * 3
+                stamp = f"00:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+                srt.write(f"{number}\n{stamp},000 --> {stamp},900\n{text}\n\n")
+            zipf.writestr(f"Series.S01E{episode + 1:03d}.srt", srt.getvalue())
+
+
+def run(zip_path, target_languages, io_workers, cpu_workers, latency):
+    translator = StubTranslator(latency)
+    start = time.perf_counter()
+    process_zip_of_srts(
+        zip_path,
+        target_languages,
+        enable_transliteration=True,
+        io_workers=io_workers,
+        cpu_workers=cpu_workers,
+        translate_batch=translator,
+    )
+    elapsed = time.perf_counter() - start
+    with zipfile.ZipFile(zip_path) as zipf:
+        episodes = len(zipf.namelist())
+    return {
+        "io_workers": io_workers,
+        "cpu_workers": cpu_workers,
+        "seconds": round(elapsed, 2),
+        "episodes_per_second": round(episodes / elapsed, 2),
+        "translation_requests": translator.requests,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark process_zip_of_srts scheduling")
+    parser.add_argument("--episodes", type=int, default=100)
+    parser.add_argument("--languages", default="zh-ch,ja")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub seconds per batch")
+    args = parser.parse_args()
+
+    target_languages = args.languages.split(",")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        zip_path = os.path.join(temp_dir, "episodes.zip")
+        build_episode_zip(zip_path, episodes=args.episodes)
+
+        # Old layout: one small thread pool for everything
+        configs = [(4, 1), (8, 1), (8, os.cpu_count() or 1), (16, os.cpu_count() or 1)]
+        for io_workers, cpu_workers in configs:
+            print(run(zip_path, target_languages, io_workers, cpu_workers, args.latency))
@@ -0,0 +1,154 @@
+import html
+import os
+import zipfile
+
+from lxml import etree
+
+# srt_to_epub writes every cue as a self-describing block:
+#   <div class="subtitle-block" id="cue-12" data-number="12" data-timestamp="00:01:02,000 --> ...">
+# and the enclosing <div class="srt-file"> carries data-filename and data-cue-count.
+# Calibre rewrites classes and splits long chapters, but keeps these data attributes,
+# so they are the index the extractor reads back.
+CUE_BLOCKS = etree.XPath("//*[@data-number and @data-timestamp]")
+CHAPTER_FILENAME = etree.XPath("string((//*[@data-filename])[1]/@data-filename)")
+CHAPTER_CUE_COUNT = etree.XPath("string((//*[@data-cue-count])[1]/@data-cue-count)")
+CHAPTER_TITLE = etree.XPath("string((//*[local-name()='title'])[1])")
+BLOCK_PARAGRAPHS = etree.XPath("./descendant::*[local-name()='p']")
+
+_PARSER = etree.XMLParser(recover=True, huge_tree=True, resolve_entities=False)
+
+
+def format_cue_block(number, timestamp, text):
+    """XHTML block for one cue, with the index attributes the extractor reads"""
+    escaped_timestamp = html.escape(timestamp)
+    return f"""
+                <div class="subtitle-block" id="cue-{number}" data-number="{number}" data-timestamp="{escaped_timestamp}">
+                    <p class="subtitle-number">{number}</p>
+                    <p class="subtitle-time">{escaped_timestamp}</p>
+                    <p class="subtitle-text">{text}</p>
+                </div>
+                """
+
+
+def is_chapter_document(name):
+    base = os.path.basename(name)
+    return base.endswith((".xhtml", ".html", ".htm")) and not base.startswith("nav.")
+
+
+def paragraph_text(element):
+    return " ".join("".join(element.itertext()).split())
+
+
+def read_block_cue(block):
+    """
+    Reads (number, timestamp, text, translation) from one indexed block.
+
+    Number and timestamp come from the attributes; paragraphs repeating them are
+    skipped, so it does not matter which classes the translator left behind.
+    """
+    number = block.get("data-number").strip()
+    timestamp = " ".join(block.get("data-timestamp").split())
+    skip = {number, f"#{number}", timestamp}
+
+    texts = []
+    translation = ""
+    fallback_translation = ""
+    for p in BLOCK_PARAGRAPHS(block):
+        text = paragraph_text(p)
+        if not text:
+            continue
+        lang = p.get("lang")
+        if lang is not None:
+            if lang == "zh" and not translation:
+                translation = text
+            elif not fallback_translation:
+                fallback_translation = text
+        elif text not in skip:
+            texts.append(text)
+
+    return number, timestamp, " ".join(texts), translation or fallback_translation
+
+
+def read_chapter_cues(data, default_filename):
+    """
+    Parses one chapter document.
+
+    Returns:
+        (srt filename, expected cue count or None, list of cues); the list is
+        empty when the chapter has no cue index (EPUBs from older versions)
+    """
+    root = etree.fromstring(data, _PARSER)
+    if root is None:
+        return default_filename, None, []
+
+    filename = CHAPTER_FILENAME(root) or ""
+    if not filename:
+        title = CHAPTER_TITLE(root).strip()
+        filename = title.replace(".xhtml", ".srt") if title else default_filename
+
+    cue_count = CHAPTER_CUE_COUNT(root)
+    cues = [read_block_cue(block) for block in CUE_BLOCKS(root)]
+    return filename, int(cue_count) if cue_count.isdigit() else None, cues
+
+
+def read_epub_cues(epub_path):
+    """
+    Collects the cues of every SRT in an EPUB, straight from the zip.
+
+    Chapters Calibre split into several files are merged back by filename and
+    cue number.
+
+    Returns:
+        Dict of srt filename -> list of (number, timestamp, text, translation),
+        ordered by cue number
+    """
+    cues_by_file = {}
+    expected_counts = {}
+
+    with zipfile.ZipFile(epub_path, "r") as epub_zip:
+        for name in epub_zip.namelist():
+            if not is_chapter_document(name):
+                continue
+            default_filename = os.path.basename(name).rsplit(".", 1)[0].split("_split_")[0]
+            filename, cue_count, cues = read_chapter_cues(epub_zip.read(name), default_filename)
+            if not cues:
+                continue
+
+            by_number = cues_by_file.setdefault(filename, {})
+            for cue in cues:
+                by_number.setdefault(cue[0], cue)
+            if cue_count is not None:
+                expected_counts[filename] = cue_count
+
+    ordered = {}
+    for filename, by_number in cues_by_file.items():
+        ordered[filename] = sorted(
+            by_number.values(), key=lambda cue: int(cue[0]) if cue[0].isdigit() else 0
+        )
+        expected = expected_counts.get(filename)
+        if expected is not None and expected != len(ordered[filename]):
+            print(f"Warning: {filename} has {len(ordered[filename])} of {expected} cues")
+    return ordered
+
+
+def cues_to_srt(cues):
+    """SRT text with the original line and, when present, the translation of each cue"""
+    lines = []
+    for number, timestamp, text, translation in cues:
+        lines.append(number)
+        lines.append(timestamp)
+        lines.append(text)
+        if translation:
+            lines.append(translation)
+        lines.append("")
+    return "\n".join(lines)
+
+
+def epub_to_srt_contents(epub_path):
+    """
+    Rebuilds the SRT files of an EPUB made by srt_to_epub in one pass.
+
+    Returns:
+        Dict of srt filename -> SRT content; empty when the EPUB has no cue index
+    """
+    return {filename: cues_to_srt(cues) for filename, cues in read_epub_cues(epub_path).items()}
@@ -0,0 +1,333 @@
+# epub_writer.py
+import html
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from ebooklib import epub
+from markdown_it import MarkdownIt
+
+# Pandoc's defaults for our books: a chapter per level-1 header, TOC down to level 2
+CHAPTER_LEVEL = "h1"
+TOC_LEVEL = "h2"
+
+DEFAULT_AUTHOR = "Zaya Barrini"
+DEFAULT_PUBLISHER = "Zaya's Language Press"
+
+WRITE_OPTIONS = {
+    "epub2_guide": False,
+    "epub3_landmark": False,
+    "epub3_pages": False,
+}
+
+HEADER_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+
+_markdown = MarkdownIt("commonmark", {"html": True}).enable("table")
+_TAG_PATTERN = re.compile(r"<[^>]+>|[*_`]")
+
+
+def heading_text(inline_token):
+    """Plain text of a header, without inline markup or HTML tags"""
+    return html.unescape(_TAG_PATTERN.sub("", inline_token.content)).strip()
+
+
+def slugify(text, used):
+    slug = re.sub(r"[^\w]+", "-", text.lower()).strip("-") or "section"
+    candidate, counter = slug, 1
+    while candidate in used:
+        counter += 1
+        candidate = f"{slug}-{counter}"
+    used.add(candidate)
+    return candidate
+
+
+def markdown_to_chapters(markdown_text, default_title="Contents"):
+    """
+    Renders Markdown to XHTML chapters in-process, one per level-1 header.
+
+    Raw HTML (ruby annotations) passes through untouched; tables are enabled.
+    Text before the first header becomes a chapter named default_title.
+
+    Returns:
+        List of (title, body html, [(subsection title, anchor id), ...])
+    """
+    tokens = _markdown.parse(markdown_text)
+    starts = [
+        i
+        for i, token in enumerate(tokens)
+        if token.type == "heading_open" and token.tag == CHAPTER_LEVEL and token.level == 0
+    ]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+
+    chapters = []
+    used_ids = set()
+    for position, start in enumerate(starts):
+        end = starts[position + 1] if position + 1 < len(starts) else len(tokens)
+        chapter_tokens = tokens[start:end]
+        if not chapter_tokens:
+            continue
+
+        title = default_title
+        sections = []
+        for i, token in enumerate(chapter_tokens):
+            if token.type != "heading_open" or token.tag not in (CHAPTER_LEVEL, TOC_LEVEL):
+                continue
+            text = heading_text(chapter_tokens[i + 1])
+            anchor = slugify(text, used_ids)
+            token.attrSet("id", anchor)
+            if token.tag == CHAPTER_LEVEL and i == 0:
+                title = text or default_title
+            elif token.tag == TOC_LEVEL:
+                sections.append((text, anchor))
+
+        body = _markdown.renderer.render(chapter_tokens, _markdown.options, {})
+        chapters.append((title, body, sections))
+    return chapters
+
+
+def inline_html(text):
+    """Markdown inline markup of one line (emphasis, links, raw HTML) as HTML"""
+    return _markdown.renderInline(text)
+
+
+def header_block(markdown_header):
+    """'## Animals' -> ('h2', 'Animals')"""
+    text = markdown_header.lstrip("#")
+    level = min(len(markdown_header) - len(text), 6) or 1
+    return f"h{level}", text.strip()
+
+
+def word_list_blocks(items, words_per_paragraph=10):
+    """
+    Blocks for blocks_to_chapters from a word list.
+
+    items yields ("word", html) for entries, joined with ", " in paragraphs of
+    words_per_paragraph, and ("line", text) for lines between them: headers
+    when they start with "#", plain paragraphs otherwise.
+    """
+    words = []
+    for kind, content in items:
+        if kind == "word":
+            words.append(content)
+            if len(words) == words_per_paragraph:
+                yield "p", ", ".join(words)
+                words = []
+            continue
+        if words:
+            yield "p", ", ".join(words)
+            words = []
+        if content.startswith("#"):
+            yield header_block(content)
+        elif content.strip():
+            yield "p", inline_html(content.strip())
+    if words:
+        yield "p", ", ".join(words)
+
+
+def blocks_to_chapters(blocks, default_title="Contents"):
+    """
+    XHTML chapters from already rendered blocks, without parsing any Markdown.
+
+    blocks yields (tag, content): "h1" to "h6" with plain header text, "hr",
+    "raw" with HTML written as is, or any other tag ("p", "div", ...) with the
+    inner HTML. Chapters and TOC entries are split as in markdown_to_chapters.
+    """
+    chapters = []
+    used_ids = set()
+    title, parts, sections = default_title, [], []
+    for tag, content in blocks:
+        if tag == CHAPTER_LEVEL and parts:
+            chapters.append((title, "".join(parts), sections))
+            parts, sections = [], []
+        if tag in HEADER_TAGS:
+            anchor = slugify(content, used_ids)
+            parts.append(f'<{tag} id="{anchor}">{html.escape(content)}</{tag}>\n')
+            if tag == CHAPTER_LEVEL:
+                title = content or default_title
+            elif tag == TOC_LEVEL:
+                sections.append((content, anchor))
+        elif tag == "hr":
+            parts.append("<hr />\n")
+        elif tag == "raw":
+            parts.append(f"{content}\n")
+        else:
+            parts.append(f"<{tag}>{content}</{tag}>\n")
+    if parts:
+        chapters.append((title, "".join(parts), sections))
+    return chapters
+
+
+def read_optional_file(path, label):
+    if not path:
+        return None
+    if not os.path.exists(path):
+        print(f"Skipping missing {label}: {path}")
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def write_epub(
+    output_path,
+    chapters,
+    title,
+    language="en",
+    subtitle=None,
+    css_path=None,
+    cover_image=None,
+    author=DEFAULT_AUTHOR,
+    publisher=DEFAULT_PUBLISHER,
+    date=None,
+):
+    """
+    Writes chapters (from markdown_to_chapters or blocks_to_chapters) into an
+    EPUB with ebooklib, zipped in-process.
+
+    Cover image and CSS paths that do not exist are skipped with a message
+    instead of failing the whole book.
+    """
+    book = epub.EpubBook()
+    book.set_identifier(str(uuid.uuid4()))
+    book.set_title(title)
+    book.set_language(language)
+    book.add_author(author)
+    book.add_metadata("DC", "publisher", publisher)
+    book.add_metadata("DC", "date", date or datetime.today().strftime("%Y-%m-%d"))
+    book.add_metadata("DC", "rights", f"© {datetime.today().year} {author}, CC BY-NC")
+    if subtitle:
+        book.add_metadata("DC", "description", subtitle)
+
+    cover = read_optional_file(cover_image, "cover image")
+    if cover is not None:
+        book.set_cover(f"cover{os.path.splitext(cover_image)[1] or '.png'}", cover)
+
+    css = read_optional_file(css_path, "stylesheet")
+    stylesheet = None
+    if css is not None:
+        stylesheet = epub.EpubItem(
+            uid="style", file_name="style/main.css", media_type="text/css", content=css
+        )
+        book.add_item(stylesheet)
+
+    spine = ["nav"]
+    toc = []
+    for number, (chapter_title, body, sections) in enumerate(chapters, 1):
+        file_name = f"ch{number:03d}.xhtml"
+        chapter = epub.EpubHtml(title=chapter_title, file_name=file_name, lang=language)
+        chapter.content = body
+        if stylesheet is not None:
+            chapter.add_item(stylesheet)
+        book.add_item(chapter)
+        spine.append(chapter)
+
+        link = epub.Link(file_name, chapter_title, f"chapter-{number}")
+        if sections:
+            toc.append(
+                (
+                    epub.Section(chapter_title, file_name),
+                    [
+                        epub.Link(f"{file_name}#{anchor}", text, f"chapter-{number}-{anchor}")
+                        for text, anchor in sections
+                    ],
+                )
+            )
+        else:
+            toc.append(link)
+
+    book.toc = toc
+    book.spine = spine
+    book.add_item(epub.EpubNcx())
+    book.add_item(epub.EpubNav())
+    epub.write_epub(output_path, book, WRITE_OPTIONS)
+    return output_path
+
+
+def markdown_to_epub(markdown_text, output_path, title, **options):
+    """Markdown text straight to an EPUB, without pandoc or a temporary file"""
+    chapters = markdown_to_chapters(markdown_text, default_title=title)
+    return write_epub(output_path, chapters, title, **options)
+
+
+def build_epub(job):
+    """write_epub(**job); a "markdown_text" entry is rendered to chapters first"""
+    job = dict(job)
+    if "markdown_text" in job:
+        job["chapters"] = markdown_to_chapters(job.pop("markdown_text"), job["title"])
+    return write_epub(**job)
+
+
+def build_epubs(jobs, max_workers=1):
+    """
+    Builds many EPUBs in one run, in worker processes when max_workers > 1.
+
+    Args:
+        jobs: Dicts of write_epub keyword arguments (output_path, chapters,
+            title, ...), or with markdown_text instead of chapters
+        max_workers: Number of processes; 1 builds the books one by one here
+
+    Returns:
+        Paths of the written EPUBs, in the order of jobs
+    """
+    if max_workers <= 1 or len(jobs) <= 1:
+        return [build_epub(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(build_epub, jobs))
+
+
+def pandoc_to_epub(markdown_text, output_path, css_path=None):
+    """The previous path: temporary Markdown file plus one pandoc process per book"""
+    with tempfile.NamedTemporaryFile("w", suffix=".md", encoding="utf-8", delete=False) as f:
+        f.write(markdown_text)
+    pandoc_cmd = ["pandoc", "-s", f.name, "-o", output_path, "--toc", "--toc-depth=2"]
+    if css_path:
+        pandoc_cmd.append(f"--css={css_path}")
+    try:
+        subprocess.run(pandoc_cmd, check=True, capture_output=True)
+    finally:
+        os.remove(f.name)
+    return output_path
+
+
+def benchmark_epub_writers(markdown_text, chapters=None, runs=3, output_dir=None):
+    """
+    Average seconds per EPUB for pandoc (None when it is not installed), the
+    native writer on the same Markdown and, given chapters, the native writer
+    on chapters rendered without Markdown.
+    """
+    output_dir = output_dir or tempfile.mkdtemp()
+    timings = {}
+    writers = {"native": lambda path: markdown_to_epub(markdown_text, path, "Benchmark")}
+    if chapters is not None:
+        writers["native-blocks"] = lambda path: write_epub(path, chapters, "Benchmark")
+    if shutil.which("pandoc"):
+        writers["pandoc"] = lambda path: pandoc_to_epub(markdown_text, path)
+    else:
+        timings["pandoc"] = None
+
+    for name, writer in writers.items():
+        start = time.perf_counter()
+        for run in range(runs):
+            writer(os.path.join(output_dir, f"{name}-{run}.epub"))
+        timings[name] = round((time.perf_counter() - start) / runs, 4)
+    return timings
+
+
+if __name__ == "__main__":
+    # A 2000-word dictionary: 20 sections of 100 ruby-annotated words
+    items = []
+    for section in range(20):
+        items.append(("line", f"# Section {section}"))
+        items.extend(("word", f"<ruby>词{i}<rt>cí {i}</rt></ruby>") for i in range(100))
+    blocks = list(word_list_blocks(items))
+    sample = "".join(
+        f"{'#' * int(tag[1])} {content}\n\n" if tag[0] == "h" else f"{content}\n\n"
+        for tag, content in blocks
+    )
+    print(benchmark_epub_writers(sample, blocks_to_chapters(blocks, "Benchmark")))
@@ -1,19 +1,15 @@
 import os
 import re
+import sys
 from pathlib import Path
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from subtitles.srt_ingest import read_subtitle_file
+
 
 def detect_encoding(file_path):
     """Try to detect the file encoding"""
-    encodings = ["utf-8", "latin-1", "iso-8859-1", "cp1252", "utf-16"]
-    for encoding in encodings:
-        try:
-            with open(file_path, "r", encoding=encoding) as f:
-                f.read()
-            return encoding
-        except UnicodeDecodeError:
-            continue
-    return "utf-8"  # fallback
+    return read_subtitle_file(file_path)[1]
 
 
 def extract_series_info(filename):
@@ -82,18 +78,15 @@ def process_subfolder(subfolder_path):
                 file = episodes[episode]
                 outfile.write(f"## {episode}\n\n")
 
-                encoding = detect_encoding(file)
                 try:
-                    with open(file, "r", encoding=encoding) as infile:
-                        content = infile.read()
-
-                        if file.suffix.lower() in (".srt", ".ass", ".ssa", ".sub"):
-                            # outfile.write(f"```{file.suffix[1:]}\n")
-                            outfile.write(content)
-                            outfile.write("\n\n")
-                        else:
-                            outfile.write(content)
-                            outfile.write("\n\n")
+                    content, encoding = read_subtitle_file(file)
+                    if file.suffix.lower() in (".srt", ".ass", ".ssa", ".sub"):
+                        # outfile.write(f"```{file.suffix[1:]}\n")
+                        outfile.write(content)
+                        outfile.write("\n\n")
+                    else:
+                        outfile.write(content)
+                        outfile.write("\n\n")
 
                     print(f"  Added: {file.name} as {episode}")
                 except Exception as e:
@@ -1,15 +1,18 @@
 import os
 import re
 import random
+import sys
 from pathlib import Path
-import subprocess
 import yaml
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from subtitles.epub_writer import build_epub, build_epubs
 
-def generate_metadata(title, file_type="subtitles"):
-    """Generate YAML metadata block with random cover image"""
+
+def metadata_fields(title, file_type="subtitles"):
+    """Book metadata with a random cover image"""
     random_num = random.randint(1, 214)
-    metadata = {
+    return {
         "title": [{"type": "main", "text": title}, {"type": "subtitle", "text": file_type}],
         "creator": [
             {"role": "author", "text": "Zaya Barrini"},
@@ -21,6 +24,11 @@ def generate_metadata(title, file_type="subtitles"):
         "rights": "© 2024 Zaya Barrini, CC BY-NC",
         "ibooks": {"version": "1.3.4"},
     }
+
+
+def generate_metadata(title, file_type="subtitles", metadata=None):
+    """Generate YAML metadata block with random cover image"""
+    metadata = metadata or metadata_fields(title, file_type)
     return yaml.dump(metadata, sort_keys=False, allow_unicode=True)
 
 
@@ -46,8 +54,13 @@ def clean_markdown_content(content):
     return content
 
 
-def process_folder(folder_path):
-    """Process all text and markdown files in a folder, merging them into one file"""
+def process_folder(folder_path, build_epub_now=True):
+    """
+    Process all text and markdown files in a folder, merging them into one file.
+
+    The EPUB is rendered in-process from the merged Markdown. With
+    build_epub_now=False the EPUB job is returned for build_epubs instead.
+    """
     # Get all text and markdown files
     text_files = list(folder_path.glob("*.{srt,txt}"))
     md_files = list(folder_path.glob("*.md"))
@@ -58,75 +71,75 @@ def process_folder(folder_path):
 
     # Create output filename
     output_file = folder_path / f"{folder_path.name}.md"
-    metadata = generate_metadata(folder_path.name)
+    metadata = metadata_fields(folder_path.name)
+    parts = []
 
-    # Write to file
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write(f"---\n{metadata}---\n\n")
+    # Process markdown files first
+    for file in sorted(md_files):
+        # Add section header with filename (without extension)
+        section_title = file.stem.replace("_", " ").title()
+        parts.append(f"# {section_title}\n\n")
 
-        # Process markdown files first
-        for file in sorted(md_files):
-            # Add section header with filename (without extension)
-            section_title = file.stem.replace("_", " ").title()
-            f.write(f"# {section_title}\n\n")
+        # Add file content
+        try:
+            content = file.read_text(encoding="utf-8")
+            content = clean_markdown_content(content)
 
-            # Add file content
+            parts.append(f"{content}\n\n")
+        except UnicodeDecodeError:
             try:
-                content = file.read_text(encoding="utf-8")
-                content = clean_markdown_content(content)
-
-                f.write(f"{content}\n\n")
-            except UnicodeDecodeError:
-                try:
-                    content = file.read_text(encoding="latin-1")
-                    f.write(f"{content}\n\n")
-                except Exception as e:
-                    print(f"Error reading {file}: {e}")
-
-        # Process other text files
-        for file in sorted(text_files):
-            # Add section header with filename (without extension)
-            section_title = file.stem.replace("_", " ").title()
-            f.write(f"# {section_title}\n\n")
-
-            # Add file content
+                content = file.read_text(encoding="latin-1")
+                parts.append(f"{content}\n\n")
+            except Exception as e:
+                print(f"Error reading {file}: {e}")
+
+    # Process other text files
+    for file in sorted(text_files):
+        # Add section header with filename (without extension)
+        section_title = file.stem.replace("_", " ").title()
+        parts.append(f"# {section_title}\n\n")
+
+        # Add file content
+        try:
+            content = file.read_text(encoding="utf-8")
+            content = clean_markdown_content(content)
+
+            parts.append(f"```text\n{content}\n```\n\n")
+        except UnicodeDecodeError:
             try:
-                content = file.read_text(encoding="utf-8")
-                content = clean_markdown_content(content)
-
-                f.write(f"```text\n{content}\n```\n\n")
-            except UnicodeDecodeError:
-                try:
-                    content = file.read_text(encoding="latin-1")
-                    f.write(f"```text\n{content}\n```\n\n")
-                except Exception as e:
-                    print(f"Error reading {file}: {e}")
-
-        css_path = "/home/zaya/Downloads/Zayas/ZayasTransliteration/web/static/md-table.css"
-        epub_filename = folder_path / f"{folder_path.name}.epub"
-
-        pandoc_cmd = [
-            "pandoc",
-            "-s",
-            output_file,
-            "-o",
-            epub_filename,
-            "--toc",
-            "--toc-depth=2",
-            f"--css={css_path}",
-        ]
+                content = file.read_text(encoding="latin-1")
+                parts.append(f"```text\n{content}\n```\n\n")
+            except Exception as e:
+                print(f"Error reading {file}: {e}")
 
-        try:
-            subprocess.run(pandoc_cmd, check=True)
-            print(f"Successfully created {epub_filename}")
-        except subprocess.CalledProcessError as e:
-            print(f"Error converting to EPUB: {e}")
+    markdown_text = "".join(parts)
 
+    # Write to file
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write(f"---\n{generate_metadata(folder_path.name, metadata=metadata)}---\n\n")
+        f.write(markdown_text)
     print(f"Created: {output_file}")
 
+    css_path = "/home/zaya/Downloads/Zayas/ZayasTransliteration/web/static/md-table.css"
+    job = {
+        "output_path": str(folder_path / f"{folder_path.name}.epub"),
+        "markdown_text": markdown_text,
+        "title": folder_path.name,
+        "subtitle": metadata["title"][1]["text"],
+        "css_path": css_path,
+        "cover_image": metadata["cover-image"],
+        "publisher": metadata["publisher"],
+    }
+    if not build_epub_now:
+        return job
+
+    epub_filename = build_epub(job)
+    print(f"Successfully created {epub_filename}")
+    return epub_filename
 
-def process_all_folders(root_dir):
-    """Process all subfolders in the root directory"""
+
+def process_all_folders(root_dir, max_workers=1):
+    """Process all subfolders in the root directory, building their EPUBs in one batch"""
     root_path = Path(root_dir)
     if not root_path.exists():
         print(f"Directory not found: {root_dir}")
@@ -134,10 +147,16 @@ def process_all_folders(root_dir):
 
     print(f"Processing folders in: {root_dir}")
 
+    jobs = []
     for folder in root_path.iterdir():
         if folder.is_dir():
             print(f"\nProcessing: {folder.name}")
-            process_folder(folder)
+            job = process_folder(folder, build_epub_now=False)
+            if job:
+                jobs.append(job)
+
+    for epub_filename in build_epubs(jobs, max_workers):
+        print(f"Successfully created {epub_filename}")
 
     print("\nProcessing complete!")
 
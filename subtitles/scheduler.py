@@ -0,0 +1,96 @@
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+# Translation requests spend their time waiting on the network
+DEFAULT_IO_WORKERS = 8
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+class SubtitleJobScheduler:
+    """
+    Runs I/O-bound stages (translation requests) on a thread pool and CPU-bound
+    stages (jieba, kakasi, pinyin) on a process pool, chained per item so the
+    CPU stage of one file overlaps the I/O stage of the next.
+
+    Limits default to SUBTITLE_IO_WORKERS / SUBTITLE_CPU_WORKERS from the
+    environment, then to DEFAULT_IO_WORKERS / os.cpu_count().
+    Set use_processes=False when the CPU stage cannot be pickled.
+    """
+
+    def __init__(self, io_workers=None, cpu_workers=None, max_pending=None, use_processes=True):
+        self.io_workers = io_workers or _env_int("SUBTITLE_IO_WORKERS", DEFAULT_IO_WORKERS)
+        self.cpu_workers = cpu_workers or _env_int("SUBTITLE_CPU_WORKERS", os.cpu_count() or 1)
+        # Items in flight at once; bounds memory held by finished-but-unconsumed results
+        self.max_pending = max_pending or 2 * (self.io_workers + self.cpu_workers)
+
+        self.io_executor = ThreadPoolExecutor(max_workers=self.io_workers)
+        if use_processes and self.cpu_workers > 1:
+            self.cpu_executor = ProcessPoolExecutor(max_workers=self.cpu_workers)
+        else:
+            self.cpu_executor = ThreadPoolExecutor(max_workers=self.cpu_workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown(cancel_futures=exc_type is not None)
+
+    def shutdown(self, cancel_futures=False):
+        self.io_executor.shutdown(wait=True, cancel_futures=cancel_futures)
+        self.cpu_executor.shutdown(wait=True, cancel_futures=cancel_futures)
+
+    def submit_io(self, fn, *args, **kwargs):
+        return self.io_executor.submit(fn, *args, **kwargs)
+
+    def submit_cpu(self, fn, *args, **kwargs):
+        return self.cpu_executor.submit(fn, *args, **kwargs)
+
+    def submit_chain(self, item, io_stage, cpu_stage):
+        """
+        Schedules io_stage(item) and then cpu_stage(io_result) without blocking.
+
+        Returns:
+            Future resolving to (io_result, cpu_result)
+        """
+        result = Future()
+
+        def on_cpu_done(cpu_future, io_result):
+            try:
+                result.set_result((io_result, cpu_future.result()))
+            except BaseException as e:
+                result.set_exception(e)
+
+        def on_io_done(io_future):
+            try:
+                io_result = io_future.result()
+                cpu_future = self.submit_cpu(cpu_stage, io_result)
+            except BaseException as e:
+                result.set_exception(e)
+                return
+            cpu_future.add_done_callback(lambda f: on_cpu_done(f, io_result))
+
+        self.submit_io(io_stage, item).add_done_callback(on_io_done)
+        return result
+
+    def pipeline(self, items, io_stage, cpu_stage):
+        """
+        Pipelines every item through io_stage then cpu_stage.
+
+        Yields:
+            (item, io_result, cpu_result) in input order, as soon as each is ready
+        """
+        pending = deque()
+        for item in items:
+            pending.append((item, self.submit_chain(item, io_stage, cpu_stage)))
+            if len(pending) >= self.max_pending:
+                done_item, future = pending.popleft()
+                yield (done_item, *future.result())
+
+        while pending:
+            done_item, future = pending.popleft()
+            yield (done_item, *future.result())
@@ -0,0 +1,176 @@
+import codecs
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+try:
+    import chardet
+except ImportError:
+    # Detection falls back to cp1252/latin-1 when chardet is not installed
+    chardet = None
+
+# Only this many leading bytes are handed to chardet when strict UTF-8 fails
+DETECTION_SAMPLE_SIZE = 64 * 1024
+
+# UTF-32 BOMs must be checked before UTF-16 (BOM_UTF32_LE starts with BOM_UTF16_LE)
+_BOM_ENCODINGS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+# Detected encodings kept for files that are not plain UTF-8, least recently used dropped first
+ENCODING_CACHE_SIZE = 1024
+
+# Encoding verdicts keyed by content hash, shared by every reader in the process
+_encoding_cache = OrderedDict()
+_encoding_cache_lock = threading.Lock()
+
+
+def _content_key(raw_data):
+    return hashlib.blake2b(raw_data, digest_size=16).digest()
+
+
+def _detect_from_sample(raw_data, sample_size):
+    """Ask chardet about the first sample_size bytes only"""
+    if chardet is None:
+        return None
+    result = chardet.detect(raw_data[:sample_size])
+    if result["encoding"] and (result["confidence"] or 0) > 0.5:
+        return result["encoding"]
+    return None
+
+
+def _decode_fast(raw_data):
+    """(text, encoding) from a BOM or strict UTF-8, else None"""
+    for bom, encoding in _BOM_ENCODINGS:
+        if raw_data.startswith(bom):
+            try:
+                return raw_data.decode(encoding), encoding
+            except UnicodeDecodeError:
+                break
+
+    try:
+        return raw_data.decode("utf-8"), "utf-8"
+    except UnicodeDecodeError:
+        return None
+
+
+def _decode_detected(raw_data, sample_size):
+    candidates = [_detect_from_sample(raw_data, sample_size), "cp1252"]
+    for encoding in candidates:
+        if not encoding:
+            continue
+        try:
+            return raw_data.decode(encoding), encoding
+        except (UnicodeDecodeError, LookupError):
+            continue
+
+    # latin-1 maps every byte, so this never fails
+    return raw_data.decode("latin-1"), "latin-1"
+
+
+def _decode_cached(raw_data, sample_size):
+    """Slow path: detection, skipped for content whose encoding was already detected"""
+    key = _content_key(raw_data)
+    with _encoding_cache_lock:
+        encoding = _encoding_cache.get(key)
+        if encoding is not None:
+            _encoding_cache.move_to_end(key)
+
+    if encoding is not None:
+        return raw_data.decode(encoding), encoding
+
+    text, encoding = _decode_detected(raw_data, sample_size)
+    with _encoding_cache_lock:
+        _encoding_cache[key] = encoding
+        while len(_encoding_cache) > ENCODING_CACHE_SIZE:
+            _encoding_cache.popitem(last=False)
+    return text, encoding
+
+
+def decode_subtitle_bytes(raw_data, sample_size=DETECTION_SAMPLE_SIZE):
+    """
+    Decodes raw subtitle bytes, trying BOM and strict UTF-8 before any detection.
+
+    Args:
+        raw_data: File contents as bytes
+        sample_size: Number of leading bytes passed to chardet on the slow path
+
+    Returns:
+        Tuple of (decoded text with universal newlines, encoding name)
+    """
+    decoded = _decode_fast(raw_data)
+    if decoded is None:
+        decoded = _decode_cached(raw_data, sample_size)
+    text, encoding = decoded
+
+    if text.startswith("\ufeff"):
+        text = text[1:]
+
+    # Match what open(..., "r") would have produced
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+
+    return text, encoding
+
+
+def read_subtitle_file(file_path, sample_size=DETECTION_SAMPLE_SIZE):
+    """Reads a subtitle file once and returns (text, encoding)"""
+    with open(file_path, "rb") as f:
+        raw_data = f.read()
+    return decode_subtitle_bytes(raw_data, sample_size)
+
+
+def read_subtitle_text(file_path):
+    """Reads a subtitle file once and returns its decoded text"""
+    return read_subtitle_file(file_path)[0]
+
+
+def read_subtitle_lines(file_path):
+    """Drop-in replacement for open(...).readlines() with encoding detection"""
+    return io.StringIO(read_subtitle_text(file_path)).readlines()
+
+
+def detect_stream_encoding(file_path, sample_size=DETECTION_SAMPLE_SIZE):
+    """
+    Encoding of a file judged from its first sample_size bytes only, for files
+    too large to decode in one piece. Same order as decode_subtitle_bytes: BOM,
+    strict UTF-8, chardet, cp1252.
+    """
+    with open(file_path, "rb") as f:
+        sample = f.read(sample_size)
+    for bom, encoding in _BOM_ENCODINGS:
+        if sample.startswith(bom):
+            return encoding
+    try:
+        # final=False: a multi-byte character cut at the end of the sample is fine
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    return _detect_from_sample(sample, sample_size) or "cp1252"
+
+
+def open_subtitle_stream(file_path, sample_size=DETECTION_SAMPLE_SIZE):
+    """
+    Opens a file for reading as text, with the encoding detected from its head.
+
+    Unlike read_subtitle_lines the file is never held in memory; bytes that do
+    not decode further down the file are replaced instead of failing.
+    """
+    encoding = detect_stream_encoding(file_path, sample_size)
+    return open(file_path, "r", encoding=encoding, errors="replace")
+
+
+def detect_encoding(file_path):
+    """Returns the encoding a file would be decoded with (uses the shared cache)"""
+    return read_subtitle_file(file_path)[1]
+
+
+def clear_encoding_cache():
+    with _encoding_cache_lock:
+        _encoding_cache.clear()
@@ -6,29 +6,28 @@ import time
 import zipfile
 from pathlib import Path
 
-import chardet
 import ebooklib
 from bs4 import BeautifulSoup
 from ebooklib import epub
+from lxml import etree
 
+from subtitles.epub_cues import epub_to_srt_contents, format_cue_block
+from subtitles.srt_ingest import read_subtitle_file, read_subtitle_lines, read_subtitle_text
 from transliteration.filter_language_characters import filter_language_characters
 from transliteration.translationFunctions import (
     LANGUAGE_CODE_MAP,
     LANGUAGE_STYLES,
     TARGET_PATTERNS,
+    get_translation_backend,
     transliterate,
 )
 
+XHTML_NAMESPACE = "http://www.w3.org/1999/xhtml"
+
 
 def read_srt(file_path):
     """Read SRT file lines"""
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            return f.readlines()
-    except:
-        # Fallback encoding
-        with open(file_path, "r", encoding="latin-1") as f:
-            return f.readlines()
+    return read_subtitle_lines(file_path)
 
 
 def write_srt(file_path, lines):
@@ -102,20 +101,7 @@ def transliterate_srt(input_file, target_language):
 def merge_subtitle_lines(input_file, output_file=None):
     """Merge subtitle lines and save the modified content with error handling."""
     try:
-        encodings = ["utf-8", "latin-1", "iso-8859-1", "cp1252", "utf-16"]
-        content = None
-
-        for encoding in encodings:
-            try:
-                with open(input_file, "r", encoding=encoding) as f:
-                    content = f.read()
-                break
-            except UnicodeDecodeError:
-                continue
-
-        if content is None:
-            with open(input_file, "rb") as f:
-                content = f.read().decode("utf-8", errors="ignore")
+        content = read_subtitle_text(input_file)
 
         blocks = re.split(r"\n\n+", content.strip())
         processed_blocks = []
@@ -154,40 +140,14 @@ def merge_subtitle_lines(input_file, output_file=None):
 
 
 def detect_encoding(file_path):
-    """Detect file encoding with multiple fallbacks"""
-    try:
-        with open(file_path, "rb") as f:
-            raw_data = f.read()
-            result = chardet.detect(raw_data)
-            encoding = result["encoding"] if result["confidence"] > 0.7 else "utf-8"
-
-        with open(file_path, "r", encoding=encoding) as f:
-            f.read(1024)
-
-        return encoding
-    except (UnicodeDecodeError, LookupError):
-        for enc in ["utf-8-sig", "latin-1", "windows-1252", "cp1252", "iso-8859-1"]:
-            try:
-                with open(file_path, "r", encoding=enc) as f:
-                    f.read(1024)
-                return enc
-            except (UnicodeDecodeError, LookupError):
-                continue
-
-    return "utf-8"
+    """Detect file encoding (strict UTF-8/BOM first, sampled chardet fallback)"""
+    return read_subtitle_file(file_path)[1]
 
 
 def read_srt_with_encoding(srt_file):
     """Read SRT file with automatic encoding detection and better error handling"""
     try:
-        encoding = detect_encoding(srt_file)
-
-        with open(srt_file, "r", encoding=encoding) as f:
-            content = f.read()
-
-        # Clean BOM if present
-        if content.startswith("\ufeff"):
-            content = content[1:]
+        content = read_subtitle_text(srt_file)
 
         # Validate content
         if not content or len(content.strip()) < 10:
@@ -197,14 +157,7 @@ def read_srt_with_encoding(srt_file):
 
     except Exception as e:
         print(f"Error reading {srt_file}: {e}")
-        # Final fallback - read as binary
-        try:
-            with open(srt_file, "rb") as f:
-                content = f.read().decode("utf-8", errors="replace")
-            return content
-        except Exception as e2:
-            print(f"Complete failure reading {srt_file}: {e2}")
-            return ""
+        return ""
 
 
 def process_srt_files_with_merging(srt_files):
@@ -257,14 +210,7 @@ def format_srt_for_epub(srt_content, filename):
                 ):
                     continue
 
-                formatted_block = f"""
-                <div class="subtitle-block" data-original-index="{i}">
-                    <p class="subtitle-number">{number}</p>
-                    <p class="subtitle-time">{timestamp}</p>
-                    <p class="subtitle-text">{text}</p>
-                </div>
-                """
-                formatted_blocks.append(formatted_block)
+                formatted_blocks.append(format_cue_block(number, timestamp, text))
                 valid_blocks += 1
 
             except Exception as e:
@@ -309,6 +255,7 @@ def srt_to_epub(srt_files, output_epub):
                 chapter_title = chapter_title[:-7]
 
             formatted_content = format_srt_for_epub(srt_content, chapter_title)
+            cue_count = formatted_content.count('class="subtitle-block"')
 
             # Check if we have any valid content after formatting
             if not formatted_content or len(formatted_content.strip()) < 10:
@@ -330,14 +277,15 @@ def srt_to_epub(srt_files, output_epub):
 <body>
     <div class="chapter">
         <h1>{chapter_title}</h1>
-        <div class="srt-file" data-filename="{os.path.basename(srt_file).replace('.merged', '')}">
+        <div class="srt-file" data-filename="{os.path.basename(srt_file).replace('.merged', '')}" data-cue-count="{cue_count}">
             {formatted_content}
         </div>
     </div>
 </body>
 </html>"""
 
-            chapter.content = full_content
+            # Bytes: lxml rejects str input that carries an encoding declaration
+            chapter.content = full_content.encode("utf-8")
             book.add_item(chapter)
             book.toc.append(epub.Link(f"{chapter_title}.xhtml", chapter_title, chapter_title))
             spine.append(chapter)
@@ -491,6 +439,33 @@ def process_zip_to_epub(zip_path, output_epub):
 
 
 def epub_to_srts(epub_path, output_zip):
+    """
+    Convert translated EPUB back to SRT files.
+
+    Reads the cue index srt_to_epub embeds straight from the zip; EPUBs without
+    one go through the slower BeautifulSoup extraction.
+
+    Returns:
+        Names of the SRT files written to output_zip
+    """
+    try:
+        srt_contents = epub_to_srt_contents(epub_path)
+    except Exception as e:
+        print(f"Cue index extraction failed ({e}), falling back to full parse")
+        srt_contents = {}
+
+    if not srt_contents:
+        return epub_to_srts_with_soup(epub_path, output_zip)
+
+    with zipfile.ZipFile(output_zip, "w", zipfile.ZIP_DEFLATED) as zipf:
+        for filename, content in srt_contents.items():
+            zipf.writestr(filename, content)
+
+    print(f"Created output zip with {len(srt_contents)} SRT files: {output_zip}")
+    return list(srt_contents)
+
+
+def epub_to_srts_with_soup(epub_path, output_zip):
     """Convert translated EPUB back to SRT files using the precise structure"""
     extract_dir = "epub_extract"
     os.makedirs(extract_dir, exist_ok=True)
@@ -543,6 +518,16 @@ def epub_to_srts(epub_path, output_zip):
                             try:
                                 # Extract number, timestamp, and text
                                 number_elems = block.find_all("p", class_="subtitle-number")
+                                if len(number_elems) < 3:
+                                    # Layout written by srt_to_epub (e.g. translated offline)
+                                    number_elems = block.find_all(
+                                        "p",
+                                        class_=[
+                                            "subtitle-number",
+                                            "subtitle-time",
+                                            "subtitle-text",
+                                        ],
+                                    )
                                 if len(number_elems) < 3:
                                     continue
 
@@ -556,8 +541,11 @@ def epub_to_srts(epub_path, output_zip):
                                 original_text = number_elems[2].get_text().strip()
 
                                 # Chinese translation is in element with lang="zh"
+                                # (any lang-tagged element for other target languages)
                                 chinese_text = ""
-                                zh_elements = block.find_all(attrs={"lang": "zh"})
+                                zh_elements = block.find_all(
+                                    attrs={"lang": "zh"}
+                                ) or block.find_all(attrs={"lang": True})
                                 if zh_elements:
                                     chinese_text = zh_elements[0].get_text().strip()
 
@@ -782,6 +770,104 @@ def debug_epub_structure(extract_dir):
                     print(f"Error examining {file}: {e}")
 
 
+class CalibreTranslationStep:
+    """
+    The manual translation step: a person translates the generated EPUB in Calibre.
+
+    Not a TranslationBackend, since it cannot translate single texts;
+    complete_workflow checks `interactive` and calls wait_for_translated_epub.
+    """
+
+    name = "calibre"
+    interactive = True
+
+    def wait_for_translated_epub(self, epub_path, translated_epub_path):
+        print("\nNow please:")
+        print("1. Open Calibre and load the EPUB")
+        print("2. Use Calibre's translation feature to translate the EPUB")
+        print(f"3. Save the translated EPUB as: {translated_epub_path}")
+        print("=" * 60)
+
+        input("Press Enter after you've completed the translation in Calibre...")
+
+        if not os.path.exists(translated_epub_path):
+            print(f"Translated EPUB not found at: {translated_epub_path}")
+            translated_epub_path = (
+                input("Enter the full path to the translated EPUB file: ").strip().strip('"')
+            )
+        return translated_epub_path
+
+
+def translate_with_backend(backend, texts, target_language):
+    """
+    backend.translate_batch(texts), keeping a text's original wording when the
+    backend has no answer for it; a failed batch is retried text by text.
+    """
+    try:
+        translated = backend.translate_batch(texts, target_language)
+    except Exception as e:
+        print(f"Error in batch translation, retrying text by text: {e}")
+        translated = []
+        for text in texts:
+            try:
+                translated.append(backend.translate(text, target_language))
+            except Exception as e:
+                print(f"Error translating text '{text[:50]}...': {e}")
+                translated.append(None)
+    return [result or text for text, result in zip(texts, translated)]
+
+
+def translate_epub_with_backend(epub_path, translated_epub_path, target_language, backend=None):
+    """
+    Translates every subtitle text of an EPUB made by srt_to_epub, unattended.
+
+    Each translation is added after the original as <p lang="..">, the same way
+    Calibre's translation does, so epub_to_srts reads both outputs alike.
+    backend (default: the process-wide one) is called directly; the process-wide
+    backend and the translate_text cache are left alone.
+
+    Returns:
+        Path to the translated EPUB
+    """
+    backend = backend or get_translation_backend()
+
+    lang_code = LANGUAGE_CODE_MAP.get(target_language, target_language)
+    lang_attr = lang_code.split("-")[0]
+    namespaces = {"x": XHTML_NAMESPACE}
+
+    with zipfile.ZipFile(epub_path, "r") as zin, zipfile.ZipFile(
+        translated_epub_path, "w", zipfile.ZIP_DEFLATED
+    ) as zout:
+        for item in zin.infolist():
+            data = zin.read(item.filename)
+            name = os.path.basename(item.filename)
+
+            if name.endswith(".xhtml") and not name.startswith("nav."):
+                root = etree.fromstring(data)
+                paragraphs = root.xpath("//x:p[@class='subtitle-text']", namespaces=namespaces)
+                texts = ["".join(p.itertext()).strip() for p in paragraphs]
+                unique_texts = list(dict.fromkeys(texts))
+                translated_texts = translate_with_backend(backend, unique_texts, target_language)
+                translations = dict(zip(unique_texts, translated_texts))
+
+                for p, text in zip(paragraphs, texts):
+                    translated = etree.Element(f"{{{XHTML_NAMESPACE}}}p")
+                    translated.set("class", "subtitle-text")
+                    translated.set("lang", lang_attr)
+                    translated.text = translations[text]
+                    translated.tail = p.tail
+                    p.addnext(translated)
+
+                data = etree.tostring(root, xml_declaration=True, encoding="utf-8")
+
+            # mimetype must stay first and uncompressed
+            compress = zipfile.ZIP_STORED if name == "mimetype" else zipfile.ZIP_DEFLATED
+            zout.writestr(item, data, compress_type=compress)
+
+    print(f"Translated EPUB with {backend.name} backend: {translated_epub_path}")
+    return translated_epub_path
+
+
 def transliterate_srt_files(srt_files, target_language):
     """Apply transliteration to all SRT files"""
     transliterated_files = []
@@ -798,7 +884,17 @@ def transliterate_srt_files(srt_files, target_language):
     return transliterated_files
 
 
-def complete_workflow(input_zip_path, target_languages=["zh-ch"]):
+def complete_workflow(input_zip_path, target_languages=["zh-ch"], backend=None):
+    """
+    SRT zip -> EPUB -> translated EPUB -> SRT zip -> transliterated SRT zip.
+
+    backend decides how the EPUB gets translated: the default
+    CalibreTranslationStep waits for a person to translate it in Calibre, a
+    TranslationBackend (e.g. OfflineDictionaryBackend) translates it in-process
+    so the whole pipeline runs unattended.
+    """
+    backend = backend or CalibreTranslationStep()
+    timings = {}
     try:
         # Get the directory of the input ZIP file
         zip_dir = os.path.dirname(os.path.abspath(input_zip_path))
@@ -816,44 +912,45 @@ def complete_workflow(input_zip_path, target_languages=["zh-ch"]):
         print(f"Expected translated EPUB: {translated_epub_path}")
 
         # Step 1: Convert ZIP of SRTs to EPUB
+        step_start = time.time()
         process_zip_to_epub(input_zip_path, epub_path)
+        timings["srt_to_epub"] = time.time() - step_start
 
         print("\n" + "=" * 60)
         print("STEP 1 COMPLETE: SRTs merged into EPUB")
         print("=" * 60)
         print(f"EPUB created at: {epub_path}")
-        print("\nNow please:")
-        print("1. Open Calibre and load the EPUB")
-        print("2. Use Calibre's translation feature to translate to Chinese")
-        print(f"3. Save the translated EPUB as: {translated_epub_path}")
-        print("=" * 60)
-
-        input("Press Enter after you've completed the translation in Calibre...")
 
-        # Step 2: Check if translated EPUB exists
-        if not os.path.exists(translated_epub_path):
-            print(f"Translated EPUB not found at: {translated_epub_path}")
-            translated_epub_path = (
-                input("Enter the full path to the translated EPUB file: ").strip().strip('"')
+        # Step 2: Translate the EPUB (by hand in Calibre, or with a backend)
+        step_start = time.time()
+        if backend.interactive:
+            translated_epub_path = backend.wait_for_translated_epub(epub_path, translated_epub_path)
+        else:
+            translate_epub_with_backend(
+                epub_path, translated_epub_path, target_languages[0], backend
             )
+        timings["translate_epub"] = time.time() - step_start
 
         if not os.path.exists(translated_epub_path):
             raise FileNotFoundError(f"Translated EPUB not found: {translated_epub_path}")
 
         # Step 3: Debug the Calibre structure first
-        print("Analyzing Calibre's EPUB structure...")
-        debug_extract_dir = "debug_extract"
-        os.makedirs(debug_extract_dir, exist_ok=True)
-        try:
-            with zipfile.ZipFile(translated_epub_path, "r") as zip_ref:
-                zip_ref.extractall(debug_extract_dir)
-            debug_calibre_structure(debug_extract_dir)
-        finally:
-            shutil.rmtree(debug_extract_dir, ignore_errors=True)
+        if backend.interactive:
+            print("Analyzing Calibre's EPUB structure...")
+            debug_extract_dir = "debug_extract"
+            os.makedirs(debug_extract_dir, exist_ok=True)
+            try:
+                with zipfile.ZipFile(translated_epub_path, "r") as zip_ref:
+                    zip_ref.extractall(debug_extract_dir)
+                debug_calibre_structure(debug_extract_dir)
+            finally:
+                shutil.rmtree(debug_extract_dir, ignore_errors=True)
 
         # Step 4: Convert translated EPUB back to SRTs
         print("Converting translated EPUB back to SRT files...")
+        step_start = time.time()
         srt_files = epub_to_srts(translated_epub_path, output_zip_path)
+        timings["epub_to_srts"] = time.time() - step_start
 
         if not srt_files:
             print("Warning: No SRT files were extracted from the translated EPUB")
@@ -862,6 +959,7 @@ def complete_workflow(input_zip_path, target_languages=["zh-ch"]):
         if srt_files:
             # Step 4: Apply transliteration to all SRT files
             print("Applying transliteration to SRT files...")
+            step_start = time.time()
             transliterated_files = []
 
             # Extract SRT files for transliteration
@@ -885,18 +983,24 @@ def complete_workflow(input_zip_path, target_languages=["zh-ch"]):
                         transliterated_file = transliterate_srt(srt_file, target_lang)
                         transliterated_files.append(transliterated_file)
 
+                # Step 5: Create final zip before the temp dir goes away
+                with zipfile.ZipFile(final_zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
+                    for trans_file in transliterated_files:
+                        zipf.write(trans_file, os.path.basename(trans_file))
+
             finally:
                 shutil.rmtree(transliterate_dir, ignore_errors=True)
 
-            # Step 5: Create final zip with transliterated files
-            with zipfile.ZipFile(final_zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-                for trans_file in transliterated_files:
-                    zipf.write(trans_file, os.path.basename(trans_file))
+            timings["transliterate"] = time.time() - step_start
 
             print(f"\nWorkflow complete!")
             print(f"Translated SRTs: {output_zip_path}")
             print(f"Transliterated SRTs: {final_zip_path}")
 
+        for step, seconds in timings.items():
+            print(f"  {step}: {seconds:.2f}s")
+        return timings
+
     except Exception as e:
         print(f"Error in workflow: {e}")
         import traceback
@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+from subtitles.aligned_multilingual import (
+    align_tracks,
+    assign_by_dtw,
+    build_aligned_outputs,
+    estimate_offset,
+    process_aligned_zip,
+    track_language,
+)
+from subtitles.timeline import Timeline
+
+
+def make_track(lang, count=60, factor=1.0, offset_ms=0):
+    cues = [(i * 3000 + 500, i * 3000 + 2300, f"{lang} {i}") for i in range(count)]
+    return Timeline.from_cues(cues).retime(factor, offset_ms)
+
+
+class TestAlignedMultilingual(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def assertAligned(self, merged):
+        for texts in merged.texts:
+            self.assertEqual(len({text.split(" ")[1] for text in texts}), 1, texts)
+
+    def test_track_language(self):
+        self.assertEqual(track_language("show/Episode01-de.srt"), ("Episode01", "de"))
+        self.assertEqual(track_language("Episode01.zh-ch.srt"), ("Episode01", "zh-ch"))
+        self.assertIsNone(track_language("Episode01.srt"))
+
+    def test_offset_larger_than_cue_gap(self):
+        anchor, shifted = make_track("en"), make_track("de", offset_ms=4200)
+        self.assertEqual(estimate_offset(anchor, shifted), 4200)
+
+        languages, merged = align_tracks({"en": anchor, "de": shifted})
+        self.assertEqual((languages, len(merged)), (["en", "de"], 60))
+        self.assertAligned(merged)
+
+    def test_unmatched_cue_keeps_the_corrected_timing(self):
+        # Irregular gaps, so the offset cannot be mistaken for a multiple of the cue spacing
+        cues, start = [], 500
+        for i in range(60):
+            cues.append((start, start + 1800, i))
+            start += 2600 + (i * 7919) % 2300
+        anchor = Timeline.from_cues([(s, e, f"en {i}") for s, e, i in cues if i != 30])
+        shifted = Timeline.from_cues([(s + 4200, e + 4200, f"de {i}") for s, e, i in cues])
+
+        _, merged = align_tracks({"en": anchor, "de": shifted})
+        self.assertEqual(len(merged), 60)
+        # The German line without an English counterpart sits where its dialogue is
+        extra = merged.texts.index(("", "de 30"))
+        start, end, _ = cues[30]
+        self.assertEqual((merged.starts[extra], merged.ends[extra]), (start, end))
+
+    def test_frame_rate_drift_uses_dtw(self):
+        tracks = {
+            "en": make_track("en"),
+            "fr": make_track("fr", factor=25 / 23.976, offset_ms=300),
+            "es": make_track("es", offset_ms=-120),
+        }
+        languages, merged = align_tracks(tracks, anchor_language="es")
+        self.assertEqual(languages, ["es", "en", "fr"])
+        self.assertEqual(len(merged), 60)
+        self.assertAligned(merged)
+
+    def test_very_unequal_track_lengths(self):
+        for n, m in [(2000, 3), (400, 2), (2000, 1), (3, 400)]:
+            assignment = assign_by_dtw(make_track("en", n), make_track("de", m))
+            self.assertEqual(len(assignment), m)
+            self.assertTrue(all(0 <= index < n for index in assignment), (n, m))
+            self.assertEqual(assignment, sorted(assignment))
+
+        # A stub track of two cues no longer aborts the episode
+        languages, merged = align_tracks({"en": make_track("en", 400), "de": make_track("de", 2)})
+        self.assertEqual(len(merged), 400)
+
+    def test_outputs_and_zip(self):
+        tracks = {"en": make_track("en", 3), "ru": make_track("ru", 3)}
+        tracks["ru"].texts = ["Привет", "Да", "Нет"]
+        outputs = dict(build_aligned_outputs("Ep", tracks))
+        self.assertEqual(sorted(outputs), ["Ep_en.srt", "Ep_en_ru.srt", "Ep_ru.srt"])
+        self.assertTrue(
+            outputs["Ep_en_ru.srt"].startswith(
+                "1\n00:00:00,500 --> 00:00:02,300\nen 0\nПривет\nPrivet\n\n2\n"
+            )
+        )
+
+        zip_path = os.path.join(self.test_dir, "show.zip")
+        with zipfile.ZipFile(zip_path, "w") as zf:
+            zf.writestr("Ep-en.srt", tracks["en"].to_srt())
+            zf.writestr("Ep-ru.srt", tracks["ru"].to_srt())
+            zf.writestr("notes.txt", "ignored")
+        with zipfile.ZipFile(process_aligned_zip(zip_path, enable_transliteration=False)) as zf:
+            self.assertIn("Ep_en_ru.srt", zf.namelist())
+            self.assertIn("en 2\nНет\n", zf.read("Ep_en_ru.srt").decode("utf-8"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+from subtitles.epub_cues import epub_to_srt_contents, read_epub_cues
+from subtitles.sub2epub2sub import epub_to_srts, srt_to_epub, translate_epub_with_backend
+from transliteration.translation_backends import TranslationBackend
+from transliteration.translationFunctions import get_translation_backend
+
+SAMPLE_SRT = (
+    "1\n00:00:01,000 --> 00:00:02,000\nCome in.\n\n"
+    "2\n00:00:03,000 --> 00:00:04,500\n<i>Tom & Jerry</i>\n\n"
+    "3\n00:00:05,000 --> 00:00:06,000\nThank you.\n"
+)
+
+CALIBRE_SPLIT = """<?xml version='1.0' encoding='utf-8'?>
+<html xmlns="http://www.w3.org/1999/xhtml"><head><title>movie.srt</title></head>
+<body><div class="srt-file" data-filename="movie.srt">
+<div class="srt-file" data-number="{number}" data-timestamp="{timestamp}">
+<p class="subtitle-number">{timestamp}</p>
+<p class="subtitle-number">{text}</p>
+<p class="subtitle-number" lang="zh">{translation}</p></div>
+</div></body></html>"""
+
+
+class TableBackend(TranslationBackend):
+    name = "table"
+
+    def translate(self, text, target_language):
+        return {"Come in.": "进来。", "Thank you.": "谢谢。"}.get(text)
+
+
+class TestEpubCues(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_srt_to_epub_round_trip(self):
+        srt_path = os.path.join(self.test_dir, "movie.srt")
+        with open(srt_path, "w", encoding="utf-8") as f:
+            f.write(SAMPLE_SRT)
+        epub_path = os.path.join(self.test_dir, "movie.epub")
+        srt_to_epub([srt_path], epub_path)
+
+        cues = read_epub_cues(epub_path)["movie.srt"]
+        self.assertEqual([cue[0] for cue in cues], ["1", "2", "3"])
+        self.assertEqual(cues[1][1], "00:00:03,000 --> 00:00:04,500")
+        self.assertEqual(cues[1][2], "Tom & Jerry")
+        self.assertEqual(cues[1][3], "")
+
+        output_zip = os.path.join(self.test_dir, "out.zip")
+        self.assertEqual(epub_to_srts(epub_path, output_zip), ["movie.srt"])
+        with zipfile.ZipFile(output_zip) as zipf:
+            self.assertIn(
+                "3\n00:00:05,000 --> 00:00:06,000\nThank you.\n", zipf.read("movie.srt").decode()
+            )
+
+    def test_translate_epub_with_backend(self):
+        srt_path = os.path.join(self.test_dir, "movie.srt")
+        with open(srt_path, "w", encoding="utf-8") as f:
+            f.write(SAMPLE_SRT)
+        epub_path = os.path.join(self.test_dir, "movie.epub")
+        srt_to_epub([srt_path], epub_path)
+
+        process_backend = get_translation_backend()
+        translated_path = os.path.join(self.test_dir, "movie-zh.epub")
+        translate_epub_with_backend(epub_path, translated_path, "zh-ch", TableBackend())
+        # The backend is used for this EPUB only, never installed process-wide
+        self.assertIs(get_translation_backend(), process_backend)
+
+        cues = read_epub_cues(translated_path)["movie.srt"]
+        self.assertEqual([cue[3] for cue in cues], ["进来。", "Tom & Jerry", "谢谢。"])
+
+    def test_calibre_split_chapters_are_merged(self):
+        epub_path = os.path.join(self.test_dir, "translated.epub")
+        parts = [
+            ("2", "00:00:03,000 --&gt; 00:00:04,000", "Thank you.", "谢谢。"),
+            ("1", "00:00:01,000 --&gt; 00:00:02,000", "Come in.", "进来。"),
+        ]
+        with zipfile.ZipFile(epub_path, "w") as zipf:
+            zipf.writestr("mimetype", "application/epub+zip")
+            for index, (number, timestamp, text, translation) in enumerate(parts):
+                zipf.writestr(
+                    f"EPUB/movie.srt_split_00{index}.xhtml",
+                    CALIBRE_SPLIT.format(
+                        number=number, timestamp=timestamp, text=text, translation=translation
+                    ),
+                )
+
+        contents = epub_to_srt_contents(epub_path)
+        self.assertEqual(
+            contents["movie.srt"],
+            "1\n00:00:01,000 --> 00:00:02,000\nCome in.\n进来。\n\n"
+            "2\n00:00:03,000 --> 00:00:04,000\nThank you.\n谢谢。\n",
+        )
+
+    def test_epub_without_cue_index(self):
+        epub_path = os.path.join(self.test_dir, "old.epub")
+        with zipfile.ZipFile(epub_path, "w") as zipf:
+            zipf.writestr("EPUB/movie.xhtml", "<html><body><p>1</p></body></html>")
+        self.assertEqual(epub_to_srt_contents(epub_path), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
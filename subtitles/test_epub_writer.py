@@ -0,0 +1,76 @@
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+from subtitles.epub_writer import (
+    blocks_to_chapters,
+    build_epubs,
+    markdown_to_chapters,
+    word_list_blocks,
+)
+
+
+class TestEpubWriter(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_markdown_chapters_and_toc(self):
+        chapters = markdown_to_chapters(
+            "Intro\n\n# One\n\n## Part *a*\n\n<ruby>字<rt>zì</rt></ruby>\n\n# One\n\n|a|\n|-|\n|1|\n",
+            default_title="Book",
+        )
+        self.assertEqual([title for title, _, _ in chapters], ["Book", "One", "One"])
+        self.assertEqual(chapters[1][2], [("Part a", "part-a")])
+        self.assertIn("<ruby>字<rt>zì</rt></ruby>", chapters[1][1])
+        self.assertIn('<h1 id="one-2">', chapters[2][1])
+        self.assertIn("<td>1</td>", chapters[2][1])
+
+    def test_word_list_blocks(self):
+        items = [("word", str(i)) for i in range(3)]
+        items += [("line", "## Food"), ("word", "bread"), ("line", "plain <b>text</b>")]
+        blocks = list(word_list_blocks(items, words_per_paragraph=2))
+        self.assertEqual(
+            blocks,
+            [
+                ("p", "0, 1"),
+                ("p", "2"),
+                ("h2", "Food"),
+                ("p", "bread"),
+                ("p", "plain <b>text</b>"),
+            ],
+        )
+        chapters = blocks_to_chapters([("h1", "A & B")] + blocks, "Words")
+        self.assertEqual(chapters[0][0], "A & B")
+        self.assertIn('<h1 id="a-b">A &amp; B</h1>', chapters[0][1])
+
+    def test_build_epubs(self):
+        jobs = [
+            {
+                "output_path": os.path.join(self.test_dir, "words.epub"),
+                "chapters": blocks_to_chapters([("h1", "Animals"), ("p", "dog")], "Words"),
+                "title": "Words",
+                "css_path": os.path.join(self.test_dir, "missing.css"),
+            },
+            {
+                "output_path": os.path.join(self.test_dir, "notes.epub"),
+                "markdown_text": "# Notes\n\n## First\n\ntext\n",
+                "title": "Notes",
+                "language": "de",
+            },
+        ]
+        paths = build_epubs(jobs)
+        self.assertEqual(paths, [job["output_path"] for job in jobs])
+
+        with zipfile.ZipFile(paths[1]) as epub_zip:
+            self.assertEqual(epub_zip.namelist()[0], "mimetype")
+            self.assertIn('href="ch001.xhtml#first"', epub_zip.read("EPUB/nav.xhtml").decode())
+            self.assertIn("<p>text</p>", epub_zip.read("EPUB/ch001.xhtml").decode())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import time
+import unittest
+
+from subtitles.scheduler import SubtitleJobScheduler
+
+
+def square(value):
+    return value * value
+
+
+def slow_for_small(value):
+    # Earlier items finish last, so results complete out of order
+    time.sleep(0.01 * (5 - value))
+    return value + 1
+
+
+class TestSubtitleJobScheduler(unittest.TestCase):
+    def test_pipeline_keeps_input_order(self):
+        with SubtitleJobScheduler(io_workers=4, cpu_workers=2) as scheduler:
+            results = list(scheduler.pipeline(range(5), slow_for_small, square))
+        self.assertEqual(results, [(i, i + 1, (i + 1) ** 2) for i in range(5)])
+
+    def test_submit_chain(self):
+        with SubtitleJobScheduler(io_workers=1, cpu_workers=1) as scheduler:
+            future = scheduler.submit_chain(3, lambda value: value + 1, square)
+            self.assertEqual(future.result(timeout=5), (4, 16))
+
+    def test_max_pending_bounds_items_in_flight(self):
+        pulled = []
+
+        def items():
+            for i in range(10):
+                pulled.append(i)
+                yield i
+
+        with SubtitleJobScheduler(io_workers=2, cpu_workers=1, max_pending=3) as scheduler:
+            results = scheduler.pipeline(items(), lambda value: value, lambda value: value)
+            self.assertEqual(next(results), (0, 0, 0))
+            self.assertEqual(len(pulled), 3)
+            self.assertEqual(next(results), (1, 1, 1))
+            self.assertEqual(len(pulled), 4)
+            self.assertEqual([item for item, _, _ in results], list(range(2, 10)))
+
+    def test_errors_reach_the_consumer(self):
+        def io_stage(value):
+            if value == 2:
+                raise ValueError("translation failed")
+            return value
+
+        def cpu_stage(value):
+            if value == 3:
+                raise KeyError("transliteration failed")
+            return value
+
+        with SubtitleJobScheduler(io_workers=2, cpu_workers=1) as scheduler:
+            results = scheduler.pipeline(range(5), io_stage, cpu_stage)
+            self.assertEqual([next(results), next(results)], [(0, 0, 0), (1, 1, 1)])
+            with self.assertRaisesRegex(ValueError, "translation failed"):
+                next(results)
+
+            future = scheduler.submit_chain(3, io_stage, cpu_stage)
+            with self.assertRaises(KeyError):
+                future.result(timeout=5)
+
+    def test_failure_shuts_the_executors_down(self):
+        started = []
+
+        def io_stage(value):
+            started.append(value)
+            if value == 0:
+                raise ValueError("translation failed")
+            return value
+
+        with self.assertRaises(ValueError):
+            with SubtitleJobScheduler(io_workers=1, cpu_workers=1, max_pending=4) as scheduler:
+                for _ in scheduler.pipeline(range(8), io_stage, square):
+                    pass
+
+        # Nothing past the first max_pending items was submitted
+        self.assertEqual(started[0], 0)
+        self.assertLessEqual(set(started), {0, 1, 2, 3})
+        for executor in (scheduler.io_executor, scheduler.cpu_executor):
+            with self.assertRaises(RuntimeError):
+                executor.submit(square, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import codecs
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from subtitles import srt_ingest
+from subtitles.srt_ingest import (
+    clear_encoding_cache,
+    decode_subtitle_bytes,
+    read_subtitle_file,
+    read_subtitle_lines,
+)
+
+SAMPLE_SRT = (
+    "1\n00:00:01,000 --> 00:00:02,000\nJá é tarde, Grüße\n\n2\n00:00:03,000 --> 00:00:04,000\n你好\n"
+)
+
+
+class TestSrtIngest(unittest.TestCase):
+    def setUp(self):
+        clear_encoding_cache()
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write_bytes(self, name, data):
+        path = os.path.join(self.test_dir, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_plain_utf8(self):
+        text, encoding = decode_subtitle_bytes(SAMPLE_SRT.encode("utf-8"))
+        self.assertEqual(encoding, "utf-8")
+        self.assertEqual(text, SAMPLE_SRT)
+
+    def test_boms_are_stripped(self):
+        for bom_encoding in ("utf-8-sig", "utf-16", "utf-32"):
+            text, _ = decode_subtitle_bytes(SAMPLE_SRT.encode(bom_encoding))
+            self.assertEqual(text, SAMPLE_SRT, bom_encoding)
+
+        text, encoding = decode_subtitle_bytes(codecs.BOM_UTF8 + b"1\n")
+        self.assertEqual((text, encoding), ("1\n", "utf-8-sig"))
+
+    def test_legacy_single_byte_fallback(self):
+        raw = "1\n00:00:01,000 --> 00:00:02,000\nCafé crème\n".encode("cp1252")
+        text, encoding = decode_subtitle_bytes(raw)
+        self.assertIn("Café crème", text)
+        self.assertNotEqual(encoding, "utf-8")
+
+    def test_crlf_matches_text_mode_readlines(self):
+        path = self.write_bytes("crlf.srt", SAMPLE_SRT.replace("\n", "\r\n").encode("utf-8"))
+        with open(path, "r", encoding="utf-8") as f:
+            expected = f.readlines()
+        self.assertEqual(read_subtitle_lines(path), expected)
+
+    def test_verdict_is_cached_by_content(self):
+        raw = "Ça va?\n".encode("cp1252")
+        first = self.write_bytes("a.srt", raw)
+        second = self.write_bytes("b.srt", raw)
+        self.assertEqual(read_subtitle_file(first), read_subtitle_file(second))
+
+    def test_cache_holds_detected_encodings_only(self):
+        decode_subtitle_bytes(SAMPLE_SRT.encode("utf-8"))
+        decode_subtitle_bytes(SAMPLE_SRT.encode("utf-16"))
+        self.assertEqual(len(srt_ingest._encoding_cache), 0)
+
+        with mock.patch.object(srt_ingest, "ENCODING_CACHE_SIZE", 2):
+            for word in ("Ça", "Où", "Déjà"):
+                decode_subtitle_bytes(f"{word} va?\n".encode("cp1252"))
+            self.assertEqual(len(srt_ingest._encoding_cache), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
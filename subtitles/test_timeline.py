@@ -0,0 +1,75 @@
+import unittest
+
+from subtitles.timeline import (
+    IntervalIndex,
+    Timeline,
+    format_ms,
+    merge_tracks,
+    parse_timestamp_line,
+)
+
+ENGLISH = (
+    "1\n00:00:01,000 --> 00:00:02,500\nCome in.\n\n"
+    "2\n00:00:03,000 --> 00:00:05,000\nThank you.\nPlease sit.\n\n"
+    "7\n00:00:10,000 --> 00:00:11,000\n1984\n"
+)
+GERMAN = (
+    "1\n00:00:01,100 --> 00:00:02,400\nHerein.\n"
+    "2\n00:00:03,100 --> 00:00:04,000\nDanke.\n\n"
+    "3\n00:00:04,000 --> 00:00:05,100\nSetzen Sie sich.\n\n"
+    "4\n00:00:20,000 --> 00:00:21,000\nEnde.\n"
+)
+
+
+class TestTimeline(unittest.TestCase):
+    def test_timestamps(self):
+        self.assertEqual(parse_timestamp_line("01:02:03,045 --> 01:02:04,5"), (3723045, 3724500))
+        self.assertIsNone(parse_timestamp_line("Come in."))
+        self.assertEqual(format_ms(3723045), "01:02:03,045")
+
+    def test_from_srt_and_dense_renumbering(self):
+        timeline = Timeline.from_srt(ENGLISH)
+        self.assertEqual(timeline.starts, [1000, 3000, 10000])
+        self.assertEqual(timeline.texts, ["Come in.", "Thank you.\nPlease sit.", "1984"])
+        self.assertTrue(
+            timeline.to_srt().startswith("1\n00:00:01,000 --> 00:00:02,500\nCome in.\n")
+        )
+        self.assertIn("3\n00:00:10,000 --> 00:00:11,000\n1984\n", timeline.to_srt())
+
+        # Missing blank line: the next cue number is not taken as text
+        self.assertEqual(Timeline.from_srt(GERMAN).texts[0], "Herein.")
+
+    def test_interval_index(self):
+        index = IntervalIndex([0, 100, 150, 400], [300, 200, 160, 500])
+        self.assertEqual(index.overlapping(155, 170), [0, 1, 2])
+        self.assertEqual(index.overlapping(300, 400), [])
+        self.assertEqual(index.best_overlap(120, 220), 0)
+        self.assertEqual(index.best_overlap(350, 450), 3)
+
+    def test_shift_retime_and_split(self):
+        timeline = Timeline.from_srt(ENGLISH)
+        self.assertEqual(timeline.shift(-1500).starts, [0, 1500, 8500])
+        self.assertEqual(timeline.retime(factor=2.0).ends, [5000, 10000, 22000])
+
+        split = Timeline([0], [8000], ["First sentence here. Second one there."]).split_long_cues(
+            max_duration_ms=4000
+        )
+        self.assertEqual(split.texts, ["First sentence here.", "Second one there."])
+        self.assertEqual((split.starts, split.ends[-1]), ([0, split.ends[0]], 8000))
+
+    def test_merge_tracks_by_overlap(self):
+        merged = merge_tracks([Timeline.from_srt(ENGLISH), Timeline.from_srt(GERMAN)])
+        self.assertEqual(
+            merged.texts,
+            [
+                ("Come in.", "Herein."),
+                ("Thank you.\nPlease sit.", "Danke.\nSetzen Sie sich."),
+                ("1984", ""),
+                ("", "Ende."),
+            ],
+        )
+        self.assertEqual(merged.starts[-1], 20000)
+
+
+if __name__ == "__main__":
+    unittest.main()
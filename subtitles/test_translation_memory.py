@@ -0,0 +1,95 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from subtitles.translation_memory import (
+    TranslationMemory,
+    memory_batch_translate,
+    normalize_memory_text,
+)
+
+
+class TestTranslationMemory(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_normalize_drops_markup_punctuation_and_case(self):
+        self.assertEqual(normalize_memory_text("<i>Come  in...</i>"), "come in")
+        self.assertEqual(normalize_memory_text("{\\an8}WAIT!"), "wait !")
+        self.assertEqual(normalize_memory_text("你好！"), "你好 !")
+        self.assertEqual(normalize_memory_text("¿De verdad...?!"), "de verdad ?")
+
+    def test_questions_and_statements_are_kept_apart(self):
+        memory = TranslationMemory()
+        memory.add("You're leaving.", "你要走了。", "zh-ch")
+        memory.add("You're leaving?", "你要走了？", "zh-ch")
+
+        self.assertEqual(len(memory), 2)
+        self.assertEqual(memory.lookup("<i>you're leaving</i>", "zh-ch").target, "你要走了。")
+        self.assertEqual(memory.lookup("You're leaving...?", "zh-ch").target, "你要走了？")
+        self.assertIsNone(memory.lookup("You're leaving!", "zh-ch"))
+
+    def test_exact_and_fuzzy_lookup(self):
+        memory = TranslationMemory()
+        memory.add("Where is Keita going tonight?", "庆多今晚去哪儿？", "zh-ch")
+        memory.add("Where is the train station?", "火车站在哪里？", "zh-ch")
+
+        self.assertEqual(memory.lookup("where is keita going tonight ?", "zh-ch").score, 1.0)
+
+        # A near-duplicate is only a suggestion: another name, another line
+        self.assertIsNone(memory.lookup("Where is Ryota going tonight?", "zh-ch"))
+        match = memory.lookup("Where is Ryota going tonight?", "zh-ch", fuzzy=True)
+        self.assertEqual(match.target, "庆多今晚去哪儿？")
+        self.assertLess(match.score, 1.0)
+
+        self.assertIsNone(memory.lookup("Nothing like the others", "zh-ch", fuzzy=True))
+        self.assertIsNone(memory.lookup("Where is Keita going tonight?", "ja"))
+        self.assertEqual(memory.stats()["fuzzy_hits"], 1)
+
+    def test_entries_persist(self):
+        db_path = os.path.join(self.test_dir, "memory.db")
+        with TranslationMemory(db_path) as memory:
+            memory.add_many([("Thank you.", "谢谢。"), ("Good night.", "晚安。")], "zh-ch")
+            memory.add("<i>Thank you...</i>", "谢谢你。", "zh-ch")
+
+        with TranslationMemory(db_path) as memory:
+            self.assertEqual(len(memory), 2)
+            self.assertEqual(memory.exact("thank you", "zh-ch").target, "谢谢你。")
+
+    def test_memory_batch_translate_only_sends_misses(self):
+        sent = []
+
+        def batch_translate(texts, lang, failed=None):
+            sent.append(list(texts))
+            return [f"<{text}>" for text in texts]
+
+        memory = TranslationMemory()
+        memory.add("Come in.", "进来。", "zh-ch")
+        translate = memory_batch_translate(memory, batch_translate)
+
+        self.assertEqual(translate(["Come in...", "Sit down."], "zh-ch"), ["进来。", "<Sit down.>"])
+        self.assertEqual(translate(["sit down"], "zh-ch"), ["<Sit down.>"])
+        self.assertEqual(sent, [["Sit down."]])
+        self.assertIsNone(memory.lookup("I do want to sit down.", "zh-ch"))
+
+    def test_failed_and_untranslated_lines_are_not_remembered(self):
+        def batch_translate(texts, lang, failed=None):
+            # "Offline" fails; "OK" comes back as it was sent
+            failed.update(index for index, text in enumerate(texts) if text == "Offline")
+            return [text if text in ("Offline", "OK") else f"<{text}>" for text in texts]
+
+        memory = TranslationMemory()
+        translate = memory_batch_translate(memory, batch_translate)
+        self.assertEqual(
+            translate(["Offline", "OK", "Sit down."], "zh-ch"), ["Offline", "OK", "<Sit down.>"]
+        )
+        self.assertEqual(len(memory), 1)
+        self.assertIsNone(memory.exact("Offline", "zh-ch"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import zipfile
+
+from subtitles.translation_plan import (
+    build_translation_plan,
+    normalize_subtitle_line,
+    translate_lines,
+)
+from subtitles.zip2zipMultilingual import process_zip_of_srts
+
+EPISODE_1 = (
+    "1\n00:00:01,000 --> 00:00:02,000\nGood morning.\n\n"
+    "2\n00:00:03,000 --> 00:00:04,000\nHow are you?\n\n"
+    "3\n00:00:05,000 --> 00:00:06,000\nGood morning.\n"
+)
+# Shares every line but one with EPISODE_1, one of them with stray whitespace
+EPISODE_2 = (
+    "1\n00:00:01,000 --> 00:00:02,000\n  Good   morning. \n\n"
+    "2\n00:00:03,000 --> 00:00:04,000\nSee you.\n\n"
+    "3\n00:00:05,000 --> 00:00:06,000\nHow are you?\n"
+)
+
+
+class CountingTranslator:
+    """batch_translate stand-in that records every line it is asked for"""
+
+    def __init__(self):
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def __call__(self, texts, lang, failed=None):
+        with self.lock:
+            self.requests.extend((text, lang) for text in texts)
+        return [f"[{lang}] {text}" for text in texts]
+
+
+class TestTranslationPlan(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_normalize_subtitle_line(self):
+        self.assertEqual(normalize_subtitle_line("  Good   morning. \n"), "Good morning.")
+
+    def test_plan_report(self):
+        plan = build_translation_plan(
+            {
+                "e1.srt": EPISODE_1.splitlines(keepends=True),
+                "e2.srt": EPISODE_2.splitlines(keepends=True),
+            }
+        )
+        # Cue numbers and timestamps are not text lines
+        self.assertEqual(
+            plan.report(["fr", "es"]),
+            {
+                "files": 2,
+                "text_lines": 6,
+                "unique_lines": 3,
+                "dedup_ratio": 0.5,
+                "translation_requests": 6,
+                "requests_saved": 6,
+            },
+        )
+        # Lines shared across files belong to the first file that used them
+        self.assertEqual(
+            plan.lines_by_file(),
+            {"e1.srt": ["Good morning.", "How are you?"], "e2.srt": ["See you."]},
+        )
+
+        translator = CountingTranslator()
+        maps = translate_lines(["Good morning.", "See you."], ["fr"], translator, batch_size=1)
+        self.assertEqual(
+            maps, {"fr": {"Good morning.": "[fr] Good morning.", "See you.": "[fr] See you."}}
+        )
+
+    def test_zip_translates_each_unique_line_once(self):
+        input_zip = os.path.join(self.test_dir, "series.zip")
+        with zipfile.ZipFile(input_zip, "w") as zipf:
+            zipf.writestr("e1.srt", EPISODE_1)
+            zipf.writestr("e2.srt", EPISODE_2)
+
+        translator = CountingTranslator()
+        combined_zip = process_zip_of_srts(
+            input_zip, ["fr", "es"], io_workers=2, cpu_workers=1, translate_batch=translator
+        )
+
+        unique_lines = ["Good morning.", "How are you?", "See you."]
+        self.assertEqual(
+            sorted(translator.requests),
+            sorted((line, lang) for line in unique_lines for lang in ("fr", "es")),
+        )
+
+        # Rendering finds the translation of a line through its normalized form
+        with zipfile.ZipFile(combined_zip) as zipf:
+            rendered = zipf.read("e2_fr.srt").decode("utf-8")
+        self.assertTrue(
+            rendered.startswith(
+                "1\n00:00:01,000 --> 00:00:02,000\nGood   morning.\n[fr] Good morning.\n\n"
+                "2\n00:00:03,000 --> 00:00:04,000\nSee you.\n[fr] See you.\n\n"
+            )
+        )
+        self.assertIn("[fr] How are you?", rendered)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+from subtitles.benchmark_scheduler import FIXTURE_DIR, StubTranslator
+from subtitles.zip2zipMultilingual import (
+    process_zip_of_srts,
+    render_combination_outputs,
+    select_output_combinations,
+    write_combination_output,
+)
+
+LANGUAGES = ["fr", "zh-ch", "ja"]
+LINES = io.StringIO(
+    "1\n00:00:01,000 --> 00:00:02,000\nGood morning.\n\n"
+    "2\n00:00:03,000 --> 00:00:04,000\nSee you.\n"
+).readlines()
+TRANSLATIONS = {
+    "fr": {"Good morning.": "Bonjour.", "See you.": "À plus."},
+    "zh-ch": {"Good morning.": "早上好。", "See you.": "再见。"},
+    "ja": {"Good morning.": "おはよう。", "See you.": "またね。"},
+}
+TRANSLITERATIONS = {
+    "zh-ch": {"Good morning.": "zǎoshang hǎo", "See you.": "zàijiàn"},
+    "ja": {"Good morning.": "ohayou", "See you.": "matane"},
+}
+
+
+class TestCombinationOutputs(unittest.TestCase):
+    def test_select_output_combinations(self):
+        singles = [("fr",), ("zh-ch",), ("ja",)]
+        self.assertEqual(select_output_combinations(LANGUAGES), singles + [tuple(LANGUAGES)])
+        self.assertEqual(
+            select_output_combinations(LANGUAGES, (2,)),
+            singles + [("fr", "zh-ch"), ("fr", "ja"), ("zh-ch", "ja")],
+        )
+        self.assertEqual(
+            select_output_combinations(LANGUAGES, (3, 2, 5)),
+            singles + [("fr", "zh-ch"), ("fr", "ja"), ("zh-ch", "ja"), tuple(LANGUAGES)],
+        )
+        self.assertEqual(select_output_combinations(["fr"]), [("fr",)])
+
+    def test_one_pass_matches_each_combination_alone(self):
+        combos = select_output_combinations(LANGUAGES, (2, 3))
+        contents = render_combination_outputs(LINES, TRANSLATIONS, TRANSLITERATIONS, combos)
+        self.assertEqual(len(contents), 7)
+
+        for combo, content in zip(combos, contents):
+            f = io.StringIO()
+            write_combination_output(
+                LINES,
+                {lang: TRANSLATIONS[lang] for lang in combo},
+                {lang: TRANSLITERATIONS[lang] for lang in combo if lang in TRANSLITERATIONS},
+                f,
+            )
+            self.assertEqual(content, f.getvalue(), combo)
+
+        self.assertEqual(
+            contents[-1],
+            "1\n00:00:01,000 --> 00:00:02,000\nGood morning.\n"
+            "Bonjour.\n早上好。\nzǎoshang hǎo\nおはよう。\nohayou\n\n"
+            "2\n00:00:03,000 --> 00:00:04,000\nSee you.\n"
+            "À plus.\n再见。\nzàijiàn\nまたね。\nmatane\n",
+        )
+
+
+class TestProcessZipOfSrts(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_combined_zip(self):
+        input_zip = os.path.join(self.test_dir, "films.zip")
+        shutil.copy(os.path.join(FIXTURE_DIR, "1.zip"), input_zip)
+        translator = StubTranslator(latency=0)
+
+        combined_zip = process_zip_of_srts(
+            input_zip, ["fr", "zh-ch"], io_workers=2, cpu_workers=1, translate_batch=translator
+        )
+
+        self.assertEqual(combined_zip, os.path.join(self.test_dir, "films_combined.zip"))
+        with zipfile.ZipFile(input_zip) as zipf:
+            bases = [os.path.splitext(name)[0] for name in zipf.namelist()]
+        with zipfile.ZipFile(combined_zip) as zipf:
+            self.assertEqual(
+                sorted(zipf.namelist()),
+                sorted(
+                    f"{base}_{combo}.srt" for base in bases for combo in ("fr", "zh-ch", "fr_zh-ch")
+                ),
+            )
+            rendered = zipf.read("1952-Come-Back-Little-Sheba-en_fr_zh-ch.srt").decode("utf-8")
+
+        # Multi-line cues are merged, then followed by one line per language
+        original = "Good morning. You've come to see the room?"
+        self.assertTrue(
+            rendered.startswith(
+                f"1\n00:01:39,225 --> 00:01:42,558\n{original}\n"
+                f"{translator([original], 'fr')[0]}\n{translator([original], 'zh-ch')[0]}\n\n2\n"
+            )
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
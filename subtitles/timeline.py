@@ -0,0 +1,285 @@
+import re
+from bisect import bisect_left, bisect_right
+
+TIMESTAMP_PATTERN = re.compile(
+    r"^\s*(\d+):(\d{2}):(\d{2})[,.](\d{1,3})\s*-->\s*(\d+):(\d{2}):(\d{2})[,.](\d{1,3})"
+)
+SENTENCE_BREAK_PATTERN = re.compile(r"(?<=[.!?。！？…])\s+|\n")
+
+
+def timestamp_to_ms(hours, minutes, seconds, millis):
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(millis.ljust(3, "0"))
+
+
+def parse_timestamp_line(line):
+    """'00:01:02,500 --> 00:01:04,000' -> (62500, 64000), or None"""
+    match = TIMESTAMP_PATTERN.match(line)
+    if not match:
+        return None
+    groups = match.groups()
+    return timestamp_to_ms(*groups[:4]), timestamp_to_ms(*groups[4:])
+
+
+def format_ms(ms):
+    """62500 -> '00:01:02,500'"""
+    ms = max(0, int(ms))
+    seconds, millis = divmod(ms, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{millis:03d}"
+
+
+def format_timestamp_line(start, end):
+    return f"{format_ms(start)} --> {format_ms(end)}"
+
+
+class IntervalIndex:
+    """
+    Overlap queries over intervals sorted by start.
+
+    Keeps the running maximum of end times next to the sorted starts: cues
+    before the first running maximum past the query start cannot reach it, and
+    cues from the first start past the query end cannot either. Each query is
+    two bisects plus a scan of the cues in between, which for subtitles (little
+    nesting) are the overlapping cues themselves.
+    """
+
+    def __init__(self, starts, ends):
+        self.starts = starts
+        self.ends = ends
+        self.max_ends = []
+        running = None
+        for end in ends:
+            running = end if running is None or end > running else running
+            self.max_ends.append(running)
+
+    def overlapping(self, start, end):
+        """Indices of intervals with start < their end and their start < end"""
+        lo = bisect_right(self.max_ends, start)
+        hi = bisect_left(self.starts, end)
+        return [i for i in range(lo, hi) if self.ends[i] > start]
+
+    def best_overlap(self, start, end):
+        """Index of the interval sharing the most time with [start, end), or None"""
+        best, best_overlap = None, 0
+        for i in self.overlapping(start, end):
+            overlap = min(end, self.ends[i]) - max(start, self.starts[i])
+            if overlap > best_overlap:
+                best, best_overlap = i, overlap
+        return best
+
+
+class Timeline:
+    """
+    One subtitle track as parallel arrays of integer-millisecond starts and ends.
+
+    Cues are kept sorted by (start, end), so retiming is arithmetic on the
+    arrays and overlap lookups go through an IntervalIndex built on demand.
+    texts holds any per-cue payload: a string for a single track, a tuple of
+    strings (one per track) for merged tracks.
+    """
+
+    def __init__(self, starts=None, ends=None, texts=None):
+        self.starts = list(starts or [])
+        self.ends = list(ends or [])
+        self.texts = list(texts or [])
+        self._index = None
+
+    @classmethod
+    def from_cues(cls, cues):
+        """Timeline from (start_ms, end_ms, text) tuples in any order"""
+        ordered = sorted(cues, key=lambda cue: (cue[0], cue[1]))
+        return cls(
+            [cue[0] for cue in ordered], [cue[1] for cue in ordered], [cue[2] for cue in ordered]
+        )
+
+    @classmethod
+    def from_srt(cls, content):
+        """
+        Parses SRT text in one pass over its lines.
+
+        Cue numbers are ignored (they are rebuilt densely by to_srt); text lines
+        of a cue are joined with "\\n".
+        """
+        cues = []
+        current = None
+        text_lines = []
+        for line in content.splitlines():
+            times = parse_timestamp_line(line)
+            if times is not None:
+                if current is not None:
+                    # No blank line before this cue: its number ended up as text
+                    if len(text_lines) > 1 and text_lines[-1].isdigit():
+                        text_lines.pop()
+                    cues.append((*current, "\n".join(text_lines)))
+                current, text_lines = times, []
+                continue
+            if current is None:
+                continue
+            stripped = line.strip()
+            if stripped:
+                text_lines.append(stripped)
+            elif text_lines:
+                # Blank line closes the cue; the next number line is skipped
+                cues.append((*current, "\n".join(text_lines)))
+                current, text_lines = None, []
+        if current is not None:
+            cues.append((*current, "\n".join(text_lines)))
+        return cls.from_cues(cues)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self):
+        return iter(zip(self.starts, self.ends, self.texts))
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = IntervalIndex(self.starts, self.ends)
+        return self._index
+
+    def overlapping(self, start, end):
+        return self.index.overlapping(start, end)
+
+    @property
+    def duration(self):
+        """(first start, last end) in ms, or (0, 0) for an empty track"""
+        if not self.starts:
+            return 0, 0
+        return self.starts[0], max(self.index.max_ends[-1], self.starts[-1])
+
+    def shift(self, offset_ms):
+        """Moves every cue by offset_ms (negative = earlier), clamping at zero"""
+        return self.retime(offset_ms=offset_ms)
+
+    def retime(self, factor=1.0, offset_ms=0):
+        """
+        Maps every time t to t * factor + offset_ms, e.g. factor=25/23.976 for a
+        frame-rate conversion. Order is preserved, so no re-sort is needed.
+        """
+        return Timeline(
+            [max(0, round(start * factor + offset_ms)) for start in self.starts],
+            [max(0, round(end * factor + offset_ms)) for end in self.ends],
+            self.texts,
+        )
+
+    def split_long_cues(self, max_duration_ms=6000, max_chars=84):
+        """
+        Splits cues longer than max_duration_ms or max_chars at sentence breaks
+        (else word breaks), sharing the cue's time in proportion to text length.
+        """
+        starts, ends, texts = [], [], []
+        for start, end, text in self:
+            if not isinstance(text, str) or (
+                end - start <= max_duration_ms and len(text) <= max_chars
+            ):
+                starts.append(start)
+                ends.append(end)
+                texts.append(text)
+                continue
+
+            pieces = split_text(text, end - start, max_duration_ms, max_chars)
+            total_chars = sum(len(piece) for piece in pieces) or 1
+            cursor = start
+            for position, piece in enumerate(pieces):
+                if position == len(pieces) - 1:
+                    piece_end = end
+                else:
+                    piece_end = cursor + round((end - start) * len(piece) / total_chars)
+                starts.append(cursor)
+                ends.append(piece_end)
+                texts.append(piece)
+                cursor = piece_end
+        return Timeline(starts, ends, texts)
+
+    def to_srt(self, separator="\n"):
+        """SRT text numbered densely from 1; tuple payloads are joined, skipping blanks"""
+        blocks = []
+        for number, (start, end, text) in enumerate(self, 1):
+            if not isinstance(text, str):
+                text = separator.join(part for part in text if part)
+            blocks.append(f"{number}\n{format_timestamp_line(start, end)}\n{text}\n")
+        return "\n".join(blocks)
+
+
+def split_text(text, duration_ms, max_duration_ms, max_chars):
+    """Pieces of text short enough for one cue each"""
+    pieces_needed = max(
+        -(-duration_ms // max_duration_ms) if max_duration_ms else 1,
+        -(-len(text) // max_chars) if max_chars else 1,
+    )
+    sentences = [part.strip() for part in SENTENCE_BREAK_PATTERN.split(text) if part.strip()]
+    if len(sentences) < pieces_needed:
+        sentences = text.split()
+
+    # Greedily fill pieces up to an even share of the characters
+    target = len(text) / pieces_needed
+    pieces, current = [], ""
+    for sentence in sentences:
+        if (
+            current
+            and len(current) + 1 + len(sentence) > target
+            and len(pieces) < pieces_needed - 1
+        ):
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def assign_by_overlap(anchor, track):
+    """For each cue of track, the index of the anchor cue it overlaps most (or None)"""
+    index = anchor.index
+    return [index.best_overlap(start, end) for start, end, _ in track]
+
+
+def merge_tracks(tracks, assign=None):
+    """
+    Merges independently timed tracks into one timeline by time overlap.
+
+    The first track is the anchor: each cue of the other tracks joins the anchor
+    cue it overlaps most (several cues joining one anchor cue are concatenated).
+    Cues overlapping no anchor cue keep their own timing as extra cues. Runs in
+    O(n log n) over all cues.
+
+    Args:
+        tracks: Timelines of plain-text cues, anchor first
+        assign: Callable (anchor, track) -> (anchor index (or None) per track cue,
+            track retimed onto the anchor's clock); defaults to assign_by_overlap
+            on the track as it is timed
+
+    Returns:
+        Timeline whose texts are tuples with one string per track ("" if absent)
+    """
+    if not tracks:
+        return Timeline()
+
+    anchor = tracks[0]
+    width = len(tracks)
+    slots = [[text] + [""] * (width - 1) for text in anchor.texts]
+    extra = []
+
+    for position, track in enumerate(tracks[1:], 1):
+        if assign is None:
+            assignment = assign_by_overlap(anchor, track)
+        else:
+            # Extra cues take the retimed track's timing, next to their dialogue
+            assignment, track = assign(anchor, track)
+        for (start, end, text), anchor_index in zip(track, assignment):
+            if anchor_index is None:
+                texts = [""] * width
+                texts[position] = text
+                extra.append((start, end, texts))
+                continue
+            slot = slots[anchor_index]
+            slot[position] = f"{slot[position]}\n{text}" if slot[position] else text
+
+    cues = [
+        (start, end, tuple(texts)) for start, end, texts in zip(anchor.starts, anchor.ends, slots)
+    ]
+    cues.extend((start, end, tuple(texts)) for start, end, texts in extra)
+    return Timeline.from_cues(cues)
@@ -0,0 +1,314 @@
+import math
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from array import array
+from collections import Counter, namedtuple
+from difflib import SequenceMatcher
+
+MARKUP_PATTERN = re.compile(r"<[^>]+>|\{\\[^}]*\}")
+PUNCTUATION_PATTERN = re.compile(r"[^\w\s]|_")
+
+# Default similarity (difflib ratio over normalized text) for a fuzzy match
+DEFAULT_THRESHOLD = 0.85
+# Candidates verified with difflib per lookup, best word overlap first
+MAX_CANDIDATES = 16
+
+MemoryMatch = namedtuple("MemoryMatch", ["source", "target", "score"])
+
+
+def normalize_memory_text(text):
+    """
+    Key under which a subtitle line is remembered.
+
+    Drops markup (<i>, {\\an8}), case and punctuation so that "Come in." and
+    "<i>come in...</i>" share one translation, but keeps a sentence-final "?"
+    or "!" as the last word: "You're leaving?" is not "You're leaving."
+    """
+    text = unicodedata.normalize("NFKC", MARKUP_PATTERN.sub(" ", text)).casefold()
+    words = PUNCTUATION_PATTERN.sub(" ", text).split()
+    # Punctuation, quotes and spaces after the last word
+    end = len(text)
+    while end and not text[end - 1].isalnum():
+        end -= 1
+    trailing = text[end:]
+    if words and "?" in trailing:
+        words.append("?")
+    elif words and "!" in trailing:
+        words.append("!")
+    return " ".join(words)
+
+
+class TokenIndex:
+    """
+    Inverted index from (word, line length in words) to entry ids.
+
+    Keying postings by length means a lookup only touches lines of a plausible
+    length, and probing the query's rarest words first (prefix filtering) skips
+    the huge postings of words like "you" altogether. Together they keep fuzzy
+    lookups around half a millisecond on average at a million entries.
+    """
+
+    def __init__(self):
+        self.postings = {}  # word -> {length: array of entry ids}
+        self.word_counts = {}  # word -> number of entries containing it
+
+    def add(self, entry_id, words):
+        length = len(words)
+        for word in words:
+            by_length = self.postings.get(word)
+            if by_length is None:
+                by_length = self.postings[word] = {}
+            ids = by_length.get(length)
+            if ids is None:
+                ids = by_length[length] = array("I")
+            ids.append(entry_id)
+            self.word_counts[word] = self.word_counts.get(word, 0) + 1
+
+    def candidates(self, words, min_overlap, lengths, limit=MAX_CANDIDATES):
+        """
+        Up to limit entry ids sharing at least min_overlap of words, most shared first.
+
+        Only the len(words) - min_overlap + 1 rarest words need probing: any entry
+        sharing min_overlap words must contain one of them.
+        """
+        by_rarity = sorted(words, key=lambda word: self.word_counts.get(word, 0))
+        probe_count = len(by_rarity) - min_overlap + 1
+        counts = Counter()
+        for word in by_rarity[:probe_count]:
+            by_length = self.postings.get(word)
+            if not by_length:
+                continue
+            for length in lengths:
+                ids = by_length.get(length)
+                if ids is not None:
+                    counts.update(ids)
+        if len(counts) <= limit:
+            return list(counts)
+        # Keep the entries sharing the most probed words without sorting them all
+        cutoff = max(counts.values())
+        best = [entry_id for entry_id, count in counts.items() if count >= cutoff]
+        if len(best) < limit and cutoff > 1:
+            best += [entry_id for entry_id, count in counts.items() if count == cutoff - 1]
+        return best[:limit]
+
+
+class TranslationMemory:
+    """
+    Persistent (source, target, lang) store with exact and fuzzy lookups.
+
+    Entries live in SQLite at db_path (None keeps them in memory only) and are
+    indexed in memory on open. lookup() reuses a translation only for the same
+    normalized line; fuzzy() suggests similar remembered lines, which may mean
+    something else ("I do want" vs "I do not want"), so callers opt into those.
+    """
+
+    def __init__(self, db_path=None, threshold=DEFAULT_THRESHOLD):
+        self.db_path = db_path
+        self.threshold = threshold
+        self.exact_hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._sources = []
+        self._targets = []
+        self._keys = []
+        self._exact = {}  # lang -> {normalized source: entry id}
+        self._indexes = {}  # lang -> TokenIndex
+
+        self._conn = None
+        if db_path:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS memory (
+                    source_key TEXT,
+                    lang TEXT,
+                    source TEXT,
+                    target TEXT,
+                    PRIMARY KEY (source_key, lang)
+                )
+            """
+            )
+            self._conn.commit()
+            # Keys are recomputed so entries saved under an older normalization still match
+            for lang, source, target in self._conn.execute(
+                "SELECT lang, source, target FROM memory"
+            ):
+                self._index_entry(normalize_memory_text(source), lang, source, target)
+
+    def __len__(self):
+        return len(self._sources)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _index_entry(self, key, lang, source, target):
+        exact = self._exact.setdefault(lang, {})
+        entry_id = exact.get(key)
+        if entry_id is not None:
+            self._sources[entry_id] = source
+            self._targets[entry_id] = target
+            return
+
+        entry_id = len(self._sources)
+        self._sources.append(source)
+        self._targets.append(target)
+        self._keys.append(key)
+        exact[key] = entry_id
+        self._indexes.setdefault(lang, TokenIndex()).add(entry_id, list(dict.fromkeys(key.split())))
+
+    def add(self, source, target, lang):
+        self.add_many([(source, target)], lang)
+
+    def add_many(self, pairs, lang):
+        """
+        Remembers (source, target) pairs for lang, replacing older translations.
+
+        Empty targets and targets equal to their source (what the translators hand
+        back when a line fails) are skipped.
+        """
+        rows = []
+        with self._lock:
+            for source, target in pairs:
+                key = normalize_memory_text(source)
+                if not key or not target or " ".join(target.split()) == " ".join(source.split()):
+                    continue
+                self._index_entry(key, lang, source, target)
+                rows.append((key, lang, source, target))
+
+            if self._conn is not None and rows:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO memory (source_key, lang, source, target) "
+                    "VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.commit()
+
+    def exact(self, source, lang):
+        entry_id = self._exact.get(lang, {}).get(normalize_memory_text(source))
+        if entry_id is None:
+            return None
+        return MemoryMatch(self._sources[entry_id], self._targets[entry_id], 1.0)
+
+    def fuzzy(self, source, lang, threshold=None, limit=1):
+        """
+        Remembered lines most similar to source.
+
+        Returns:
+            Up to limit MemoryMatch tuples scoring at least threshold, best first
+        """
+        threshold = self.threshold if threshold is None else threshold
+        index = self._indexes.get(lang)
+        key = normalize_memory_text(source)
+        words = list(dict.fromkeys(key.split()))
+        if index is None or not words:
+            return []
+
+        # A line this similar differs in at most a few words (a name, a typo)
+        word_count = len(words)
+        word_edits = max(1, math.ceil(word_count * (1 - threshold)))
+        min_overlap = max(1, word_count - word_edits)
+        lengths = range(
+            max(1, math.floor(word_count * threshold / (2 - threshold))),
+            math.ceil(word_count * (2 - threshold) / threshold) + 1,
+        )
+
+        matches = []
+        matcher = SequenceMatcher(autojunk=False)
+        matcher.set_seq2(key)
+        for entry_id in index.candidates(words, min_overlap, lengths):
+            matcher.set_seq1(self._keys[entry_id])
+            if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+                continue
+            score = matcher.ratio()
+            if score >= threshold:
+                matches.append(
+                    MemoryMatch(self._sources[entry_id], self._targets[entry_id], round(score, 4))
+                )
+
+        matches.sort(key=lambda match: match.score, reverse=True)
+        return matches[:limit]
+
+    def lookup(self, source, lang, fuzzy=False, threshold=None):
+        """
+        Exact match on the normalized line, else None.
+
+        With fuzzy, falls back to the best fuzzy match; only use that as a
+        suggestion, since a one-word difference can change the meaning.
+        """
+        match = self.exact(source, lang)
+        if match is not None:
+            self.exact_hits += 1
+            return match
+
+        if fuzzy:
+            matches = self.fuzzy(source, lang, threshold)
+            if matches:
+                self.fuzzy_hits += 1
+                return matches[0]
+
+        self.misses += 1
+        return None
+
+    def stats(self):
+        return {
+            "entries": len(self),
+            "exact_hits": self.exact_hits,
+            "fuzzy_hits": self.fuzzy_hits,
+            "misses": self.misses,
+        }
+
+
+def memory_batch_translate(memory, batch_translate):
+    """
+    Wraps batch_translate(texts, lang, failed=None) so remembered lines skip the translator.
+
+    Lines remembered exactly reuse their translation; the rest go to batch_translate
+    in one call. batch_translate adds the positions of lines it could not translate
+    to the failed set; those are returned as given but never remembered.
+    """
+
+    def translate(texts, lang):
+        results = [None] * len(texts)
+        missing = []
+        for position, text in enumerate(texts):
+            match = memory.lookup(text, lang)
+            if match is None:
+                missing.append(position)
+            else:
+                results[position] = match.target
+
+        if missing:
+            failed = set()
+            translated = batch_translate([texts[position] for position in missing], lang, failed)
+            for position, target in zip(missing, translated):
+                results[position] = target
+            memory.add_many(
+                [
+                    (texts[position], results[position])
+                    for index, position in enumerate(missing)
+                    if index not in failed
+                ],
+                lang,
+            )
+        return results
+
+    return translate
+
+
+def open_translation_memory(db_path=None, threshold=DEFAULT_THRESHOLD):
+    """TranslationMemory at db_path, or at $SUBTITLE_TRANSLATION_MEMORY when set"""
+    db_path = db_path or os.environ.get("SUBTITLE_TRANSLATION_MEMORY")
+    return TranslationMemory(db_path, threshold=threshold)
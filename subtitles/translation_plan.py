@@ -0,0 +1,96 @@
+import re
+
+SRT_INDEX_PATTERN = re.compile(r"^\d+$")
+SRT_TIMESTAMP_PATTERN = re.compile(r"^\d{2}:\d{2}:\d{2},\d{3} --> \d{2}:\d{2}:\d{2},\d{3}$")
+
+
+def normalize_subtitle_line(text):
+    """Normalizes a subtitle line the same way translate_text cleans its input"""
+    return " ".join(text.strip().split())
+
+
+def is_subtitle_text_line(stripped):
+    """True for SRT lines that carry dialogue (not cue numbers or timestamps)"""
+    return bool(
+        stripped
+        and not SRT_INDEX_PATTERN.match(stripped)
+        and not SRT_TIMESTAMP_PATTERN.match(stripped)
+    )
+
+
+class TranslationPlan:
+    """Unique normalized subtitle lines collected across every SRT of a job"""
+
+    def __init__(self):
+        self.unique_lines = {}  # normalized line -> first file it appeared in
+        self.total_lines = 0
+        self.file_count = 0
+
+    def add_file(self, file_name, lines):
+        self.file_count += 1
+        for line in lines:
+            stripped = line.strip()
+            if not is_subtitle_text_line(stripped):
+                continue
+            self.total_lines += 1
+            self.unique_lines.setdefault(normalize_subtitle_line(stripped), file_name)
+
+    def lines_by_file(self):
+        """Groups unique lines under the file that first introduced them"""
+        grouped = {}
+        for line, file_name in self.unique_lines.items():
+            grouped.setdefault(file_name, []).append(line)
+        return grouped
+
+    @property
+    def unique_count(self):
+        return len(self.unique_lines)
+
+    @property
+    def dedup_ratio(self):
+        """Fraction of text lines that did not need their own translation request"""
+        if not self.total_lines:
+            return 0.0
+        return 1 - self.unique_count / self.total_lines
+
+    def report(self, target_languages=()):
+        languages = len(target_languages) or 1
+        return {
+            "files": self.file_count,
+            "text_lines": self.total_lines,
+            "unique_lines": self.unique_count,
+            "dedup_ratio": round(self.dedup_ratio, 4),
+            "translation_requests": self.unique_count * languages,
+            "requests_saved": (self.total_lines - self.unique_count) * languages,
+        }
+
+
+def build_translation_plan(srt_lines_by_file):
+    """
+    Scans every SRT of a job before any translation happens.
+
+    Args:
+        srt_lines_by_file: Mapping of file name -> list of SRT lines
+
+    Returns:
+        TranslationPlan with the global set of unique normalized lines
+    """
+    plan = TranslationPlan()
+    for file_name, lines in srt_lines_by_file.items():
+        plan.add_file(file_name, lines)
+    return plan
+
+
+def translate_lines(lines, target_languages, batch_translate, batch_size=50):
+    """
+    Translates lines into every target language, one batch call at a time.
+
+    Returns:
+        Dict of lang -> {line: translation}
+    """
+    translation_maps = {lang: {} for lang in target_languages}
+    for lang in target_languages:
+        for i in range(0, len(lines), batch_size):
+            batch = lines[i : i + batch_size]
+            translation_maps[lang].update(zip(batch, batch_translate(batch, lang)))
+    return translation_maps
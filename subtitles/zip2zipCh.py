@@ -1,10 +1,10 @@
+import io
 import os
 import re
+import shutil
 import tempfile
 import zipfile
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import chardet
 from functools import lru_cache
 
 # Add your project path
@@ -14,6 +14,9 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from transliteration.translationFunctions import translate_text, transliterate, LANGUAGE_CODE_MAP
 from transliteration.filter_language_characters import filter_language_characters
+from subtitles.scheduler import SubtitleJobScheduler
+from subtitles.srt_ingest import read_subtitle_file, read_subtitle_lines
+from subtitles.translation_plan import SRT_TIMESTAMP_PATTERN, is_subtitle_text_line
 
 
 # Cache everything aggressively
@@ -31,83 +34,91 @@ def cached_transliterate(text, lang):
 
 
 def detect_encoding(file_path):
-    """Fast encoding detection with small sample"""
-    with open(file_path, "rb") as f:
-        raw_data = f.read(4096)  # Only read first 4KB for detection
-        result = chardet.detect(raw_data)
-        return result["encoding"] or "utf-8"
+    """Fast encoding detection (strict UTF-8/BOM first, sampled chardet fallback)"""
+    return read_subtitle_file(file_path)[1]
 
 
 def read_srt_fast(file_path):
     """Fast SRT reading with encoding detection"""
-    encoding = detect_encoding(file_path)
-    try:
-        with open(file_path, "r", encoding=encoding) as f:
-            return f.readlines()
-    except UnicodeDecodeError:
-        with open(file_path, "r", encoding="latin-1") as f:
-            return f.readlines()
+    return read_subtitle_lines(file_path)
 
 
-def process_single_srt_zh_ch(srt_path):
-    """Ultra-optimized processing for Chinese with transliteration"""
-    print(f"Processing: {os.path.basename(srt_path)}")
-    start_time = time.time()
-
-    # Read file
+def translate_srt_zh_ch(srt_path):
+    """I/O stage: read one SRT and translate its text lines to Chinese"""
     lines = read_srt_fast(srt_path)
-
-    # Extract base name for output
+    translations = {}
+    for line in lines:
+        stripped = line.strip()
+        if is_subtitle_text_line(stripped) and not re.match(r"^\d", stripped):
+            if stripped not in translations:
+                translations[stripped] = cached_translate_text(stripped, "zh-ch")
+    return srt_path, lines, translations
+
+
+def render_srt_zh_ch(translated_srt):
+    """CPU stage: transliterate and render one translated SRT (runs in a worker process)"""
+    srt_path, lines, translations = translated_srt
     base_name = os.path.splitext(os.path.basename(srt_path))[0]
-    temp_dir = tempfile.mkdtemp()
-    output_srt = os.path.join(temp_dir, f"{base_name}_zh-ch.srt")
+    out_f = io.StringIO()
 
     # Process in one pass
-    with open(output_srt, "w", encoding="utf-8") as out_f:
-        i = 0
-        total_lines = len(lines)
-
-        while i < total_lines:
-            line = lines[i]
-            stripped = line.strip()
-
-            # Line number
-            if stripped.isdigit():
-                out_f.write(line)
-                i += 1
-                continue
-
-            # Timestamp
-            if i < total_lines and re.match(
-                r"^\d{2}:\d{2}:\d{2},\d{3} --> \d{2}:\d{2}:\d{2},\d{3}$", stripped
-            ):
-                out_f.write(line)
-                i += 1
-                continue
-
-            # Text content (translate and transliterate)
-            if stripped and not re.match(r"^\d", stripped):
-                # Translate
-                translated = cached_translate_text(stripped, "zh-ch")
-                out_f.write(line)  # Original line
-                out_f.write(translated + "\n")  # Translated line
-
-                # Transliterate
-                transliterated = cached_transliterate(translated, "zh-ch")
-                if transliterated.strip():
-                    out_f.write(transliterated + "\n")
-            else:
-                out_f.write(line)
+    i = 0
+    total_lines = len(lines)
 
+    while i < total_lines:
+        line = lines[i]
+        stripped = line.strip()
+
+        # Line number
+        if stripped.isdigit():
+            out_f.write(line)
             i += 1
+            continue
 
-    # Create individual zip
-    zip_path = os.path.join(temp_dir, f"{base_name}_zh-ch.zip")
-    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-        zipf.write(output_srt, arcname=os.path.basename(output_srt))
+        # Timestamp
+        if i < total_lines and SRT_TIMESTAMP_PATTERN.match(stripped):
+            out_f.write(line)
+            i += 1
+            continue
+
+        # Text content (translate and transliterate)
+        if stripped and not re.match(r"^\d", stripped):
+            # Translate
+            translated = translations[stripped]
+            out_f.write(line)  # Original line
+            out_f.write(translated + "\n")  # Translated line
+
+            # Transliterate
+            transliterated = cached_transliterate(translated, "zh-ch")
+            if transliterated.strip():
+                out_f.write(transliterated + "\n")
+        else:
+            out_f.write(line)
+
+        i += 1
 
-    # Cleanup temp files
-    os.remove(output_srt)
+    return f"{base_name}_zh-ch.srt", out_f.getvalue()
+
+
+def zip_single_srt(srt_name, content):
+    """Build the per-file zip in memory"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
+        zipf.writestr(srt_name, content)
+    return buffer.getvalue()
+
+
+def process_single_srt_zh_ch(srt_path):
+    """Ultra-optimized processing for Chinese with transliteration"""
+    print(f"Processing: {os.path.basename(srt_path)}")
+    start_time = time.time()
+
+    srt_name, content = render_srt_zh_ch(translate_srt_zh_ch(srt_path))
+
+    # Create individual zip
+    zip_path = os.path.join(tempfile.mkdtemp(), srt_name.replace(".srt", ".zip"))
+    with open(zip_path, "wb") as f:
+        f.write(zip_single_srt(srt_name, content))
 
     processing_time = time.time() - start_time
     print(f"Completed {os.path.basename(srt_path)} in {processing_time:.2f}s")
@@ -115,8 +126,13 @@ def process_single_srt_zh_ch(srt_path):
     return zip_path
 
 
-def fast_process_zip_to_zh_ch(input_zip_path):
-    """Process zip of SRTs to zip of Chinese-translated zips"""
+def fast_process_zip_to_zh_ch(input_zip_path, io_workers=None, cpu_workers=None):
+    """Process zip of SRTs to zip of Chinese-translated zips
+
+    Translation runs on the scheduler's thread pool and transliteration on its
+    process pool; worker limits come from io_workers / cpu_workers or the
+    SUBTITLE_IO_WORKERS / SUBTITLE_CPU_WORKERS environment variables.
+    """
     print(f"Starting processing: {input_zip_path}")
     overall_start = time.time()
 
@@ -143,51 +159,28 @@ def fast_process_zip_to_zh_ch(input_zip_path):
 
     print(f"Found {len(srt_files)} SRT files to process")
 
-    # Process files in parallel with optimal workers
-    max_workers = min(8, len(srt_files))  # Optimal for I/O bound tasks
-    individual_zips = []
-
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all tasks
-        future_to_file = {
-            executor.submit(process_single_srt_zh_ch, srt_path): srt_path for srt_path in srt_files
-        }
-
-        # Collect results as they complete
-        for future in as_completed(future_to_file):
-            try:
-                zip_path = future.result()
-                individual_zips.append(zip_path)
-                print(f"✓ Completed: {os.path.basename(zip_path)}")
-            except Exception as e:
-                file_path = future_to_file[future]
-                print(f"✗ Error processing {file_path}: {e}")
-
-    # Create final collection zip
-    print("Creating final collection zip...")
-    with zipfile.ZipFile(final_zip_path, "w", zipfile.ZIP_DEFLATED) as final_zip:
-        for zip_file in individual_zips:
-            final_zip.write(zip_file, arcname=os.path.basename(zip_file))
-
-    # Cleanup
-    print("Cleaning up temporary files...")
-    for zip_file in individual_zips:
-        try:
-            os.remove(zip_file)
-            os.rmdir(os.path.dirname(zip_file))  # Remove temp directory
-        except:
-            pass
-
-    # Remove extracted files
-    for srt_file in srt_files:
-        try:
-            os.remove(srt_file)
-        except:
-            pass
     try:
-        os.rmdir(temp_extract_dir)
-    except:
-        pass
+        with SubtitleJobScheduler(io_workers, cpu_workers) as scheduler, zipfile.ZipFile(
+            final_zip_path, "w", zipfile.ZIP_DEFLATED
+        ) as final_zip:
+            futures = {
+                srt_path: scheduler.submit_chain(srt_path, translate_srt_zh_ch, render_srt_zh_ch)
+                for srt_path in srt_files
+            }
+
+            # Write results in input order as each file finishes
+            for srt_path, future in futures.items():
+                try:
+                    _, (srt_name, content) = future.result()
+                    zip_name = srt_name.replace(".srt", ".zip")
+                    final_zip.writestr(zip_name, zip_single_srt(srt_name, content))
+                    print(f"✓ Completed: {zip_name}")
+                except Exception as e:
+                    print(f"✗ Error processing {srt_path}: {e}")
+    finally:
+        # Remove extracted files
+        print("Cleaning up temporary files...")
+        shutil.rmtree(temp_extract_dir, ignore_errors=True)
 
     total_time = time.time() - overall_start
     print(f"✅ Processing complete! Total time: {total_time:.2f}s")
@@ -1,3 +1,4 @@
+import io
 import re
 import csv
 import os
@@ -5,12 +6,9 @@ import tempfile
 import time
 import zipfile
 from itertools import combinations
-from concurrent.futures import ThreadPoolExecutor
 import sys
-import chardet  # Add this import for encoding detection
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from concurrent.futures import ThreadPoolExecutor
 from transliteration.translationFunctions import (
     translate_text,
     translate_parallel,
@@ -23,28 +21,30 @@ from transliteration.translationFunctions import (
 from transliteration.filter_language_characters import (
     filter_language_characters,
     filter_language_characters_preserve_spaces,
+    filter_lines,
 )
-from functools import lru_cache
-
-
-# Function to detect file encoding
-def detect_encoding(file_path):
-    with open(file_path, "rb") as f:
-        raw_data = f.read()
-        result = chardet.detect(raw_data)
-        return result["encoding"] or "utf-8"
+from subtitles.srt_ingest import (
+    decode_subtitle_bytes,
+    open_subtitle_stream,
+    read_subtitle_lines,
+    read_subtitle_text,
+)
+from transliteration.markdown_stream import iter_bounded_lines, stream_markdown
+from subtitles.scheduler import SubtitleJobScheduler
+from subtitles.translation_memory import memory_batch_translate, open_translation_memory
+from subtitles.translation_plan import (
+    SRT_TIMESTAMP_PATTERN,
+    build_translation_plan,
+    is_subtitle_text_line,
+    normalize_subtitle_line,
+    translate_lines,
+)
+from functools import lru_cache, partial
 
 
 # Function to read an SRT file with encoding detection
 def read_srt(file_path):
-    encoding = detect_encoding(file_path)
-    try:
-        with open(file_path, "r", encoding=encoding) as f:
-            return f.readlines()
-    except UnicodeDecodeError:
-        # Fallback to latin-1 if detected encoding fails
-        with open(file_path, "r", encoding="latin-1") as f:
-            return f.readlines()
+    return read_subtitle_lines(file_path)
 
 
 # Function to write an SRT file
@@ -169,14 +169,7 @@ def generate_combination_srt(
     output_file = f"{base_name}_{combination_name}.srt"
 
     # Read file with encoding detection
-    encoding = detect_encoding(input_file)
-    try:
-        with open(input_file, "r", encoding=encoding) as f:
-            lines = [line.rstrip("\n") for line in f.readlines()]
-    except UnicodeDecodeError:
-        # Fallback to latin-1
-        with open(input_file, "r", encoding="latin-1") as f:
-            lines = [line.rstrip("\n") for line in f.readlines()]
+    lines = [line.rstrip("\n") for line in read_subtitle_lines(input_file)]
 
     # Extract all text content that needs translation
     text_lines = [
@@ -277,14 +270,7 @@ def process_single_language(
 ):
     """Process SRT file for a single target language with optional transliteration"""
     # Read file with encoding detection
-    encoding = detect_encoding(input_file)
-    try:
-        with open(input_file, "r", encoding=encoding) as f:
-            lines = [line.rstrip("\n") for line in f.readlines()]
-    except UnicodeDecodeError:
-        # Fallback to latin-1
-        with open(input_file, "r", encoding="latin-1") as f:
-            lines = [line.rstrip("\n") for line in f.readlines()]
+    lines = [line.rstrip("\n") for line in read_subtitle_lines(input_file)]
 
     # Translate all text content (excluding timestamps and numbers)
     text_lines = [
@@ -430,14 +416,7 @@ def join_lines_if_starts_with_letter(lines):
 def process_single_srt_file(srt_path, target_languages, enable_transliteration, enable_styling):
     """Process a single SRT file with the given parameters"""
     # Read the SRT file with encoding detection
-    encoding = detect_encoding(srt_path)
-    try:
-        with open(srt_path, "r", encoding=encoding) as f:
-            lines = f.readlines()
-    except UnicodeDecodeError:
-        # Fallback to latin-1
-        with open(srt_path, "r", encoding="latin-1") as f:
-            lines = f.readlines()
+    lines = read_subtitle_lines(srt_path)
 
     # Apply the line joining transformation
     transformed_lines = join_lines_if_starts_with_letter(lines)
@@ -473,206 +452,291 @@ def cached_translate_text(text, lang):
     return translate_text(text, lang)
 
 
+def filter_translated_lines(texts, lang):
+    """Script characters of each translated line; Latin-spaced scripts keep their word breaks"""
+    return filter_lines(texts, lang, preserve_spaces=lang not in ["zh-CN", "zh-ch", "ja", "ko"])
+
+
+def transliterate_translated_line(text, lang):
+    filtered = filter_translated_lines([text], lang)[0]
+    return transliterate(filtered, lang) if filtered else ""
+
+
 @lru_cache(maxsize=1000)
 def cached_transliterate(text, lang):
-    if lang in ["zh-CN", "zh-ch", "ja", "ko"]:
-        filtered = filter_language_characters(text, lang)
-    else:
-        filtered = filter_language_characters_preserve_spaces(text, lang)
+    return transliterate_translated_line(text, lang)
 
-    return transliterate(filtered, lang) if filtered else ""
 
+def write_combination_outputs(lines, translation_maps, transliteration_maps, combos, streams):
+    """Write any number of language combinations in a single pass over the cues
 
-def generate_combination_output(lines, translation_maps, transliteration_maps, output_file):
-    """Generate output for a combination of languages"""
-    with open(output_file, "w", encoding="utf-8") as f:
-        i = 0
-        total_lines = len(lines)
-        while i < total_lines:
-            line = lines[i]
-            stripped = line.strip()
-
-            if stripped.isdigit():  # Line number
-                f.write(line)
+    Each text line's per-language fragment (translation plus transliteration) is
+    built once and shared by every combination that contains that language.
+
+    Args:
+        lines: SRT lines (with line endings)
+        translation_maps: lang -> {stripped line: translation}
+        transliteration_maps: lang -> {stripped line: transliteration}
+        combos: Sequence of language tuples, one per output
+        streams: Open text streams, parallel to combos
+    """
+    languages = list(dict.fromkeys(lang for combo in combos for lang in combo))
+    outputs = list(zip(combos, streams))
+
+    def write_all(text):
+        for f in streams:
+            f.write(text)
+
+    i = 0
+    total_lines = len(lines)
+    while i < total_lines:
+        line = lines[i]
+        stripped = line.strip()
+
+        if stripped.isdigit():  # Line number
+            write_all(line)
+            i += 1
+            if i < total_lines and SRT_TIMESTAMP_PATTERN.match(lines[i].strip()):
+                write_all(lines[i])
                 i += 1
-                if i < total_lines and re.match(
-                    r"^\d{2}:\d{2}:\d{2},\d{3} --> \d{2}:\d{2}:\d{2},\d{3}$", lines[i].strip()
-                ):
-                    f.write(lines[i])
+                while i < total_lines and lines[i].strip():
+                    original = lines[i].strip()
+
+                    # Add translations and transliterations for each language in the combination
+                    fragments = {}
+                    for lang in languages:
+                        fragment = ""
+                        if original in translation_maps[lang]:
+                            fragment = translation_maps[lang][original] + "\n"
+                            transliterated = transliteration_maps.get(lang, {}).get(original)
+                            if transliterated:
+                                fragment += transliterated + "\n"
+                        fragments[lang] = fragment
+
+                    for combo, f in outputs:
+                        f.write(lines[i] + "".join(fragments[lang] for lang in combo))
                     i += 1
-                    while i < total_lines and lines[i].strip():
-                        original = lines[i].strip()
-                        f.write(lines[i])
-
-                        # Add translations and transliterations for each language in the combination
-                        for lang in translation_maps:
-                            if original in translation_maps[lang]:
-                                f.write(translation_maps[lang][original] + "\n")
-                                if (
-                                    lang in transliteration_maps
-                                    and original in transliteration_maps[lang]
-                                    and transliteration_maps[lang][original]
-                                ):
-                                    f.write(transliteration_maps[lang][original] + "\n")
-                        i += 1
-
-                    if i < total_lines and not lines[i].strip():
-                        f.write("\n")
-                        i += 1
-                continue
 
-            f.write(line)
-            i += 1
+                if i < total_lines and not lines[i].strip():
+                    write_all("\n")
+                    i += 1
+            continue
+
+        write_all(line)
+        i += 1
 
 
-def optimized_process_single_srt_file(
-    srt_path, target_languages, enable_transliteration, enable_styling
+def render_combination_outputs(lines, translation_maps, transliteration_maps, combos):
+    """Render several combinations to in-memory SRT strings in one pass
+
+    Returns:
+        List of SRT contents, parallel to combos
+    """
+    buffers = [io.StringIO() for _ in combos]
+    write_combination_outputs(lines, translation_maps, transliteration_maps, combos, buffers)
+    return [buffer.getvalue() for buffer in buffers]
+
+
+def write_combination_output(lines, translation_maps, transliteration_maps, f):
+    """Write a combination of languages to an open text stream"""
+    write_combination_outputs(
+        lines, translation_maps, transliteration_maps, [tuple(translation_maps)], [f]
+    )
+
+
+def generate_combination_output(lines, translation_maps, transliteration_maps, output_file):
+    """Generate output for a combination of languages"""
+    with open(output_file, "w", encoding="utf-8") as f:
+        write_combination_output(lines, translation_maps, transliteration_maps, f)
+
+
+def build_output_maps(
+    lines,
+    target_languages,
+    enable_transliteration,
+    enable_styling,
+    shared_translation_maps=None,
+    shared_transliteration_maps=None,
 ):
-    """Optimized version that caches translations and transliterations"""
-    # Read and transform the SRT file with encoding detection
-    encoding = detect_encoding(srt_path)
-    try:
-        with open(srt_path, "r", encoding=encoding) as f:
-            lines = f.readlines()
-    except UnicodeDecodeError:
-        # Fallback to latin-1
-        with open(srt_path, "r", encoding="latin-1") as f:
-            lines = f.readlines()
+    """Build per-file translation and transliteration maps keyed by stripped line
+
+    shared_translation_maps / shared_transliteration_maps are job-level maps
+    (lang -> normalized line -> text) filled by process_zip_of_srts as the
+    scheduler translates each file's new lines; segments found there are not
+    translated again.
+    """
+    shared_translation_maps = shared_translation_maps or {}
+    shared_transliteration_maps = shared_transliteration_maps or {}
 
     # Create translation and transliteration mappings
     translation_maps = {lang: {} for lang in target_languages}
     transliteration_maps = {lang: {} for lang in target_languages}
 
     # First pass: identify all unique text segments that need translation
-    text_segments = set()
-    for line in lines:
-        stripped = line.strip()
-        if (
-            stripped
-            and not re.match(r"^\d+$", stripped)
-            and not re.match(r"^\d{2}:\d{2}:\d{2},\d{3} --> \d{2}:\d{2}:\d{2},\d{3}$", stripped)
-        ):
-            text_segments.add(stripped)
+    text_segments = {line.strip() for line in lines if is_subtitle_text_line(line.strip())}
 
     # Pre-translate all unique segments for each language
     for lang in target_languages:
+        shared_translations = shared_translation_maps.get(lang, {})
+        shared_transliterations = shared_transliteration_maps.get(lang, {})
         for segment in text_segments:
-            translated = apply_subtitle_style(
-                cached_translate_text(segment, lang), lang, enable_styling
-            )
+            key = normalize_subtitle_line(segment)
+            if key in shared_translations:
+                translated = shared_translations[key]
+            else:
+                translated = cached_translate_text(segment, lang)
+            translated = apply_subtitle_style(translated, lang, enable_styling)
             translation_maps[lang][segment] = translated
 
             if should_transliterate(lang, enable_transliteration):
-                transliteration_maps[lang][segment] = cached_transliterate(translated, lang)
+                if key in shared_transliterations:
+                    transliteration_maps[lang][segment] = shared_transliterations[key]
+                else:
+                    transliteration_maps[lang][segment] = cached_transliterate(translated, lang)
+
+    return translation_maps, transliteration_maps
+
+
+def select_output_combinations(target_languages, combination_sizes=None):
+    """Language tuples to emit: every single language plus the requested k-way combinations
+
+    combination_sizes=None keeps the default of one all-languages combination;
+    e.g. (2,) asks for every pair and (2, 3) for every pair and triple.
+    """
+    combos = [(lang,) for lang in target_languages]
+    if combination_sizes is None:
+        # For 3 languages, also include the 3-way combination
+        if 1 < len(target_languages) <= 15:
+            combos.append(tuple(target_languages))
+        return combos
+
+    for size in sorted(set(combination_sizes)):
+        if 2 <= size <= len(target_languages):
+            combos.extend(combinations(target_languages, size))
+    return combos
+
+
+def render_srt_outputs(
+    base_name,
+    lines,
+    target_languages,
+    translation_maps,
+    transliteration_maps,
+    enable_transliteration,
+    combination_sizes=None,
+):
+    """Render every output SRT of one input file into memory
+
+    All outputs are written during a single pass over the cues.
+
+    Returns:
+        List of (archive name, SRT content) in a stable order
+    """
+    combos = select_output_combinations(target_languages, combination_sizes)
+    transliteration_maps = {
+        lang: transliteration_maps[lang]
+        for lang in target_languages
+        if should_transliterate(lang, enable_transliteration)
+    }
+
+    contents = render_combination_outputs(lines, translation_maps, transliteration_maps, combos)
+    return [
+        (f"{base_name}_{'_'.join(combo)}.srt", content) for combo, content in zip(combos, contents)
+    ]
+
+
+def render_single_srt_file(
+    srt_path,
+    target_languages,
+    enable_transliteration,
+    enable_styling,
+    lines=None,
+    shared_translation_maps=None,
+    shared_transliteration_maps=None,
+    combination_sizes=None,
+):
+    """Translate one SRT and render all of its outputs in memory"""
+    if lines is None:
+        lines = read_subtitle_lines(srt_path)
+
+    translation_maps, transliteration_maps = build_output_maps(
+        lines,
+        target_languages,
+        enable_transliteration,
+        enable_styling,
+        shared_translation_maps,
+        shared_transliteration_maps,
+    )
 
-    # Process all output files in one pass
     base_name = os.path.splitext(os.path.basename(srt_path))[0]
-    temp_dir = tempfile.mkdtemp()
-    output_files = []
+    return render_srt_outputs(
+        base_name,
+        lines,
+        target_languages,
+        translation_maps,
+        transliteration_maps,
+        enable_transliteration,
+        combination_sizes,
+    )
 
-    # 1. Generate single language files
-    for lang in target_languages:
-        output_file = os.path.join(temp_dir, f"{base_name}_{lang}.srt")
-        generate_single_language_output(
-            lines,
-            translation_maps[lang],
-            (
-                transliteration_maps[lang]
-                if should_transliterate(lang, enable_transliteration)
-                else None
-            ),
-            output_file,
-        )
-        output_files.append(output_file)
 
-    # 2. Generate combinations (limit to practical combinations)
-    practical_combinations = []
-    if len(target_languages) > 1:
-        # Only generate 2-language combinations if we have many languages
-        # practical_combinations = list(combinations(target_languages, 2))
-        if len(target_languages) <= 15:  # For 3 languages, also include the 3-way combination
-            practical_combinations.append(tuple(target_languages))
-
-    for combo in practical_combinations:
-        combo_name = "_".join(combo)
-        output_file = os.path.join(temp_dir, f"{base_name}_{combo_name}.srt")
-        generate_combination_output(
-            lines,
-            {lang: translation_maps[lang] for lang in combo},
-            {
-                lang: transliteration_maps[lang]
-                for lang in combo
-                if should_transliterate(lang, enable_transliteration)
-            },
-            output_file,
-        )
-        output_files.append(output_file)
+def optimized_process_single_srt_file(
+    srt_path,
+    target_languages,
+    enable_transliteration,
+    enable_styling,
+    lines=None,
+    shared_translation_maps=None,
+    shared_transliteration_maps=None,
+    combination_sizes=None,
+):
+    """Optimized version that caches translations and transliterations
+
+    If the caller already holds the decoded lines (e.g. from merge_subtitle_lines),
+    pass them as lines to skip re-reading and re-detecting the file.
+    Outputs are rendered in memory and written straight into the zip.
+    combination_sizes selects extra k-way combinations (see select_output_combinations).
+    """
+    outputs = render_single_srt_file(
+        srt_path,
+        target_languages,
+        enable_transliteration,
+        enable_styling,
+        lines,
+        shared_translation_maps,
+        shared_transliteration_maps,
+        combination_sizes=combination_sizes,
+    )
 
     # Create zip file
-    zip_path = os.path.join(temp_dir, f"{base_name}.zip")
+    base_name = os.path.splitext(os.path.basename(srt_path))[0]
+    zip_path = os.path.join(tempfile.mkdtemp(), f"{base_name}.zip")
     with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-        for file in output_files:
-            zipf.write(file, arcname=os.path.basename(file))
-
-    # Clean up
-    for file in output_files:
-        try:
-            os.remove(file)
-        except OSError:
-            pass
+        for name, content in outputs:
+            zipf.writestr(name, content)
 
     return zip_path
 
 
+def write_single_language_output(lines, translation_map, transliteration_map, f):
+    """Write a single language output to an open text stream"""
+    write_combination_outputs(
+        lines,
+        {None: translation_map},
+        {None: transliteration_map} if transliteration_map else {},
+        [(None,)],
+        [f],
+    )
+
+
 def generate_single_language_output(lines, translation_map, transliteration_map, output_file):
     """Generate output for a single language"""
     with open(output_file, "w", encoding="utf-8") as f:
-        i = 0
-        total_lines = len(lines)
-        while i < total_lines:
-            line = lines[i]
-            stripped = line.strip()
-
-            if stripped.isdigit():  # Line number
-                f.write(line)
-                i += 1
-                if i < total_lines and re.match(
-                    r"^\d{2}:\d{2}:\d{2},\d{3} --> \d{2}:\d{2}:\d{2},\d{3}$", lines[i].strip()
-                ):
-                    f.write(lines[i])
-                    i += 1
-                    while i < total_lines and lines[i].strip():
-                        original = lines[i].strip()
-                        f.write(lines[i])
-                        if original in translation_map:
-                            f.write(translation_map[original] + "\n")
-                            if (
-                                transliteration_map
-                                and original in transliteration_map
-                                and transliteration_map[original]
-                            ):
-                                f.write(transliteration_map[original] + "\n")
-                        i += 1
-                    if i < total_lines and not lines[i].strip():
-                        f.write("\n")
-                        i += 1
-                continue
-
-            f.write(line)
-            i += 1
+        write_single_language_output(lines, translation_map, transliteration_map, f)
 
 
-def merge_subtitle_lines(input_file, output_file=None):
-    # Read the SRT file with encoding detection
-    encoding = detect_encoding(input_file)
-    try:
-        with open(input_file, "r", encoding=encoding) as f:
-            content = f.read()
-    except UnicodeDecodeError:
-        # Fallback to latin-1
-        with open(input_file, "r", encoding="latin-1") as f:
-            content = f.read()
-
+def merge_subtitle_content(content):
+    """Merge multi-line cues of SRT text into one line each"""
     # Split into individual subtitle blocks
     blocks = re.split(r"\n\n+", content.strip())
     processed_blocks = []
@@ -696,7 +760,13 @@ def merge_subtitle_lines(input_file, output_file=None):
         processed_blocks.append(processed_block)
 
     # Join all blocks with double newlines
-    merged_content = "\n\n".join(processed_blocks)
+    return "\n\n".join(processed_blocks)
+
+
+def merge_subtitle_lines(input_file, output_file=None):
+    """Merge multi-line cues into one line each; returns the merged content"""
+    # Read the SRT file with encoding detection
+    merged_content = merge_subtitle_content(read_subtitle_text(input_file))
 
     # Write to output file or overwrite input file
     if output_file is None:
@@ -705,67 +775,119 @@ def merge_subtitle_lines(input_file, output_file=None):
     with open(output_file, "w", encoding="utf-8") as f:
         f.write(merged_content)
 
+    return merged_content
+
+
+def transliterate_translation_maps(translation_maps, languages):
+    """CPU stage: transliterate translated lines (runs in a worker process)"""
+    transliteration_maps = {}
+    for lang in languages:
+        # One filtering pass over all of this language's lines
+        filtered = filter_translated_lines(list(translation_maps[lang].values()), lang)
+        transliteration_maps[lang] = {
+            line: transliterate(text, lang) if text else ""
+            for line, text in zip(translation_maps[lang], filtered)
+        }
+    return transliteration_maps
+
 
 def process_zip_of_srts(
-    input_zip_path, target_languages, enable_transliteration=False, enable_styling=False
+    input_zip_path,
+    target_languages,
+    enable_transliteration=False,
+    enable_styling=False,
+    io_workers=None,
+    cpu_workers=None,
+    translate_batch=None,
+    combination_sizes=None,
+    translation_memory=None,
+    progress=None,
 ):
-    """Optimized processing of zip file containing SRTs"""
-    temp_dir = tempfile.mkdtemp()
+    """Optimized processing of zip file containing SRTs
+
+    SRTs are read straight from the input zip and every output is rendered in
+    memory and streamed into the combined zip once; nothing touches disk in between.
+
+    Translation of the lines each file introduces runs on the scheduler's thread
+    pool (io_workers) and transliteration on its process pool (cpu_workers), so
+    file A is transliterated while file B is still being translated.
+    translate_batch(texts, lang) defaults to batch_translate_texts.
+    combination_sizes selects extra k-way combinations, e.g. (2,) for every pair.
+    translation_memory (a TranslationMemory) answers lines it has seen before and
+    remembers every new translation that succeeded.
+    progress(done, total) is called as each SRT file is written.
+    """
+    translate_batch = translate_batch or batch_translate_texts
+    if translation_memory is not None:
+        translate_batch = memory_batch_translate(translation_memory, translate_batch)
 
-    # Extract all SRT files
+    # Read and merge all SRT files (each file is decoded only once)
+    srt_lines = {}
     with zipfile.ZipFile(input_zip_path, "r") as zip_ref:
-        zip_ref.extractall(temp_dir)
-
-    # Find SRT files
-    srt_files = []
-    for root, _, files in os.walk(temp_dir):
-        for file in files:
-            if file.lower().endswith(".srt"):
-                merge_subtitle_lines(os.path.join(root, file), None)
-                srt_files.append(os.path.join(root, file))
+        for file_info in zip_ref.infolist():
+            if file_info.is_dir() or not file_info.filename.lower().endswith(".srt"):
+                continue
+            content, _ = decode_subtitle_bytes(zip_ref.read(file_info))
+            merged_content = merge_subtitle_content(content)
+            srt_lines[file_info.filename] = io.StringIO(merged_content).readlines()
 
-    if not srt_files:
+    if not srt_lines:
         raise ValueError("No SRT files found in the input zip")
 
-    # Process files in parallel (but limit to 4 workers for small files)
-    zip_paths = []
-    with ThreadPoolExecutor(max_workers=min(4, len(srt_files))) as executor:
-        futures = []
-        for srt_path in srt_files:
-            futures.append(
-                executor.submit(
-                    optimized_process_single_srt_file,
-                    srt_path,
-                    target_languages,
-                    enable_transliteration,
-                    enable_styling,
-                )
-            )
+    # Every unique line of the whole job is translated once, by the first file using it
+    plan = build_translation_plan(srt_lines)
+    report = plan.report(target_languages)
+    print(
+        f"Translation plan: {report['unique_lines']} unique of {report['text_lines']} lines "
+        f"in {report['files']} files (dedup ratio {report['dedup_ratio']:.1%}, "
+        f"{report['requests_saved']} requests saved)"
+    )
+    new_lines_by_file = plan.lines_by_file()
+    transliterated_languages = [
+        lang for lang in target_languages if should_transliterate(lang, enable_transliteration)
+    ]
+    shared_translation_maps = {lang: {} for lang in target_languages}
+    shared_transliteration_maps = {lang: {} for lang in transliterated_languages}
 
-        for future in futures:
-            zip_paths.append(future.result())
+    def translate_stage(srt_name):
+        return translate_lines(
+            new_lines_by_file.get(srt_name, []), target_languages, translate_batch
+        )
+
+    transliterate_stage = partial(
+        transliterate_translation_maps, languages=transliterated_languages
+    )
 
-    # Create combined zip
     combined_zip_path = input_zip_path.replace(".zip", "_combined.zip")
-    with zipfile.ZipFile(combined_zip_path, "w", zipfile.ZIP_DEFLATED) as combined_zip:
-        for zip_path in zip_paths:
-            with zipfile.ZipFile(zip_path, "r") as zip_ref:
-                for file_info in zip_ref.infolist():
-                    with zip_ref.open(file_info) as file:
-                        combined_zip.writestr(file_info.filename, file.read())
-
-    # Cleanup
-    for zip_path in zip_paths:
-        try:
-            os.remove(zip_path)
-        except OSError:
-            pass
-    try:
-        for srt_path in srt_files:
-            os.remove(srt_path)
-        os.rmdir(temp_dir)
-    except OSError:
-        pass
+    with SubtitleJobScheduler(io_workers, cpu_workers) as scheduler, zipfile.ZipFile(
+        combined_zip_path, "w", zipfile.ZIP_DEFLATED
+    ) as combined_zip:
+        # Files come back in order, so lines introduced by earlier files are already mapped
+        for done, (srt_name, translations, transliterations) in enumerate(
+            scheduler.pipeline(srt_lines, translate_stage, transliterate_stage), 1
+        ):
+            for lang in target_languages:
+                shared_translation_maps[lang].update(translations[lang])
+            for lang in transliterated_languages:
+                shared_transliteration_maps[lang].update(transliterations[lang])
+
+            # Stream this file's outputs into the combined zip right away
+            for name, content in render_single_srt_file(
+                srt_name,
+                target_languages,
+                enable_transliteration,
+                enable_styling,
+                srt_lines[srt_name],
+                shared_translation_maps,
+                shared_transliteration_maps,
+                combination_sizes=combination_sizes,
+            ):
+                combined_zip.writestr(name, content)
+            if progress is not None:
+                progress(done, len(srt_lines))
+
+    if translation_memory is not None:
+        print(f"Translation memory: {translation_memory.stats()}")
 
     return combined_zip_path
 
@@ -775,6 +897,8 @@ def filter_md_by_language(input_file: str, target_language: str) -> str:
     Filters the text in a Markdown file based on the target language, keeping only text
     that matches the specified language's character set.
 
+    The file is streamed block by block, so its size does not bound memory.
+
     Args:
         input_file: Path to the input Markdown file
         target_language: Language code for filtering (e.g., 'hi' for Hindi)
@@ -782,37 +906,20 @@ def filter_md_by_language(input_file: str, target_language: str) -> str:
     Returns:
         Path to the output filtered Markdown file
     """
-    # Read the Markdown file with encoding detection
-    encoding = detect_encoding(input_file)
-    try:
-        with open(input_file, "r", encoding=encoding) as f:
-            lines = f.readlines()
-    except UnicodeDecodeError:
-        # Fallback to latin-1
-        with open(input_file, "r", encoding="latin-1") as f:
-            lines = f.readlines()
-
-    # Prepare output lines
-    output_lines = []
+    language = LANGUAGE_CODE_MAP[target_language]
 
-    for line in lines:
-        # Skip Markdown syntax lines (headers, lists, etc.)
-        if re.match(r"^[#]", line.strip()):
-            output_lines.append(line)
-            continue
+    def filter_line(line, kind):
+        # Keep Markdown headers as they are
+        if line.strip().startswith("#"):
+            return line + "\n"
 
         # Process regular text lines
-        filtered_text = filter_language_characters_preserve_spaces(
-            line, target_language=LANGUAGE_CODE_MAP[target_language]
-        )
-        if filtered_text:
-            output_lines.append(filtered_text + "\n")
+        filtered_text = filter_language_characters_preserve_spaces(line, target_language=language)
+        return filtered_text + "\n" if filtered_text else ""
 
-    # Write output file
     output_file = input_file.replace(".md", f"_{target_language}_filtered.md")
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.writelines(output_lines)
-
+    with open_subtitle_stream(input_file) as f:
+        stream_markdown(iter_bounded_lines(f), output_file, filter_line)
     return output_file
 
 
@@ -825,9 +932,15 @@ if __name__ == "__main__":
 
     # set timer
     start_time = time.time()
-    combined_zip = process_zip_of_srts(
-        input_zip_path, target_languages, enable_transliteration=True, enable_styling=False
-    )
+    # Set SUBTITLE_TRANSLATION_MEMORY to a .db path to reuse translations across runs
+    with open_translation_memory() as translation_memory:
+        combined_zip = process_zip_of_srts(
+            input_zip_path,
+            target_languages,
+            enable_transliteration=True,
+            enable_styling=False,
+            translation_memory=translation_memory,
+        )
 
     # end timer
     end_time = time.time()
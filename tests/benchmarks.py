@@ -0,0 +1,399 @@
+import argparse
+import atexit
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import zipfile
+from contextlib import redirect_stdout
+from datetime import datetime
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT_DIR)
+
+TESTS_DIR = os.path.join(ROOT_DIR, "tests")
+MARKDOWN_FIXTURE = os.path.join(TESTS_DIR, "main-test.md")
+SRT_FIXTURE = os.path.join(TESTS_DIR, "More-tests", "test.srt")
+SRT_ZIP_FIXTURE = os.path.join(TESTS_DIR, "More-tests", "test1.zip")
+EPUB_FIXTURE = os.path.join(TESTS_DIR, "More-tests", "ebook.epub")
+EPUB_CHAPTER = "EPUB/text/ch001.xhtml"
+
+# Sections of main-test.md written in a script transliterate() handles
+TRANSLITERATED_SECTIONS = {
+    "Russian": "russian",
+    "Chinese": "chinese",
+    "Japanese": "japanese",
+    "Hindi": "hindi",
+    "Arabic": "arabic",
+    "Korean": "korean",
+}
+# A later median this much slower than the baseline counts as a regression
+DEFAULT_THRESHOLD = 0.2
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """
+    Registers a benchmark: a setup function returning the callable to time.
+
+    Setup work (reading fixtures, importing modules) is not timed.
+    """
+
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+def markdown_sections(path=MARKDOWN_FIXTURE):
+    """{language: paragraph} for the "## Language (English name)" sections of main-test.md"""
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+    sections = {}
+    for header, body in re.findall(r"^## (.+)\n+(.+)", content, re.MULTILINE):
+        name = header.split("(")[-1].rstrip(")").strip()
+        sections[name] = body.strip()
+    return sections
+
+
+def transliterate_setup(language):
+    def setup():
+        from transliteration.transliteration import transliterate
+
+        text = markdown_sections()[language]
+        return lambda: transliterate(text, TRANSLITERATED_SECTIONS[language])
+
+    return setup
+
+
+for _language in TRANSLITERATED_SECTIONS:
+    benchmark(f"transliterate[{_language.lower()}]")(transliterate_setup(_language))
+
+
+@benchmark("add_furigana[japanese]")
+def add_furigana_japanese():
+    from transliteration.transliteration import add_furigana, transliterate
+
+    text = markdown_sections()["Japanese"]
+    readings = transliterate(text, "japanese")
+    return lambda: add_furigana(text, readings, "japanese")
+
+
+@benchmark("add_furigana[russian]")
+def add_furigana_russian():
+    from transliteration.transliteration import add_furigana, transliterate
+
+    text = markdown_sections()["Russian"]
+    reading = transliterate(text, "russian")
+    return lambda: add_furigana(text, reading, "russian")
+
+
+def japanese_sentences():
+    text = markdown_sections()["Japanese"]
+    return [sentence + "。" for sentence in text.split("。") if sentence.strip()]
+
+
+@benchmark("analyze_sentences[mecab,bulk]")
+def mecab_bulk():
+    from web.japanese_analysis import JapaneseSentenceAnalyzer
+
+    analyzer = JapaneseSentenceAnalyzer()
+    sentences = japanese_sentences()
+    return lambda: analyzer.analyze_sentences(sentences, translate=False)
+
+
+@benchmark("analyze_sentences[mecab,per-sentence]")
+def mecab_per_sentence():
+    from web.japanese_analysis import JapaneseSentenceAnalyzer
+
+    analyzer = JapaneseSentenceAnalyzer()
+    sentences = japanese_sentences()
+    return lambda: [analyzer.analyze_sentence(sentence, translate=False) for sentence in sentences]
+
+
+@benchmark("get_pinyin_annotations")
+def pinyin_annotations():
+    from transliteration.transliteration import get_pinyin_annotations
+
+    text = markdown_sections()["Chinese"]
+    return lambda: get_pinyin_annotations(text, color_coded=True)
+
+
+# The seven codes filter_language_characters is called with by the subtitle tools
+FILTER_LANGUAGES = ("zh-CN", "zh-ch", "ja", "ko", "hi", "ar", "ru")
+
+
+def multilingual_srt_lines(count=10_000):
+    """Text lines of a combined subtitle: the English line, then a translation in some script"""
+    from subtitles.srt_ingest import read_subtitle_text
+    from subtitles.timeline import Timeline
+
+    english = [
+        line
+        for text in Timeline.from_srt(read_subtitle_text(SRT_FIXTURE)).texts
+        for line in text.split("\n")
+    ]
+    translations = [
+        sentence
+        for name in TRANSLITERATED_SECTIONS
+        for sentence in re.split(r"(?<=[.!?。।])\s*", markdown_sections()[name])
+        if sentence
+    ]
+    return [
+        f"{english[index % len(english)]} {translations[index % len(translations)]}"
+        for index in range(count)
+    ]
+
+
+@benchmark("filter_language_characters[10k srt lines,7 languages]")
+def filter_per_line():
+    from transliteration.filter_language_characters import filter_language_characters
+
+    lines = multilingual_srt_lines()
+    return lambda: [
+        filter_language_characters(line, language)
+        for line in lines
+        for language in FILTER_LANGUAGES
+    ]
+
+
+@benchmark("filter_lines[10k srt lines,7 languages]")
+def filter_bulk():
+    from transliteration.filter_language_characters import filter_lines
+
+    lines = multilingual_srt_lines()
+    return lambda: [filter_lines(lines, language) for language in FILTER_LANGUAGES]
+
+
+@benchmark("process_html_content[hindi]")
+def html_content():
+    from bs4 import BeautifulSoup
+
+    from transliteration.html2transliteration import process_html_content
+
+    with zipfile.ZipFile(EPUB_FIXTURE) as epub_zip:
+        html = epub_zip.read(EPUB_CHAPTER).decode("utf-8")
+    # process_html_content rewrites the soup, so every call parses a fresh one
+    return lambda: process_html_content(BeautifulSoup(html, "html.parser"), "hindi")
+
+
+@benchmark("srt_parse")
+def srt_parse():
+    from subtitles.srt_ingest import read_subtitle_text
+    from subtitles.timeline import Timeline
+
+    content = read_subtitle_text(SRT_FIXTURE)
+    return lambda: Timeline.from_srt(content)
+
+
+@benchmark("srt_render")
+def srt_render():
+    from subtitles.srt_ingest import read_subtitle_text
+    from subtitles.timeline import Timeline
+
+    timeline = Timeline.from_srt(read_subtitle_text(SRT_FIXTURE))
+    return timeline.to_srt
+
+
+@benchmark("process_zip_of_srts[zh-ch,ja]")
+def zip_of_srts():
+    from subtitles.benchmark_scheduler import StubTranslator
+    from subtitles.zip2zipMultilingual import process_zip_of_srts
+
+    # The pipeline writes its combined zip next to the input
+    temp_dir = tempfile.mkdtemp()
+    atexit.register(shutil.rmtree, temp_dir, True)
+    zip_path = os.path.join(temp_dir, os.path.basename(SRT_ZIP_FIXTURE))
+    shutil.copy(SRT_ZIP_FIXTURE, zip_path)
+
+    def run():
+        process_zip_of_srts(
+            zip_path,
+            ["zh-ch", "ja"],
+            enable_transliteration=True,
+            translate_batch=StubTranslator(latency=0),
+        )
+
+    return run
+
+
+@benchmark("live_preview_update[10k lines,one edit]")
+def live_preview_update():
+    from web.live_preview import PreviewDocument, read_blocks
+
+    # 5000 two-line paragraphs of the fixture's Russian text, one of them edited per call
+    sentences = markdown_sections()["Russian"].split(". ")
+    paragraphs = [
+        f"{sentences[index % len(sentences)]} {index}.\n{sentences[(index + 1) % len(sentences)]}"
+        for index in range(5000)
+    ]
+    temp_dir = tempfile.mkdtemp()
+    atexit.register(shutil.rmtree, temp_dir, True)
+    path = os.path.join(temp_dir, "notes.md")
+    document = PreviewDocument()
+    edits = iter(range(10**9))
+
+    def write(edit=None):
+        if edit is not None:
+            paragraphs[2500] = f"{sentences[0]} ({edit})"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n\n".join(paragraphs))
+
+    write()
+    document.update(read_blocks(path, "russian"))
+
+    def run():
+        write(next(edits))
+        document.update(read_blocks(path, "russian"))
+
+    return run
+
+
+def time_callable(func, repeat=5, min_time=0.2):
+    """
+    Seconds per call: the loop count is grown until one run takes min_time,
+    then repeat runs are timed (timeit's autorange, asv style). One untimed
+    call first loads dictionaries and fills lazy caches.
+    """
+    func()
+    timer = timeit.Timer(func)
+    loops = 1
+    while True:
+        elapsed = timer.timeit(loops)
+        if elapsed >= min_time or loops >= 1_000_000:
+            break
+        loops *= 10 if elapsed < min_time / 10 else 2
+    runs = [timer.timeit(loops) / loops for _ in range(repeat)]
+    return {
+        "min": min(runs),
+        "median": statistics.median(runs),
+        "mean": statistics.mean(runs),
+        "stdev": statistics.stdev(runs) if len(runs) > 1 else 0.0,
+        "loops": loops,
+        "repeat": repeat,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(names=None, repeat=5, min_time=0.2, quiet=True):
+    """
+    Runs the selected benchmarks (all by default).
+
+    A benchmark whose setup or first call fails (a missing optional dependency)
+    is recorded with its error instead of timings.
+
+    Returns:
+        {"metadata": {...}, "benchmarks": {name: timings or {"error": ...}}}
+    """
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if names and not any(selected in name for selected in names):
+            continue
+        start = time.perf_counter()
+        try:
+            func = setup()
+            # The pipelines report progress with print(); keep the table readable
+            with open(os.devnull, "w") as devnull, redirect_stdout(
+                devnull if quiet else sys.stdout
+            ):
+                timings = time_callable(func, repeat, min_time)
+        except Exception as e:
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+            print(f"{name:<36} error: {results[name]['error']}")
+            continue
+        results[name] = {key: round(value, 9) for key, value in timings.items()}
+        print(
+            f"{name:<36} {timings['median'] * 1000:>10.3f} ms "
+            f"(±{timings['stdev'] * 1000:.3f}, {timings['loops']} loops, "
+            f"{time.perf_counter() - start:.1f}s)"
+        )
+
+    return {
+        "metadata": {
+            "commit": git_commit(),
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "benchmarks": results,
+    }
+
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Median ratio current/baseline for benchmarks timed in both runs.
+
+    Returns:
+        List of (name, baseline median, current median, ratio, regressed)
+    """
+    rows = []
+    for name, timings in current["benchmarks"].items():
+        before = baseline["benchmarks"].get(name, {})
+        if "median" not in timings or "median" not in before:
+            continue
+        ratio = timings["median"] / before["median"]
+        rows.append((name, before["median"], timings["median"], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def print_comparison(rows, baseline, current):
+    print(
+        f"\n{baseline['metadata'].get('commit')} -> {current['metadata'].get('commit')} "
+        "(median ms)"
+    )
+    for name, before, after, ratio, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<36} {before * 1000:>10.3f} {after * 1000:>10.3f} {ratio:>6.2f}x{flag}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the transliteration hot paths")
+    parser.add_argument("--output", help="JSON results file (default benchmark-<commit>.json)")
+    parser.add_argument("--compare", help="Earlier JSON results to compare against")
+    parser.add_argument("--bench", action="append", help="Only benchmarks containing this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per timed run")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--list", action="store_true", help="List benchmarks and exit")
+    parser.add_argument("--verbose", action="store_true", help="Keep the pipelines' output")
+    args = parser.parse_args()
+
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        sys.exit(0)
+
+    current = run_benchmarks(args.bench, args.repeat, args.min_time, quiet=not args.verbose)
+    output = args.output or f"benchmark-{current['metadata']['commit'] or 'local'}.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(current, f, indent=2, ensure_ascii=False)
+    print(f"Results saved to {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare_results(baseline, current, args.threshold)
+        print_comparison(rows, baseline, current)
+        if any(regressed for *_, regressed in rows):
+            sys.exit(1)
@@ -22,6 +22,7 @@ from .transliteration import (
     is_punctuation,
     transliterate,
     transliterate_for_subtitles,
+    transliterate_many,
 )
 
 # 3. Explicit exports
@@ -33,6 +34,7 @@ __all__ = [
     "TARGET_PATTERNS",
     "filter_language_characters",
     "transliterate",
+    "transliterate_many",
     "add_furigana",
     "is_latin" "transliterate_for_subtitles",
 ]
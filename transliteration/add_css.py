@@ -22,7 +22,8 @@ def get_css_file(language, epub_folder):
     """Returns the destination path for the CSS file after copying it to the EPUB folder"""
     # Always use the unified multilingual CSS file
     css_filename = "styles-multilingual.css"
-    source_path = f"/home/zaya/Downloads/Zayas/ZayasTransliteration/transliteration/{css_filename}"
+    # Shipped next to this module, wherever the checkout (or the container's /app) is
+    source_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), css_filename)
 
     # Determine destination folder
     styles_path, structure = ensure_styles_folder(epub_folder)
@@ -4,6 +4,11 @@ import shutil
 from bs4 import BeautifulSoup
 from datetime import datetime
 
+# Folder of the bing<N>.png cover images picked at random
+COVER_DIR = os.environ.get(
+    "TRANSLITERATION_COVER_DIR", "/home/zaya/Downloads/Zayas/zayaweb/static/css/img/Bing"
+)
+
 
 def add_metadata_and_cover(epub_folder, base_name, language, date=None):
     """
@@ -89,40 +94,42 @@ def add_metadata_and_cover(epub_folder, base_name, language, date=None):
 
     # Copy the cover image to the EPUB folder
     random_number = random.randint(1, 211)
-    source_image_path = (
-        f"/home/zaya/Downloads/Zayas/zayaweb/static/css/img/Bing/bing{random_number}.png"
-    )
-    media_folder = (
-        os.path.join(epub_folder, "EPUB", "media")
-        if os.path.exists(os.path.join(epub_folder, "EPUB"))
-        else os.path.join(epub_folder, "OEBPS", "media")
-    )
-    os.makedirs(media_folder, exist_ok=True)
-    dest_image_path = os.path.join(media_folder, f"bing{random_number}.png")
-    shutil.copy(source_image_path, dest_image_path)
-
-    # Add cover image to the manifest
-    cover_item = opf_soup.find("item", id="cover")
-    if cover_item:
-        cover_item["href"] = os.path.relpath(dest_image_path, os.path.dirname(opf_path))
+    source_image_path = os.path.join(COVER_DIR, f"bing{random_number}.png")
+    if not os.path.exists(source_image_path):
+        # The cover images are not part of the repository (e.g. in the container)
+        print(f"Cover image {source_image_path} not found; the cover is left as it is")
     else:
-        cover_item = opf_soup.new_tag(
-            "item",
-            attrs={
-                "id": "cover",
-                "href": os.path.relpath(dest_image_path, os.path.dirname(opf_path)),
-                "media-type": "image/png",
-            },
+        media_folder = (
+            os.path.join(epub_folder, "EPUB", "media")
+            if os.path.exists(os.path.join(epub_folder, "EPUB"))
+            else os.path.join(epub_folder, "OEBPS", "media")
         )
-        opf_soup.manifest.append(cover_item)
-
-    # Add <meta name="cover">
-    meta_cover = opf_soup.find("meta", attrs={"name": "cover"})
-    if meta_cover:
-        meta_cover["content"] = "cover"
-    else:
-        meta_cover = opf_soup.new_tag("meta", attrs={"name": "cover", "content": "cover"})
-        opf_soup.metadata.append(meta_cover)
+        os.makedirs(media_folder, exist_ok=True)
+        dest_image_path = os.path.join(media_folder, f"bing{random_number}.png")
+        shutil.copy(source_image_path, dest_image_path)
+
+        # Add cover image to the manifest
+        cover_item = opf_soup.find("item", id="cover")
+        if cover_item:
+            cover_item["href"] = os.path.relpath(dest_image_path, os.path.dirname(opf_path))
+        else:
+            cover_item = opf_soup.new_tag(
+                "item",
+                attrs={
+                    "id": "cover",
+                    "href": os.path.relpath(dest_image_path, os.path.dirname(opf_path)),
+                    "media-type": "image/png",
+                },
+            )
+            opf_soup.manifest.append(cover_item)
+
+        # Add <meta name="cover">
+        meta_cover = opf_soup.find("meta", attrs={"name": "cover"})
+        if meta_cover:
+            meta_cover["content"] = "cover"
+        else:
+            meta_cover = opf_soup.new_tag("meta", attrs={"name": "cover", "content": "cover"})
+            opf_soup.metadata.append(meta_cover)
 
     # Update <guide> section
     guide = opf_soup.find("guide")
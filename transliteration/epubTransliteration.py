@@ -29,13 +29,14 @@ def verify_language(language: str) -> None:
         sys.exit(1)
 
 
-def process_epub(epub_path: str, language: str) -> str:
+def process_epub(epub_path: str, language: str, progress=None) -> str:
     """
     Processes an EPUB for transliteration:
     1. Extracts EPUB
     2. Transliterates text in HTML files
     3. Adds metadata/cover
     4. Repackages into new EPUB
+    progress(done, total) is called after each transliterated HTML file.
     Returns path to the generated EPUB.
     """
     base_name = os.path.basename(epub_path).replace(".epub", "")
@@ -52,7 +53,13 @@ def process_epub(epub_path: str, language: str) -> str:
         # Process HTML files (transliteration)
         text_folder = find_text_folder(extract_to)
         print(f"Text folder found: {text_folder}")
-        process_folder(text_folder, language, enable_transliteration=True, epub_folder=extract_to)
+        process_folder(
+            text_folder,
+            language,
+            enable_transliteration=True,
+            epub_folder=extract_to,
+            progress=progress,
+        )
 
         # Add metadata and cover
         add_metadata_and_cover(extract_to, base_name + "_transliterated_ccs", language)
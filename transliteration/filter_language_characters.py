@@ -1,4 +1,101 @@
 import re
+from collections import namedtuple
+from functools import lru_cache
+
+# Code point ranges of each script, (first, last) inclusive
+SCRIPT_RANGES = {
+    "han": (  # CJK Unified Ideographs and extensions A-F
+        (0x4E00, 0x9FFF),
+        (0x3400, 0x4DBF),
+        (0x20000, 0x2A6DF),
+        (0x2A700, 0x2B73F),
+        (0x2B740, 0x2B81F),
+        (0x2B820, 0x2CEAF),
+    ),
+    "kana": ((0x3040, 0x309F), (0x30A0, 0x30FF)),  # Hiragana, Katakana
+    "hangul": (
+        (0x1100, 0x11FF),
+        (0x3130, 0x318F),
+        (0xA960, 0xA97F),
+        (0xAC00, 0xD7AF),
+        (0xD7B0, 0xD7FF),
+    ),
+    "devanagari": ((0x0900, 0x097F), (0xA8E0, 0xA8FF), (0x1CD0, 0x1CFF)),
+    "arabic": (
+        (0x0600, 0x06FF),
+        (0x0750, 0x077F),
+        (0x08A0, 0x08FF),
+        (0xFB50, 0xFDFF),
+        (0xFE70, 0xFEFF),
+    ),
+    "cyrillic": ((0x0400, 0x04FF), (0x0500, 0x052F)),
+    "greek": ((0x0370, 0x03FF), (0x1F00, 0x1FFF)),
+    "hebrew": ((0x0590, 0x05FF), (0xFB1D, 0xFB4F)),
+}
+
+# Language code -> (script name, scripts, separator filter_language_characters puts
+# between kept characters: none for scripts written without spaces between words)
+LANGUAGE_SCRIPTS = {
+    "zh-CN": ("Chinese (Han)", ("han",), ""),
+    "zh-ch": ("Chinese (Han)", ("han",), ""),
+    "zh": ("Chinese (Han)", ("han",), ""),
+    "ja": ("Japanese", ("kana", "han"), ""),
+    "jp": ("Japanese", ("kana", "han"), ""),
+    "ko": ("Hangul", ("hangul",), ""),
+    "hi": ("Devanagari", ("devanagari",), " "),
+    "mr": ("Devanagari", ("devanagari",), " "),
+    "ne": ("Devanagari", ("devanagari",), " "),
+    "ar": ("Arabic", ("arabic",), " "),
+    "fa": ("Arabic", ("arabic",), " "),
+    "ur": ("Arabic", ("arabic",), " "),
+    "ru": ("Cyrillic", ("cyrillic",), " "),
+    "uk": ("Cyrillic", ("cyrillic",), " "),
+    "bg": ("Cyrillic", ("cyrillic",), " "),
+    "sr": ("Cyrillic", ("cyrillic",), " "),
+    "el": ("Greek", ("greek",), " "),
+    "he": ("Hebrew", ("hebrew",), " "),
+}
+
+# Joins the lines of a bulk call; no script range contains it
+LINE_SEPARATOR = "\x00"
+
+# Per language: sub() of everything outside the script, the same sparing whitespace,
+# both again sparing LINE_SEPARATOR (bulk calls), and the separator between kept characters
+LanguageFilter = namedtuple(
+    "LanguageFilter",
+    [
+        "remove_other",
+        "remove_other_keep_spaces",
+        "remove_other_keep_lines",
+        "remove_other_keep_spaces_and_lines",
+        "separator",
+    ],
+)
+
+
+@lru_cache(maxsize=None)
+def language_filter(target_language: str) -> LanguageFilter:
+    """
+    Compiled patterns for a language, built on its first use.
+
+    Raises:
+        ValueError: For a language without an entry in LANGUAGE_SCRIPTS
+    """
+    if target_language not in LANGUAGE_SCRIPTS:
+        raise ValueError(f"Unsupported target language: {target_language}")
+    _, scripts, separator = LANGUAGE_SCRIPTS[target_language]
+    ranges = "".join(
+        f"{re.escape(chr(first))}-{re.escape(chr(last))}"
+        for script in scripts
+        for first, last in SCRIPT_RANGES[script]
+    )
+    return LanguageFilter(
+        re.compile(f"[^{ranges}]+").sub,
+        re.compile(rf"[^{ranges}\s]+").sub,
+        re.compile(f"[^{ranges}{LINE_SEPARATOR}]+").sub,
+        re.compile(rf"[^{ranges}\s{LINE_SEPARATOR}]+").sub,
+        separator,
+    )
 
 
 def filter_language_characters(text: str, target_language: str) -> str:
@@ -13,51 +110,11 @@ def filter_language_characters(text: str, target_language: str) -> str:
     Returns:
         Text containing only characters from the target language's script
     """
-    # Define Unicode ranges for different language scripts
-    script_ranges = {
-        "zh-CN": (  # Chinese (Han characters)
-            r"[\u4e00-\u9fff\u3400-\u4dbf\U00020000-\U0002a6df\U0002a700-\U0002b73f\U0002b740-\U0002b81f\U0002b820-\U0002ceaf]",
-            "CJK Unified Ideographs",
-        ),
-        "zh-ch": (  # Chinese (Han characters)
-            r"[\u4e00-\u9fff\u3400-\u4dbf\U00020000-\U0002a6df\U0002a700-\U0002b73f\U0002b740-\U0002b81f\U0002b820-\U0002ceaf]",
-            "CJK Unified Ideographs",
-        ),
-        "hi": (r"[\u0900-\u097F\uA8E0-\uA8FF\u1CD0-\u1CFF]", "Devanagari"),  # Hindi (Devanagari)
-        "ar": (  # Arabic
-            r"[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF]",
-            "Arabic",
-        ),
-        "ja": (  # Japanese (Hiragana, Katakana, Kanji)
-            r"[\u3040-\u309F\u30A0-\u30FF\u4e00-\u9fff\u3400-\u4dbf\U00020000-\U0002a6df\U0002a700-\U0002b73f\U0002b740-\U0002b81f\U0002b820-\U0002ceaf]",
-            "Japanese",
-        ),
-        "ko": (  # Korean (Hangul)
-            r"[\u1100-\u11FF\u3130-\u318F\uA960-\uA97F\uAC00-\uD7AF\uD7B0-\uD7FF]",
-            "Hangul",
-        ),
-        "ru": (r"[\u0400-\u04FF\u0500-\u052F]", "Cyrillic"),  # Russian (Cyrillic)
-    }
-
-    # r'[\u0400-\u04FF\u0500-\u052F]',
-
-    if target_language not in script_ranges:
-        raise ValueError(f"Unsupported target language: {target_language}")
-
-    pattern, _ = script_ranges[target_language]
-    # Find all characters from the target script
-    matched_chars = re.findall(pattern, text)
-    if (
-        target_language == "zh-CN"
-        or target_language == "ja"
-        or target_language == "zh-ch"
-        or target_language == "ko"
-    ):
-        filtered_text = "".join(matched_chars)
-    else:
-        filtered_text = " ".join(matched_chars)
-
-    return filtered_text.strip()
+    compiled = language_filter(target_language)
+    kept = compiled.remove_other("", text)
+    separator = compiled.separator
+    # Alphabetic scripts get a space between every kept character
+    return separator.join(kept) if separator else kept
 
 
 def filter_language_characters_preserve_spaces(text: str, target_language: str) -> str:
@@ -72,51 +129,45 @@ def filter_language_characters_preserve_spaces(text: str, target_language: str)
     Returns:
         Text containing only characters from the target language's script with preserved spaces
     """
-    script_ranges = {
-        "ru": (r"[\u0400-\u04FF\u0500-\u052F]", "Cyrillic"),  # Russian Cyrillic
-        "hi": (r"[\u0900-\u097F\uA8E0-\uA8FF\u1CD0-\u1CFF]", "Devanagari"),  # Hindi (Devanagari)
-        "ar": (  # Arabic
-            r"[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF]",
-            "Arabic",
-        ),
-    }
-
-    if target_language not in script_ranges:
-        raise ValueError(f"Unsupported target language: {target_language}")
-
-    pattern, _ = script_ranges[target_language]
-
-    # Split the text into words while preserving spaces
-    words = text.split()
-    filtered_words = []
+    # Words left without target characters disappear, with their spaces
+    return " ".join(language_filter(target_language).remove_other_keep_spaces("", text).split())
 
-    for word in words:
-        # Find all characters from the target script in this word
-        matched_chars = re.findall(pattern, word)
-        filtered_word = "".join(matched_chars)
 
-        # Only keep the word if it contains target language characters
-        if filtered_word:
-            filtered_words.append(filtered_word)
+def filter_lines(lines, target_language: str, preserve_spaces: bool = False) -> list:
+    """
+    filter_language_characters (or, with preserve_spaces, the _preserve_spaces
+    variant) of every line, with one pattern pass over all of them.
 
-    # Rejoin words with spaces
-    return " ".join(filtered_words)
+    Returns:
+        The filtered lines, in order
+    """
+    if not lines:
+        return []
+    compiled = language_filter(target_language)
+    joined = LINE_SEPARATOR.join(lines)
+    if joined.count(LINE_SEPARATOR) != len(lines) - 1:
+        # A line contains the separator itself: filter line by line
+        filter_line = (
+            filter_language_characters_preserve_spaces
+            if preserve_spaces
+            else filter_language_characters
+        )
+        return [filter_line(line, target_language) for line in lines]
+
+    if preserve_spaces:
+        kept = compiled.remove_other_keep_spaces_and_lines("", joined).split(LINE_SEPARATOR)
+        return [" ".join(line.split()) for line in kept]
+    kept = compiled.remove_other_keep_lines("", joined).split(LINE_SEPARATOR)
+    if not compiled.separator:
+        return kept
+    return [compiled.separator.join(line) for line in kept]
 
 
 def get_language_script_name(target_language: str) -> str:
     """
     Returns the name of the script for a given language code.
     """
-    script_ranges = {
-        "zh-CN": "Chinese (Han)",
-        "zh-ch": "Chinese (Han)",
-        "hi": "Devanagari",
-        "ar": "Arabic",
-        "ja": "Japanese",
-        "ko": "Hangul",
-        "ru": "Cyrillic",
-    }
-    return script_ranges.get(target_language, "Unknown script")
+    return LANGUAGE_SCRIPTS.get(target_language, ("Unknown script",))[0]
 
 
 # Example usage:
@@ -390,15 +390,21 @@ def process_file(input_file, language, enable_transliteration, epub_folder=None)
     print(f"Saved transliterated file: {output_filename}")
 
 
-def process_folder(html_folder, target_language, enable_transliteration=True, epub_folder=None):
+def process_folder(html_folder, target_language, enable_transliteration=True, epub_folder=None, progress=None):
     """
     Processes all HTML files in the specified folder.
+    progress(done, total) is called after each file.
     """
 
-    for filename in os.listdir(html_folder):
-        if filename.lower().endswith((".html", ".htm", ".xhtml", ".xml")):
-            input_filename = os.path.join(html_folder, filename)
-            process_file(input_filename, target_language, enable_transliteration, epub_folder)
+    filenames = [
+        filename for filename in os.listdir(html_folder)
+        if filename.lower().endswith((".html", ".htm", ".xhtml", ".xml"))
+    ]
+    for done, filename in enumerate(filenames, 1):
+        input_filename = os.path.join(html_folder, filename)
+        process_file(input_filename, target_language, enable_transliteration, epub_folder)
+        if progress is not None:
+            progress(done, len(filenames))
 
 
 if __name__ == "__main__":
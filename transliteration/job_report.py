@@ -0,0 +1,112 @@
+# job_report.py
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+class JobReport:
+    """
+    Per-stage wall time and counters for one batch job, safe to share between threads.
+
+    Stages are timed with `with report.stage("translate"):` or merged from the
+    timings a worker process sends back with add_timings().
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.time()
+        self.finished = None
+        self.stages = {}  # stage -> {"seconds": float, "calls": int}
+        self.items = []  # one entry per processed file/row
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage_time(name, time.perf_counter() - start)
+
+    def add_stage_time(self, name, seconds, calls=1):
+        with self._lock:
+            stage = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+            stage["seconds"] += seconds
+            stage["calls"] += calls
+
+    def add_timings(self, timings):
+        for name, seconds in timings.items():
+            self.add_stage_time(name, seconds)
+
+    def add_item(self, **item):
+        with self._lock:
+            self.items.append(item)
+
+    def finish(self):
+        self.finished = time.time()
+        return self
+
+    def to_dict(self):
+        wall_seconds = (self.finished or time.time()) - self.started
+        failed = sum(1 for item in self.items if item.get("status") == "error")
+        return {
+            "job": self.name,
+            "wall_seconds": round(wall_seconds, 4),
+            "items": len(self.items),
+            "failed": failed,
+            "stages": {
+                name: {"seconds": round(stage["seconds"], 4), "calls": stage["calls"]}
+                for name, stage in self.stages.items()
+            },
+            "results": self.items,
+        }
+
+    def write_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return path
+
+
+class ProgressReporter:
+    """
+    Single-line "[done/total] label" progress with rate and ETA.
+
+    Redraws at most every `interval` seconds so it never becomes the bottleneck;
+    quiet=True turns it off entirely.
+    """
+
+    def __init__(self, total, label="items", quiet=False, interval=0.5, stream=None):
+        self.total = total
+        self.label = label
+        self.quiet = quiet
+        self.interval = interval
+        self.stream = stream or sys.stdout
+        self.done = 0
+        self.started = time.perf_counter()
+        self._last_draw = 0.0
+        self._lock = threading.Lock()
+
+    def advance(self, current=None, count=1):
+        with self._lock:
+            self.done += count
+            now = time.perf_counter()
+            if self.quiet or (now - self._last_draw < self.interval and self.done < self.total):
+                return
+            self._last_draw = now
+            self._draw(now, current)
+
+    def _draw(self, now, current):
+        elapsed = now - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        remaining = (self.total - self.done) / rate if rate > 0 else 0.0
+        percent = 100.0 * self.done / self.total if self.total else 100.0
+        suffix = f" {current}" if current else ""
+        self.stream.write(
+            f"\r[{self.done}/{self.total}] {percent:5.1f}% {self.label} "
+            f"{rate:.1f}/s ETA {remaining:.0f}s{suffix}\033[K"
+        )
+        if self.done >= self.total:
+            self.stream.write("\n")
+        self.stream.flush()
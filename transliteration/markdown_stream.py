@@ -0,0 +1,179 @@
+# markdown_stream.py
+import re
+
+# Transliterators are handed text in pieces of at most this many characters
+MAX_CHUNK_CHARS = 100_000
+# Lines and blocks are flushed once they grow past this many characters
+MAX_BLOCK_CHARS = 64 * 1024
+
+# A sentence ends after terminal punctuation (and closing quotes) or a line break
+SENTENCE_END_PATTERN = re.compile(r"[.!?。！？…；;]+[\"'”’」』)）]*\s*|\n+")
+HEADER_PATTERN = re.compile(r"^\s*#")
+LIST_ITEM_PATTERN = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s+")
+FENCE_PATTERN = re.compile(r"^\s*(```|~~~)")
+
+
+def sentence_cut(text, start, limit):
+    """Index in (start, limit] to cut at: last sentence end, else last space, else limit"""
+    cut = None
+    for match in SENTENCE_END_PATTERN.finditer(text, start, limit):
+        cut = match.end()
+    if cut is None or cut <= start:
+        space = max(text.rfind(" ", start, limit), text.rfind("\t", start, limit))
+        cut = space + 1 if space >= start else limit
+    return cut
+
+
+def iter_sentence_chunks(text, max_chars=MAX_CHUNK_CHARS):
+    """
+    Consecutive pieces of text of at most max_chars characters, cut after a
+    sentence end where possible; "".join(pieces) == text.
+    """
+    start = 0
+    while len(text) - start > max_chars:
+        cut = sentence_cut(text, start, start + max_chars)
+        yield text[start:cut]
+        start = cut
+    if start < len(text) or not text:
+        yield text[start:]
+
+
+def transliterate_in_chunks(text, transliterate_chunk, max_chars=MAX_CHUNK_CHARS):
+    """
+    Runs transliterate_chunk over sentence chunks of text and joins the results:
+    strings are concatenated, lists (Japanese and Korean readings) extended.
+    """
+    strings, items = [], None
+    for chunk in iter_sentence_chunks(text, max_chars):
+        result = transliterate_chunk(chunk)
+        if isinstance(result, list):
+            items = items if items is not None else []
+            items.extend(result)
+        else:
+            strings.append(result)
+    return items if items is not None else "".join(strings)
+
+
+def iter_bounded_lines(stream, max_chars=MAX_BLOCK_CHARS):
+    """
+    Lines of a text stream, none longer than max_chars characters.
+
+    A longer line is yielded in pieces cut at sentence ends; only the last piece
+    keeps the newline.
+    """
+    carry = ""
+    while True:
+        piece = stream.readline(max_chars)
+        if not piece:
+            if carry:
+                yield carry
+            return
+        text = carry + piece
+        if text.endswith("\n"):
+            carry = ""
+            yield from iter_sentence_chunks(text, max_chars)
+            continue
+        carry = text
+        if len(carry) > max_chars:
+            cut = sentence_cut(carry, 0, max_chars)
+            yield carry[:cut]
+            carry = carry[cut:]
+
+
+def line_kind(line):
+    if not line.strip():
+        return "blank"
+    if HEADER_PATTERN.match(line):
+        return "header"
+    if LIST_ITEM_PATTERN.match(line):
+        return "list"
+    return "paragraph"
+
+
+def iter_markdown_blocks(lines, max_block_chars=MAX_BLOCK_CHARS):
+    """
+    Groups Markdown lines into blocks, never holding more than one block.
+
+    Yields (kind, lines) with kind "header", "list", "paragraph", "code" or
+    "blank"; lines keep their newlines. Indented lines continue a list item;
+    a block growing past max_block_chars is yielded in several parts. A line
+    without a newline continues on the next one (the pieces of an overlong line
+    from iter_bounded_lines) and keeps the kind of the line it started.
+    """
+    kind, block, size = None, [], 0
+    continuing = False
+    for line in lines:
+        if continuing:
+            block.append(line)
+            size += len(line)
+            continuing = not line.endswith("\n")
+            if size > max_block_chars:
+                yield kind, block
+                block, size = [], 0
+            continue
+        continuing = not line.endswith("\n")
+
+        if kind == "code":
+            block.append(line)
+            size += len(line)
+            if FENCE_PATTERN.match(line) and len(block) > 1:
+                yield kind, block
+                kind, block, size = None, [], 0
+            elif size > max_block_chars:
+                yield kind, block
+                block, size = [], 0
+            continue
+
+        if FENCE_PATTERN.match(line):
+            line_type = "code"
+        else:
+            line_type = line_kind(line)
+            if line_type == "paragraph" and kind == "list" and line[:1] in " \t":
+                line_type = "list"
+        same_block = line_type == kind and line_type in ("paragraph", "list", "blank")
+        if block and (not same_block or size + len(line) > max_block_chars):
+            yield kind, block
+            block, size = [], 0
+        kind = line_type
+        block.append(line)
+        size += len(line)
+    if block:
+        yield kind, block
+
+
+def stream_markdown(lines, output_file, transform_line):
+    """
+    Writes transform_line(line, kind) for every line of every Markdown block.
+
+    lines is any iterable of lines (an open file, iter_bounded_lines(...)), so
+    memory stays bounded by one block whatever the input size. transform_line
+    gets the line without its newline and returns the text to write. The pieces
+    of a line cut by iter_bounded_lines are transformed one by one, but only the
+    last piece's output keeps its trailing newlines, so the line stays one line.
+
+    Returns:
+        Number of blocks written
+    """
+    blocks = 0
+    # Newlines held back from a piece until it is known whether the line goes on
+    pending = ""
+    with open(output_file, "w", encoding="utf-8") as f:
+        for kind, block in iter_markdown_blocks(lines):
+            for line in block:
+                text = transform_line(line.rstrip("\n"), kind)
+                if line.endswith("\n"):
+                    pending = ""
+                else:
+                    body = text.rstrip("\n")
+                    text, pending = body, text[len(body) :]
+                f.write(text)
+            blocks += 1
+        # The input's last line had no newline of its own
+        f.write(pending)
+    return blocks
+
+
+def stream_markdown_file(input_file, output_file, transform_line, max_chars=MAX_BLOCK_CHARS):
+    """stream_markdown over a UTF-8 file read line by line"""
+    with open(input_file, "r", encoding="utf-8") as f:
+        return stream_markdown(iter_bounded_lines(f, max_chars), output_file, transform_line)
@@ -10,6 +10,8 @@ import pykakasi  # For Japanese Romaji
 from pyarabic.trans import custom_utf82latin  # For Arabic transliteration
 import jieba
 
+from transliteration.markdown_stream import stream_markdown_file
+
 # def format_transliteration(text):
 #     # Add spaces after commas and periods
 #     text = re.sub(r'([,.])', r'\1 ', text)
@@ -254,17 +256,28 @@ def is_header(line):
     return re.match(r"^#+\s*", line) is not None
 
 
+TRANSLITERATED_SCRIPTS_PATTERN = re.compile(
+    r"[\u4e00-\u9fff\u0400-\u04FF\u0900-\u097F\u3040-\u30FF\uAC00-\uD7AF\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF]"
+)
+
+
+def transliterate_markdown_line(line, language):
+    """One Markdown line with its transliteration (headers and Latin lines as-is)"""
+    if TRANSLITERATED_SCRIPTS_PATTERN.search(line) and not is_header(line):
+        transliteration_line = transliterate(line, language)
+        line = add_furigana(line, transliteration_line, language)
+    return f"{line}\n\n"
+
+
 # Pipeline for processing the file and generating two versions
 def process_file(input_file, language, enable_transliteration):
     print(f"Processing {input_file} for {language} with transliteration: {enable_transliteration}")
-    with open(input_file, "r", encoding="utf-8") as f:
-        content = f.read()
 
     # Step 1: Remove English lines (keeping only the target language translation)
     # content_no_english = remove_latin(content, language)
 
     # Determine output filenames
-    base_name = os.path.splitext(input_filename)[0]
+    base_name = os.path.splitext(input_file)[0]
     # output_filename_version1 = f"{base_name}-{language}.md"
 
     # Step 4: Save Version 1 (only Input Language characters)
@@ -275,31 +288,14 @@ def process_file(input_file, language, enable_transliteration):
     if enable_transliteration:
         output_filename_version2 = f"{base_name}-{language}-trans.md"
 
-        # Step 2: Add Transliteration (Pinyin, Romaji, etc.)
+        # Steps 2 and 3: add transliteration (Pinyin, Romaji, etc.) block by block,
+        # writing Version 2 (Original + Transliteration + Latin lines) as we go
         print(f"Saving {output_filename_version2} with transliteration")
-        content_with_transliteration = ""
-        for line in content.splitlines():  # Use the original content (including Latin lines)
-            if re.search(
-                r"[\u4e00-\u9fff\u0400-\u04FF\u0900-\u097F\u3040-\u30FF\uAC00-\uD7AF\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF]",
-                line,
-            ):
-                # If the line contains target language script, add transliteration
-                if is_header(line):
-                    # If it's a header, return the line as-is
-                    content_with_transliteration += f"{line}\n\n"
-                else:
-                    # If it's not a header, transliterate and format the line
-                    transliteration_line = transliterate(line, language)
-                    formatted_line = add_furigana(line, transliteration_line, language)
-                    content_with_transliteration += f"{formatted_line}\n\n"
-                # print(transliteration_line)
-                # content_with_transliteration += f"{formatted_line}\n\n{line}\n\n"
-            else:
-                # If the line is Latin (e.g., English), keep it as is
-                content_with_transliteration += f"{line}\n\n"
-
-        # Step 3: Save Version 2 (Original + Transliteration + Latin lines)
-        save_markdown(content_with_transliteration, output_filename_version2)
+        stream_markdown_file(
+            input_file,
+            output_filename_version2,
+            lambda line, kind: transliterate_markdown_line(line, language),
+        )
 
 
 # Example Usage
@@ -311,9 +307,10 @@ def process_file(input_file, language, enable_transliteration):
 
 # process_file(input_filename, target_language, enable_transliteration=True)
 
-input_filename = "/home/zaya/Documents/Gitrepos/cinema/Subtitles/Chinese-A-brighter-summer-day.srt"
-target_language = "chinese"
-process_file(input_filename, target_language, enable_transliteration=True)
+if __name__ == "__main__":
+    input_filename = "/home/zaya/Documents/Gitrepos/cinema/Subtitles/Chinese-A-brighter-summer-day.srt"
+    target_language = "chinese"
+    process_file(input_filename, target_language, enable_transliteration=True)
 
 # input_folder = '/home/zaya/Documents/Ebooks'  # Update this path to your folder containing HTML files
 # target_language = 'japanese'  # Target language (e.g., 'chinese', 'japanese', etc.)
@@ -12,6 +12,8 @@ import jieba
 import csv
 import random
 
+from transliteration.markdown_stream import stream_markdown_file
+
 
 def format_transliteration(text):
     # Add spaces after commas and periods
@@ -254,8 +256,20 @@ def generate_epub(content, output_file, css_file=None, metadata=None, cover_imag
     with open(temp_file, "w", encoding="utf-8") as f:
         f.write(content)
 
+    try:
+        generate_epub_from_markdown(temp_file, output_file, css_file, metadata, cover_image)
+    finally:
+        # Clean up the temporary file
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+
+
+def generate_epub_from_markdown(
+    markdown_file, output_file, css_file=None, metadata=None, cover_image=None
+):
+    """Runs Pandoc on a Markdown file already on disk (no copy of its content in memory)"""
     # Build Pandoc command
-    pandoc_args = ["pandoc", "-o", output_file, "-t", "epub", temp_file]
+    pandoc_args = ["pandoc", "-o", output_file, "-t", "epub", markdown_file]
 
     # Add CSS file if provided
     if css_file:
@@ -289,10 +303,19 @@ def generate_epub(content, output_file, css_file=None, metadata=None, cover_imag
             print(f"Failed to generate EPUB. Return code: {result.returncode}")
     except Exception as e:
         print(f"An error occurred: {e}")
-    finally:
-        # Clean up the temporary file
-        if os.path.exists(temp_file):
-            os.remove(temp_file)
+
+
+TRANSLITERATED_SCRIPTS_PATTERN = re.compile(
+    r"[\u4e00-\u9fff\u0400-\u04FF\u0900-\u097F\u3040-\u30FF\uAC00-\uD7AF\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF]"
+)
+
+
+def transliterate_markdown_line(line, language):
+    """One Markdown line with its furigana (headers and Latin lines as-is)"""
+    if TRANSLITERATED_SCRIPTS_PATTERN.search(line) and not is_header(line):
+        transliteration_line = transliterate(line, language)
+        line = add_furigana(line, transliteration_line, language)
+    return f"{line}\n\n"
 
 
 def process_file(input_filename):
@@ -304,10 +327,6 @@ def process_file(input_filename):
             enable_transliteration = True  # Enable transliteration by default
 
             if enable_transliteration:
-                # Read the content of the input Markdown file
-                with open(input_md_file, mode="r", encoding="utf-8") as md_file:
-                    input_text = md_file.read()
-
                 # Extract base_name from the input Markdown file path
                 base_name = os.path.splitext(os.path.basename(input_md_file))[0]
                 print(f"Processing {input_md_file} for {language}")
@@ -316,28 +335,12 @@ def process_file(input_filename):
                 output_filename_version2 = f"{base_name}-{language}-trans.md"
                 print(f"Saving {output_filename_version2} with transliteration")
 
-                # Process each line of the input text
-                content_with_transliteration = ""
-                for line in input_text.splitlines():  # Process each line
-                    if re.search(
-                        r"[\u4e00-\u9fff\u0400-\u04FF\u0900-\u097F\u3040-\u30FF\uAC00-\uD7AF\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF]",
-                        line,
-                    ):
-                        # If the line contains target language script, add transliteration
-                        if is_header(line):
-                            # If it's a header, return the line as-is
-                            content_with_transliteration += f"{line}\n\n"
-                        else:
-                            # If it's not a header, transliterate and format the line
-                            transliteration_line = transliterate(line, language)
-                            formatted_line = add_furigana(line, transliteration_line, language)
-                            content_with_transliteration += f"{formatted_line}\n\n"
-                    else:
-                        # If the line is Latin (e.g., English), keep it as is
-                        content_with_transliteration += f"{line}\n\n"
-
-                # Save the processed Markdown content
-                save_markdown(content_with_transliteration, output_filename_version2)
+                # Transliterate block by block straight into the output Markdown file
+                stream_markdown_file(
+                    input_md_file,
+                    output_filename_version2,
+                    lambda line, kind: transliterate_markdown_line(line, language),
+                )
 
                 # Generate EPUB file name
                 output_epub_file = f"{base_name}-{language}-trans.epub"
@@ -355,8 +358,8 @@ def process_file(input_filename):
                 cover_image = f"/home/zaya/Downloads/Zayas/zayaweb/static/css/img/Bing/bing{random_number}.png"
 
                 # Generate EPUB with metadata and cover image
-                generate_epub(
-                    content_with_transliteration,
+                generate_epub_from_markdown(
+                    output_filename_version2,
                     output_epub_file,
                     css_file=css_file,
                     metadata={
@@ -376,5 +379,6 @@ def process_file(input_filename):
 
 # process_file(input_filename, target_language, enable_transliteration=True)
 
-input_folder = "/home/zaya/Downloads/transliteration_files.csv"
-process_file(input_folder)
+if __name__ == "__main__":
+    input_folder = "/home/zaya/Downloads/transliteration_files.csv"
+    process_file(input_folder)
@@ -0,0 +1,401 @@
+# metrics.py
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Content type of the Prometheus text exposition format
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Directory where every worker of a multi-process server writes its samples
+METRICS_DIR = os.environ.get("TRANSLITERATION_METRICS_DIR")
+# Where CLI tools write their samples on exit (node_exporter textfile collector)
+METRICS_FILE = os.environ.get("TRANSLITERATION_METRICS_FILE")
+# Seconds between two snapshot writes of one worker
+SNAPSHOT_INTERVAL = 1.0
+
+# Stage latencies run from a cached lookup to a slow translation round trip
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in pairs) + "}"
+
+
+class Metric:
+    """
+    One named metric with optional labels, safe to update from any thread.
+
+    Values are kept per tuple of label values, in labelnames order; a label
+    left out of an update is recorded as "".
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._function = None
+        self._lock = threading.Lock()
+        (REGISTRY if registry is None else registry).register(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def set_function(self, function):
+        """Reads the (unlabelled) value from function() at every collection"""
+        self._function = function
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        """[(label values, value)], read at collection time"""
+        if self._function is not None:
+            try:
+                return [((), self._function())]
+            except Exception:
+                return []
+        with self._lock:
+            return list(self._values.items())
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    """Cumulative buckets, sum and count per label set, as Prometheus expects them"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [count per bucket (+Inf last), sum, count]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            return [
+                (key, [list(state[0]), state[1], state[2]]) for key, state in self._values.items()
+            ]
+
+
+class Registry:
+    """The metrics of one process, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+
+    def snapshot(self):
+        """JSON-serializable state of every metric, as written to the metrics directory"""
+        return {
+            name: {
+                "type": metric.kind,
+                "help": metric.documentation,
+                "labelnames": list(metric.labelnames),
+                "buckets": list(getattr(metric, "buckets", ())),
+                "samples": [[list(key), value] for key, value in metric.samples()],
+            }
+            for name, metric in self.metrics.items()
+        }
+
+    def render(self, snapshot=None):
+        return render_snapshot(self.snapshot() if snapshot is None else snapshot)
+
+
+def render_snapshot(snapshot):
+    lines = []
+    for name, metric in snapshot.items():
+        names = metric["labelnames"]
+        documentation = metric["help"].replace("\\", "\\\\").replace("\n", "\\n")
+        lines.append(f"# HELP {name} {documentation}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        for values, value in metric["samples"]:
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{format_labels(names, values)} {format_value(value)}")
+                continue
+            counts, total, count = value
+            cumulative = 0
+            for bound, bucket_count in zip(list(metric["buckets"]) + [float("inf")], counts):
+                cumulative += bucket_count
+                le = [("le", format_value(bound))]
+                lines.append(
+                    f"{name}_bucket{format_labels(names, values, le)} {format_value(cumulative)}"
+                )
+            lines.append(f"{name}_sum{format_labels(names, values)} {format_value(total)}")
+            lines.append(f"{name}_count{format_labels(names, values)} {format_value(count)}")
+    return "\n".join(lines) + "\n"
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def merge_snapshots(snapshots):
+    """
+    One snapshot from several workers' ({pid: snapshot}).
+
+    Counters and histograms are summed, so totals survive a worker restart.
+    Gauges describe one process: they get a pid label, and those of exited
+    workers are dropped.
+    """
+    merged = {}
+    for pid, snapshot in sorted(snapshots.items()):
+        for name, metric in snapshot.items():
+            gauge = metric["type"] == "gauge"
+            target = merged.setdefault(
+                name,
+                {
+                    **metric,
+                    "labelnames": metric["labelnames"] + (["pid"] if gauge else []),
+                    "samples": {},
+                },
+            )
+            if gauge and not pid_alive(pid):
+                continue
+            for values, value in metric["samples"]:
+                key = tuple(values) + ((str(pid),) if gauge else ())
+                previous = target["samples"].get(key)
+                if previous is None or gauge:
+                    target["samples"][key] = value
+                elif metric["type"] == "histogram":
+                    counts = [a + b for a, b in zip(previous[0], value[0])]
+                    target["samples"][key] = [
+                        counts,
+                        previous[1] + value[1],
+                        previous[2] + value[2],
+                    ]
+                else:
+                    target["samples"][key] = previous + value
+    for metric in merged.values():
+        metric["samples"] = [[list(key), value] for key, value in metric["samples"].items()]
+    return merged
+
+
+REGISTRY = Registry()
+
+
+def resident_memory_bytes():
+    """Current RSS from /proc; peak RSS where /proc is missing (macOS)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        import sys
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def cpu_seconds():
+    times = os.times()
+    return times.user + times.system
+
+
+STAGE_SECONDS = Histogram(
+    "transliteration_stage_seconds",
+    "Time spent per processing stage (detect, segment, transliterate, translate, render...)",
+    ["stage", "language"],
+)
+REQUEST_SECONDS = Histogram(
+    "transliteration_http_request_seconds",
+    "Web request latency by route and status",
+    ["route", "status"],
+)
+TRANSLATION_LOOKUPS = Counter(
+    "translation_lookups_total",
+    "Translations asked of the translation client, by target language and cache result",
+    ["target_language", "cache"],
+)
+TRANSLATION_REQUESTS = Counter(
+    "translation_requests_total",
+    "Outbound translation calls (retries included) by target language and outcome",
+    ["target_language", "outcome"],
+)
+RESPONSE_CACHE_LOOKUPS = Counter(
+    "response_cache_lookups_total",
+    "Response cache lookups by result (memory, disk, miss)",
+    ["result"],
+)
+JOB_ITEMS = Counter(
+    "transliteration_job_items_total",
+    "Files or rows processed by the batch CLI tools, by language and status",
+    ["language", "status"],
+)
+BACKGROUND_JOB_SECONDS = Histogram(
+    "transliteration_background_job_seconds",
+    "Run time of background jobs (EPUBs, subtitle zips) by kind and final status",
+    ["kind", "status"],
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200),
+)
+ENGINE_INIT_SECONDS = Gauge(
+    "transliteration_engine_init_seconds",
+    "Seconds the last initialization of each engine took",
+    ["engine"],
+)
+RESIDENT_MEMORY = Gauge("process_resident_memory_bytes", "Resident memory of this process")
+RESIDENT_MEMORY.set_function(resident_memory_bytes)
+CPU_SECONDS = Counter("process_cpu_seconds_total", "User and system CPU time of this process")
+CPU_SECONDS.set_function(cpu_seconds)
+
+
+def stage_timer(stage, language=""):
+    """with stage_timer("segment", "chinese"): ... records into STAGE_SECONDS"""
+    return STAGE_SECONDS.time(stage=stage, language=language)
+
+
+@contextmanager
+def engine_timer(engine):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        ENGINE_INIT_SECONDS.set(round(time.perf_counter() - start, 4), engine=engine)
+
+
+_last_snapshot = 0.0
+
+
+def write_snapshot(directory=None, force=False):
+    """
+    Writes this process's samples to <directory>/<pid>.json (at most once per
+    SNAPSHOT_INTERVAL unless force), so any worker can answer /metrics for all.
+    """
+    global _last_snapshot
+    directory = directory or METRICS_DIR
+    now = time.monotonic()
+    if not directory or (not force and now - _last_snapshot < SNAPSHOT_INTERVAL):
+        return
+    _last_snapshot = now
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{os.getpid()}.json")
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(REGISTRY.snapshot(), f)
+    os.replace(path + ".tmp", path)
+
+
+def render_metrics(directory=None):
+    """
+    Prometheus text for /metrics: this process alone, or every worker that
+    wrote to directory ($TRANSLITERATION_METRICS_DIR) merged into one.
+    """
+    directory = directory or METRICS_DIR
+    if not directory:
+        return REGISTRY.render()
+
+    write_snapshot(directory, force=True)
+    snapshots = {}
+    for path in glob.glob(os.path.join(directory, "*.json")):
+        try:
+            with open(path, encoding="utf-8") as f:
+                snapshots[int(os.path.splitext(os.path.basename(path))[0])] = json.load(f)
+        except (OSError, ValueError):
+            continue
+    return render_snapshot(merge_snapshots(snapshots))
+
+
+def write_textfile(path=None):
+    """Writes this process's samples to path ($TRANSLITERATION_METRICS_FILE); returns the path"""
+    path = path or METRICS_FILE
+    if not path:
+        return None
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(REGISTRY.render())
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def instrument_flask_app(app, stats=None):
+    """
+    Times every request of a Flask app into REQUEST_SECONDS and adds GET /metrics.
+
+    /metrics answers in the Prometheus text format; /metrics?format=json returns
+    stats() (e.g. response cache and translation client counters) instead.
+    """
+    from flask import Response, g, jsonify, request
+
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def observe_request(response):
+        start = g.pop("metrics_start", None)
+        if start is not None:
+            route = request.url_rule.rule if request.url_rule is not None else "other"
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - start, route=route, status=response.status_code
+            )
+            write_snapshot()
+        return response
+
+    @app.route("/metrics")
+    def metrics():
+        if request.args.get("format") == "json":
+            return jsonify(stats() if stats else {})
+        return Response(render_metrics(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+    return app
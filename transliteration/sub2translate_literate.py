@@ -1,16 +1,17 @@
+import argparse
 import re
 import csv
 import time
 import sys
 import os
 import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
 # sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 # from transliteration.translationFunctions import translate_text, translate_parallel, TARGET_PATTERNS, LANGUAGE_CODE_MAP
 # from transliteration.filter_language_characters import filter_language_characters
 # from transliteration.transliteration import transliterate
 from transliteration import (
-    translate_parallel,
     LANGUAGE_CODE_MAP,
     TARGET_PATTERNS,
     filter_language_characters,
@@ -18,12 +19,18 @@ from transliteration import (
     add_furigana,
     transliterate_for_subtitles,
 )
+from transliteration.job_report import JobReport, ProgressReporter
+from transliteration.translationFunctions import batch_translate_texts
+from transliteration.metrics import JOB_ITEMS, STAGE_SECONDS, write_textfile
+from subtitles.srt_ingest import read_subtitle_lines
 
+SRT_INDEX_PATTERN = re.compile(r"^\d+$")
+SRT_TIMESTAMP_PATTERN = re.compile(r"^\d{2}:\d{2}:\d{2},\d{3} --> \d{2}:\d{2}:\d{2},\d{3}$")
 
-# Function to read an SRT file
+
+# Function to read an SRT file (any encoding, BOM and CRLF handled)
 def read_srt(file_path):
-    with open(file_path, "r", encoding="utf-8") as f:
-        return f.readlines()
+    return read_subtitle_lines(file_path)
 
 
 # Function to write an SRT file
@@ -32,7 +39,54 @@ def write_srt(file_path, lines):
         f.writelines(lines)
 
 
-def transliterate_srt(input_file: str, target_language: str) -> str:
+def transliterated_srt_path(input_file: str, target_language: str) -> str:
+    return input_file.replace(".srt", f"_{target_language}_transliterated.srt")
+
+
+def translated_srt_path(input_file: str, target_language: str) -> str:
+    return input_file.replace(".srt", f"_{target_language}_translated.srt")
+
+
+def srt_text_positions(lines):
+    """Positions of the cue text lines of an SRT (not numbers, timestamps or blank lines)"""
+    positions = []
+    in_text = False
+    for position, line in enumerate(lines):
+        stripped = line.strip()
+        if not stripped:
+            in_text = False
+        elif in_text:
+            positions.append(position)
+        elif SRT_TIMESTAMP_PATTERN.match(stripped):
+            in_text = True
+    return positions
+
+
+def translate_srt_lines(lines, target_language):
+    """
+    Adds the translation under every text line of an SRT.
+
+    Every distinct text line is translated once, in one batch.
+
+    Returns:
+        Output lines, ready for write_srt
+    """
+    positions = srt_text_positions(lines)
+    texts = list(dict.fromkeys(lines[position].strip() for position in positions))
+    translations = dict(zip(texts, batch_translate_texts(texts, target_language)))
+
+    output_lines = list(lines)
+    # Insert from the end so earlier positions stay valid
+    for position in reversed(positions):
+        original_line = lines[position].strip()
+        output_lines[position : position + 1] = [
+            original_line + "\n",
+            translations[original_line] + "\n",
+        ]
+    return output_lines
+
+
+def transliterate_srt(input_file: str, target_language: str, quiet: bool = False) -> str:
     """
     Transliterates the text lines in an SRT file based on the target language.
     Skips SRT timestamps and line numbers.
@@ -40,13 +94,29 @@ def transliterate_srt(input_file: str, target_language: str) -> str:
     Args:
         input_file: Path to the input SRT file
         target_language: Language code for transliteration
+        quiet: Skip the per-line debug output
 
     Returns:
         Path to the output transliterated SRT file
     """
     # Read the SRT file
     lines = read_srt(input_file)
+    output_lines = transliterate_srt_lines(lines, target_language, quiet)
+
+    # Write output file
+    output_file = transliterated_srt_path(input_file, target_language)
+    write_srt(output_file, output_lines)
+
+    return output_file
+
+
+def transliterate_srt_lines(lines, target_language, quiet=False):
+    """
+    Adds the transliteration under every target-language text line of an SRT.
 
+    Returns:
+        Output lines, ready for write_srt
+    """
     # Prepare output lines
     output_lines = []
     i = 0
@@ -56,12 +126,10 @@ def transliterate_srt(input_file: str, target_language: str) -> str:
         line = lines[i]
 
         # Handle SRT block structure
-        if re.match(r"^\d+$", line.strip()):  # Line number
+        if SRT_INDEX_PATTERN.match(line.strip()):  # Line number
             output_lines.append(line)
             i += 1
-            if i < total_lines and re.match(
-                r"^\d{2}:\d{2}:\d{2},\d{3} --> \d{2}:\d{2}:\d{2},\d{3}$", lines[i].strip()
-            ):  # Timestamp
+            if i < total_lines and SRT_TIMESTAMP_PATTERN.match(lines[i].strip()):  # Timestamp
                 output_lines.append(lines[i])
                 i += 1
                 # Process text lines in this block
@@ -74,7 +142,8 @@ def transliterate_srt(input_file: str, target_language: str) -> str:
 
                     if filtered_text:  # Only process if target language text exists
                         output_lines.append(original_line + "\n")
-                        print(f"Transliterating: {filtered_text}")  # Debug
+                        if not quiet:
+                            print(f"Transliterating: {filtered_text}")  # Debug
                         transliterated_line = transliterate_for_subtitles(
                             filtered_text, target_language
                         )
@@ -113,80 +182,127 @@ def transliterate_srt(input_file: str, target_language: str) -> str:
         output_lines.append(line)
         i += 1
 
-    # Write output file
-    output_file = input_file.replace(".srt", f"_{target_language}_transliterated.srt")
-    write_srt(output_file, output_lines)
+    return output_lines
 
-    return output_file
 
+def process_srt(
+    input_file, target_language, enable_translation=True, enable_transliteration=False, quiet=False
+):
+    """
+    Translates and/or transliterates one SRT file.
 
-def process_srt(input_file, target_language, enable_translation=True, enable_transliteration=False):
-    start_time = time.time()
+    enable_translation writes <name>_<lang>_translated.srt (each text line followed
+    by its translation), enable_transliteration <name>_<lang>_transliterated.srt.
+
+    Returns:
+        Dict of stage -> seconds for the decode, translate, transliterate and write stages
+    """
+    timings = {"write": 0.0}
 
     # Read the SRT file
+    stage_start = time.perf_counter()
     lines = read_srt(input_file)
+    timings["decode"] = time.perf_counter() - stage_start
 
-    # Translate lines if translation is enabled
-    translated_lines = lines  # Default to original lines if not translating
+    outputs = []
     if enable_translation:
-        translated_lines = translate_parallel(lines, target_language)
+        stage_start = time.perf_counter()
+        outputs.append((translated_srt_path, translate_srt_lines(lines, target_language)))
+        timings["translate"] = time.perf_counter() - stage_start
+
+    if enable_transliteration:
+        stage_start = time.perf_counter()
+        outputs.append(
+            (transliterated_srt_path, transliterate_srt_lines(lines, target_language, quiet))
+        )
+        timings["transliterate"] = time.perf_counter() - stage_start
+
+    for output_path, output_lines in outputs:
+        stage_start = time.perf_counter()
+        write_srt(output_path(input_file, target_language), output_lines)
+        timings["write"] += time.perf_counter() - stage_start
+
+    return timings
+
+
+def parse_flag(value):
+    """CSV cells arrive as text: "False" must not count as enabled"""
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "y")
+    return bool(value)
+
+
+def run_srt_job(job):
+    """Runs one (input_file, target_language, translate, transliterate) job; never raises"""
+    input_file, target_language, enable_translation, enable_transliteration = job
+    start = time.perf_counter()
+    try:
+        timings = process_srt(
+            input_file, target_language, enable_translation, enable_transliteration, quiet=True
+        )
+        status, error = "ok", None
+    except Exception as e:
+        timings, status, error = {}, "error", str(e)
+
+    result = {
+        "file": input_file,
+        "language": target_language,
+        "status": status,
+        "seconds": round(time.perf_counter() - start, 4),
+        "timings": {stage: round(seconds, 4) for stage, seconds in timings.items()},
+    }
+    if error:
+        result["error"] = error
+    return result
+
+
+def run_batch_job(
+    report, jobs, max_workers=None, quiet=False, use_processes=False, report_path=None
+):
+    """
+    Runs SRT jobs in parallel with a progress line and per-stage timings.
 
-    transliterate_srt(input_file, target_language)
+    Translation waits on the network, so threads are the default; use_processes
+    runs jobs in worker processes when transliteration dominates instead.
 
-    # Prepare output lines
-    # output_lines_v1 = []
-    # output_lines_v2 = []
-    # output_lines_v3 = []
-
-    # for line, processed_line in zip(lines, translated_lines):
-    #     # Skip SRT timestamps and line numbers
-    #     if re.match(r'^\d+$', line.strip()) or re.match(r'^\d{2}:\d{2}:\d{2},\d{3} --> \d{2}:\d{2}:\d{2},\d{3}$', line.strip()):
-    #         output_lines_v1.append(line)
-    #         output_lines_v2.append(line)
-    #         output_lines_v3.append(line)
-    #         continue
-
-    #     # Add original and translated lines to Version 1
-    #     if enable_translation:
-    #         output_lines_v1.append(line)
-    #         output_lines_v1.append(processed_line + '\n')
-    #     else:
-    #         output_lines_v1.append(line)
-
-    #     # Add original, translated, and transliterated lines to Version 2
-    #     output_lines_v2.append(line)
-    #     if enable_translation:
-    #         output_lines_v2.append(processed_line + '\n')
-    #     if enable_transliteration:
-    #         line_to_transliterate = processed_line if enable_translation else line
-    #         line_without_headers = re.sub(r'^#+\s*', '', line_to_transliterate)
-    #         transliterated_line = transliterate(line_without_headers, target_language)
-    #         output_lines_v2.append(transliterated_line + '\n')
-
-    #     # Add only target language lines to Version 3
-    #     pattern = TARGET_PATTERNS.get(target_language.lower())  # Handle case insensitivity
-    #     if not pattern:  # Fallback: try to find by mapped code
-    #         mapped_code = LANGUAGE_CODE_MAP.get(target_language.lower())
-    #         pattern = TARGET_PATTERNS.get(mapped_code) if mapped_code else None
-
-    #     if pattern and pattern.search(line):
-    #         output_lines_v3.append(line)
-
-    # # Write output files
-    # base_name = input_file.replace('.srt', '')
-    # if enable_translation:
-    #     write_srt(f"{base_name}_{target_language}_v1.srt", output_lines_v1)
-    # if enable_transliteration:
-    #     write_srt(f"{base_name}_{target_language}_trans.srt", output_lines_v2)
-    # # write_srt(f"{base_name}_{target_language}_no_latin.srt", output_lines_v3)
-
-    # # Print processing time
-    # end_time = time.time()
-    # processing_time = end_time - start_time
-    # print(f"Time to process {input_file}: {processing_time:.2f} seconds")
-
-
-def process_zip(zip_file):
+    Returns:
+        The job report as a dict (also written as JSON to report_path)
+    """
+    progress = ProgressReporter(len(jobs), "files", quiet=quiet)
+    if jobs:
+        executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        max_workers = max_workers or min(8, len(jobs))
+        with executor_class(max_workers=max_workers) as executor:
+            futures = [executor.submit(run_srt_job, job) for job in jobs]
+            for future in as_completed(futures):
+                result = future.result()
+                report.add_timings(result["timings"])
+                for stage, seconds in result["timings"].items():
+                    STAGE_SECONDS.observe(seconds, stage=stage, language=result["language"])
+                JOB_ITEMS.inc(language=result["language"], status=result["status"])
+                report.add_item(**result)
+                progress.advance(os.path.basename(result["file"]))
+                if result["status"] == "error":
+                    print(f"\nFAILED: {result['file']}: {result['error']}")
+
+    summary = report.finish().to_dict()
+    if report_path:
+        report.write_json(report_path)
+    if not quiet:
+        stages = ", ".join(
+            f"{name} {stage['seconds']:.2f}s" for name, stage in summary["stages"].items()
+        )
+        print(f"{summary['items']} files in {summary['wall_seconds']:.2f}s ({stages})")
+        if report_path:
+            print(f"Timing report: {report_path}")
+    return summary
+
+
+def default_report_path(input_path):
+    return f"{os.path.splitext(input_path)[0]}_timings.json"
+
+
+def process_zip(zip_file, max_workers=None, quiet=False, use_processes=False, report_path=None):
     # Determine processing mode based on zip filename
     if "translate.zip" in zip_file:
         enable_translation = True
@@ -197,49 +313,78 @@ def process_zip(zip_file):
     else:
         enable_translation = True
         enable_transliteration = False
-    print(
-        f"Mode: translation={enable_translation}, transliteration={enable_transliteration}"
-    )  # Debug
-
-    with zipfile.ZipFile(zip_file, "r") as zip_ref:
+    if not quiet:
+        print(
+            f"Mode: translation={enable_translation}, transliteration={enable_transliteration}"
+        )  # Debug
+
+    report = JobReport(zip_file)
+    jobs = []
+    with report.stage("extract"), zipfile.ZipFile(zip_file, "r") as zip_ref:
         for file_info in zip_ref.infolist():
             if file_info.filename.endswith(".srt"):
                 # Extract target_language from filename pattern "target_language"-filename.srt
-                print(f"Found file in zip: {file_info.filename}")  # Debug
-
                 match = re.match(r"^([a-zA-Z-]+?)-.+\.srt$", file_info.filename)
                 if match:
                     language_key = match.group(1).lower()  # Normalize to lowercase
                     target_language = LANGUAGE_CODE_MAP.get(language_key)
 
                     if target_language:
-                        print(
-                            f"Processing: {file_info.filename} (detected language: {target_language})"
-                        )
                         zip_ref.extract(file_info)
-                        process_srt(
-                            file_info.orig_filename,
-                            target_language,
-                            enable_translation=enable_translation,
-                            enable_transliteration=enable_transliteration,
+                        jobs.append(
+                            (
+                                file_info.orig_filename,
+                                target_language,
+                                enable_translation,
+                                enable_transliteration,
+                            )
                         )
-                    else:
+                    elif not quiet:
                         print(
                             f"SKIPPED: Unsupported language '{language_key}' in filename '{file_info.filename}'"
                         )
-                else:
+                elif not quiet:
                     print(
                         f"SKIPPED: Filename '{file_info.filename}' doesn't match expected pattern."
                     )
 
+    return run_batch_job(
+        report,
+        jobs,
+        max_workers,
+        quiet,
+        use_processes,
+        report_path or default_report_path(zip_file),
+    )
+
 
 # Function to process all SRT files listed in a CSV
-def process_csv(csv_file):
-    with open(csv_file, "r", encoding="utf-8") as f:
+def process_csv(csv_file, max_workers=None, quiet=False, use_processes=False, report_path=None):
+    report = JobReport(csv_file)
+    jobs = []
+    with report.stage("read_csv"), open(csv_file, "r", encoding="utf-8") as f:
         reader = csv.reader(f)
         for row in reader:
+            if not row or not row[0].strip():
+                continue
             input_file, target_language, enable_translation, enable_transliteration = row
-            process_srt(input_file, target_language, enable_translation, enable_transliteration)
+            jobs.append(
+                (
+                    input_file.strip(),
+                    target_language.strip(),
+                    parse_flag(enable_translation),
+                    parse_flag(enable_transliteration),
+                )
+            )
+
+    return run_batch_job(
+        report,
+        jobs,
+        max_workers,
+        quiet,
+        use_processes,
+        report_path or default_report_path(csv_file),
+    )
 
 
 # Main function
@@ -255,8 +400,29 @@ if __name__ == "__main__":
     Total subtitles should be: Cn,1 + Cn,2 + ... + Cn,n
     All the subtitles should be zipped together into Input_filename.zip
     """
-    zip_file = "/home/zaya/Downloads/Zayas/ZayasTransliteration/tests/subtitles/transliterate.zip"
-    process_zip(zip_file)
+    parser = argparse.ArgumentParser(description="Batch translate/transliterate SRTs")
+    parser.add_argument(
+        "input",
+        nargs="?",
+        default="/home/zaya/Downloads/Zayas/ZayasTransliteration/tests/subtitles/transliterate.zip",
+        help="Zip of <lang>-name.srt files, or CSV rows of file,language,translate,transliterate",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Parallel files (default 8)")
+    parser.add_argument("--processes", action="store_true", help="Use processes, not threads")
+    parser.add_argument("--quiet", action="store_true", help="No progress output")
+    parser.add_argument("--report", default=None, help="JSON timing report path")
+    parser.add_argument(
+        "--metrics",
+        default=None,
+        help="Prometheus textfile to write (default: $TRANSLITERATION_METRICS_FILE)",
+    )
+    args = parser.parse_args()
+
+    process_job = process_csv if args.input.lower().endswith(".csv") else process_zip
+    process_job(args.input, args.workers, args.quiet, args.processes, args.report)
+    metrics_path = write_textfile(args.metrics)
+    if metrics_path and not args.quiet:
+        print(f"Metrics: {metrics_path}")
     # csv_file = "/home/zaya/Downloads/trans.csv"
     # process_csv(csv_file)
     # input_file = "/home/zaya/Downloads/Zayas/zayascinema/trans/Gosford-de-(ja).srt"
@@ -0,0 +1,60 @@
+import unittest
+
+from transliteration.filter_language_characters import (
+    filter_language_characters,
+    filter_language_characters_preserve_spaces,
+    filter_lines,
+    get_language_script_name,
+)
+
+
+class TestFilterLanguageCharacters(unittest.TestCase):
+    def test_scripts_without_spaces_are_joined(self):
+        text = "我儿子的中国文学成绩一直很好。1959 年夏 SUMMER 1959"
+        self.assertEqual(filter_language_characters(text, "zh-CN"), "我儿子的中国文学成绩一直很好年夏")
+        self.assertEqual(filter_language_characters("ひらがなとカタカナ、漢字 abc", "ja"), "ひらがなとカタカナ漢字")
+        self.assertEqual(filter_language_characters("안녕 하세요!", "ko"), "안녕하세요")
+        self.assertEqual(filter_language_characters("Hello", "zh"), "")
+
+    def test_alphabetic_scripts(self):
+        self.assertEqual(filter_language_characters("Да, мир!", "ru"), "Д а м и р")
+        self.assertEqual(
+            filter_language_characters_preserve_spaces("Привет,  big мир! 42", "ru"), "Привет мир"
+        )
+        self.assertEqual(
+            filter_language_characters_preserve_spaces("Γεια σου, κόσμε", "el"), "Γεια σου κόσμε"
+        )
+        self.assertEqual(
+            filter_language_characters_preserve_spaces("שלום world עולם", "he"), "שלום עולם"
+        )
+        self.assertEqual(
+            filter_language_characters_preserve_spaces("Привіт, світе", "uk"), "Привіт світе"
+        )
+
+    def test_filter_lines_matches_line_by_line(self):
+        lines = ["Привет, мир!", "", "Hello there", "  Как дела?  ", "我喜欢 Pizza", "a\x00мир"]
+        for language in ("zh-CN", "ja", "ko", "ru", "hi", "ar"):
+            for preserve_spaces in (False, True):
+                filter_line = (
+                    filter_language_characters_preserve_spaces
+                    if preserve_spaces
+                    else filter_language_characters
+                )
+                for subset in (lines[:-1], lines):  # the last line holds the bulk separator
+                    self.assertEqual(
+                        filter_lines(subset, language, preserve_spaces),
+                        [filter_line(line, language) for line in subset],
+                    )
+        self.assertEqual(filter_lines([], "ru"), [])
+
+    def test_unsupported_language(self):
+        with self.assertRaises(ValueError):
+            filter_language_characters("Hello", "en")
+        with self.assertRaises(ValueError):
+            filter_lines(["Hello"], "en")
+        self.assertEqual(get_language_script_name("he"), "Hebrew")
+        self.assertEqual(get_language_script_name("en"), "Unknown script")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from transliteration.job_report import JobReport, ProgressReporter
+
+
+class TestJobReport(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_stage_timings_and_items(self):
+        report = JobReport("job.zip")
+        with report.stage("decode"):
+            pass
+        report.add_timings({"decode": 0.5, "write": 0.25})
+        report.add_item(file="a.srt", status="ok")
+        report.add_item(file="b.srt", status="error", error="boom")
+
+        summary = report.finish().to_dict()
+        self.assertEqual(summary["stages"]["decode"]["calls"], 2)
+        self.assertGreaterEqual(summary["stages"]["decode"]["seconds"], 0.5)
+        self.assertEqual(summary["stages"]["write"], {"seconds": 0.25, "calls": 1})
+        self.assertEqual((summary["items"], summary["failed"]), (2, 1))
+
+        path = report.write_json(os.path.join(self.test_dir, "timings.json"))
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["job"], "job.zip")
+
+    def test_progress_reporter(self):
+        stream = io.StringIO()
+        progress = ProgressReporter(2, "files", interval=0, stream=stream)
+        progress.advance("a.srt")
+        progress.advance("b.srt")
+        self.assertIn("[2/2] 100.0% files", stream.getvalue())
+        self.assertTrue(stream.getvalue().endswith("\n"))
+
+        quiet_stream = io.StringIO()
+        quiet = ProgressReporter(1, quiet=True, stream=quiet_stream)
+        quiet.advance()
+        self.assertEqual(quiet_stream.getvalue(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from transliteration.markdown_stream import (
+    iter_bounded_lines,
+    iter_markdown_blocks,
+    iter_sentence_chunks,
+    stream_markdown_file,
+    transliterate_in_chunks,
+)
+
+
+class TestMarkdownStream(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_sentence_chunks(self):
+        text = "Первое предложение. 第二句。 Third one!" * 50
+        chunks = list(iter_sentence_chunks(text, max_chars=100))
+        self.assertEqual("".join(chunks), text)
+        self.assertTrue(all(len(chunk) <= 100 for chunk in chunks))
+        self.assertTrue(all(chunk.rstrip()[-1] in ".。!" for chunk in chunks))
+
+        # No sentence end or space: hard cut at the limit
+        self.assertEqual(list(iter_sentence_chunks("x" * 25, max_chars=10))[1], "x" * 10)
+
+    def test_transliterate_in_chunks_joins_results(self):
+        text = "ab. cd. ef."
+        self.assertEqual(transliterate_in_chunks(text, str.upper, max_chars=4), "AB. CD. EF.")
+        readings = transliterate_in_chunks(text, lambda chunk: [chunk], max_chars=4)
+        self.assertEqual(readings, ["ab. ", "cd. ", "ef."])
+
+    def test_bounded_lines_split_long_lines(self):
+        stream = io.StringIO("short\n" + "Sentence one. " * 20 + "\nend")
+        lines = list(iter_bounded_lines(stream, max_chars=64))
+        self.assertEqual("".join(lines), stream.getvalue())
+        self.assertTrue(all(len(line) <= 64 for line in lines))
+        self.assertEqual((lines[0], lines[-1]), ("short\n", "end"))
+
+    def test_blocks(self):
+        lines = [
+            "# Title\n",
+            "\n",
+            "First line\n",
+            "second line\n",
+            "- item\n",
+            "  more item\n",
+            "```\n",
+            "# not a header\n",
+            "```\n",
+        ]
+        kinds = [(kind, len(block)) for kind, block in iter_markdown_blocks(lines)]
+        self.assertEqual(
+            kinds, [("header", 1), ("blank", 1), ("paragraph", 2), ("list", 2), ("code", 3)]
+        )
+        self.assertEqual(len(list(iter_markdown_blocks(["a\n"] * 10, max_block_chars=4))), 5)
+
+    def test_stream_markdown_file(self):
+        input_file = os.path.join(self.test_dir, "in.md")
+        output_file = os.path.join(self.test_dir, "out.md")
+        with open(input_file, "w", encoding="utf-8") as f:
+            f.write("# Привет\n\nпривет мир\n")
+
+        blocks = stream_markdown_file(
+            input_file, output_file, lambda line, kind: f"{kind}:{line.upper()}\n"
+        )
+        self.assertEqual(blocks, 3)
+        with open(output_file, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "header:# ПРИВЕТ\nblank:\nparagraph:ПРИВЕТ МИР\n")
+
+    def test_long_line_stays_one_paragraph(self):
+        input_file = os.path.join(self.test_dir, "in.md")
+        output_file = os.path.join(self.test_dir, "out.md")
+        line = "".join(f"Sentence {i} goes on. " for i in range(20)) + "# Not a header."
+        with open(input_file, "w", encoding="utf-8") as f:
+            f.write(f"{line}\nshort\n{line}")
+
+        def transform(line, kind):
+            # Like transliterate_markdown_line: each line becomes its own paragraph
+            return f"{line.upper() if kind == 'paragraph' else line}\n\n"
+
+        stream_markdown_file(input_file, output_file, transform, max_chars=64)
+        with open(output_file, encoding="utf-8") as f:
+            self.assertEqual(f.read(), f"{line.upper()}\n\nSHORT\n\n{line.upper()}\n\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import json
+import os
+import tempfile
+import unittest
+
+from transliteration.metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    Registry,
+    merge_snapshots,
+    render_metrics,
+    render_snapshot,
+    write_textfile,
+)
+from transliteration.translation_client import TranslationClient
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_counter_and_gauge_text_format(self):
+        calls = Counter("calls_total", "Calls", ["language"], registry=self.registry)
+        calls.inc(language="ru")
+        calls.inc(2, language="ru")
+        calls.inc(language='zh "cn"')
+        Gauge("rss_bytes", "RSS", registry=self.registry).set_function(lambda: 1024)
+
+        text = self.registry.render()
+        self.assertIn("# TYPE calls_total counter", text)
+        self.assertIn('calls_total{language="ru"} 3', text)
+        self.assertIn('calls_total{language="zh \\"cn\\""} 1', text)
+        self.assertIn("rss_bytes 1024", text)
+        with self.assertRaises(ValueError):
+            Counter("calls_total", "Again", registry=self.registry)
+
+    def test_histogram_buckets_are_cumulative(self):
+        latency = Histogram(
+            "stage_seconds", "Stages", ["stage"], buckets=(0.1, 1), registry=self.registry
+        )
+        for value in (0.05, 0.1, 0.5, 3):
+            latency.observe(value, stage="segment")
+
+        lines = self.registry.render().splitlines()
+        self.assertIn('stage_seconds_bucket{stage="segment",le="0.1"} 2', lines)
+        self.assertIn('stage_seconds_bucket{stage="segment",le="1"} 3', lines)
+        self.assertIn('stage_seconds_bucket{stage="segment",le="+Inf"} 4', lines)
+        self.assertIn('stage_seconds_count{stage="segment"} 4', lines)
+        self.assertIn('stage_seconds_sum{stage="segment"} 3.65', lines)
+
+    def test_worker_snapshots_merge(self):
+        calls = Counter("calls_total", "Calls", ["language"], registry=self.registry)
+        latency = Histogram("stage_seconds", "Stages", buckets=(1,), registry=self.registry)
+        rss = Gauge("rss_bytes", "RSS", registry=self.registry)
+        calls.inc(language="ru")
+        latency.observe(0.5)
+        rss.set(100)
+
+        snapshot = json.loads(json.dumps(self.registry.snapshot()))
+        merged = render_snapshot(merge_snapshots({os.getpid(): snapshot, 2**22 + 1: snapshot}))
+        self.assertIn('calls_total{language="ru"} 2', merged)
+        self.assertIn('stage_seconds_bucket{le="1"} 2', merged)
+        # Gauges are per process, and only for workers still running
+        self.assertIn(f'rss_bytes{{pid="{os.getpid()}"}} 100', merged)
+        self.assertNotIn(f'pid="{2**22 + 1}"', merged)
+
+    def test_metrics_directory_and_textfile(self):
+        with tempfile.TemporaryDirectory() as directory:
+            text = render_metrics(directory)
+            self.assertIn("# TYPE transliteration_stage_seconds histogram", text)
+            self.assertEqual(os.listdir(directory), [f"{os.getpid()}.json"])
+
+            path = write_textfile(os.path.join(directory, "cli.prom"))
+            with open(path, encoding="utf-8") as f:
+                self.assertIn("process_resident_memory_bytes", f.read())
+
+    def test_translation_cache_hits_are_counted(self):
+        from transliteration.metrics import TRANSLATION_LOOKUPS, TRANSLATION_REQUESTS
+
+        client = TranslationClient(translate=lambda text, target: text.upper(), rate_limit=0)
+        before_hits = TRANSLATION_LOOKUPS.value(target_language="xx", cache="hit")
+        before_misses = TRANSLATION_LOOKUPS.value(target_language="xx", cache="miss")
+        before_requests = TRANSLATION_REQUESTS.value(target_language="xx", outcome="ok")
+        for text in ("a", "b", "a", "a"):
+            client.translate(text, "xx")
+
+        self.assertEqual(
+            TRANSLATION_LOOKUPS.value(target_language="xx", cache="hit"), before_hits + 2
+        )
+        self.assertEqual(
+            TRANSLATION_LOOKUPS.value(target_language="xx", cache="miss"), before_misses + 2
+        )
+        self.assertEqual(
+            TRANSLATION_REQUESTS.value(target_language="xx", outcome="ok"), before_requests + 2
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from transliteration.sub2translate_literate import (
+    process_srt,
+    translated_srt_path,
+    transliterated_srt_path,
+)
+from transliteration.translation_backends import TranslationBackend
+from transliteration.translationFunctions import set_translation_backend
+
+SRT = (
+    "1\n00:00:01,000 --> 00:00:02,000\nПривет.\n\n2\n00:00:03,000 --> 00:00:04,000\n1984\nПривет.\n"
+)
+
+
+class UpperBackend(TranslationBackend):
+    name = "upper"
+
+    def __init__(self):
+        self.requests = []
+
+    def translate(self, text, target_language):
+        self.requests.append(text)
+        return text.upper()
+
+
+class TestProcessSrt(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, "ru-episode.srt")
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(SRT)
+        self.backend = UpperBackend()
+        set_translation_backend(self.backend)
+
+    def tearDown(self):
+        set_translation_backend(None)
+        shutil.rmtree(self.test_dir)
+
+    def read(self, path):
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    def test_translation_is_written(self):
+        timings = process_srt(self.path, "ru", enable_translation=True)
+        self.assertEqual(sorted(timings), ["decode", "translate", "write"])
+        self.assertEqual(
+            self.read(translated_srt_path(self.path, "ru")),
+            "1\n00:00:01,000 --> 00:00:02,000\nПривет.\nПРИВЕТ.\n\n"
+            "2\n00:00:03,000 --> 00:00:04,000\n1984\n1984\nПривет.\nПРИВЕТ.\n",
+        )
+        # Each distinct line is sent once; "1984" is too short to translate
+        self.assertEqual(self.backend.requests, ["Привет."])
+        self.assertFalse(os.path.exists(transliterated_srt_path(self.path, "ru")))
+
+    def test_flags_select_the_stages(self):
+        timings = process_srt(
+            self.path, "ru", enable_translation=False, enable_transliteration=True, quiet=True
+        )
+        self.assertEqual(sorted(timings), ["decode", "transliterate", "write"])
+        self.assertEqual(self.backend.requests, [])
+        self.assertIn("Привет.\nP", self.read(transliterated_srt_path(self.path, "ru")))
+        self.assertFalse(os.path.exists(translated_srt_path(self.path, "ru")))
+
+        timings = process_srt(self.path, "ru", enable_translation=False)
+        self.assertEqual(sorted(timings), ["decode", "write"])
+
+
+if __name__ == "__main__":
+    unittest.main()
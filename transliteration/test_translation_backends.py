@@ -0,0 +1,90 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from transliteration.translation_backends import OfflineDictionaryBackend, TranslationBackend
+from transliteration.translationFunctions import (
+    batch_translate_texts,
+    get_translation_backend,
+    set_translation_backend,
+    translate_text,
+)
+
+
+class EchoBackend(TranslationBackend):
+    name = "echo"
+
+    def translate(self, text, target_language):
+        return f"[{target_language}] {text}"
+
+
+class BrokenBackend(TranslationBackend):
+    name = "broken"
+
+    def translate(self, text, target_language):
+        raise ConnectionError("offline")
+
+
+class TestTranslationBackends(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        set_translation_backend(None)
+        shutil.rmtree(self.test_dir)
+
+    def write_file(self, name, content):
+        path = os.path.join(self.test_dir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def test_tsv_lookup_ignores_whitespace_and_case(self):
+        path = self.write_file("memory.tsv", "source\ttarget\nGood  morning\t早上好\n")
+        backend = OfflineDictionaryBackend(path)
+        self.assertEqual(backend.translate(" good morning ", "zh-ch"), "早上好")
+        self.assertIsNone(backend.translate("Good night", "zh-ch"))
+        self.assertEqual((backend.hits, backend.misses), (1, 1))
+
+    def test_json_per_language_tables(self):
+        data = {"ja": {"Hello": "こんにちは"}, "zh-CN": {"Hello": "你好"}, "Bye": "再见"}
+        path = self.write_file("memory.json", json.dumps(data, ensure_ascii=False))
+        backend = OfflineDictionaryBackend(path, language_code_map={"zh-ch": "zh-CN"})
+        self.assertEqual(backend.translate("Hello", "zh-ch"), "你好")
+        self.assertEqual(backend.translate("Hello", "ja"), "こんにちは")
+        self.assertEqual(backend.translate("Bye", "ja"), "再见")
+
+    def test_fallback_backend_handles_misses(self):
+        path = self.write_file("memory.csv", "Yes,是\n")
+        backend = OfflineDictionaryBackend(path, fallback=EchoBackend())
+        self.assertEqual(backend.translate("Yes", "zh-ch"), "是")
+        self.assertEqual(backend.translate("No", "zh-ch"), "[zh-ch] No")
+
+    def test_translation_functions_use_selected_backend(self):
+        set_translation_backend(EchoBackend())
+        self.assertEqual(get_translation_backend().name, "echo")
+        self.assertEqual(translate_text("Hello", "ja"), "[ja] Hello")
+        self.assertEqual(batch_translate_texts(["One", "Two"], "de"), ["[de] One", "[de] Two"])
+
+        set_translation_backend(None)
+        self.assertEqual(get_translation_backend().name, "google")
+
+    def test_interactive_steps_are_not_backends(self):
+        from subtitles.sub2epub2sub import CalibreTranslationStep
+
+        with self.assertRaises(ValueError):
+            set_translation_backend(CalibreTranslationStep())
+        self.assertEqual(get_translation_backend().name, "google")
+
+    def test_batch_reports_failed_lines(self):
+        path = self.write_file("memory.csv", "Yes,是\n")
+        set_translation_backend(OfflineDictionaryBackend(path, fallback=BrokenBackend()))
+        failed = set()
+        self.assertEqual(batch_translate_texts(["Yes", "Maybe"], "zh-ch", failed), ["是", "Maybe"])
+        self.assertEqual(failed, {1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import threading
+import time
+import unittest
+
+from transliteration.translation_client import TokenBucket, TranslationClient
+
+
+class SlowTranslator:
+    def __init__(self, latency=0.05, failing=()):
+        self.latency = latency
+        self.failing = set(failing)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, text, target_language):
+        with self._lock:
+            self.calls.append(text)
+        time.sleep(self.latency)
+        if text in self.failing:
+            raise RuntimeError("service unavailable")
+        return f"{target_language}:{text}"
+
+
+class TestTranslationClient(unittest.TestCase):
+    def test_token_bucket_limits_rate(self):
+        bucket = TokenBucket(rate=50, burst=5)
+        start = time.monotonic()
+        for _ in range(15):
+            bucket.acquire()
+        # 5 tokens immediately, the other 10 at 50 per second
+        self.assertGreaterEqual(time.monotonic() - start, 0.18)
+
+    def test_translate_many_caches_and_runs_concurrently(self):
+        translator = SlowTranslator(latency=0.05)
+        client = TranslationClient(translate=translator, rate_limit=0, max_workers=8)
+        words = [f"word{i}" for i in range(16)]
+
+        start = time.monotonic()
+        result = client.translate_many(words + words, "en")
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(result, {word: f"en:{word}" for word in words})
+        self.assertEqual(sorted(translator.calls), sorted(words))
+        # 16 calls of 50 ms on 8 workers, well under the 0.8 s a serial loop takes
+        self.assertLess(elapsed, 0.5)
+
+        client.translate_many(words, "en")
+        self.assertEqual(len(translator.calls), len(words))
+        self.assertEqual(client.stats()["cache_misses"], len(words))
+
+    def test_default_burst_covers_a_paragraph(self):
+        # Default rate limit and burst: 100 distinct words are not spread over 10 s
+        translator = SlowTranslator(latency=0.02)
+        client = TranslationClient(translate=translator, max_workers=16)
+        start = time.monotonic()
+        client.translate_many([f"word{i}" for i in range(100)], "en")
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual(client.stats()["requests"], 100)
+
+    def test_failures_fall_back_and_are_not_cached(self):
+        translator = SlowTranslator(latency=0, failing={"bad"})
+        client = TranslationClient(translate=translator, rate_limit=0, retries=1)
+
+        result = client.translate_many(["good", "bad"], "en", fallback=lambda _: None)
+        self.assertEqual(result, {"good": "en:good", "bad": None})
+        self.assertEqual(translator.calls.count("bad"), 2)
+
+        self.assertEqual(client.translate_many(["bad"], "en"), {"bad": "bad"})
+        self.assertEqual(translator.calls.count("bad"), 4)
+        self.assertEqual(client.stats()["failures"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
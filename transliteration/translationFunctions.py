@@ -1,7 +1,6 @@
 # translationFunctions.py
 import re
 from functools import lru_cache
-from deep_translator import GoogleTranslator
 from concurrent.futures import ThreadPoolExecutor
 import pypinyin
 import pykakasi
@@ -11,6 +10,8 @@ from indic_transliteration.sanscript import transliterate as indic_transliterate
 from hangul_romanize import Transliter
 from hangul_romanize.rule import academic
 
+from transliteration.translation_backends import GoogleTranslateBackend
+
 # Map target_language to Google Translate language codes
 LANGUAGE_CODE_MAP = {
     "de": "de",  # German
@@ -73,16 +74,28 @@ TARGET_PATTERNS = {
     "ar": re.compile(r"[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF]"),  # Arabic
 }
 
-# Cache translator instances to avoid recreation
-_translator_cache = {}
+# Online backend used unless set_translation_backend() picks another one
+_google_backend = GoogleTranslateBackend(LANGUAGE_CODE_MAP)
+_translation_backend = _google_backend
+
+
+def get_translation_backend():
+    """Return the backend every translate_* function goes through"""
+    return _translation_backend
+
+
+def set_translation_backend(backend):
+    """Switch translation provider (e.g. OfflineDictionaryBackend) for the whole process"""
+    global _translation_backend
+    if getattr(backend, "interactive", False):
+        raise ValueError(f"{backend.name} cannot translate text unattended")
+    _translation_backend = backend or _google_backend
+    translate_text.cache_clear()
 
 
 def get_translator(target_language):
-    """Get or create cached translator instance"""
-    lang_code = LANGUAGE_CODE_MAP.get(target_language, target_language)
-    if lang_code not in _translator_cache:
-        _translator_cache[lang_code] = GoogleTranslator(source="auto", target=lang_code)
-    return _translator_cache[lang_code]
+    """Get or create cached GoogleTranslator instance"""
+    return _google_backend.get_translator(target_language)
 
 
 @lru_cache(maxsize=5000)  # Increased cache size
@@ -97,8 +110,7 @@ def translate_text(text, target_language):
         return clean_text
 
     try:
-        translator = get_translator(target_language)
-        translated = translator.translate(clean_text)
+        translated = get_translation_backend().translate(clean_text, target_language)
         return translated if translated and translated != clean_text else clean_text
     except Exception as e:
         print(f"Error translating text '{clean_text[:50]}...': {e}")
@@ -106,15 +118,19 @@ def translate_text(text, target_language):
 
 
 # Batch translation function for better performance
-def batch_translate_texts(texts, target_language):
-    """Translate multiple texts in a batch for better performance"""
+def batch_translate_texts(texts, target_language, failed=None):
+    """Translate multiple texts in a batch for better performance
+
+    Texts that fail keep their original wording; pass a set as failed to collect
+    their positions.
+    """
     if not texts:
         return []
 
-    translator = get_translator(target_language)
+    backend = get_translation_backend()
     results = []
 
-    for text in texts:
+    for position, text in enumerate(texts):
         if not text.strip():
             results.append(text)
             continue
@@ -125,11 +141,13 @@ def batch_translate_texts(texts, target_language):
             continue
 
         try:
-            translated = translator.translate(clean_text)
+            translated = backend.translate(clean_text, target_language)
             results.append(translated if translated and translated != clean_text else clean_text)
         except Exception as e:
             print(f"Error in batch translation: {e}")
             results.append(clean_text)
+            if failed is not None:
+                failed.add(position)
 
     return results
 
@@ -151,11 +169,11 @@ def translate_parallel(tokens, target_language):
         return tokens
 
     def translate_batch(batch_tokens):
-        translator = get_translator(target_language)
+        backend = get_translation_backend()
         translated_batch = []
         for token in batch_tokens:
             try:
-                translated = translator.translate(token)
+                translated = backend.translate(token, target_language)
                 translated_batch.append(translated if translated else token)
             except Exception:
                 translated_batch.append(token)
@@ -0,0 +1,136 @@
+# translation_backends.py
+import csv
+import json
+import os
+
+
+def normalize_source_text(text):
+    """Collapse whitespace the same way translate_text cleans its input"""
+    return " ".join(text.strip().split())
+
+
+class TranslationBackend:
+    """
+    Interface shared by every translation provider.
+
+    translate() returns the raw translation or None when the backend has no
+    answer; translationFunctions takes care of cleaning, caching and fallbacks.
+    """
+
+    name = "base"
+    # Backends always translate text unattended; workflow steps that need a
+    # person (CalibreTranslationStep in sub2epub2sub) set this instead
+    interactive = False
+
+    def translate(self, text, target_language):
+        raise NotImplementedError
+
+    def translate_batch(self, texts, target_language):
+        return [self.translate(text, target_language) for text in texts]
+
+
+class GoogleTranslateBackend(TranslationBackend):
+    """Online translation through deep_translator's GoogleTranslator"""
+
+    name = "google"
+
+    def __init__(self, language_code_map=None):
+        self.language_code_map = language_code_map or {}
+        # Cache translator instances to avoid recreation
+        self._translators = {}
+
+    def get_translator(self, target_language):
+        """Get or create cached translator instance"""
+        from deep_translator import GoogleTranslator
+
+        lang_code = self.language_code_map.get(target_language, target_language)
+        if lang_code not in self._translators:
+            self._translators[lang_code] = GoogleTranslator(source="auto", target=lang_code)
+        return self._translators[lang_code]
+
+    def translate(self, text, target_language):
+        return self.get_translator(target_language).translate(text)
+
+
+class OfflineDictionaryBackend(TranslationBackend):
+    """
+    Offline translation from a local bilingual dictionary / translation memory.
+
+    Supported files:
+        .json  {"source": "target"} or {"zh-CN": {"source": "target"}, ...}
+        .csv   rows of source,target[,lang] (an optional header row is skipped)
+        .tsv / .txt  the same columns separated by tabs
+
+    Entries without a language apply to every target language. Lookups ignore
+    whitespace differences and fall back to a case-insensitive match. Misses go
+    to fallback (another backend) when given, otherwise return None.
+    """
+
+    name = "offline"
+
+    def __init__(self, path, language_code_map=None, fallback=None):
+        self.path = path
+        self.language_code_map = language_code_map or {}
+        self.fallback = fallback
+        self.entries = {}  # lang or None -> {normalized source: target}
+        self.hits = 0
+        self.misses = 0
+        self._load(path)
+
+    def _lang_key(self, lang):
+        if lang is None:
+            return None
+        return self.language_code_map.get(lang, lang)
+
+    def add(self, source, target, lang=None):
+        table = self.entries.setdefault(self._lang_key(lang), {})
+        key = normalize_source_text(source)
+        table[key] = target
+        table.setdefault(key.casefold(), target)
+
+    def _load(self, path):
+        extension = os.path.splitext(path)[1].lower()
+        with open(path, "r", encoding="utf-8-sig") as f:
+            if extension == ".json":
+                data = json.load(f)
+                for key, value in data.items():
+                    if isinstance(value, dict):
+                        for source, target in value.items():
+                            self.add(source, target, key)
+                    else:
+                        self.add(key, value)
+                return
+
+            delimiter = "," if extension == ".csv" else "\t"
+            for row_number, row in enumerate(csv.reader(f, delimiter=delimiter)):
+                if len(row) < 2 or not row[0].strip():
+                    continue
+                if row_number == 0 and [cell.strip().lower() for cell in row[:2]] == [
+                    "source",
+                    "target",
+                ]:
+                    continue
+                lang = row[2].strip() if len(row) > 2 and row[2].strip() else None
+                self.add(row[0], row[1], lang)
+
+    def lookup(self, text, target_language):
+        key = normalize_source_text(text)
+        for table in (self.entries.get(self._lang_key(target_language)), self.entries.get(None)):
+            if not table:
+                continue
+            if key in table:
+                return table[key]
+            if key.casefold() in table:
+                return table[key.casefold()]
+        return None
+
+    def translate(self, text, target_language):
+        translated = self.lookup(text, target_language)
+        if translated is not None:
+            self.hits += 1
+            return translated
+
+        self.misses += 1
+        if self.fallback is not None:
+            return self.fallback.translate(text, target_language)
+        return None
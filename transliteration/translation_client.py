@@ -0,0 +1,161 @@
+# translation_client.py
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from transliteration.metrics import TRANSLATION_LOOKUPS, TRANSLATION_REQUESTS
+
+# Outbound translation requests per second allowed for the whole process
+DEFAULT_RATE_LIMIT = float(os.environ.get("TRANSLATION_RATE_LIMIT", 10))
+# Requests that may go out back to back before the rate applies: a paragraph's
+# words (100 or so) go out at once, and the sustained rate still caps what the
+# process sends over time. A smaller burst spreads a large page over seconds.
+DEFAULT_BURST = int(os.environ.get("TRANSLATION_RATE_BURST", 100))
+# Translation requests in flight at once
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_CACHE_SIZE = 20000
+DEFAULT_RETRIES = 2
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: acquire() takes one token, waiting for the next
+    one when the bucket is empty. Waiting happens outside the lock, so one
+    slow caller never holds up the bookkeeping for the others.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Take the token now, even if it is only available in the future
+            self.tokens -= 1
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.waited += delay
+        if delay:
+            time.sleep(delay)
+
+
+def backend_translate(text, target_language):
+    """Translation through the translationFunctions backend (Google unless switched)"""
+    from transliteration.translationFunctions import get_translation_backend
+
+    return get_translation_backend().translate(text, target_language)
+
+
+class TranslationClient:
+    """
+    Shared, rate-limited, caching front for a translate(text, target_language) function.
+
+    Every outbound call takes a token from one bucket, so the rate limit holds
+    for all requests of the process together instead of being approximated by
+    sleeps inside each request. Results are cached per (text, target language);
+    failures are retried with a short backoff and never cached.
+    """
+
+    def __init__(
+        self,
+        translate=None,
+        rate_limit=DEFAULT_RATE_LIMIT,
+        burst=DEFAULT_BURST,
+        max_workers=DEFAULT_MAX_WORKERS,
+        cache_size=DEFAULT_CACHE_SIZE,
+        retries=DEFAULT_RETRIES,
+    ):
+        self._translate = translate or backend_translate
+        self.bucket = TokenBucket(rate_limit, burst)
+        self.retries = retries
+        self.requests = 0
+        self.failures = 0
+        # The pool threads update the counters together
+        self._counter_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="translation-client"
+        )
+        self._cached = lru_cache(maxsize=cache_size)(self._translate_uncached)
+        # Set by _translate_uncached, so translate() can tell a cache hit from a miss
+        self._local = threading.local()
+
+    def _translate_uncached(self, text, target_language):
+        self._local.missed = True
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire()
+            with self._counter_lock:
+                self.requests += 1
+            try:
+                translated = self._translate(text, target_language)
+                TRANSLATION_REQUESTS.inc(target_language=target_language, outcome="ok")
+                return translated if translated else text
+            except Exception:
+                TRANSLATION_REQUESTS.inc(target_language=target_language, outcome="error")
+                if attempt == self.retries:
+                    with self._counter_lock:
+                        self.failures += 1
+                    raise
+                time.sleep(0.2 * 2**attempt)
+
+    def translate(self, text, target_language="en"):
+        """Cached translation of text; raises when every attempt failed"""
+        self._local.missed = False
+        try:
+            return self._cached(text, target_language)
+        finally:
+            cache = "miss" if self._local.missed else "hit"
+            TRANSLATION_LOOKUPS.inc(target_language=target_language, cache=cache)
+
+    def submit(self, text, target_language="en"):
+        """Future for translate(text, target_language), run on the client's thread pool"""
+        return self._executor.submit(self.translate, text, target_language)
+
+    def translate_many(self, texts, target_language="en", fallback=None):
+        """
+        Translations of texts, each distinct text translated once and all of
+        them concurrently.
+
+        Returns:
+            {text: translation}; a text whose translation failed maps to
+            fallback(text), or to the text itself without a fallback
+        """
+
+        def translate_or_fallback(text):
+            try:
+                return self.translate(text, target_language)
+            except Exception as e:
+                print(f"Translation failed for '{text[:50]}': {e}")
+                return fallback(text) if fallback else text
+
+        unique = list(dict.fromkeys(texts))
+        return dict(zip(unique, self._executor.map(translate_or_fallback, unique)))
+
+    def cache_clear(self):
+        self._cached.cache_clear()
+
+    def stats(self):
+        info = self._cached.cache_info()
+        return {
+            "cache_hits": info.hits,
+            "cache_misses": info.misses,
+            "cached": info.currsize,
+            "requests": self.requests,
+            "failures": self.failures,
+            "rate_limited_seconds": round(self.bucket.waited, 2),
+        }
+
+
+@lru_cache(maxsize=None)
+def get_translation_client():
+    """The process-wide TranslationClient every web handler shares"""
+    return TranslationClient()
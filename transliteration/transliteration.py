@@ -1,6 +1,7 @@
 import os
 import re
 import sys
+from functools import lru_cache
 from pathlib import Path
 
 language_map = {
@@ -166,6 +167,8 @@ import jieba
 import jieba.posseg as pseg
 from pypinyin import Style, lazy_pinyin, pinyin
 
+from transliteration.markdown_stream import MAX_CHUNK_CHARS, transliterate_in_chunks
+
 EXCLUDE_CHARS = {
     " ",
     ".",
@@ -417,16 +420,21 @@ def get_grammatical_classes_from_pos(pos_tag):
     
     return pos_mapping.get(pos_tag.lower(), pos_tag.lower())
 
+@lru_cache(maxsize=None)
+def load_phrase_corrections():
+    """Custom phrase corrections; loading retrains pypinyin's segmenter, so only once per process"""
+    from pypinyin import load_phrases_dict
+
+    load_phrases_dict(
+        {"什么": [["shén"], ["me"]], "怎么": [["zěn"], ["me"]], "明白": [["míng"], ["bai"]]}
+    )
+
 def get_pinyin_annotations(text, color_coded=False, show_grammatical_class=False):
     """Get pinyin annotations with optional grammatical class display"""
     from string import Template
 
-    from pypinyin import Style, lazy_pinyin, load_phrases_dict
-
     # Custom phrase corrections
-    load_phrases_dict(
-        {"什么": [["shén"], ["me"]], "怎么": [["zěn"], ["me"]], "明白": [["míng"], ["bai"]]}
-    )
+    load_phrase_corrections()
 
     # Get syntax analysis with actual POS tags
     syntax_analysis = analyze_chinese_syntax(text)
@@ -806,12 +814,43 @@ def filter_language_text(text, language):
     else:
         return ""  # Return empty for non-language text to skip processing
 
+def transliterate_chunk(chunk, language):
+    """transliterate() for one chunk of a large input, keeping the result type uniform"""
+    result = transliterate(chunk, language)
+    if isinstance(result, str) and language == "japanese":
+        return [{"orig": chunk, "trans": chunk}]
+    if isinstance(result, str) and language == "korean":
+        return [(c, c) for c in chunk]
+    return result
+
+
+@lru_cache(maxsize=None)
+def japanese_converter():
+    """One (patched) pykakasi converter per process instead of one per call"""
+    return original_pykakasi.kakasi()
+
+
+def transliterate_many(texts, language):
+    """
+    transliterate() for a group of texts in one language, results in order;
+    each distinct text is transliterated once.
+    """
+    results = {}
+    for text in texts:
+        if text not in results:
+            results[text] = transliterate(text, language)
+    return [results[text] for text in texts]
+
+
 # Function to transliterate text
 def transliterate(input_text, language):
     language = language.lower()
     language = language_map.get(language, language)
-    if sys.getsizeof(input_text) > 1_000_000:  # 1MB
-        return "Input too large"
+    if len(input_text) > MAX_CHUNK_CHARS:
+        # Large inputs are transliterated sentence chunk by sentence chunk
+        return transliterate_in_chunks(
+            input_text, lambda chunk: transliterate_chunk(chunk, language)
+        )
     if not input_text:
         return ""
     filtered_text = filter_language_text(input_text, language)
@@ -821,10 +860,7 @@ def transliterate(input_text, language):
         # return ' '.join(pypinyin.lazy_pinyin(input_text, style=pypinyin.Style.TONE))
         return transliterate_chinese(input_text)
     elif language == "japanese":
-        import pykakasi as original_pykakasi
-
-        test_kakasi = original_pykakasi.kakasi()
-        result = test_kakasi.convert(input_text)
+        result = japanese_converter().convert(input_text)
         # print(f"Transliteration result: {[{'orig': item['orig'], 'trans': item['hira'] or item['hepburn']} for item in result]}")
         return [{"orig": item["orig"], "trans": item["hepburn"]} for item in result]
 
@@ -0,0 +1,121 @@
+# batch_benchmark.py
+import argparse
+import asyncio
+import os
+import sys
+import time
+from urllib.parse import urlsplit
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from web.load_test import LOCAL_HOSTS, asgi_request, asgi_startup, http_request
+
+# Subtitle-overlay style lines; the mix repeats to the requested text count
+SAMPLE_TEXTS = [
+    "Я изучаю русский язык каждый день.",
+    "我喜欢学习中文，因为很有意思。",
+    "日本語を毎日勉強しています。",
+    "मैं हर दिन हिंदी सीखता हूँ।",
+    "أنا أتعلم العربية.",
+    "나는 한국어를 공부한다.",
+    "Он читает книгу в библиотеке.",
+    "他们每天都在图书馆看书。",
+]
+
+
+def sample_texts(count):
+    return [SAMPLE_TEXTS[index % len(SAMPLE_TEXTS)] + f" {index}" for index in range(count)]
+
+
+async def run_requests(send_request, payloads, concurrency):
+    """Sends every payload to the endpoint with concurrency in flight; returns seconds elapsed"""
+    queue = asyncio.Queue()
+    for payload in payloads:
+        queue.put_nowait(payload)
+    errors = 0
+
+    async def user():
+        nonlocal errors
+        while not queue.empty():
+            path, payload = queue.get_nowait()
+            if await send_request("POST", path, payload) != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    if errors:
+        print(f"{errors} requests failed")
+    return elapsed
+
+
+async def compare(send_request, texts, batch_size, concurrency):
+    single = [("/api/transliterate", {"text": text}) for text in texts]
+    batches = [
+        ("/api/transliterate/batch", {"texts": texts[start : start + batch_size]})
+        for start in range(0, len(texts), batch_size)
+    ]
+
+    report = {}
+    for name, payloads in (("single", single), (f"batch[{batch_size}]", batches)):
+        elapsed = await run_requests(send_request, payloads, concurrency)
+        report[name] = {
+            "requests": len(payloads),
+            "seconds": round(elapsed, 3),
+            "requests_per_s": round(len(payloads) / elapsed, 1),
+            "texts_per_s": round(len(texts) / elapsed, 1),
+        }
+    return report
+
+
+async def run_in_process(texts, batch_size, concurrency):
+    from web.service import create_app
+
+    app = create_app(max_batch_texts=max(batch_size, 1))
+    lifespan, messages = await asgi_startup(app)
+
+    async def send_request(method, path, payload):
+        status, _, _ = await asgi_request(app, method, path, payload)
+        return status
+
+    try:
+        return await compare(send_request, texts, batch_size, concurrency)
+    finally:
+        await messages.put({"type": "lifespan.shutdown"})
+        await lifespan
+
+
+async def run_against_url(url, texts, batch_size, concurrency):
+    parts = urlsplit(url)
+    if parts.hostname not in LOCAL_HOSTS:
+        raise SystemExit(f"Refusing to benchmark {parts.hostname}: local servers only")
+    port = parts.port or 80
+
+    async def send_request(method, path, payload):
+        return await http_request(parts.hostname, port, method, path, payload)
+
+    return await compare(send_request, texts, batch_size, concurrency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare /api/transliterate/batch with one /api/transliterate request per text"
+    )
+    parser.add_argument(
+        "--url", help="Local server, e.g. http://127.0.0.1:5000 (default: in-process)"
+    )
+    parser.add_argument("--texts", type=int, default=400, help="Texts to transliterate")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    texts = sample_texts(args.texts)
+    if args.url:
+        report = asyncio.run(run_against_url(args.url, texts, args.batch_size, args.concurrency))
+    else:
+        report = asyncio.run(run_in_process(texts, args.batch_size, args.concurrency))
+
+    for name, summary in report.items():
+        print(f"{name:<12} {summary}")
+    single, batch = report.values()
+    print(f"Batch speed-up: {batch['texts_per_s'] / single['texts_per_s']:.1f}x texts/s")
@@ -0,0 +1,582 @@
+# japanese_analysis.py
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+try:
+    import MeCab
+except ImportError:
+    MeCab = None
+
+from transliteration.metrics import engine_timer
+from transliteration.translation_client import get_translation_client
+
+# Dictionaries tried in order before MeCab's default one
+UNIDIC_PATHS = [
+    "/usr/lib/x86_64-linux-gnu/mecab/dic/unidic",
+    "/usr/local/lib/mecab/dic/unidic",
+    "/opt/homebrew/lib/mecab/dic/unidic",  # For macOS
+    os.path.expanduser("~/.local/lib/mecab/dic/unidic"),
+]
+# Taggers per process; a tagger parses for one thread at a time
+TAGGER_POOL_SIZE = int(os.environ.get("MECAB_TAGGER_POOL_SIZE", 4))
+# MeCab node types that carry no token
+BOS_NODE, EOS_NODE = 2, 3
+# Feature count of each dictionary -> index of its katakana reading field
+READING_FIELDS = {
+    29: 20,  # UniDic 3.x "kana"
+    26: 17,  # UniDic 2.x "kana"
+    17: 9,  # older UniDic: "pron", the closest field to a reading
+    9: 7,  # IPAdic "reading"
+}
+
+# Common words translated without a network call
+# fmt: off
+TRANSLATION_MAP = {
+    # Pronouns
+    "私": "I", "わたし": "I", "僕": "I", "俺": "I", "わたくし": "I",
+    "あなた": "you", "君": "you", "お前": "you", "貴方": "you",
+    "彼": "he", "彼女": "she",
+    "これ": "this", "それ": "that", "あれ": "that (over there)",
+    "ここ": "here", "そこ": "there", "あそこ": "over there",
+
+    # Common nouns
+    "人": "person", "先生": "teacher", "學生": "student",
+    "本": "book", "水": "water", "食べ物": "food", "學校": "school",
+    "家": "house", "車": "car", "猫": "cat", "犬": "dog", "魚": "fish",
+    "仕事": "work", "會社": "company", "時間": "time", "友達": "friend",
+    "子供": "child", "大人": "adult", "男": "man", "女": "woman",
+
+    # Verbs
+    "行く": "go", "來る": "come", "見る": "see", "食べる": "eat", "飲む": "drink",
+    "読む": "read", "書く": "write", "話す": "speak", "聞く": "hear",
+    "する": "do", "なる": "become", "ある": "exist (inanimate)", "いる": "exist (animate)",
+    "買う": "buy", "売る": "sell", "作る": "make", "使う": "use",
+    "わかる": "understand", "知る": "know", "思う": "think",
+
+    # Adjectives
+    "大きい": "big", "小さい": "small", "良い": "good", "悪い": "bad",
+    "美味しい": "delicious", "高い": "high/expensive", "安い": "cheap",
+    "暑い": "hot", "寒い": "cold", "新しい": "new", "古い": "old",
+    "難しい": "difficult", "易しい": "easy", "嬉しい": "happy", "悲しい": "sad",
+
+    # Adverbs and others
+    "とても": "very", "少し": "a little", "たくさん": "many", "すぐに": "immediately",
+    "ゆっくり": "slowly", "早く": "quickly",
+
+    # Question words
+    "何": "what", "誰": "who", "どこ": "where", "いつ": "when", "なぜ": "why", "どう": "how",
+
+    # Numbers
+    "一": "one", "二": "two", "三": "three", "四": "four", "五": "five",
+    "六": "six", "七": "seven", "八": "eight", "九": "nine", "十": "ten",
+}
+# fmt: on
+
+
+def create_tagger():
+    """A MeCab tagger on UniDic when it can be found, else on MeCab's default dictionary"""
+    if MeCab is None:
+        raise ImportError("MeCab is not installed (pip install mecab-python3 unidic)")
+
+    unidic_paths = list(UNIDIC_PATHS)
+    # Add the pip installed unidic path
+    try:
+        import unidic
+
+        unidic_paths.insert(0, unidic.DICDIR)
+    except ImportError:
+        pass
+
+    for path in unidic_paths:
+        try:
+            if os.path.exists(path):
+                tagger = MeCab.Tagger(f"-d {path}")
+                print(f"Successfully loaded unidic from: {path}")
+                return tagger
+        except Exception:
+            continue
+
+    # Fallback to system dictionary
+    print("Warning: Could not load unidic, using default system dictionary")
+    return MeCab.Tagger()
+
+
+class TaggerPool:
+    """
+    Thread-safe pool of MeCab taggers.
+
+    A tagger (and the nodes it returns) must not be used by two threads at
+    once, so each parse checks one out; up to size taggers are created lazily
+    and reused, and a thread finding none idle waits for one.
+
+        with pool.tagger() as tagger:
+            tokens = parse_tokens(tagger, text)
+    """
+
+    def __init__(self, size=TAGGER_POOL_SIZE, factory=create_tagger):
+        self.size = max(1, size)
+        self.factory = factory
+        self.created = 0
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def tagger(self):
+        try:
+            tagger = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self.created < self.size
+                if create:
+                    self.created += 1
+            if create:
+                try:
+                    with engine_timer("mecab"):
+                        tagger = self.factory()
+                except Exception:
+                    with self._lock:
+                        self.created -= 1
+                    raise
+            else:
+                tagger = self._idle.get()
+        try:
+            yield tagger
+        finally:
+            self._idle.put(tagger)
+
+
+def parse_tokens(tagger, text):
+    """
+    [(surface, features, byte_offset)] for every MeCab node of text, by node
+    iteration; byte_offset is where the surface starts in text's UTF-8 bytes.
+    """
+    tokens = []
+    offset = 0
+    node = tagger.parseToNode(text)
+    while node:
+        if node.stat not in (BOS_NODE, EOS_NODE):
+            # rlength also counts the whitespace MeCab skipped before the surface
+            offset += node.rlength - node.length
+            tokens.append((node.surface, node.feature.split(","), offset))
+            offset += node.length
+        node = node.next
+    return tokens
+
+
+def split_tokens(tokens, sentences, separator="\n"):
+    """Tokens of "separator".join(sentences) regrouped per sentence"""
+    grouped = [[] for _ in sentences]
+    ends = []
+    end = -len(separator.encode("utf-8"))
+    for sentence in sentences:
+        end += len(separator.encode("utf-8")) + len(sentence.encode("utf-8"))
+        ends.append(end)
+
+    index = 0
+    for surface, features, offset in tokens:
+        while index < len(ends) - 1 and offset >= ends[index]:
+            index += 1
+        grouped[index].append((surface, features))
+    return grouped
+
+
+def kana_reading(features: List[str]) -> Optional[str]:
+    """Katakana reading from a node's features, None when the dictionary has none"""
+    field = READING_FIELDS.get(len(features))
+    if field is None:
+        return None
+    reading = features[field]
+    return reading if reading and reading != "*" else None
+
+
+@lru_cache(maxsize=None)
+def kana_converter():
+    """pykakasi's kana -> romaji converter, without its kanji dictionary pass"""
+    from pykakasi.scripts import IConv
+
+    return IConv()
+
+
+@lru_cache(maxsize=20000)
+def kana_to_romaji(reading):
+    return kana_converter().convert(reading, reading)["hepburn"]
+
+
+@lru_cache(maxsize=None)
+def kanji_converter():
+    """Full pykakasi, for tokens MeCab has no reading for"""
+    import pykakasi
+
+    return pykakasi.kakasi()
+
+
+def word_translation(word, translation):
+    # Failed words, and words Google hands back unchanged, stay blank
+    return translation if translation is not None and translation != word else ""
+
+
+def sentence_translation(sentence, translation):
+    return translation if translation is not None else f"Translation not available: {sentence}"
+
+
+class JapaneseSentenceAnalyzer:
+    """
+    Color-coding analysis of Japanese sentences with MeCab.
+
+    All sentences of a request are parsed in one MeCab call on a pooled tagger;
+    romaji comes from MeCab's own kana reading, and word translations missing
+    from TRANSLATION_MAP go through the shared TranslationClient in one
+    concurrent batch of distinct words.
+    """
+
+    def __init__(self, tagger_pool=None, translation_client=None):
+        self.tagger_pool = tagger_pool or TaggerPool()
+        self._translation_client = translation_client
+
+    @property
+    def translation_client(self):
+        if self._translation_client is None:
+            self._translation_client = get_translation_client()
+        return self._translation_client
+
+    def get_part_of_speech(self, pos_info: str) -> str:
+        """Extract part of speech from MeCab output"""
+        if not pos_info:
+            return "UNKNOWN"
+
+        pos_info = pos_info.split(",")[0]
+
+        pos_mapping = {
+            "名詞": "NOUN",
+            "代名詞": "PRONOUN",
+            "動詞": "VERB",
+            "形容詞": "ADJECTIVE_I",
+            "形状詞": "ADJECTIVE_NA",
+            "副詞": "ADVERB",
+            "連体詞": "PRENOUN_ADJECTIVE",
+            "接続詞": "CONJUNCTION",
+            "感動詞": "INTERJECTION",
+            "助詞": "PARTICLE",
+            "助動詞": "AUXILIARY_VERB",
+            "接頭辞": "PREFIX",
+            "接尾辞": "SUFFIX",
+            "記号": "SYMBOL",
+            "補助記号": "PUNCTUATION",
+        }
+
+        return pos_mapping.get(pos_info, "UNKNOWN")
+
+    def get_particle_type(self, word: str, pos: str, sub_pos: str) -> str:
+        """Determine specific particle type"""
+        if pos != "PARTICLE":
+            return "None"
+
+        particle_mapping = {
+            "は": "CASE_WA",
+            "が": "CASE_GA",
+            "を": "CASE_O",
+            "に": "CASE_NI",
+            "で": "CASE_DE",
+            "へ": "CASE_E",
+            "と": "CASE_TO",
+            "から": "CASE_KARA",
+            "より": "CASE_YORI",
+            "まで": "CASE_MADE",
+            "の": "CASE_NO",
+            "て": "CONNECTIVE_TE",
+            "で": "CONNECTIVE_DE",
+            "ば": "CONNECTIVE_BA",
+            "か": "FINAL_KA",
+            "ね": "FINAL_NE",
+            "よ": "FINAL_YO",
+            "わ": "FINAL_WA",
+            "も": "CASE_MO",
+            "や": "CASE_YA",
+            "とか": "CASE_TOKA",
+            "など": "CASE_NADO",
+        }
+
+        return particle_mapping.get(word, "PARTICLE_GENERIC")
+
+    def get_verb_form(self, word: str, pos: str, conjugation: str) -> str:
+        """Determine verb conjugation form"""
+        if pos not in ["VERB", "AUXILIARY_VERB"]:
+            return "None"
+
+        # Simple form detection based on endings
+        if word.endswith("ます"):
+            return "MASU_PRESENT"
+        elif word.endswith("ました"):
+            return "MASU_PAST"
+        elif word.endswith("ません"):
+            return "MASU_NEGATIVE"
+        elif word.endswith("て"):
+            return "TE_FORM"
+        elif word.endswith("た") or word.endswith("だ"):
+            return "TA_FORM"
+        elif word.endswith("ない"):
+            return "NAI_FORM"
+        elif word.endswith("ば"):
+            return "CONDITIONAL_BA"
+        elif word.endswith("よう"):
+            return "VOLITIONAL"
+        elif word.endswith("られる") or word.endswith("える"):
+            return "POTENTIAL"
+        elif word.endswith("させる"):
+            return "CAUSATIVE"
+        elif word.endswith("ろ") or word.endswith("よ"):
+            return "IMPERATIVE"
+
+        return "DICTIONARY"
+
+    def get_honorific_level(self, word: str, pos: str) -> str:
+        """Determine honorific/politeness level"""
+        if pos == "VERB":
+            if "ます" in word or "です" in word:
+                return "POLITE"
+            elif any(honorific in word for honorific in ["お", "ご", "いたし", "申し"]):
+                return "HUMBLE"
+            elif any(respectful in word for respectful in ["れる", "られる", "なさる"]):
+                return "RESPECTFUL"
+
+        return "PLAIN"
+
+    def get_semantic_category(self, word: str, pos: str) -> str:
+        """Determine semantic category"""
+        if pos == "NOUN":
+            # Simple semantic categorization
+            time_words = ["時", "時間", "日", "月", "年", "分", "秒", "朝", "晩", "夜"]
+            location_words = ["場所", "所", "地点", "位置", "家", "學校", "店", "駅", "空港"]
+            person_words = ["人", "先生", "學生", "私", "あなた", "彼", "彼女", "子供", "大人"]
+
+            if any(time in word for time in time_words):
+                return "TIME"
+            elif any(loc in word for loc in location_words):
+                return "LOCATION"
+            elif any(person in word for person in person_words):
+                return "PERSON"
+            else:
+                return "OBJECT"
+
+        elif pos == "VERB":
+            return "ACTION"
+        elif pos in ["ADJECTIVE_I", "ADJECTIVE_NA"]:
+            return "DESCRIPTION"
+        elif pos == "ADVERB":
+            return "DESCRIPTION"
+        elif pos == "PARTICLE":
+            return "GRAMMAR"
+
+        return "GENERAL"
+
+    def get_syntax_role(
+        self, word: str, pos: str, particle_type: str, index: int, sentence_length: int
+    ) -> str:
+        """Determine syntactic role in sentence"""
+        if particle_type != "None":
+            if particle_type in ["CASE_WA"]:
+                return "TOPIC"
+            elif particle_type in ["CASE_GA"]:
+                return "SUBJECT"
+            elif particle_type in ["CASE_O"]:
+                return "DIRECT_OBJECT"
+            elif particle_type in ["CASE_NI"]:
+                return "INDIRECT_OBJECT"
+            elif particle_type in ["CASE_DE"]:
+                return "LOCATION"
+            elif particle_type in ["CASE_E"]:
+                return "DIRECTION"
+            elif particle_type in ["CASE_KARA"]:
+                return "SOURCE"
+            elif particle_type in ["CASE_MADE"]:
+                return "DESTINATION"
+            elif particle_type in ["CASE_NO"]:
+                return "POSSESSOR"
+            elif particle_type in ["FINAL_KA", "FINAL_NE", "FINAL_YO"]:
+                return "SENTENCE_ENDER"
+
+        if pos == "VERB" and index >= sentence_length - 3:  # Usually verb is near end
+            return "VERB"
+        elif pos in ["ADJECTIVE_I", "ADJECTIVE_NA"] and index >= sentence_length - 3:
+            return "PREDICATE"
+
+        return "MODIFIER"
+
+    def is_punctuation(self, word: str) -> bool:
+        """Check if word is punctuation"""
+        punctuation_chars = [
+            "。",
+            "、",
+            "！",
+            "？",
+            "・",
+            "「",
+            "」",
+            "『",
+            "』",
+            "（",
+            "）",
+            "『",
+            "』",
+            "【",
+            "】",
+            "…",
+            "‥",
+            "〃",
+            "´",
+            "～",
+        ]
+        return word in punctuation_chars
+
+    def get_dictionary_translation(self, word: str, pos: str) -> Optional[str]:
+        """Translation without a network call, or None when the word needs Google Translate"""
+        # Skip translation for particles, punctuation, and some grammatical elements
+        if pos in ["PARTICLE", "PUNCTUATION", "SYMBOL", "AUXILIARY_VERB"]:
+            return ""
+
+        # Enhanced translation dictionary for common words (fallback)
+        if word in TRANSLATION_MAP:
+            return TRANSLATION_MAP[word]
+        return None
+
+    def get_transliteration(self, word: str, features: Optional[List[str]] = None) -> str:
+        """Hepburn romaji from MeCab's kana reading (pykakasi when MeCab has none)"""
+        if self.is_punctuation(word):
+            return ""
+        try:
+            reading = kana_reading(features) if features else None
+            if reading:
+                return kana_to_romaji(reading)
+            result = kanji_converter().convert(word)
+            return "".join(item["hepburn"] for item in result) if result else word
+        except Exception as e:
+            print(f"Transliteration error for '{word}': {e}")
+            return word
+
+    def translate_texts(self, texts: List[str], target_language: str = "en") -> Dict[str, Any]:
+        """{text: translation or None on failure}, distinct texts translated concurrently"""
+        return self.translation_client.translate_many(
+            texts, target_language, fallback=lambda _: None
+        )
+
+    def get_word_translation(self, word: str, pos: str, target_language: str = "en") -> str:
+        """Get translation for individual words using Google Translate"""
+        # First try the translation map
+        translation = self.get_dictionary_translation(word, pos)
+        if translation is not None:
+            return translation
+        return word_translation(word, self.translate_texts([word], target_language)[word])
+
+    def translate_sentence(self, sentence: str, target_lang: str = "en") -> str:
+        """Translate entire sentence using Google Translate"""
+        return sentence_translation(
+            sentence, self.translate_texts([sentence], target_lang)[sentence]
+        )
+
+    def fill_translations(self, analyses, target_language: str = "en", sentences=()):
+        """
+        Translates the words analyze_sentences(translate=False) left pending,
+        together with sentences, in one batch.
+
+        Returns:
+            the translations of sentences
+        """
+        words = [
+            item["word"] for analysis in analyses for item in analysis if item["needs_translation"]
+        ]
+        translated = self.translate_texts(words + list(sentences), target_language)
+        for analysis in analyses:
+            for item in analysis:
+                if item["needs_translation"]:
+                    item["translation"] = word_translation(item["word"], translated[item["word"]])
+                    item["needs_translation"] = False
+        return [sentence_translation(sentence, translated[sentence]) for sentence in sentences]
+
+    def parse_sentences(self, sentences: List[str]):
+        """[(surface, features)] per sentence, all sentences parsed in one MeCab call"""
+        with self.tagger_pool.tagger() as tagger:
+            tokens = parse_tokens(tagger, "\n".join(sentences))
+        return split_tokens(tokens, sentences)
+
+    def analyze_tokens(self, words) -> List[Dict[str, Any]]:
+        """Analysis of one sentence's (surface, features) tokens, without network calls"""
+        result = []
+        for i, (word, features) in enumerate(words):
+            # Skip punctuation entirely
+            if self.is_punctuation(word):
+                continue
+
+            # Skip if it's empty
+            if not word.strip():
+                continue
+
+            # Get basic POS
+            pos = self.get_part_of_speech(features[0] if features else "")
+
+            # Skip if it's punctuation POS
+            if pos == "PUNCTUATION":
+                continue
+
+            # Get particle type
+            particle_type = self.get_particle_type(
+                word, pos, features[1] if len(features) > 1 else ""
+            )
+
+            # Get verb form
+            verb_form = self.get_verb_form(word, pos, features[-1] if features else "")
+
+            # Get honorific level
+            honorific_level = self.get_honorific_level(word, pos)
+
+            # Get semantic category
+            semantic_category = self.get_semantic_category(word, pos)
+
+            # Get syntax role
+            syntax_role = self.get_syntax_role(word, pos, particle_type, i, len(words))
+
+            # Get transliteration from MeCab's reading
+            romaji_word = self.get_transliteration(word, features)
+
+            # Dictionary translation now; the rest are batched by fill_translations
+            translation = self.get_dictionary_translation(word, pos)
+
+            result.append(
+                {
+                    "word": word,
+                    "transliteration": romaji_word,
+                    "translation": translation or "",
+                    "syntax_role": syntax_role,
+                    "part_of_speech": pos,
+                    "particle_type": particle_type,
+                    "verb_form": verb_form,
+                    "honorific_level": honorific_level,
+                    "is_punctuation": False,  # We're filtering these out now
+                    "semantic_category": semantic_category,
+                    "needs_translation": translation is None,
+                }
+            )
+
+        return result
+
+    def analyze_sentences(
+        self, sentences: List[str], target_language: str = "en", translate: bool = True
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Analyze Japanese sentences and return detailed word information per sentence.
+        With translate=False no network call is made: words missing from
+        TRANSLATION_MAP get "needs_translation": True and an empty translation.
+        """
+        analyses = [self.analyze_tokens(words) for words in self.parse_sentences(sentences)]
+        if translate:
+            self.fill_translations(analyses, target_language)
+        return analyses
+
+    def analyze_sentence(
+        self, sentence: str, target_language: str = "en", translate: bool = True
+    ) -> List[Dict[str, Any]]:
+        """Analyze a Japanese sentence and return detailed word information"""
+        return self.analyze_sentences([sentence], target_language, translate)[0]
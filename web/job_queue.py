@@ -0,0 +1,536 @@
+# job_queue.py
+import argparse
+import json
+import os
+import shutil
+import signal
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from transliteration.metrics import BACKGROUND_JOB_SECONDS, pid_alive
+
+# Uploaded inputs, one directory per job (the docker-compose "uploads" volume)
+UPLOAD_DIR = os.environ.get("TRANSLITERATION_UPLOAD_DIR", "uploads")
+# Finished outputs, one directory per job (the docker-compose "processed" volume)
+PROCESSED_DIR = os.environ.get("TRANSLITERATION_PROCESSED_DIR", "processed")
+# Queue database shared by every web worker and job worker on the host
+JOBS_DB = os.environ.get("TRANSLITERATION_JOBS_DB") or os.path.join(UPLOAD_DIR, "jobs.sqlite")
+# Jobs running at once on the host, whichever process started them
+MAX_RUNNING_JOBS = int(os.environ.get("TRANSLITERATION_MAX_RUNNING_JOBS", 2))
+# Jobs waiting; further uploads are refused until the queue drains
+MAX_QUEUED_JOBS = int(os.environ.get("TRANSLITERATION_MAX_QUEUED_JOBS", 50))
+# Largest upload accepted, in bytes
+MAX_UPLOAD_BYTES = int(os.environ.get("TRANSLITERATION_MAX_UPLOAD_BYTES", 512 * 1024 * 1024))
+# Job workers each web worker runs (0: only `python web/job_queue.py` runs jobs)
+JOB_WORKERS = int(os.environ.get("TRANSLITERATION_JOB_WORKERS", MAX_RUNNING_JOBS))
+# Seconds between two looks at the queue
+POLL_INTERVAL = 1.0
+# Runs a job gets when its worker keeps dying before it is marked failed
+MAX_ATTEMPTS = 2
+
+
+class JobError(Exception):
+    """A job that cannot be queued, found or changed; status is the HTTP status to answer"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def run_epub_transliteration(input_path, options, progress):
+    from transliteration.epubTransliteration import process_epub
+
+    return [process_epub(input_path, options["language"], progress=progress)]
+
+
+def run_subtitle_zip(input_path, options, progress):
+    from subtitles.translation_memory import open_translation_memory
+    from subtitles.zip2zipMultilingual import process_zip_of_srts
+
+    # Set SUBTITLE_TRANSLATION_MEMORY to reuse translations across jobs
+    with open_translation_memory() as translation_memory:
+        combined_zip = process_zip_of_srts(
+            input_path,
+            options["languages"],
+            enable_transliteration=options.get("transliterate", True),
+            enable_styling=options.get("styling", False),
+            translation_memory=translation_memory,
+            progress=progress,
+        )
+    return [combined_zip]
+
+
+def run_epub_versions(input_path, options, progress):
+    from transliteration.epubVersions import (
+        SUPPORTED_LANGUAGES,
+        get_language_from_epub,
+        remove_original,
+        transliterate_epub,
+    )
+
+    language = options.get("language") or get_language_from_epub(input_path)
+    outputs = [remove_original(input_path)]
+    if language not in SUPPORTED_LANGUAGES:
+        print(f"No transliteration for language {language!r}; original text removed only")
+        return outputs
+    progress(1, 2)
+    # The second half of the job: transliteration, file by file
+    outputs.append(
+        transliterate_epub(
+            input_path, language, progress=lambda done, total: progress(total + done, 2 * total)
+        )
+    )
+    return outputs
+
+
+# kind -> (function(input_path, options, progress) -> output paths, accepted file extension)
+JOB_KINDS = {
+    "epub_transliteration": (run_epub_transliteration, ".epub"),
+    "epub_versions": (run_epub_versions, ".epub"),
+    "subtitle_zip": (run_subtitle_zip, ".zip"),
+}
+
+
+def job_options(kind, filename, params):
+    """
+    Checked options of a new job from request parameters ({name: string}).
+
+    Raises:
+        JobError: 400 for an unknown kind, a wrong file type or a missing/unsupported language
+    """
+    if kind not in JOB_KINDS:
+        raise JobError(400, f"'kind' must be one of: {', '.join(JOB_KINDS)}")
+    extension = JOB_KINDS[kind][1]
+    if not filename or not filename.lower().endswith(extension):
+        raise JobError(400, f"A {kind} job takes a {extension} file ('filename')")
+
+    options = {}
+    if kind in ("epub_transliteration", "epub_versions"):
+        from transliteration.epubTransliteration import SUPPORTED_LANGUAGES
+
+        language = params.get("language")
+        if language and language not in SUPPORTED_LANGUAGES:
+            raise JobError(400, f"'language' must be one of: {', '.join(SUPPORTED_LANGUAGES)}")
+        if kind == "epub_transliteration" and not language:
+            raise JobError(400, "'language' is required")
+        options["language"] = language
+    else:
+        from transliteration.translationFunctions import LANGUAGE_CODE_MAP
+
+        languages = [
+            code.strip() for code in params.get("languages", "").split(",") if code.strip()
+        ]
+        unknown = [code for code in languages if code not in LANGUAGE_CODE_MAP]
+        if not languages or unknown:
+            raise JobError(
+                400,
+                f"'languages' must be a comma-separated list of: {', '.join(LANGUAGE_CODE_MAP)}",
+            )
+        options["languages"] = languages
+        options["transliterate"] = params.get("transliterate", "1") not in ("0", "false", "no")
+        options["styling"] = params.get("styling", "0") not in ("0", "false", "no")
+    return options
+
+
+class JobQueue:
+    """
+    Jobs (EPUB transliteration, EPUB versions, subtitle zips) queued in SQLite.
+
+    Any number of processes on the host open the same db_path: web workers
+    submit, query and cancel jobs, JobWorkers claim and run them. The
+    max_running limit is checked inside the claiming transaction, so it holds
+    for the whole host however many workers there are.
+
+    A job is queued -> running -> done | failed | cancelled. Inputs live in
+    upload_dir/<id>/ until the job ends; outputs are moved to processed_dir/<id>/.
+    """
+
+    def __init__(
+        self,
+        db_path=JOBS_DB,
+        upload_dir=UPLOAD_DIR,
+        processed_dir=PROCESSED_DIR,
+        max_running=MAX_RUNNING_JOBS,
+        max_queued=MAX_QUEUED_JOBS,
+    ):
+        self.db_path = db_path
+        self.upload_dir = upload_dir
+        self.processed_dir = processed_dir
+        self.max_running = max_running
+        self.max_queued = max_queued
+
+        self._lock = threading.Lock()
+        # Opened on first use in each process: a connection must not cross a gunicorn fork
+        self._conn = None
+        self._conn_pid = None
+
+    def close(self):
+        if self._conn is not None and self._conn_pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None or self._conn_pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            # Autocommit; claims take the write lock explicitly with BEGIN IMMEDIATE
+            self._conn = sqlite3.connect(
+                self.db_path, timeout=30, check_same_thread=False, isolation_level=None
+            )
+            self._conn_pid = os.getpid()
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT,
+                    status TEXT,
+                    filename TEXT,
+                    options TEXT,
+                    input_path TEXT,
+                    output_dir TEXT,
+                    results TEXT,
+                    progress REAL DEFAULT 0,
+                    message TEXT,
+                    error TEXT,
+                    worker_pid INTEGER,
+                    attempts INTEGER DEFAULT 0,
+                    created REAL,
+                    started REAL,
+                    finished REAL
+                )
+            """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+        return self._conn
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._connection().execute(sql, params)
+
+    def upload_path(self, job_id, filename):
+        # Only the base name: the client picks the name, not the directory
+        return os.path.join(self.upload_dir, job_id, os.path.basename(filename))
+
+    def new_job_id(self):
+        return uuid.uuid4().hex
+
+    def submit(self, job_id, kind, filename, options):
+        """
+        Queues a job whose input is already at upload_path(job_id, filename).
+
+        Raises:
+            JobError: 503 when max_queued jobs are already waiting
+        """
+        with self._lock:
+            conn = self._connection()
+            queued = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            if queued >= self.max_queued:
+                raise JobError(503, f"The job queue is full ({queued} jobs waiting)")
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, filename, options, input_path, output_dir, "
+                "created) VALUES (?, ?, 'queued', ?, ?, ?, ?, ?)",
+                (
+                    job_id,
+                    kind,
+                    os.path.basename(filename),
+                    json.dumps(options),
+                    os.path.abspath(self.upload_path(job_id, filename)),
+                    os.path.abspath(os.path.join(self.processed_dir, job_id)),
+                    time.time(),
+                ),
+            )
+        return self.get(job_id)
+
+    def get(self, job_id):
+        """The job as a dict, or None"""
+        row = self._execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job(row) if row is not None else None
+
+    def list(self, limit=50):
+        rows = self._execute("SELECT * FROM jobs ORDER BY created DESC LIMIT ?", (limit,))
+        return [self._job(row) for row in rows.fetchall()]
+
+    def _job(self, row):
+        job = dict(row)
+        job["options"] = json.loads(job["options"] or "{}")
+        job["results"] = json.loads(job["results"] or "[]")
+        return job
+
+    def claim(self, worker_pid=None):
+        """
+        Marks the oldest queued job running and returns it, or None when the
+        queue is empty or max_running jobs are already running.
+        """
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                running = conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = 'running'"
+                ).fetchone()[0]
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1"
+                ).fetchone()
+                if running >= self.max_running or row is None:
+                    conn.execute("ROLLBACK")
+                    return None
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', started = ?, worker_pid = ?, "
+                    "attempts = attempts + 1, message = NULL WHERE id = ?",
+                    (time.time(), worker_pid or os.getpid(), row["id"]),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return self.get(row["id"])
+
+    def set_worker(self, job_id, pid):
+        self._execute("UPDATE jobs SET worker_pid = ? WHERE id = ?", (pid, job_id))
+
+    def set_progress(self, job_id, done, total, message=None):
+        progress = min(1.0, done / total) if total else 0.0
+        self._execute(
+            "UPDATE jobs SET progress = ?, message = COALESCE(?, message) "
+            "WHERE id = ? AND status = 'running'",
+            (round(progress, 4), message, job_id),
+        )
+
+    def _end(self, job_id, status, from_statuses, **fields):
+        """Moves a job to a final status; False when it was not in from_statuses anymore"""
+        assignments = "".join(f", {name} = ?" for name in fields)
+        placeholders = ", ".join("?" for _ in from_statuses)
+        cursor = self._execute(
+            f"UPDATE jobs SET status = ?, finished = ?{assignments} "
+            f"WHERE id = ? AND status IN ({placeholders})",
+            (status, time.time(), *fields.values(), job_id, *from_statuses),
+        )
+        return bool(cursor.rowcount)
+
+    def remove_input(self, job):
+        # The upload and anything the job extracted next to it
+        shutil.rmtree(os.path.dirname(job["input_path"]), ignore_errors=True)
+
+    def finish(self, job_id, results):
+        # A job cancelled while it was finishing stays cancelled
+        ended = self._end(job_id, "done", ("running",), results=json.dumps(results), progress=1.0)
+        if ended:
+            self.remove_input(self.get(job_id))
+        return ended
+
+    def fail(self, job_id, error):
+        ended = self._end(job_id, "failed", ("running",), error=error)
+        if ended:
+            self.remove_input(self.get(job_id))
+        return ended
+
+    def cancel(self, job_id):
+        """
+        Cancels a queued or running job; a running one's worker process group is killed.
+
+        Raises:
+            JobError: 404 for an unknown job, 409 for one that already ended
+        """
+        job = self.get(job_id)
+        if job is None:
+            raise JobError(404, "No such job")
+        if not self._end(job_id, "cancelled", ("queued", "running"), message="Cancelled"):
+            raise JobError(409, f"The job is already {self.get(job_id)['status']}")
+        if job["status"] == "running":
+            kill_worker(job["worker_pid"])
+            shutil.rmtree(job["output_dir"], ignore_errors=True)
+        self.remove_input(job)
+        return self.get(job_id)
+
+    def recover(self, alive=pid_alive):
+        """
+        Requeues running jobs whose worker process is gone (a crash, a killed
+        container), or fails them after MAX_ATTEMPTS. Returns their ids.
+        """
+        rows = self._execute(
+            "SELECT id, worker_pid, attempts FROM jobs WHERE status = 'running'"
+        ).fetchall()
+        recovered = []
+        for row in rows:
+            if row["worker_pid"] and alive(row["worker_pid"]):
+                continue
+            if row["attempts"] < MAX_ATTEMPTS:
+                self._execute(
+                    "UPDATE jobs SET status = 'queued', worker_pid = NULL, progress = 0, "
+                    "message = 'Requeued: its worker exited' WHERE id = ? AND status = 'running'",
+                    (row["id"],),
+                )
+            else:
+                self.fail(row["id"], f"Worker exited {row['attempts']} times")
+            recovered.append(row["id"])
+        return recovered
+
+    def stats(self):
+        counts = dict(self._execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {
+            "queued": counts.get("queued", 0),
+            "running": counts.get("running", 0),
+            "done": counts.get("done", 0),
+            "failed": counts.get("failed", 0),
+            "cancelled": counts.get("cancelled", 0),
+            "max_running": self.max_running,
+            "max_queued": self.max_queued,
+        }
+
+
+def open_job_queue(db_path=None):
+    """JobQueue at db_path, or at $TRANSLITERATION_JOBS_DB (uploads/jobs.sqlite)"""
+    return JobQueue(db_path=db_path or JOBS_DB)
+
+
+def kill_worker(pid):
+    """Stops a job process and its own workers (translation threads, process pools)"""
+    if not pid:
+        return
+    try:
+        # Job processes lead their own session, so the group id is their pid
+        os.killpg(pid, signal.SIGTERM)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def run_job(queue, job_id):
+    """
+    Runs one claimed job in this process and records its outcome.
+
+    Outputs are moved to the job's output directory; the results list their file names.
+    """
+    job = queue.get(job_id)
+    run, _ = JOB_KINDS[job["kind"]]
+    last_update = [0.0]
+
+    def progress(done, total):
+        # At most a few writes per second, whatever the number of chapters
+        now = time.monotonic()
+        if done >= total or now - last_update[0] > 0.5:
+            last_update[0] = now
+            queue.set_progress(job_id, done, total, f"{done}/{total}")
+
+    print(f"Job {job_id}: {job['kind']} of {job['filename']}")
+    try:
+        outputs = run(job["input_path"], job["options"], progress)
+        os.makedirs(job["output_dir"], exist_ok=True)
+        results = []
+        for output in outputs:
+            name = os.path.basename(output)
+            shutil.move(output, os.path.join(job["output_dir"], name))
+            results.append(name)
+    except BaseException as e:
+        # SystemExit too: verify_language() exits on an unsupported language
+        error = str(e) or type(e).__name__
+        print(f"Job {job_id} failed: {error}")
+        queue.fail(job_id, error)
+        shutil.rmtree(job["output_dir"], ignore_errors=True)
+        return False
+    queue.finish(job_id, results)
+    print(f"Job {job_id} done: {', '.join(results)}")
+    return True
+
+
+class JobWorker:
+    """
+    Claims jobs from a JobQueue and runs each in its own process, at most
+    `slots` at a time (and at most queue.max_running on the host).
+
+    Job processes start a new session, outlive this worker (a web worker
+    restart does not kill a book half-way) and record their own outcome; the
+    worker only reaps them, times them and requeues jobs of crashed ones.
+    """
+
+    def __init__(self, queue, slots=JOB_WORKERS, poll_interval=POLL_INTERVAL):
+        self.queue = queue
+        self.slots = slots
+        self.poll_interval = poll_interval
+        self.processes = {}  # job id -> (Popen, kind, start time)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def spawn(self, job):
+        command = [
+            sys.executable,
+            os.path.abspath(__file__),
+            "--run-job",
+            job["id"],
+            "--db",
+            os.path.abspath(self.queue.db_path),
+        ]
+        return subprocess.Popen(command, start_new_session=True)
+
+    def reap(self):
+        for job_id, (process, kind, started) in list(self.processes.items()):
+            if process.poll() is None:
+                continue
+            del self.processes[job_id]
+            job = self.queue.get(job_id)
+            if job["status"] == "running":
+                self.queue.fail(job_id, f"Job process exited with code {process.returncode}")
+                job = self.queue.get(job_id)
+            BACKGROUND_JOB_SECONDS.observe(time.time() - started, kind=kind, status=job["status"])
+
+    def run_once(self):
+        """Reaps finished job processes and starts queued jobs in the free slots"""
+        self.reap()
+        self.queue.recover()
+        while len(self.processes) < self.slots:
+            job = self.queue.claim()
+            if job is None:
+                break
+            try:
+                process = self.spawn(job)
+            except OSError as e:
+                self.queue.fail(job["id"], f"Could not start the job process: {e}")
+                continue
+            self.queue.set_worker(job["id"], process.pid)
+            self.processes[job["id"]] = (process, job["kind"], time.time())
+
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except sqlite3.Error as e:
+                print(f"Job queue unavailable: {e}")
+            self._stop.wait(self.poll_interval)
+
+    def start(self):
+        """Runs the worker on a daemon thread (inside a web worker)"""
+        if self.slots > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="job-worker", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        # Running jobs carry on and record their own outcome
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval * 2)
+            self._thread = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Runs queued EPUB and subtitle jobs")
+    parser.add_argument("--db", default=JOBS_DB, help="Queue database (TRANSLITERATION_JOBS_DB)")
+    parser.add_argument("--workers", type=int, default=MAX_RUNNING_JOBS, help="Jobs at once")
+    parser.add_argument("--run-job", metavar="ID", help="Run one claimed job (used by workers)")
+    args = parser.parse_args()
+
+    job_queue = open_job_queue(args.db)
+    if args.run_job:
+        sys.exit(0 if run_job(job_queue, args.run_job) else 1)
+
+    print(f"Job worker: {args.workers} slot(s), queue {args.db}")
+    try:
+        JobWorker(job_queue, slots=args.workers).run()
+    except KeyboardInterrupt:
+        pass
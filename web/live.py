@@ -1,5 +1,9 @@
+import argparse
 import re
 import os
+import sys
+from functools import lru_cache
+
 import pypinyin
 from hangul_romanize import Transliter
 from hangul_romanize.rule import academic
@@ -11,7 +15,6 @@ import jieba
 import http.server
 import socketserver
 import json
-from livereload import Server
 import time
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
@@ -85,17 +88,18 @@ def add_furigana(text, transliteration, language):
     return "".join(furigana_text)
 
 
+@lru_cache(maxsize=None)
+def kakasi_converter():
+    # One converter for the process; pykakasi's setMode/getConverter API is deprecated
+    return pykakasi.kakasi()
+
+
 # Function to transliterate text
 def transliterate(input_text, language):
     if language == "chinese":
         return " ".join(pypinyin.lazy_pinyin(input_text, style=pypinyin.Style.TONE3))
     elif language == "japanese":
-        kakasi = pykakasi.kakasi()
-        kakasi.setMode("H", "a")
-        kakasi.setMode("K", "a")
-        kakasi.setMode("J", "a")
-        converter = kakasi.getConverter()
-        result = converter.do(input_text)
+        result = " ".join(item["hepburn"] for item in kakasi_converter().convert(input_text))
         return result.split()
     elif language == "russian":
         import transliterate
@@ -181,6 +185,8 @@ def write_css_file(css_file):
 
 # Function to start a live server
 def start_live_server(port=8000):
+    from livereload import Server
+
     server = Server()
     server.watch("output.html")  # Watch the HTML file for changes
     server.watch("styles.css")  # Watch the CSS file for changes
@@ -255,8 +261,32 @@ def process_file(input_file):
     start_live_server()
 
 
-# Example usage
-input_file = (
-    "/home/zaya/Downloads/Zayas/ZayasTransliteration/web/test.json"  # Replace with your input file
-)
-process_file(input_file)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Live transliteration preview")
+    parser.add_argument(
+        "input",
+        nargs="?",
+        default="/home/zaya/Downloads/Zayas/ZayasTransliteration/web/test.json",
+        help="JSON list of {language, text}, or (with --incremental) a Markdown file",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Re-render only changed paragraphs and patch the page over a websocket",
+    )
+    parser.add_argument("--language", help="Language of the whole file (--incremental)")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    if args.incremental:
+        import asyncio
+
+        sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+        from web.live_preview import serve_preview
+
+        try:
+            asyncio.run(serve_preview(args.input, args.language, port=args.port))
+        except KeyboardInterrupt:
+            pass
+    else:
+        process_file(args.input)
@@ -0,0 +1,480 @@
+# live_preview.py
+import argparse
+import asyncio
+import base64
+import hashlib
+import html
+import json
+import os
+import re
+import struct
+import sys
+import time
+from functools import lru_cache
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from transliteration import add_furigana, transliterate
+from web.text_analysis import detect_language_text
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+# Rendered paragraphs kept across edits; unchanged ones are never transliterated again
+RENDER_CACHE_SIZE = 50_000
+# Seconds between checks of the input file when watchdog is not installed
+POLL_INTERVAL = 0.2
+# Editors save in several writes; changes this close together are rendered once
+DEBOUNCE_SECONDS = 0.02
+# Largest message accepted from a browser (they only send their version)
+MAX_CLIENT_FRAME_BYTES = 64 * 1024
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+TRANSLITERATED_LANGUAGES = {"chinese", "japanese", "korean", "hindi", "arabic", "russian"}
+PARAGRAPH_BREAK = re.compile(r"\n(?:[ \t]*\n)+")
+FENCE_PATTERN = re.compile(r"^\s*(```|~~~)", re.MULTILINE)
+HEADER_PATTERN = re.compile(r"^(#{1,6})\s+(.*)$", re.DOTALL)
+
+PREVIEW_CSS = """
+ruby { display: inline-flex; flex-direction: column-reverse; align-items: center;
+       white-space: nowrap; margin-right: 0.5em; }
+rt { font-size: 0.75em; line-height: 1.2; text-align: center; }
+.content { max-width: 800px; margin: 0 auto; padding: 20px; font-family: Arial, sans-serif; }
+h1 { font-size: 1.5em; margin-bottom: 10px; }
+p { font-size: 1.2em; line-height: 1.6; }
+.changed { animation: changed 1s ease-out; }
+@keyframes changed { from { background: #fff3b0; } to { background: transparent; } }
+"""
+
+# Applies {"type": "patch"} messages to #content; anything out of order asks for a reset
+PREVIEW_SCRIPT = """
+(function () {
+  const content = document.getElementById('content');
+  let version = Number(content.dataset.version);
+
+  function block(html) {
+    const div = document.createElement('div');
+    div.className = 'block';
+    div.innerHTML = html;
+    return div;
+  }
+
+  function connect() {
+    const socket = new WebSocket(`ws://${location.host}/ws`);
+    socket.onopen = () => socket.send(String(version));
+    socket.onmessage = (event) => {
+      const message = JSON.parse(event.data);
+      if (message.type === 'reset') {
+        content.replaceChildren(...message.blocks.map(block));
+        version = message.version;
+        return;
+      }
+      if (message.version !== version + 1) {
+        socket.send('reset');
+        return;
+      }
+      for (let i = 0; i < message.delete; i++) {
+        content.children[message.start].remove();
+      }
+      const anchor = content.children[message.start] || null;
+      message.insert.forEach((html) => {
+        const div = block(html);
+        div.classList.add('changed');
+        content.insertBefore(div, anchor);
+      });
+      const first = content.children[Math.min(message.start, content.children.length - 1)];
+      if (first) {
+        first.scrollIntoView({ block: 'nearest' });
+      }
+      version = message.version;
+    };
+    socket.onclose = () => setTimeout(connect, 1000);
+  }
+
+  connect();
+})();
+"""
+
+
+def split_blocks(text):
+    """
+    Markdown paragraphs of text, split at blank lines; a fenced code block
+    stays one block even when it contains blank lines.
+    """
+    blocks = []
+    open_block = None
+    for piece in PARAGRAPH_BREAK.split(text):
+        if open_block is not None:
+            open_block += "\n\n" + piece
+            if len(FENCE_PATTERN.findall(piece)) % 2:
+                blocks.append(open_block)
+                open_block = None
+            continue
+        if not piece.strip():
+            continue
+        if len(FENCE_PATTERN.findall(piece)) % 2:
+            open_block = piece
+        else:
+            blocks.append(piece)
+    if open_block is not None:
+        blocks.append(open_block)
+    return blocks
+
+
+def read_blocks(path, language=None):
+    """
+    (language, text) blocks of a Markdown/text file, or of a JSON list of
+    {"language", "text"} entries (each rendered under a language heading).
+    language=None detects the language of every block.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+    if not path.endswith(".json"):
+        return [(language, block) for block in split_blocks(content)]
+
+    blocks = []
+    for entry in json.loads(content or "[]"):
+        blocks.append(("english", f"# {entry['language'].capitalize()}"))
+        blocks.append((entry["language"], entry["text"]))
+    return blocks
+
+
+def annotate_line(line, language):
+    if language is None:
+        language = detect_language_text(line)
+    if language not in TRANSLITERATED_LANGUAGES or not line.strip():
+        return html.escape(line)
+    try:
+        return str(add_furigana(line, transliterate(line, language), language))
+    except Exception as e:
+        print(f"Could not transliterate {line[:40]!r}: {e}")
+        return html.escape(line)
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def render_block(language, text):
+    """HTML for one block: a heading, a fenced code block or a transliterated paragraph"""
+    if FENCE_PATTERN.match(text):
+        lines = text.split("\n")[1:]
+        if lines and FENCE_PATTERN.match(lines[-1]):
+            lines.pop()
+        code = "\n".join(lines)
+        return f"<pre><code>{html.escape(code)}</code></pre>"
+
+    header = HEADER_PATTERN.match(text.strip())
+    if header:
+        level = len(header.group(1))
+        return f"<h{level}>{annotate_line(header.group(2), language)}</h{level}>"
+
+    lines = [annotate_line(line, language) for line in text.strip().split("\n")]
+    return "<p>" + "<br>\n".join(lines) + "</p>"
+
+
+class PreviewDocument:
+    """
+    Rendered blocks of the previewed file and the patches between versions.
+
+    update() keeps the blocks shared with the previous version at the start
+    and at the end and renders only those in between, so editing one line
+    re-renders one paragraph whatever the size of the file.
+    """
+
+    def __init__(self, render=render_block):
+        self.render = render
+        self.blocks = []
+        self.html = []
+        self.version = 0
+
+    def update(self, blocks):
+        """
+        Returns:
+            {"type": "patch", "version", "start", "delete", "insert"} turning the
+            previous HTML blocks into the new ones, or None when nothing changed
+        """
+        old = self.blocks
+        limit = min(len(old), len(blocks))
+        start = 0
+        while start < limit and old[start] == blocks[start]:
+            start += 1
+        end = 0
+        while end < limit - start and old[-1 - end] == blocks[-1 - end]:
+            end += 1
+        if start == len(old) == len(blocks):
+            return None
+
+        inserted = [self.render(*block) for block in blocks[start : len(blocks) - end]]
+        deleted = len(old) - end - start
+        self.html[start : start + deleted] = inserted
+        self.blocks = list(blocks)
+        self.version += 1
+        return {
+            "type": "patch",
+            "version": self.version,
+            "start": start,
+            "delete": deleted,
+            "insert": inserted,
+        }
+
+    def reset_message(self):
+        return {"type": "reset", "version": self.version, "blocks": self.html}
+
+    def page(self, title):
+        blocks = "".join(f'<div class="block">{block}</div>' for block in self.html)
+        return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{html.escape(title)}</title>
+    <style>{PREVIEW_CSS}</style>
+</head>
+<body>
+    <div class="content" id="content" data-version="{self.version}">{blocks}</div>
+    <script>{PREVIEW_SCRIPT}</script>
+</body>
+</html>
+"""
+
+
+def websocket_accept(key):
+    """Sec-WebSocket-Accept for a client's Sec-WebSocket-Key (RFC 6455)"""
+    digest = hashlib.sha1((key + WEBSOCKET_GUID).encode("ascii")).digest()
+    return base64.b64encode(digest).decode("ascii")
+
+
+def encode_frame(payload, opcode=0x1):
+    """One unmasked, unfragmented server frame (0x1 text, 0x8 close, 0xA pong)"""
+    header = bytearray([0x80 | opcode])
+    length = len(payload)
+    if length < 126:
+        header.append(length)
+    elif length < 1 << 16:
+        header.append(126)
+        header += struct.pack("!H", length)
+    else:
+        header.append(127)
+        header += struct.pack("!Q", length)
+    return bytes(header) + payload
+
+
+async def read_frame(reader, max_bytes=MAX_CLIENT_FRAME_BYTES):
+    """(opcode, payload) of the next frame, unmasked"""
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        (length,) = struct.unpack("!H", await reader.readexactly(2))
+    elif length == 127:
+        (length,) = struct.unpack("!Q", await reader.readexactly(8))
+    if length > max_bytes:
+        raise ValueError(f"Frame of {length} bytes is over the {max_bytes} byte limit")
+    mask = await reader.readexactly(4) if second & 0x80 else b""
+    payload = await reader.readexactly(length)
+    if mask:
+        payload = bytes(byte ^ mask[index % 4] for index, byte in enumerate(payload))
+    return first & 0x0F, payload
+
+
+class FileChangeHandler(FileSystemEventHandler):
+    """Calls notify() for events on one file (saves through a rename included)"""
+
+    def __init__(self, path, notify):
+        self.path = os.path.abspath(path)
+        self.notify = notify
+
+    def on_any_event(self, event):
+        paths = (getattr(event, "src_path", ""), getattr(event, "dest_path", ""))
+        if self.path in (os.path.abspath(path) for path in paths if path):
+            self.notify()
+
+
+class PreviewServer:
+    """
+    Serves a live, transliterated preview of one file.
+
+        python web/live_preview.py notes.md --port 8000
+
+    GET / returns the current page; the page keeps a websocket open on /ws.
+    When the file changes, only the changed paragraphs are re-rendered and
+    the browser receives them as a patch, so the preview updates in
+    milliseconds even for very large files.
+    """
+
+    def __init__(self, path, language=None, host="127.0.0.1", port=8000):
+        self.path = path
+        self.language = language
+        self.host = host
+        self.port = port
+        self.document = PreviewDocument()
+        self.clients = set()
+        self.server = None
+        self.last_update_ms = None
+        self._changed = None
+        self._observer = None
+
+    def refresh(self):
+        """Re-reads the file; returns the patch sent to the browsers, or None"""
+        start = time.perf_counter()
+        try:
+            blocks = read_blocks(self.path, self.language)
+        except (OSError, ValueError) as e:
+            # A half-written JSON file or a save in progress; the next event retries
+            print(f"Could not read {self.path}: {e}")
+            return None
+        patch = self.document.update(blocks)
+        if patch is not None:
+            self.last_update_ms = (time.perf_counter() - start) * 1000
+            print(
+                f"Version {patch['version']}: {len(patch['insert'])} block(s) re-rendered "
+                f"at {patch['start']} in {self.last_update_ms:.1f} ms"
+            )
+            self.broadcast(patch)
+        return patch
+
+    def broadcast(self, message):
+        frame = encode_frame(json.dumps(message, ensure_ascii=False).encode("utf-8"))
+        for writer in list(self.clients):
+            if writer.is_closing():
+                self.clients.discard(writer)
+            else:
+                writer.write(frame)
+
+    async def start(self):
+        self._changed = asyncio.Event()
+        self.refresh()
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.watch()
+        return self
+
+    async def close(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+        for writer in list(self.clients):
+            writer.close()
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    def watch(self):
+        """Watches the file with watchdog, or by polling its mtime without it"""
+        loop = asyncio.get_running_loop()
+        if Observer is not None:
+            handler = FileChangeHandler(
+                self.path, lambda: loop.call_soon_threadsafe(self._changed.set)
+            )
+            self._observer = Observer()
+            self._observer.schedule(handler, os.path.dirname(os.path.abspath(self.path)) or ".")
+            self._observer.start()
+        else:
+            loop.create_task(self.poll())
+        loop.create_task(self.refresh_on_change())
+
+    async def poll(self):
+        last = None
+        while True:
+            try:
+                stat = os.stat(self.path)
+                current = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                current = None
+            if last is not None and current != last:
+                self._changed.set()
+            last = current
+            await asyncio.sleep(POLL_INTERVAL)
+
+    async def refresh_on_change(self):
+        while True:
+            await self._changed.wait()
+            await asyncio.sleep(DEBOUNCE_SECONDS)
+            self._changed.clear()
+            self.refresh()
+
+    async def handle_connection(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode("latin-1")
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                key, _, value = line.partition(":")
+                headers[key.strip().lower()] = value.strip()
+
+            parts = request_line.split()
+            path = parts[1].split("?")[0] if len(parts) > 1 else ""
+            if path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+                await self.serve_websocket(reader, writer, headers)
+                return
+            if path == "/":
+                body = self.document.page(os.path.basename(self.path)).encode("utf-8")
+                status, content_type = "200 OK", "text/html; charset=utf-8"
+            else:
+                body, status, content_type = b"Not found", "404 Not Found", "text/plain"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nCache-Control: no-cache\r\n"
+                f"Connection: close\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve_websocket(self, reader, writer, headers):
+        key = headers.get("sec-websocket-key")
+        if not key:
+            writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+            return
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {websocket_accept(key)}\r\n\r\n".encode("latin-1")
+        )
+        self.clients.add(writer)
+        try:
+            while True:
+                opcode, payload = await read_frame(reader)
+                if opcode == 0x8:
+                    writer.write(encode_frame(payload[:2], 0x8))
+                    break
+                if opcode == 0x9:
+                    writer.write(encode_frame(payload, 0xA))
+                elif opcode == 0x1 and payload.decode("utf-8") != str(self.document.version):
+                    # A new page, or one that missed a patch: send everything once
+                    message = json.dumps(self.document.reset_message(), ensure_ascii=False)
+                    writer.write(encode_frame(message.encode("utf-8")))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self.clients.discard(writer)
+
+
+async def serve_preview(path, language=None, host="127.0.0.1", port=8000):
+    server = await PreviewServer(path, language, host, port).start()
+    print(f"Previewing {path} on http://{host}:{server.port}/ (Ctrl+C to stop)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Live transliterated preview; only changed paragraphs are re-rendered"
+    )
+    parser.add_argument("input", help="Markdown/text file, or JSON list of {language, text}")
+    parser.add_argument("--language", help="Language of the whole file (default: per paragraph)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve_preview(args.input, args.language, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
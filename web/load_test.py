@@ -0,0 +1,255 @@
+# load_test.py
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from urllib.parse import urlsplit
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Latency targets for the default request mix against one worker, in milliseconds
+TARGET_P50_MS = 150
+TARGET_P99_MS = 500
+# Users in flight; engines share one thread per worker, so latency grows with this
+DEFAULT_CONCURRENCY = 8
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+# (weight, method, path, payload): the mix a reading session produces
+SCENARIOS = [
+    (4, "POST", "/api/transliterate", {"text": "Я изучаю русский язык каждый день."}),
+    (4, "POST", "/api/transliterate", {"text": "我喜欢学习中文，因为很有意思。"}),
+    (3, "POST", "/api/transliterate", {"text": "日本語を毎日勉強しています。"}),
+    (2, "POST", "/api/transliterate", {"text": "मैं हर दिन हिंदी सीखता हूँ।"}),
+    (3, "POST", "/api/annotate", {"text": "我喜欢学习中文，因为很有意思。"}),
+    (2, "POST", "/api/annotate", {"text": "日本語を毎日勉強しています。"}),
+    (2, "POST", "/api/breakdown", {"text": "我喜欢学习中文。他们也在学习。", "target_lang": "en"}),
+    (2, "POST", "/api/translate", {"texts": ["学习", "中文", "日本語"], "target_lang": "en"}),
+    (1, "GET", "/health", None),
+]
+
+
+class StubTranslator:
+    """Local stand-in for the translation service: fixed latency per call"""
+
+    def __init__(self, latency=0.05):
+        self.latency = latency
+        self.calls = 0
+
+    def __call__(self, text, target_lang):
+        self.calls += 1
+        time.sleep(self.latency)
+        return f"{target_lang}:{text}"
+
+
+async def asgi_request(app, method, path, payload=None, headers=()):
+    """
+    Sends one request straight to an ASGI app; payload is JSON-encoded unless it is bytes.
+
+    Returns:
+        (status, {header: value}, body bytes)
+    """
+    if isinstance(payload, bytes):
+        body, content_type = payload, b"application/octet-stream"
+    else:
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        content_type = b"application/json"
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": query.encode("latin-1"),
+        "headers": [
+            (b"content-type", content_type),
+            (b"content-length", str(len(body)).encode()),
+        ]
+        + [(key.encode(), value.encode()) for key, value in headers],
+    }
+    sent = False
+    response = {"status": None, "headers": {}, "body": bytearray()}
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            await asyncio.sleep(3600)
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {
+                key.decode(): value.decode() for key, value in message["headers"]
+            }
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    await app(scope, receive, send)
+    return response["status"], response["headers"], bytes(response["body"])
+
+
+async def asgi_startup(app):
+    """Runs the app's lifespan startup (engine warm-up)"""
+    messages = asyncio.Queue()
+    started = asyncio.Event()
+    await messages.put({"type": "lifespan.startup"})
+
+    async def send(message):
+        if message["type"] == "lifespan.startup.complete":
+            started.set()
+
+    task = asyncio.ensure_future(app({"type": "lifespan"}, messages.get, send))
+    await started.wait()
+    return task, messages
+
+
+async def http_request(host, port, method, path, payload=None):
+    """One HTTP/1.1 request on its own connection; returns the status code"""
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, elapsed):
+    """Latency summary in milliseconds for a list of seconds"""
+    values = sorted(latency * 1000 for latency in latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "rps": round(len(values) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(values, 0.50), 1),
+        "p90_ms": round(percentile(values, 0.90), 1),
+        "p99_ms": round(percentile(values, 0.99), 1),
+        "max_ms": round(values[-1], 1) if values else 0.0,
+        "mean_ms": round(statistics.mean(values), 1) if values else 0.0,
+    }
+
+
+async def run_load(send_request, concurrency=DEFAULT_CONCURRENCY, requests=500, seed=0):
+    """
+    Fires requests from the weighted SCENARIOS with concurrency users in flight.
+
+    send_request(method, path, payload) returns the status code.
+
+    Returns:
+        {"overall": summary, "endpoints": {path: summary}}
+    """
+    rng = random.Random(seed)
+    weights = [scenario[0] for scenario in SCENARIOS]
+    plan = rng.choices(SCENARIOS, weights=weights, k=requests)
+    queue = asyncio.Queue()
+    for scenario in plan:
+        queue.put_nowait(scenario)
+
+    latencies = {}
+    errors = {}
+
+    async def user():
+        while not queue.empty():
+            _, method, path, payload = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                status = await send_request(method, path, payload)
+            except Exception:
+                status = None
+            latencies.setdefault(path, []).append(time.perf_counter() - start)
+            if status != 200:
+                errors[path] = errors.get(path, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    every = [latency for values in latencies.values() for latency in values]
+    return {
+        "overall": summarize(every, sum(errors.values()), elapsed),
+        "endpoints": {
+            path: summarize(values, errors.get(path, 0), elapsed)
+            for path, values in sorted(latencies.items())
+        },
+    }
+
+
+async def run_in_process(concurrency, requests, latency):
+    from web.service import create_app
+
+    app = create_app(translate=StubTranslator(latency))
+    lifespan, messages = await asgi_startup(app)
+
+    async def send_request(method, path, payload):
+        status, _, _ = await asgi_request(app, method, path, payload)
+        return status
+
+    try:
+        return await run_load(send_request, concurrency, requests)
+    finally:
+        await messages.put({"type": "lifespan.shutdown"})
+        await lifespan
+
+
+async def run_against_url(url, concurrency, requests):
+    parts = urlsplit(url)
+    if parts.hostname not in LOCAL_HOSTS:
+        raise SystemExit(f"Refusing to load-test {parts.hostname}: local servers only")
+    port = parts.port or 80
+
+    async def send_request(method, path, payload):
+        return await http_request(parts.hostname, port, method, path, payload)
+
+    return await run_load(send_request, concurrency, requests)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the transliteration service")
+    parser.add_argument(
+        "--url", help="Local server, e.g. http://127.0.0.1:5000 (default: in-process)"
+    )
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub seconds per translation")
+    parser.add_argument("--p50", type=float, default=TARGET_P50_MS, help="p50 target in ms")
+    parser.add_argument("--p99", type=float, default=TARGET_P99_MS, help="p99 target in ms")
+    args = parser.parse_args()
+
+    if args.url:
+        report = asyncio.run(run_against_url(args.url, args.concurrency, args.requests))
+    else:
+        report = asyncio.run(run_in_process(args.concurrency, args.requests, args.latency))
+
+    for path, summary in report["endpoints"].items():
+        print(f"{path:<20} {summary}")
+    overall = report["overall"]
+    print(f"{'overall':<20} {overall}")
+
+    missed = []
+    if overall["p50_ms"] > args.p50:
+        missed.append(f"p50 {overall['p50_ms']} ms > {args.p50} ms")
+    if overall["p99_ms"] > args.p99:
+        missed.append(f"p99 {overall['p99_ms']} ms > {args.p99} ms")
+    if overall["errors"]:
+        missed.append(f"{overall['errors']} errors")
+    if missed:
+        print("Targets missed: " + ", ".join(missed))
+        sys.exit(1)
+    print(f"Targets met (p50 <= {args.p50} ms, p99 <= {args.p99} ms)")
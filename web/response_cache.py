@@ -0,0 +1,299 @@
+# response_cache.py
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+from importlib import metadata
+
+from transliteration.metrics import RESPONSE_CACHE_LOOKUPS
+
+# Responses kept in memory per process
+CACHE_SIZE = int(os.environ.get("TRANSLITERATION_RESPONSE_CACHE_SIZE", 1024))
+# SQLite file shared by every worker on the host; unset keeps the cache in memory only
+CACHE_PATH = os.environ.get("TRANSLITERATION_RESPONSE_CACHE")
+# Responses kept on disk; the oldest are pruned past this
+DISK_CACHE_SIZE = int(os.environ.get("TRANSLITERATION_RESPONSE_CACHE_DISK_SIZE", 100_000))
+# Larger bodies are served but never cached
+MAX_ENTRY_BYTES = 1024 * 1024
+# Disk pruning runs once per this many stored responses
+PRUNE_EVERY = 1000
+
+# A new release of any of these can change the output for the same text
+ENGINE_PACKAGES = (
+    "deep-translator",
+    "hangul-romanize",
+    "indic_transliteration",
+    "jieba",
+    "PyArabic",
+    "pykakasi",
+    "pypinyin",
+    "transliterate",
+)
+ENGINE_SOURCES = (
+    os.path.join("transliteration", "transliteration.py"),
+    os.path.join("web", "text_analysis.py"),
+    os.path.join("web", "japanese_analysis.py"),
+)
+# Results that embed a failed translation must be recomputed, not replayed
+ERROR_MARKERS = (b"[Error: ", b"Translation error: ", b"Translation unavailable")
+
+CachedResponse = namedtuple("CachedResponse", ["body", "content_type", "etag"])
+
+
+@lru_cache(maxsize=None)
+def engine_version():
+    """Short hash of the engine package versions and transliteration sources"""
+    digest = hashlib.sha256()
+    for package in ENGINE_PACKAGES:
+        try:
+            version = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            version = "missing"
+        digest.update(f"{package}={version}\n".encode("utf-8"))
+
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    for source in ENGINE_SOURCES:
+        try:
+            with open(os.path.join(root, source), "rb") as f:
+                digest.update(f.read())
+        except OSError:
+            digest.update(f"{source} missing".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def cache_key(endpoint, options):
+    """
+    Content hash for a response: endpoint, request text and options, engine version.
+
+    options is anything JSON-serializable (the parsed request body, the form);
+    keys are sorted, so the same request always maps to the same entry.
+    """
+    canonical = json.dumps(
+        [endpoint, options, engine_version()], sort_keys=True, ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def body_etag(body):
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match, etag):
+    """True when an If-None-Match header value lists etag (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+def is_cacheable(body):
+    return len(body) <= MAX_ENTRY_BYTES and not any(marker in body for marker in ERROR_MARKERS)
+
+
+class ResponseCache:
+    """
+    Two-tier cache of rendered responses keyed by cache_key().
+
+    The first tier is an LRU of max_entries responses in this process. The
+    optional second tier is SQLite at db_path, which every gunicorn worker on
+    the host opens, so a text rendered by one worker is a hit for all of them.
+    Disk hits are promoted to the LRU; failed translations are never stored.
+    """
+
+    def __init__(self, max_entries=CACHE_SIZE, db_path=None, max_disk_entries=DISK_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.db_path = db_path
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stored = 0
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+        # Opened on first use in each process: a connection must not cross a gunicorn fork
+        self._conn = None
+        self._conn_pid = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def close(self):
+        if self._conn is not None and self._conn_pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+
+    def _connection(self):
+        if not self.db_path:
+            return None
+        if self._conn is None or self._conn_pid != os.getpid():
+            # WAL lets workers read while another one writes
+            self._conn = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+            self._conn_pid = os.getpid()
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    content_type TEXT,
+                    etag TEXT,
+                    body BLOB,
+                    created REAL
+                )
+            """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_created ON responses (created)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key):
+        """CachedResponse for key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                RESPONSE_CACHE_LOOKUPS.inc(result="memory")
+                return entry
+
+            conn = self._connection()
+            if conn is not None:
+                row = conn.execute(
+                    "SELECT body, content_type, etag FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = CachedResponse(bytes(row[0]), row[1], row[2])
+                    self._remember(key, entry)
+                    self.disk_hits += 1
+                    RESPONSE_CACHE_LOOKUPS.inc(result="disk")
+                    return entry
+
+            self.misses += 1
+            RESPONSE_CACHE_LOOKUPS.inc(result="miss")
+            return None
+
+    def put(self, key, body, content_type):
+        """
+        Stores a rendered response unless it is too large or carries a failed translation.
+
+        Returns:
+            The CachedResponse (with its ETag) whether or not it was stored
+        """
+        entry = CachedResponse(body, content_type, body_etag(body))
+        if not is_cacheable(body):
+            return entry
+
+        with self._lock:
+            self._remember(key, entry)
+            self.stored += 1
+            conn = self._connection()
+            if conn is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, content_type, etag, body, created) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, content_type, entry.etag, body, time.time()),
+                )
+                if self.stored % PRUNE_EVERY == 0:
+                    conn.execute(
+                        "DELETE FROM responses WHERE key IN (SELECT key FROM responses "
+                        "ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                        (self.max_disk_entries,),
+                    )
+                conn.commit()
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            conn = self._connection()
+            if conn is not None:
+                conn.execute("DELETE FROM responses")
+                conn.commit()
+
+    def stats(self):
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "disk": self.db_path is not None,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+def open_response_cache(db_path=None, max_entries=CACHE_SIZE):
+    """ResponseCache at db_path, or at $TRANSLITERATION_RESPONSE_CACHE when set"""
+    return ResponseCache(max_entries=max_entries, db_path=db_path or CACHE_PATH)
+
+
+def skip_response_cache():
+    """Called inside a cached Flask view whose response must not be stored (e.g. an error page)"""
+    from flask import g
+
+    g.skip_response_cache = True
+
+
+def cached_view(cache, vary=("Accept",)):
+    """
+    Flask view decorator serving repeated requests from cache.
+
+    The key covers the endpoint, query string, form, JSON body and the vary
+    headers. Every 200 response gets an ETag; a request whose If-None-Match
+    lists it is answered 304 with no body. Streamed responses pass through.
+    """
+
+    def decorate(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            from flask import g, make_response, request
+
+            options = {
+                "method": request.method,
+                "args": request.args.to_dict(flat=False),
+                "form": request.form.to_dict(flat=False),
+                "json": request.get_json(silent=True),
+                "headers": {header: request.headers.get(header, "") for header in vary},
+            }
+            key = cache_key(request.endpoint, options)
+            entry = cache.get(key)
+            status = "HIT"
+            if entry is None:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                if g.get("skip_response_cache"):
+                    return response
+                entry = cache.put(key, response.get_data(), response.content_type)
+                status = "MISS"
+
+            if etag_matches(request.headers.get("If-None-Match"), entry.etag):
+                response = make_response("", 304)
+            else:
+                response = make_response(entry.body)
+                response.content_type = entry.content_type
+            response.headers["ETag"] = entry.etag
+            response.headers["X-Cache"] = status
+            return response
+
+        return wrapper
+
+    return decorate
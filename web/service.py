@@ -0,0 +1,660 @@
+# service.py
+import asyncio
+import json
+import os
+import shutil
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import parse_qs, quote
+
+from transliteration import add_furigana, get_pinyin_annotations, transliterate
+from transliteration.metrics import (
+    PROMETHEUS_CONTENT_TYPE,
+    REQUEST_SECONDS,
+    engine_timer,
+    render_metrics,
+    stage_timer,
+    write_snapshot,
+)
+from transliteration.translation_client import get_translation_client
+from web.job_queue import (
+    JOB_WORKERS,
+    MAX_UPLOAD_BYTES,
+    JobError,
+    JobWorker,
+    job_options,
+    open_job_queue,
+)
+from web.response_cache import cache_key, etag_matches, open_response_cache
+from web.text_analysis import (
+    detect_language_text,
+    get_language_direction,
+    segment_sentence,
+    split_into_sentences,
+    target_language_name,
+    transliterate_batch,
+)
+
+# Largest request body accepted, in bytes
+MAX_BODY_BYTES = int(os.environ.get("TRANSLITERATION_MAX_BODY_BYTES", 256 * 1024))
+# Longest text for transliterate / annotate
+MAX_TEXT_CHARS = 50_000
+# Most texts in one /api/transliterate/batch request
+MAX_BATCH_TEXTS = int(os.environ.get("TRANSLITERATION_MAX_BATCH_TEXTS", 500))
+# Longest text for breakdown: every distinct word is one translation call
+MAX_BREAKDOWN_CHARS = 5_000
+# Outbound translation calls in flight per worker
+TRANSLATE_CONCURRENCY = int(os.environ.get("TRANSLITERATION_TRANSLATE_CONCURRENCY", 8))
+
+# Short samples run at startup so the first request does not load dictionaries
+WARM_UP_TEXTS = {
+    "chinese": "我喜欢学习中文。",
+    "japanese": "日本語を勉強します。",
+    "korean": "한국어를 공부합니다.",
+    "hindi": "मैं हिंदी सीखता हूँ।",
+    "arabic": "أنا أتعلم العربية.",
+    "russian": "Я изучаю русский язык.",
+}
+
+# Endpoints whose JSON answers are replayed from the response cache
+CACHED_ROUTES = {
+    ("POST", "/api/transliterate"),
+    ("POST", "/api/transliterate/batch"),
+    ("POST", "/api/annotate"),
+    ("POST", "/api/breakdown"),
+    ("POST", "/api/translate"),
+}
+
+# Endpoints whose body is streamed to disk by the handler instead of read into memory
+UPLOAD_ROUTES = {("POST", "/api/jobs")}
+# Bytes read per chunk of a result download
+FILE_CHUNK_BYTES = 256 * 1024
+RESULT_CONTENT_TYPES = {".epub": "application/epub+zip", ".zip": "application/zip"}
+
+Request = namedtuple("Request", ["method", "path", "query", "headers", "body"])
+Response = namedtuple("Response", ["status", "body", "content_type", "headers"])
+# chunks is an async iterator of bytes, sent with chunked transfer encoding
+StreamingResponse = namedtuple(
+    "StreamingResponse", ["chunks", "content_type", "status", "headers"], defaults=[()]
+)
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def json_response(payload, status=200, headers=None):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    return Response(status, body, "application/json; charset=utf-8", headers or [])
+
+
+def request_json(request):
+    """Request body as a JSON object (400 when it is not one)"""
+    try:
+        data = json.loads(request.body or b"{}")
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise HTTPError(400, f"Invalid JSON body: {e}")
+    if not isinstance(data, dict):
+        raise HTTPError(400, "JSON body must be an object")
+    return data
+
+
+def request_text(data, max_chars, field="text"):
+    text = data.get(field, "")
+    if not isinstance(text, str) or not text.strip():
+        raise HTTPError(400, f"'{field}' is required")
+    if len(text) > max_chars:
+        raise HTTPError(413, f"'{field}' is limited to {max_chars} characters")
+    return text
+
+
+async def read_body(receive, max_bytes):
+    """Request body, refused with 413 as soon as it grows past max_bytes"""
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise HTTPError(499, "Client disconnected")
+        body += message.get("body", b"")
+        if len(body) > max_bytes:
+            raise HTTPError(413, f"Request body is limited to {max_bytes} bytes")
+        if not message.get("more_body", False):
+            return bytes(body)
+
+
+async def save_upload(receive, path, max_bytes):
+    """Writes the request body to path as it arrives (413 past max_bytes); returns its size"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    size = 0
+    with open(path, "wb") as f:
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                raise HTTPError(499, "Client disconnected")
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPError(413, f"Uploads are limited to {max_bytes} bytes")
+            f.write(chunk)
+            if not message.get("more_body", False):
+                return size
+
+
+async def file_chunks(path, chunk_size=FILE_CHUNK_BYTES):
+    loop = asyncio.get_running_loop()
+    with open(path, "rb") as f:
+        while True:
+            chunk = await loop.run_in_executor(None, f.read, chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def job_payload(job):
+    """A job as the API shows it: without server paths, with its download URLs"""
+    hidden = ("input_path", "output_dir", "worker_pid")
+    payload = {key: value for key, value in job.items() if key not in hidden}
+    payload["result_urls"] = [
+        f"/api/jobs/{job['id']}/result?file={quote(name)}" for name in job["results"]
+    ]
+    return payload
+
+
+def translate_with_backend(text, target_lang):
+    """Translation through the process-wide rate-limited TranslationClient"""
+    try:
+        return get_translation_client().translate(text, target_lang)
+    except Exception as e:
+        return f"[Error: {str(e)}]"
+
+
+def json_transliteration(result):
+    # Korean pairs are tuples; JSON has lists only
+    if isinstance(result, tuple):
+        result = list(result)
+    return result
+
+
+def detect_language(text):
+    with stage_timer("detect_language"):
+        return detect_language_text(text)
+
+
+def transliteration_payload(text, language):
+    with stage_timer("transliterate", language):
+        return json_transliteration(transliterate(text, language))
+
+
+def batch_transliteration_payload(texts, languages):
+    with stage_timer("transliterate_batch"):
+        return [
+            {"transliteration": json_transliteration(result), "detected_language": language}
+            for result, language in transliterate_batch(texts, languages)
+        ]
+
+
+def annotate_html(text, language):
+    with stage_timer("annotate", language):
+        if language == "chinese":
+            return get_pinyin_annotations(text, color_coded=True)
+        # Japanese furigana comes back as a BeautifulSoup tag
+        return str(add_furigana(text, transliterate(text, language), language))
+
+
+def segment_payload(sentence, language):
+    with stage_timer("segment", language):
+        return segment_sentence(sentence, language)
+
+
+class TransliterationService:
+    """
+    One ASGI service for the transliteration tools, replacing the per-script Flask apps.
+
+        uvicorn web.service:app --port 5000
+        gunicorn -c gunicorn_config.py app:app
+
+    Endpoints (JSON in, JSON out):
+        GET  /health              engines warmed up in this worker
+        GET  /metrics             Prometheus text (?format=json: cache and client counters)
+        POST /api/transliterate   {"text", "language"?}
+        POST /api/transliterate/batch  {"texts", "languages"? or "language"?} -> results in order
+        POST /api/annotate        {"text", "language"?} -> ruby / color-coded HTML
+        POST /api/breakdown       {"text", "target_lang"?, "stream"?} -> word by word
+        POST /api/translate       {"text" or "texts", "target_lang"?}
+        POST /api/jobs?kind=&filename=&language(s)=  body: the EPUB / zip -> 202, the job
+        GET  /api/jobs            recent jobs and queue counts
+        GET  /api/jobs/<id>       status and progress
+        GET  /api/jobs/<id>/result?file=  download a finished job's output
+        DELETE /api/jobs/<id>     cancel a queued or running job
+
+    Engines (jieba, pykakasi, pypinyin...) are loaded once per worker at startup
+    and run on one engine thread, so the event loop keeps accepting requests while
+    a long text is segmented. translate(text, target_lang) is any blocking
+    translation function; calls run concurrently on translate_concurrency
+    threads, once per distinct word.
+
+    Answers of CACHED_ROUTES are kept in response_cache (by default an LRU,
+    plus the shared SQLite file at $TRANSLITERATION_RESPONSE_CACHE) and carry
+    an ETag; If-None-Match with a current ETag is answered 304.
+
+    EPUBs and subtitle zips are processed as background jobs (web/job_queue.py):
+    uploads are streamed to disk and queued, job_workers processes per web
+    worker run them outside any request, so no request timeout applies.
+    """
+
+    def __init__(
+        self,
+        translate=None,
+        max_body_bytes=MAX_BODY_BYTES,
+        translate_concurrency=TRANSLATE_CONCURRENCY,
+        warm_up_texts=None,
+        max_batch_texts=MAX_BATCH_TEXTS,
+        response_cache=None,
+        job_queue=None,
+        job_workers=JOB_WORKERS,
+        max_upload_bytes=MAX_UPLOAD_BYTES,
+    ):
+        self.translate = translate or translate_with_backend
+        self.max_body_bytes = max_body_bytes
+        self.max_batch_texts = max_batch_texts
+        self.warm_up_texts = WARM_UP_TEXTS if warm_up_texts is None else warm_up_texts
+        self.warm_languages = []
+        self.started = time.time()
+        self.response_cache = open_response_cache() if response_cache is None else response_cache
+        self.job_queue = open_job_queue() if job_queue is None else job_queue
+        self.job_worker = JobWorker(self.job_queue, slots=job_workers)
+        self.max_upload_bytes = max_upload_bytes
+
+        # One engine thread: jieba / pykakasi instances are shared, never used concurrently
+        self.engine_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="engine")
+        self.translate_executor = ThreadPoolExecutor(
+            max_workers=translate_concurrency, thread_name_prefix="translate"
+        )
+        self.routes = {
+            ("GET", "/"): self.index,
+            ("GET", "/health"): self.health,
+            ("GET", "/metrics"): self.metrics,
+            ("POST", "/api/transliterate"): self.api_transliterate,
+            ("POST", "/api/transliterate/batch"): self.api_transliterate_batch,
+            ("POST", "/api/annotate"): self.api_annotate,
+            ("POST", "/api/breakdown"): self.api_breakdown,
+            ("POST", "/api/translate"): self.api_translate,
+            ("POST", "/api/jobs"): self.api_submit_job,
+            ("GET", "/api/jobs"): self.api_jobs,
+        }
+        # The rest of the path is the job id (and "/result")
+        self.prefix_routes = {
+            ("GET", "/api/jobs/"): self.api_job,
+            ("DELETE", "/api/jobs/"): self.api_cancel_job,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self.handle_http(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await self.warm_up()
+                self.job_worker.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def close(self):
+        self.job_worker.stop()
+        self.job_queue.close()
+        self.response_cache.close()
+        self.engine_executor.shutdown(wait=False)
+        self.translate_executor.shutdown(wait=False)
+
+    def warm_up_engines(self):
+        warm = []
+        for language, text in self.warm_up_texts.items():
+            try:
+                with engine_timer(language):
+                    transliterate(text, language)
+                    annotate_html(text, language)
+                    segment_sentence(text, language)
+                warm.append(language)
+            except Exception as e:
+                print(f"Warm-up failed for {language}: {e}")
+        return warm
+
+    async def warm_up(self):
+        start = time.perf_counter()
+        self.warm_languages = await self.run_engine(self.warm_up_engines)
+        print(
+            f"Engines ready in {time.perf_counter() - start:.2f}s: "
+            f"{', '.join(self.warm_languages) or 'none'}"
+        )
+
+    async def run_engine(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.engine_executor, partial(func, *args))
+
+    async def translate_one(self, text, target_lang):
+        loop = asyncio.get_running_loop()
+        with stage_timer("translate", target_lang):
+            return await loop.run_in_executor(
+                self.translate_executor, self.translate, text, target_lang
+            )
+
+    async def translate_many(self, texts, target_lang):
+        """{text: translation} for the distinct texts, translated concurrently"""
+        unique = list(dict.fromkeys(texts))
+        results = await asyncio.gather(*(self.translate_one(text, target_lang) for text in unique))
+        return dict(zip(unique, results))
+
+    def find_route(self, method, path):
+        """(handler, route label for metrics); 404 or 405 when no route matches"""
+        handler = self.routes.get((method, path))
+        if handler is not None:
+            return handler, path
+        for (route_method, prefix), handler in self.prefix_routes.items():
+            if route_method == method and path.startswith(prefix):
+                return handler, prefix + "<id>"
+        if any(route_path == path for _, route_path in self.routes) or any(
+            path.startswith(prefix) for _, prefix in self.prefix_routes
+        ):
+            raise HTTPError(405, "Method not allowed")
+        raise HTTPError(404, "Not found")
+
+    async def handle_http(self, scope, receive, send):
+        start = time.perf_counter()
+        headers = {
+            key.decode("latin-1").lower(): value.decode("latin-1")
+            for key, value in scope.get("headers", [])
+        }
+        # Unknown paths share one label so scanners cannot blow up the series count
+        route = "other"
+        try:
+            handler, route = self.find_route(scope["method"], scope["path"])
+            query = scope.get("query_string", b"").decode("latin-1")
+            if (scope["method"], scope["path"]) in UPLOAD_ROUTES:
+                request = Request(scope["method"], scope["path"], query, headers, b"")
+                response = await handler(request, receive)
+            else:
+                response = await self.respond(
+                    handler, await self.read_request(scope, receive, headers, query)
+                )
+        except (HTTPError, JobError) as e:
+            if e.status == 499:
+                return
+            response = json_response({"error": e.message}, status=e.status)
+        except Exception as e:
+            print(f"Error handling {scope['method']} {scope['path']}: {e}")
+            response = json_response({"error": str(e)}, status=500)
+
+        if isinstance(response, StreamingResponse):
+            await self.send_stream(send, response)
+        else:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": response.status,
+                    "headers": [
+                        (b"content-type", response.content_type.encode()),
+                        (b"content-length", str(len(response.body)).encode()),
+                    ]
+                    + [(key.encode(), value.encode()) for key, value in response.headers],
+                }
+            )
+            await send({"type": "http.response.body", "body": response.body})
+
+        REQUEST_SECONDS.observe(time.perf_counter() - start, route=route, status=response.status)
+        write_snapshot()
+
+    async def read_request(self, scope, receive, headers, query):
+        """The Request with its body read into memory (413 past max_body_bytes)"""
+        content_length = headers.get("content-length")
+        if (
+            content_length
+            and content_length.isdigit()
+            and int(content_length) > self.max_body_bytes
+        ):
+            raise HTTPError(413, f"Request body is limited to {self.max_body_bytes} bytes")
+        body = await read_body(receive, self.max_body_bytes) if scope["method"] == "POST" else b""
+        return Request(scope["method"], scope["path"], query, headers, body)
+
+    async def respond(self, handler, request):
+        """handler's response, replayed from the response cache for CACHED_ROUTES"""
+        if (request.method, request.path) not in CACHED_ROUTES:
+            return await handler(request)
+
+        # The parsed body makes key order and whitespace irrelevant; Accept picks the format
+        key = cache_key(request.path, [request_json(request), request.headers.get("accept", "")])
+        entry = self.response_cache.get(key)
+        status = "HIT"
+        if entry is None:
+            response = await handler(request)
+            if not isinstance(response, Response) or response.status != 200:
+                return response
+            entry = self.response_cache.put(key, response.body, response.content_type)
+            status = "MISS"
+
+        headers = [("etag", entry.etag), ("x-cache", status)]
+        if etag_matches(request.headers.get("if-none-match"), entry.etag):
+            return Response(304, b"", entry.content_type, headers)
+        return Response(200, entry.body, entry.content_type, headers)
+
+    async def send_stream(self, send, response):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": response.status,
+                "headers": [
+                    (b"content-type", response.content_type.encode()),
+                    (b"cache-control", b"no-cache"),
+                ]
+                + [(key.encode(), value.encode()) for key, value in response.headers],
+            }
+        )
+        async for chunk in response.chunks:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def index(self, request):
+        routes = list(self.routes) + [
+            (method, prefix + "<id>") for method, prefix in self.prefix_routes
+        ]
+        return json_response({"endpoints": [f"{method} {path}" for method, path in routes]})
+
+    async def health(self, request):
+        return json_response(
+            {
+                "status": "ok",
+                "engines": self.warm_languages,
+                "uptime_seconds": round(time.time() - self.started, 1),
+            }
+        )
+
+    async def metrics(self, request):
+        if parse_qs(request.query).get("format") == ["json"]:
+            return json_response(
+                {
+                    "response_cache": self.response_cache.stats(),
+                    "translation_client": get_translation_client().stats(),
+                    "jobs": self.job_queue.stats(),
+                }
+            )
+        body = render_metrics().encode("utf-8")
+        return Response(200, body, PROMETHEUS_CONTENT_TYPE, [])
+
+    async def api_transliterate(self, request):
+        data = request_json(request)
+        text = request_text(data, MAX_TEXT_CHARS)
+        language = data.get("language") or detect_language(text)
+        result = await self.run_engine(transliteration_payload, text, language)
+        return json_response({"transliteration": result, "detected_language": language})
+
+    async def api_transliterate_batch(self, request):
+        data = request_json(request)
+        texts = data.get("texts")
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            raise HTTPError(400, "'texts' must be a list of strings")
+        if len(texts) > self.max_batch_texts:
+            raise HTTPError(413, f"A batch is limited to {self.max_batch_texts} texts")
+        if sum(len(text) for text in texts) > MAX_TEXT_CHARS:
+            raise HTTPError(413, f"'texts' are limited to {MAX_TEXT_CHARS} characters in total")
+
+        # Hints per text ("languages") or one for all ("language"); missing ones are detected
+        languages = data.get("languages") or [data.get("language")] * len(texts)
+        if not isinstance(languages, list) or len(languages) != len(texts):
+            raise HTTPError(400, "'languages' must have one entry (or null) per text")
+        results = await self.run_engine(batch_transliteration_payload, texts, languages)
+        return json_response({"results": results})
+
+    async def api_annotate(self, request):
+        data = request_json(request)
+        text = request_text(data, MAX_TEXT_CHARS)
+        language = data.get("language") or detect_language(text)
+        html = await self.run_engine(annotate_html, text, language)
+        return json_response({"html": html, "detected_language": language})
+
+    async def breakdown_sentence(self, sentence, target_lang):
+        sentence_lang = detect_language(sentence)
+        items = await self.run_engine(segment_payload, sentence, sentence_lang)
+        words = [item["word"] for item in items if item["processable"]]
+        translations, full_translation = await asyncio.gather(
+            self.translate_many(words, target_lang), self.translate_one(sentence, target_lang)
+        )
+        for item in items:
+            if item["processable"]:
+                item["translation"] = translations[item["word"]]
+        return {
+            "original": sentence,
+            "word_breakdown": items,
+            "full_translation": full_translation,
+            "detected_language": sentence_lang,
+        }
+
+    async def api_breakdown(self, request):
+        data = request_json(request)
+        text = request_text(data, MAX_BREAKDOWN_CHARS)
+        target_lang = data.get("target_lang") or "en"
+        detected_lang = detect_language(text)
+        # Sentences are segmented and translated concurrently, answered in order
+        tasks = [
+            asyncio.ensure_future(self.breakdown_sentence(sentence, target_lang))
+            for sentence in split_into_sentences(text)
+        ]
+        header = {
+            "detected_language": detected_lang,
+            "target_language": target_lang,
+            "detected_language_name": detected_lang.title(),
+            "target_language_name": target_language_name(target_lang),
+            "text_direction": get_language_direction(detected_lang),
+        }
+
+        streamed = data.get("stream") or "application/x-ndjson" in request.headers.get("accept", "")
+        if not streamed:
+            return json_response({**header, "sentences": list(await asyncio.gather(*tasks))})
+
+        async def chunks():
+            # One JSON object per line: the header, then each sentence as it is ready
+            try:
+                yield (json.dumps(header, ensure_ascii=False) + "\n").encode("utf-8")
+                for task in tasks:
+                    sentence = await task
+                    yield (json.dumps({"sentence": sentence}, ensure_ascii=False) + "\n").encode(
+                        "utf-8"
+                    )
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+        return StreamingResponse(chunks(), "application/x-ndjson; charset=utf-8", 200)
+
+    async def api_translate(self, request):
+        data = request_json(request)
+        target_lang = data.get("target_lang") or "en"
+        texts = data.get("texts")
+        if texts is None:
+            text = request_text(data, MAX_TEXT_CHARS)
+            return json_response({"translation": await self.translate_one(text, target_lang)})
+
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            raise HTTPError(400, "'texts' must be a list of strings")
+        if sum(len(text) for text in texts) > MAX_TEXT_CHARS:
+            raise HTTPError(413, f"'texts' are limited to {MAX_TEXT_CHARS} characters in total")
+        translations = await self.translate_many(texts, target_lang)
+        return json_response({"translations": [translations[text] for text in texts]})
+
+    async def api_submit_job(self, request, receive):
+        params = {key: values[-1] for key, values in parse_qs(request.query).items()}
+        kind, filename = params.get("kind", ""), params.get("filename", "")
+        options = job_options(kind, filename, params)
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit():
+            if int(content_length) > self.max_upload_bytes:
+                raise HTTPError(413, f"Uploads are limited to {self.max_upload_bytes} bytes")
+
+        job_id = self.job_queue.new_job_id()
+        path = self.job_queue.upload_path(job_id, filename)
+        try:
+            if not await save_upload(receive, path, self.max_upload_bytes):
+                raise HTTPError(400, "The request body must be the file to process")
+            job = self.job_queue.submit(job_id, kind, filename, options)
+        except BaseException:
+            shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+            raise
+        print(f"Queued job {job_id}: {kind} of {job['filename']}")
+        return json_response(
+            {"job": job_payload(job)}, status=202, headers=[("location", f"/api/jobs/{job_id}")]
+        )
+
+    async def api_jobs(self, request):
+        jobs = [job_payload(job) for job in self.job_queue.list()]
+        return json_response({"jobs": jobs, "queue": self.job_queue.stats()})
+
+    def find_job(self, job_id):
+        job = self.job_queue.get(job_id)
+        if job is None:
+            raise HTTPError(404, "No such job")
+        return job
+
+    async def api_job(self, request):
+        job_id, _, action = request.path[len("/api/jobs/") :].partition("/")
+        job = self.find_job(job_id)
+        if not action:
+            return json_response({"job": job_payload(job)})
+        if action != "result":
+            raise HTTPError(404, "Not found")
+
+        if job["status"] != "done":
+            raise HTTPError(409, f"The job is {job['status']}")
+        name = parse_qs(request.query).get("file", job["results"][:1])[-1]
+        path = os.path.join(job["output_dir"], name)
+        if name not in job["results"] or not os.path.exists(path):
+            raise HTTPError(404, f"No result {name!r}")
+        content_type = RESULT_CONTENT_TYPES.get(
+            os.path.splitext(name)[1].lower(), "application/octet-stream"
+        )
+        headers = [
+            ("content-length", str(os.path.getsize(path))),
+            ("content-disposition", f"attachment; filename*=UTF-8''{quote(name)}"),
+        ]
+        return StreamingResponse(file_chunks(path), content_type, 200, headers)
+
+    async def api_cancel_job(self, request):
+        job_id = request.path[len("/api/jobs/") :]
+        self.find_job(job_id)
+        return json_response({"job": job_payload(self.job_queue.cancel(job_id))})
+
+
+def create_app(**kwargs):
+    return TransliterationService(**kwargs)
+
+
+app = create_app()
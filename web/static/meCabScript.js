@@ -3,7 +3,7 @@ document.addEventListener('DOMContentLoaded', function () {
   const sentenceInput = document.getElementById('sentenceInput');
   const resultsDiv = document.getElementById('results');
   const clearBtn = document.getElementById('clearBtn');
-  const targetLanguageSelect = document.getElementById('targetLanguage');
+  const targetLanguageSelect = document.getElementById('target_lang');
 
   analyzeBtn.addEventListener('click', analyzeSentences);
   if (clearBtn) {
@@ -24,6 +24,31 @@ document.addEventListener('DOMContentLoaded', function () {
 
     resultsDiv.innerHTML = '<div class="loading">Analyzing sentences...</div>';
 
+    if (!window.ReadableStream || !window.TextDecoder) {
+      analyzeAll(sentences, targetLanguage);
+      return;
+    }
+
+    // Cards appear as soon as MeCab has parsed each sentence; Google translations fill in later
+    let started = false;
+    streamEvents('/analyze/stream', { sentences: sentences, target_language: targetLanguage }, (name, data) => {
+      if (!started) {
+        resultsDiv.innerHTML = '';
+        started = true;
+      }
+      if (name === 'sentence') {
+        resultsDiv.appendChild(renderSentence(data));
+      } else if (name === 'translation') {
+        fillTranslation(data);
+      }
+    }).catch((error) => {
+      console.error('Error:', error);
+      resultsDiv.innerHTML =
+        '<div class="error">Error analyzing sentences. Please check if the server is running and try again.</div>';
+    });
+  }
+
+  function analyzeAll(sentences, targetLanguage) {
     fetch('/analyze', {
       method: 'POST',
       headers: {
@@ -64,54 +89,83 @@ document.addEventListener('DOMContentLoaded', function () {
     resultsDiv.innerHTML = '';
 
     results.forEach((result, index) => {
-      const sentenceDiv = document.createElement('div');
-      sentenceDiv.className = 'sentence-result';
+      resultsDiv.appendChild(renderSentence({ index: index, ...result }));
+    });
+  }
+
+  function escapeHTML(value) {
+    const div = document.createElement('div');
+    div.textContent = value;
+    return div.innerHTML;
+  }
+
+  function renderSentence(result) {
+    const sentenceDiv = document.createElement('div');
+    sentenceDiv.className = 'sentence-result';
+    sentenceDiv.dataset.index = result.index;
 
-      let analysisHTML = `
-        <div class="sentence-header">
-          <div class="original-sentence">${result.original}</div>
-          <div class="translated-sentence">${result.translated}</div>
+    let analysisHTML = `
+      <div class="sentence-header">
+        <div class="original-sentence">${escapeHTML(result.original)}</div>
+        <div class="translated-sentence">${escapeHTML(result.translated || '…')}</div>
+      </div>
+      <div class="analysis-grid">
+    `;
+
+    result.analysis.forEach((word) => {
+      // Only show translation if it exists; streamed words get theirs later
+      const translationDisplay = `<div class="word-translation"${word.translation ? '' : ' hidden'}>${escapeHTML(
+        word.translation
+      )}</div>`;
+
+      analysisHTML += `
+        <div class="word-card" data-pos="${word.part_of_speech}" data-word="${escapeHTML(word.word)}">
+          <div class="word-japanese">${escapeHTML(word.word)}</div>
+          ${translationDisplay}
+          <div class="word-details">
+            <div class="detail-item"><strong>POS:</strong> ${word.part_of_speech}</div>
+            <div class="detail-item"><strong>Role:</strong> ${word.syntax_role}</div>
+            ${
+              word.particle_type !== 'None'
+                ? `<div class="detail-item"><strong>Particle:</strong> ${word.particle_type}</div>`
+                : ''
+            }
+            ${
+              word.verb_form !== 'None'
+                ? `<div class="detail-item"><strong>Verb Form:</strong> ${word.verb_form}</div>`
+                : ''
+            }
+            ${
+              word.honorific_level !== 'PLAIN'
+                ? `<div class="detail-item"><strong>Honorific:</strong> ${word.honorific_level}</div>`
+                : ''
+            }
+            <div class="detail-item"><strong>Category:</strong> ${word.semantic_category}</div>
+          </div>
         </div>
-        <div class="analysis-grid">
       `;
+    });
 
-      result.analysis.forEach((word) => {
-        // Only show translation if it exists
-        const translationDisplay = word.translation
-          ? `<div class="word-translation">${word.translation}</div>`
-          : '';
-
-        analysisHTML += `
-          <div class="word-card" data-pos="${word.part_of_speech}">
-            <div class="word-japanese">${word.word}</div>
-            ${translationDisplay}
-            <div class="word-details">
-              <div class="detail-item"><strong>POS:</strong> ${word.part_of_speech}</div>
-              <div class="detail-item"><strong>Role:</strong> ${word.syntax_role}</div>
-              ${
-                word.particle_type !== 'None'
-                  ? `<div class="detail-item"><strong>Particle:</strong> ${word.particle_type}</div>`
-                  : ''
-              }
-              ${
-                word.verb_form !== 'None'
-                  ? `<div class="detail-item"><strong>Verb Form:</strong> ${word.verb_form}</div>`
-                  : ''
-              }
-              ${
-                word.honorific_level !== 'PLAIN'
-                  ? `<div class="detail-item"><strong>Honorific:</strong> ${word.honorific_level}</div>`
-                  : ''
-              }
-              <div class="detail-item"><strong>Category:</strong> ${word.semantic_category}</div>
-            </div>
-          </div>
-        `;
-      });
+    analysisHTML += '</div>';
+    sentenceDiv.innerHTML = analysisHTML;
+    return sentenceDiv;
+  }
 
-      analysisHTML += '</div>';
-      sentenceDiv.innerHTML = analysisHTML;
-      resultsDiv.appendChild(sentenceDiv);
+  function fillTranslation(data) {
+    const sentenceDiv = resultsDiv.querySelector(`.sentence-result[data-index="${data.index}"]`);
+    if (!sentenceDiv) {
+      return;
+    }
+    if (data.translated !== undefined) {
+      sentenceDiv.querySelector('.translated-sentence').textContent = data.translated;
+      return;
+    }
+    sentenceDiv.querySelectorAll('.word-card').forEach((card) => {
+      if (card.dataset.word === data.word && data.translation) {
+        const translation = card.querySelector('.word-translation');
+        translation.textContent = data.translation;
+        translation.hidden = false;
+      }
     });
   }
 
@@ -0,0 +1,36 @@
+# streaming.py
+import json
+from concurrent.futures import as_completed
+
+# Keeps proxies (nginx) from buffering the stream until it ends
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+SSE_MIMETYPE = "text/event-stream"
+
+
+def sse_event(event, data):
+    """One Server-Sent Events frame carrying data as JSON"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def stream_request_data(request):
+    """Fields of a JSON body, a form, or the query string (EventSource can only GET)"""
+    return request.get_json(silent=True) or request.values
+
+
+def completed_translations(pending):
+    """
+    Yields (key, translation, error) for each future of pending ({future: key})
+    in the order the translations finish; error is None on success.
+
+    Unfinished futures are cancelled when the consumer stops early, e.g. when
+    the client disconnects mid-stream.
+    """
+    try:
+        for future in as_completed(pending):
+            try:
+                yield pending[future], future.result(), None
+            except Exception as e:
+                yield pending[future], None, e
+    finally:
+        for future in pending:
+            future.cancel()
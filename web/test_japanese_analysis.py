@@ -0,0 +1,144 @@
+import threading
+import time
+import unittest
+
+from transliteration.translation_client import TranslationClient
+from web.japanese_analysis import JapaneseSentenceAnalyzer, TaggerPool
+
+# IPAdic-style features: pos, pos1, pos2, pos3, cType, cForm, base, reading, pron
+FEATURES = {
+    "私": "名詞,代名詞,一般,*,*,*,私,ワタシ,ワタシ",
+    "は": "助詞,係助詞,*,*,*,*,は,ハ,ワ",
+    "本": "名詞,一般,*,*,*,*,本,ホン,ホン",
+    "を": "助詞,格助詞,一般,*,*,*,を,ヲ,ヲ",
+    "読み": "動詞,自立,*,*,五段・マ行,連用形,読む,ヨミ,ヨミ",
+    "ました": "助動詞,*,*,*,特殊・マス,連用形,ます,マシタ,マシタ",
+    "。": "記号,句点,*,*,*,*,。,。,。",
+    "東京": "名詞,固有名詞,地域,一般,*,*,東京,トウキョウ,トーキョー",
+    "に": "助詞,格助詞,一般,*,*,*,に,ニ,ニ",
+    "行き": "動詞,自立,*,*,五段・カ行促音便,連用形,行く,イキ,イキ",
+    "ます": "助動詞,*,*,*,特殊・マス,基本形,ます,マス,マス",
+}
+
+
+class FakeNode:
+    def __init__(self, surface, feature, stat, length, rlength):
+        self.surface = surface
+        self.feature = feature
+        self.stat = stat
+        self.length = length
+        self.rlength = rlength
+        self.next = None
+
+
+class FakeTagger:
+    """Longest-match tokenizer over FEATURES with MeCab's node interface"""
+
+    def __init__(self):
+        self.calls = 0
+        self.in_use = False
+
+    def parseToNode(self, text):
+        self.calls += 1
+        nodes = [FakeNode("", "BOS/EOS", 2, 0, 0)]
+        position, skipped = 0, 0
+        while position < len(text):
+            if text[position].isspace():
+                skipped += len(text[position].encode("utf-8"))
+                position += 1
+                continue
+            surface = max(
+                (word for word in FEATURES if text.startswith(word, position)),
+                key=len,
+                default=text[position],
+            )
+            length = len(surface.encode("utf-8"))
+            feature = FEATURES.get(surface, "名詞,一般,*,*,*,*,*")
+            nodes.append(FakeNode(surface, feature, 0, length, length + skipped))
+            position += len(surface)
+            skipped = 0
+        nodes.append(FakeNode("", "BOS/EOS", 3, 0, 0))
+        for node, following in zip(nodes, nodes[1:]):
+            node.next = following
+        return nodes[0]
+
+
+class RecordingTranslator:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text, target_language):
+        self.calls.append(text)
+        return f"{target_language}:{text}"
+
+
+class TestJapaneseSentenceAnalyzer(unittest.TestCase):
+    def setUp(self):
+        self.tagger = FakeTagger()
+        self.translator = RecordingTranslator()
+        self.analyzer = JapaneseSentenceAnalyzer(
+            tagger_pool=TaggerPool(size=1, factory=lambda: self.tagger),
+            translation_client=TranslationClient(translate=self.translator, rate_limit=0),
+        )
+
+    def test_sentences_parsed_in_one_call(self):
+        sentences = ["私は本を読みました。", "私は東京に行きます。"]
+        analyses = self.analyzer.analyze_sentences(sentences, "de")
+
+        self.assertEqual(self.tagger.calls, 1)
+        self.assertEqual([item["word"] for item in analyses[0]], ["私", "は", "本", "を", "読み", "ました"])
+        self.assertEqual([item["word"] for item in analyses[1]], ["私", "は", "東京", "に", "行き", "ます"])
+
+        words = {item["word"]: item for analysis in analyses for item in analysis}
+        # Readings come from the kana feature field
+        self.assertEqual(words["私"]["transliteration"], "watashi")
+        self.assertEqual(words["東京"]["transliteration"], "toukyou")
+        self.assertEqual(words["読み"]["transliteration"], "yomi")
+        self.assertEqual(words["は"]["particle_type"], "CASE_WA")
+        self.assertEqual(words["ました"]["verb_form"], "MASU_PAST")
+
+        # Dictionary words need no call; particles and auxiliaries are not translated
+        self.assertEqual(words["私"]["translation"], "I")
+        self.assertEqual(words["は"]["translation"], "")
+        self.assertEqual(words["東京"]["translation"], "de:東京")
+        self.assertEqual(sorted(self.translator.calls), sorted(["読み", "東京", "行き"]))
+
+    def test_fill_translations_batches_sentences(self):
+        sentences = ["本を読みました。"]
+        analyses = self.analyzer.analyze_sentences(sentences, translate=False)
+        self.assertTrue(any(item["needs_translation"] for item in analyses[0]))
+
+        translations = self.analyzer.fill_translations(analyses, "en", sentences)
+        self.assertEqual(translations, ["en:本を読みました。"])
+        self.assertFalse(any(item["needs_translation"] for item in analyses[0]))
+        self.assertEqual(self.analyzer.analyze_sentences([]), [])
+
+    def test_tagger_pool_never_shares_a_tagger(self):
+        created = []
+
+        def factory():
+            created.append(FakeTagger())
+            return created[-1]
+
+        pool = TaggerPool(size=2, factory=factory)
+        shared = []
+
+        def parse():
+            with pool.tagger() as tagger:
+                if tagger.in_use:
+                    shared.append(tagger)
+                tagger.in_use = True
+                time.sleep(0.01)
+                tagger.in_use = False
+
+        threads = [threading.Thread(target=parse) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(shared, [])
+        self.assertEqual(len(created), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from web.job_queue import JOB_KINDS, JobError, JobQueue, JobWorker, job_options, run_job
+
+
+def fake_job(input_path, options, progress):
+    output = input_path.replace(".zip", "_combined.zip")
+    with open(output, "w", encoding="utf-8") as f:
+        f.write(",".join(options["languages"]))
+    progress(2, 2)
+    return [output]
+
+
+def broken_job(input_path, options, progress):
+    raise ValueError("No SRT files found in the input zip")
+
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.queue = JobQueue(
+            db_path=os.path.join(self.test_dir, "jobs.sqlite"),
+            upload_dir=os.path.join(self.test_dir, "uploads"),
+            processed_dir=os.path.join(self.test_dir, "processed"),
+            max_running=1,
+            max_queued=2,
+        )
+
+    def tearDown(self):
+        self.queue.close()
+        shutil.rmtree(self.test_dir)
+
+    def submit(self, filename="subs.zip", kind="subtitle_zip", options=None):
+        job_id = self.queue.new_job_id()
+        path = self.queue.upload_path(job_id, filename)
+        os.makedirs(os.path.dirname(path))
+        with open(path, "wb") as f:
+            f.write(b"PK")
+        options = {"languages": ["de", "ja"]} if options is None else options
+        return self.queue.submit(job_id, kind, filename, options)
+
+    def test_job_options(self):
+        options = job_options("subtitle_zip", "a.zip", {"languages": "de, ja", "styling": "1"})
+        self.assertEqual(
+            options, {"languages": ["de", "ja"], "transliterate": True, "styling": True}
+        )
+        self.assertEqual(
+            job_options("epub_transliteration", "a.epub", {"language": "hindi"}),
+            {"language": "hindi"},
+        )
+        for kind, filename, params in [
+            ("pdf", "a.pdf", {}),
+            ("subtitle_zip", "a.epub", {"languages": "de"}),
+            ("subtitle_zip", "a.zip", {"languages": "de,xx"}),
+            ("epub_transliteration", "a.epub", {}),
+            ("epub_versions", "a.epub", {"language": "klingon"}),
+        ]:
+            with self.assertRaises(JobError) as raised:
+                job_options(kind, filename, params)
+            self.assertEqual(raised.exception.status, 400)
+
+    def test_running_and_queued_limits(self):
+        first, second = self.submit(), self.submit()
+        with self.assertRaises(JobError) as raised:
+            self.submit()
+        self.assertEqual(raised.exception.status, 503)
+
+        self.assertEqual(self.queue.claim()["id"], first["id"])
+        # One job at a time on the host, whoever asks
+        self.assertIsNone(self.queue.claim())
+        self.queue.finish(first["id"], ["subs_combined.zip"])
+        claimed = self.queue.claim()
+        self.assertEqual((claimed["id"], claimed["status"]), (second["id"], "running"))
+        self.assertIsNone(self.queue.claim())
+        self.assertEqual(self.queue.stats()["done"], 1)
+
+    def test_run_job_moves_outputs(self):
+        job = self.submit()
+        self.queue.claim()
+        with mock.patch.dict(JOB_KINDS, {"subtitle_zip": (fake_job, ".zip")}):
+            self.assertTrue(run_job(self.queue, job["id"]))
+        job = self.queue.get(job["id"])
+        self.assertEqual((job["status"], job["progress"]), ("done", 1.0))
+        self.assertEqual(job["results"], ["subs_combined.zip"])
+        with open(os.path.join(job["output_dir"], "subs_combined.zip"), encoding="utf-8") as f:
+            self.assertEqual(f.read(), "de,ja")
+        self.assertFalse(os.path.exists(os.path.dirname(job["input_path"])))
+
+        job = self.submit()
+        self.queue.claim()
+        with mock.patch.dict(JOB_KINDS, {"subtitle_zip": (broken_job, ".zip")}):
+            self.assertFalse(run_job(self.queue, job["id"]))
+        job = self.queue.get(job["id"])
+        self.assertEqual(job["status"], "failed")
+        self.assertEqual(job["error"], "No SRT files found in the input zip")
+
+    def test_cancel(self):
+        queued = self.submit()
+        self.assertEqual(self.queue.cancel(queued["id"])["status"], "cancelled")
+        self.assertFalse(os.path.exists(os.path.dirname(queued["input_path"])))
+        with self.assertRaises(JobError) as raised:
+            self.queue.cancel(queued["id"])
+        self.assertEqual(raised.exception.status, 409)
+
+        running = self.submit()
+        self.queue.claim()
+        process = subprocess.Popen(["sleep", "30"], start_new_session=True)
+        self.queue.set_worker(running["id"], process.pid)
+        self.assertEqual(self.queue.cancel(running["id"])["status"], "cancelled")
+        self.assertIsNotNone(process.wait(timeout=5))
+        # A late finish from the killed process does not undo the cancellation
+        self.assertFalse(self.queue.finish(running["id"], ["late.zip"]))
+
+    def test_jobs_of_dead_workers_are_retried_then_failed(self):
+        job = self.submit()
+        for attempt in range(2):
+            self.queue.claim()
+            self.queue.set_worker(job["id"], 12345)
+            self.assertEqual(self.queue.recover(alive=lambda pid: False), [job["id"]])
+        job = self.queue.get(job["id"])
+        self.assertEqual((job["status"], job["attempts"]), ("failed", 2))
+        self.assertEqual(job["error"], "Worker exited 2 times")
+
+    def test_worker_runs_jobs_in_their_own_process(self):
+        # Two bytes are no EPUB: the job process fails and records why
+        job = self.submit("book.epub", "epub_transliteration", {"language": "hindi"})
+        worker = JobWorker(self.queue, slots=2, poll_interval=0.1)
+        worker.run_once()
+        deadline = time.time() + 60
+        while worker.processes and time.time() < deadline:
+            time.sleep(0.1)
+            worker.reap()
+        job = self.queue.get(job["id"])
+        self.assertEqual(job["status"], "failed")
+        self.assertIn("zip", job["error"].lower())
+        self.assertFalse(os.path.exists(os.path.dirname(job["input_path"])))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+import asyncio
+import base64
+import json
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+from web.live_preview import (
+    PreviewDocument,
+    PreviewServer,
+    encode_frame,
+    read_frame,
+    render_block,
+    split_blocks,
+    websocket_accept,
+)
+
+
+class RecordingRenderer:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, language, text):
+        self.calls.append(text)
+        return f"<p>{text}</p>"
+
+
+def client_frame(text):
+    """A masked text frame, as browsers send them"""
+    payload = text.encode("utf-8")
+    mask = b"\x01\x02\x03\x04"
+    masked = bytes(byte ^ mask[index % 4] for index, byte in enumerate(payload))
+    return bytes([0x81, 0x80 | len(payload)]) + mask + masked
+
+
+class TestPreviewDocument(unittest.TestCase):
+    def test_split_blocks_keeps_fences_together(self):
+        text = "# Title\n\nПривет мир.\nВторая строка.\n\n```\ncode\n\nmore\n```\n\n\n我喜欢中文。\n"
+        self.assertEqual(
+            split_blocks(text),
+            ["# Title", "Привет мир.\nВторая строка.", "```\ncode\n\nmore\n```", "我喜欢中文。\n"],
+        )
+
+    def test_only_changed_paragraphs_are_rendered(self):
+        renderer = RecordingRenderer()
+        document = PreviewDocument(render=renderer)
+        blocks = [(None, f"paragraph {index}") for index in range(1000)]
+        first = document.update(blocks)
+        self.assertEqual((first["start"], first["delete"], len(first["insert"])), (0, 0, 1000))
+        self.assertIsNone(document.update(list(blocks)))
+
+        renderer.calls.clear()
+        edited = list(blocks)
+        edited[500] = (None, "paragraph 500, edited")
+        patch = document.update(edited)
+        self.assertEqual(renderer.calls, ["paragraph 500, edited"])
+        self.assertEqual(
+            patch,
+            {
+                "type": "patch",
+                "version": 2,
+                "start": 500,
+                "delete": 1,
+                "insert": ["<p>paragraph 500, edited</p>"],
+            },
+        )
+
+        # A new paragraph between two identical ones, then a deletion at the end
+        edited.insert(1, (None, "paragraph 0"))
+        patch = document.update(edited)
+        self.assertEqual(
+            (patch["start"], patch["delete"], patch["insert"]), (1, 0, ["<p>paragraph 0</p>"])
+        )
+        patch = document.update(edited[:-2])
+        self.assertEqual((patch["start"], patch["delete"], patch["insert"]), (999, 2, []))
+        self.assertEqual(document.html, [f"<p>{text}</p>" for _, text in edited[:-2]])
+
+    def test_render_block(self):
+        self.assertEqual(render_block(None, "## Hello <b>"), "<h2>Hello &lt;b&gt;</h2>")
+        self.assertEqual(render_block(None, "```\nx < 1\n```"), "<pre><code>x &lt; 1</code></pre>")
+        russian = render_block("russian", "Привет мир")
+        self.assertIn("<ruby", russian)
+        self.assertIn("privet", russian.lower())
+
+
+class TestWebSocket(unittest.TestCase):
+    def test_accept_key_from_rfc_6455(self):
+        self.assertEqual(
+            websocket_accept("dGhlIHNhbXBsZSBub25jZQ=="), "s3pPLMBiTxaQ9kYGzzhZRbK+xOo="
+        )
+
+    def test_frames_round_trip(self):
+        async def read(data):
+            reader = asyncio.StreamReader()
+            reader.feed_data(data)
+            return await read_frame(reader)
+
+        self.assertEqual(asyncio.run(read(client_frame("reset"))), (0x1, b"reset"))
+        long_payload = b"x" * 70000
+        frame = encode_frame(long_payload)
+        self.assertEqual(frame[:2], bytes([0x81, 127]))
+        self.assertEqual(struct.unpack("!Q", frame[2:10])[0], 70000)
+        self.assertEqual(asyncio.run(read(encode_frame(b"a" * 300)))[1], b"a" * 300)
+
+
+class TestPreviewServer(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, "notes.md")
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("# Notes\n\nПривет мир.\n\nДо свидания.\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_edit_is_pushed_as_patch(self):
+        async def scenario():
+            server = await PreviewServer(self.path, port=0).start()
+            try:
+                reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+                key = base64.b64encode(b"0123456789abcdef").decode()
+                writer.write(
+                    (
+                        "GET /ws HTTP/1.1\r\nHost: localhost\r\nUpgrade: websocket\r\n"
+                        f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n\r\n"
+                    ).encode()
+                )
+                response = await reader.readuntil(b"\r\n\r\n")
+                self.assertIn(websocket_accept(key).encode(), response)
+
+                # A page at another version gets the whole document once
+                writer.write(client_frame("0"))
+                _, payload = await asyncio.wait_for(read_frame(reader), 5)
+                reset = json.loads(payload)
+                self.assertEqual((reset["type"], len(reset["blocks"])), ("reset", 3))
+
+                with open(self.path, "w", encoding="utf-8") as f:
+                    f.write("# Notes\n\nПока мир.\n\nДо свидания.\n")
+                server.refresh()
+                _, payload = await asyncio.wait_for(read_frame(reader), 5)
+                writer.close()
+                return json.loads(payload)
+            finally:
+                await server.close()
+
+        patch = asyncio.run(scenario())
+        self.assertEqual((patch["type"], patch["start"], patch["delete"]), ("patch", 1, 1))
+        self.assertIn("poka", patch["insert"][0].lower())
+
+
+if __name__ == "__main__":
+    unittest.main()
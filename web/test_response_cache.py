@@ -0,0 +1,151 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+from flask import Flask, jsonify, request
+
+from web.job_queue import JobQueue
+from web.load_test import asgi_request
+from web.response_cache import (
+    ResponseCache,
+    cache_key,
+    cached_view,
+    etag_matches,
+    skip_response_cache,
+)
+from web.service import create_app
+
+
+class RecordingTranslator:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text, target_lang):
+        self.calls.append(text)
+        return f"{target_lang}:{text}"
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_key_ignores_option_order(self):
+        self.assertEqual(
+            cache_key("/api", {"text": "a", "language": "ru"}),
+            cache_key("/api", {"language": "ru", "text": "a"}),
+        )
+        self.assertNotEqual(cache_key("/api", {"text": "a"}), cache_key("/other", {"text": "a"}))
+
+    def test_lru_evicts_oldest_and_skips_errors(self):
+        cache = ResponseCache(max_entries=2)
+        cache.put("a", b"A", "text/plain")
+        cache.put("b", b"B", "text/plain")
+        cache.get("a")
+        cache.put("c", b"C", "text/plain")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a").body, b"A")
+
+        entry = cache.put("d", b'{"translation": "[Error: timeout]"}', "application/json")
+        self.assertTrue(entry.etag)
+        self.assertIsNone(cache.get("d"))
+        self.assertEqual(cache.stats()["memory_hits"], 2)
+        self.assertEqual(cache.stats()["misses"], 2)
+
+    def test_disk_tier_is_shared(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "responses.sqlite")
+            first = ResponseCache(db_path=path)
+            second = ResponseCache(db_path=path)
+            stored = first.put("key", b"body", "text/html")
+            self.assertEqual(second.get("key"), stored)
+            self.assertEqual(second.get("key"), stored)
+            self.assertEqual(second.stats()["disk_hits"], 1)
+            self.assertEqual(second.stats()["memory_hits"], 1)
+            first.close()
+            second.close()
+
+    def test_etag_matches(self):
+        self.assertTrue(etag_matches('"x", W/"abc"', '"abc"'))
+        self.assertTrue(etag_matches("*", '"abc"'))
+        self.assertFalse(etag_matches('"x"', '"abc"'))
+        self.assertFalse(etag_matches(None, '"abc"'))
+
+
+class TestCachedService(unittest.TestCase):
+    def setUp(self):
+        self.translator = RecordingTranslator()
+        self.jobs_dir = tempfile.TemporaryDirectory()
+        job_queue = JobQueue(db_path=os.path.join(self.jobs_dir.name, "jobs.sqlite"))
+        self.app = create_app(translate=self.translator, warm_up_texts={}, job_queue=job_queue)
+
+    def tearDown(self):
+        self.app.close()
+        self.jobs_dir.cleanup()
+
+    def request(self, method, path, payload=None, headers=()):
+        return asyncio.run(asgi_request(self.app, method, path, payload, headers))
+
+    def test_repeated_request_is_served_from_cache(self):
+        payload = {"texts": ["a", "b"], "target_lang": "de"}
+        status, first, body = self.request("POST", "/api/translate", payload)
+        self.assertEqual((status, first["x-cache"]), (200, "MISS"))
+
+        status, second, cached = self.request(
+            "POST", "/api/translate", {"target_lang": "de", "texts": ["a", "b"]}
+        )
+        self.assertEqual((status, second["x-cache"]), (200, "HIT"))
+        self.assertEqual(cached, body)
+        self.assertEqual(second["etag"], first["etag"])
+        self.assertEqual(sorted(self.translator.calls), ["a", "b"])
+
+        status, _, body = self.request(
+            "POST", "/api/translate", payload, headers=[("if-none-match", first["etag"])]
+        )
+        self.assertEqual((status, body), (304, b""))
+
+        status, _, body = self.request("GET", "/metrics?format=json")
+        stats = json.loads(body)["response_cache"]
+        self.assertEqual((stats["memory_hits"], stats["misses"]), (2, 1))
+        self.assertAlmostEqual(stats["hit_rate"], 2 / 3, places=3)
+
+    def test_errors_are_not_cached(self):
+        self.assertEqual(self.request("POST", "/api/transliterate", {"text": " "})[0], 400)
+        self.assertEqual(self.app.response_cache.stats()["entries"], 0)
+
+
+class TestCachedView(unittest.TestCase):
+    def setUp(self):
+        self.cache = ResponseCache()
+        self.calls = []
+        app = Flask(__name__)
+
+        @app.route("/echo", methods=["POST"])
+        @cached_view(self.cache)
+        def echo():
+            self.calls.append(request.form["text"])
+            if request.form["text"] == "fail":
+                skip_response_cache()
+            return jsonify({"text": request.form["text"]})
+
+        self.client = app.test_client()
+
+    def test_view_runs_once_per_distinct_form(self):
+        first = self.client.post("/echo", data={"text": "привет"})
+        second = self.client.post("/echo", data={"text": "привет"})
+        self.assertEqual(first.headers["X-Cache"], "MISS")
+        self.assertEqual(second.headers["X-Cache"], "HIT")
+        self.assertEqual(second.get_json(), {"text": "привет"})
+        self.assertEqual(second.mimetype, "application/json")
+        self.assertEqual(self.calls, ["привет"])
+
+        conditional = self.client.post(
+            "/echo", data={"text": "привет"}, headers={"If-None-Match": first.headers["ETag"]}
+        )
+        self.assertEqual(conditional.status_code, 304)
+
+        self.client.post("/echo", data={"text": "fail"})
+        self.client.post("/echo", data={"text": "fail"})
+        self.assertEqual(self.calls, ["привет", "fail", "fail"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,186 @@
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from web.job_queue import JobQueue
+from web.load_test import asgi_request
+from web.service import create_app
+
+
+class RecordingTranslator:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text, target_lang):
+        self.calls.append(text)
+        return f"{target_lang}:{text}"
+
+
+class TestTransliterationService(unittest.TestCase):
+    def setUp(self):
+        self.translator = RecordingTranslator()
+        self.app = create_app(
+            translate=self.translator, max_body_bytes=1024, warm_up_texts={}, max_batch_texts=4
+        )
+
+    def tearDown(self):
+        self.app.close()
+
+    def request(self, method, path, payload=None, headers=()):
+        return asyncio.run(asgi_request(self.app, method, path, payload, headers))
+
+    def test_transliterate_detects_language(self):
+        status, headers, body = self.request("POST", "/api/transliterate", {"text": "привет"})
+        self.assertEqual(status, 200)
+        self.assertTrue(headers["content-type"].startswith("application/json"))
+        self.assertEqual(
+            json.loads(body), {"transliteration": "privet", "detected_language": "russian"}
+        )
+
+    def test_transliterate_batch_keeps_order(self):
+        texts = ["привет", "我喜欢中文。", "мир", "привет"]
+        status, _, body = self.request(
+            "POST",
+            "/api/transliterate/batch",
+            {"texts": texts, "languages": [None, None, None, "ru"]},
+        )
+        self.assertEqual(status, 200)
+        results = json.loads(body)["results"]
+        self.assertEqual(
+            [result["detected_language"] for result in results],
+            ["russian", "chinese", "russian", "ru"],
+        )
+        self.assertEqual(results[0]["transliteration"], "privet")
+        self.assertEqual(results[2]["transliteration"], "mir")
+        self.assertEqual(results[3]["transliteration"], "privet")
+        self.assertIn("xǐ huān", results[1]["transliteration"])
+
+        too_many = {"texts": ["a"] * 5}
+        self.assertEqual(self.request("POST", "/api/transliterate/batch", too_many)[0], 413)
+        mismatched = {"texts": ["a", "b"], "languages": ["ru"]}
+        self.assertEqual(self.request("POST", "/api/transliterate/batch", mismatched)[0], 400)
+
+    def test_breakdown_translates_each_word_once(self):
+        text = "我喜欢中文。我喜欢中文。"
+        status, _, body = self.request("POST", "/api/breakdown", {"text": text})
+        self.assertEqual(status, 200)
+        result = json.loads(body)
+        self.assertEqual(result["detected_language"], "chinese")
+        self.assertEqual(len(result["sentences"]), 2)
+
+        words = [item for item in result["sentences"][0]["word_breakdown"] if item["processable"]]
+        self.assertEqual(words[0]["translation"], f"en:{words[0]['word']}")
+        self.assertEqual(result["sentences"][0]["full_translation"], "en:我喜欢中文。")
+        # Distinct words are translated once per sentence, never twice for one sentence
+        self.assertEqual(len(self.translator.calls), 2 * (len(words) + 1))
+
+        status, headers, body = self.request(
+            "POST", "/api/breakdown", {"text": text, "stream": True}
+        )
+        lines = [json.loads(line) for line in body.decode("utf-8").splitlines()]
+        self.assertTrue(headers["content-type"].startswith("application/x-ndjson"))
+        self.assertEqual(lines[0]["detected_language"], "chinese")
+        self.assertEqual([line["sentence"]["original"] for line in lines[1:]], ["我喜欢中文。"] * 2)
+
+    def test_translate_batch(self):
+        status, _, body = self.request(
+            "POST", "/api/translate", {"texts": ["a", "b", "a"], "target_lang": "de"}
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body)["translations"], ["de:a", "de:b", "de:a"])
+        self.assertEqual(sorted(self.translator.calls), ["a", "b"])
+
+    def test_errors(self):
+        self.assertEqual(self.request("POST", "/api/transliterate", {"text": "x" * 2000})[0], 413)
+        self.assertEqual(self.request("POST", "/api/transliterate", {"text": " "})[0], 400)
+        self.assertEqual(self.request("GET", "/api/transliterate")[0], 405)
+        self.assertEqual(self.request("GET", "/missing")[0], 404)
+        self.assertEqual(self.request("GET", "/health")[0], 200)
+
+    def test_metrics_in_prometheus_format(self):
+        self.request("POST", "/api/transliterate", {"text": "привет"})
+        status, headers, body = self.request("GET", "/metrics")
+        self.assertEqual(status, 200)
+        self.assertTrue(headers["content-type"].startswith("text/plain; version=0.0.4"))
+        text = body.decode("utf-8")
+        self.assertIn(
+            'transliteration_http_request_seconds_count{route="/api/transliterate",status="200"}',
+            text,
+        )
+        self.assertIn(
+            'transliteration_stage_seconds_count{stage="transliterate",language="russian"}', text
+        )
+
+
+class TestJobEndpoints(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.queue = JobQueue(
+            db_path=os.path.join(self.test_dir, "jobs.sqlite"),
+            upload_dir=os.path.join(self.test_dir, "uploads"),
+            processed_dir=os.path.join(self.test_dir, "processed"),
+        )
+        self.app = create_app(warm_up_texts={}, job_queue=self.queue, max_upload_bytes=1024)
+
+    def tearDown(self):
+        self.app.close()
+        shutil.rmtree(self.test_dir)
+
+    def request(self, method, path, payload=None):
+        return asyncio.run(asgi_request(self.app, method, path, payload))
+
+    def test_upload_status_download_and_cancel(self):
+        status, headers, body = self.request(
+            "POST", "/api/jobs?kind=subtitle_zip&filename=subs.zip&languages=de,ja", b"PK zip"
+        )
+        self.assertEqual(status, 202)
+        job = json.loads(body)["job"]
+        self.assertEqual(headers["location"], f"/api/jobs/{job['id']}")
+        self.assertEqual((job["status"], job["options"]["languages"]), ("queued", ["de", "ja"]))
+        self.assertNotIn("input_path", job)
+        with open(self.queue.get(job["id"])["input_path"], "rb") as f:
+            self.assertEqual(f.read(), b"PK zip")
+
+        self.assertEqual(self.request("GET", f"/api/jobs/{job['id']}/result")[0], 409)
+        # What a job process does once the zip is processed
+        claimed = self.queue.claim()
+        os.makedirs(claimed["output_dir"])
+        with open(os.path.join(claimed["output_dir"], "subs_combined.zip"), "wb") as f:
+            f.write(b"combined")
+        self.queue.finish(job["id"], ["subs_combined.zip"])
+
+        status, _, body = self.request("GET", f"/api/jobs/{job['id']}")
+        job = json.loads(body)["job"]
+        self.assertEqual((status, job["status"], job["progress"]), (200, "done", 1.0))
+        status, headers, body = self.request("GET", job["result_urls"][0])
+        self.assertEqual((status, body), (200, b"combined"))
+        self.assertEqual(headers["content-type"], "application/zip")
+        self.assertIn("subs_combined.zip", headers["content-disposition"])
+        self.assertEqual(self.request("DELETE", f"/api/jobs/{job['id']}")[0], 409)
+
+        status, _, body = self.request(
+            "POST", "/api/jobs?kind=epub_versions&filename=book.epub", b"PK epub"
+        )
+        queued = json.loads(body)["job"]
+        status, _, body = self.request("DELETE", f"/api/jobs/{queued['id']}")
+        self.assertEqual((status, json.loads(body)["job"]["status"]), (200, "cancelled"))
+
+        listing = json.loads(self.request("GET", "/api/jobs")[2])
+        self.assertEqual([item["status"] for item in listing["jobs"]], ["cancelled", "done"])
+        self.assertEqual(listing["queue"]["done"], 1)
+
+    def test_job_errors(self):
+        self.assertEqual(self.request("POST", "/api/jobs?kind=pdf&filename=a.pdf", b"x")[0], 400)
+        upload = "/api/jobs?kind=epub_transliteration&language=hindi&filename=a.epub"
+        self.assertEqual(self.request("POST", upload, b"")[0], 400)
+        self.assertEqual(self.request("POST", upload, b"x" * 2000)[0], 413)
+        self.assertEqual(os.listdir(os.path.join(self.test_dir, "uploads")), [])
+        self.assertEqual(self.request("GET", "/api/jobs/missing")[0], 404)
+        self.assertEqual(self.request("PUT", "/api/jobs/missing")[0], 405)
+
+
+if __name__ == "__main__":
+    unittest.main()
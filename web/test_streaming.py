@@ -0,0 +1,86 @@
+import json
+import time
+import unittest
+from unittest import mock
+
+from transliteration.translation_client import TranslationClient
+from web import webTransliterator
+from web.streaming import sse_event
+
+
+def parse_events(body):
+    events = []
+    for frame in body.decode("utf-8").split("\n\n"):
+        if not frame.strip():
+            continue
+        lines = dict(line.split(": ", 1) for line in frame.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class TestBreakdownStream(unittest.TestCase):
+    def setUp(self):
+        def slow_translate(text, target_language):
+            time.sleep(0.02)
+            return f"{target_language}:{text}"
+
+        self.client = TranslationClient(translate=slow_translate, rate_limit=0)
+        patcher = mock.patch.object(
+            webTransliterator, "get_translation_client", return_value=self.client
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.app = webTransliterator.app.test_client()
+
+    def test_sse_event_format(self):
+        self.assertEqual(sse_event("done", {"a": "中"}), 'event: done\ndata: {"a": "中"}\n\n')
+
+    def test_sentences_stream_before_translations(self):
+        text = "我喜欢中文。他们也在学习。"
+        response = self.app.post("/api/breakdown/stream", json={"text": text, "target_lang": "de"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "text/event-stream")
+
+        events = parse_events(response.data)
+        names = [name for name, _ in events]
+        self.assertEqual(names[:3], ["meta", "sentence", "sentence"])
+        self.assertEqual(names[-1], "done")
+        self.assertEqual(events[0][1]["detected_language"], "chinese")
+
+        first = events[1][1]
+        self.assertEqual(first["original"], "我喜欢中文。")
+        processable = [item for item in first["word_breakdown"] if item["processable"]]
+        self.assertTrue(all(item["translation"] == "" for item in processable))
+        self.assertTrue(all(item["transliteration"] for item in processable))
+
+        translations = [data for name, data in events if name == "translation"]
+        full = {
+            data["index"]: data["full_translation"]
+            for data in translations
+            if "full_translation" in data
+        }
+        self.assertEqual(full, {0: "de:我喜欢中文。", 1: "de:他们也在学习。"})
+        words = {
+            (data["index"], data["word"]): data["translation"]
+            for data in translations
+            if "word" in data
+        }
+        for item in processable:
+            self.assertEqual(words[(0, item["word"])], f"de:{item['word']}")
+
+    def test_page_translates_through_the_shared_client(self):
+        response = self.app.post("/", data={"text": "他们在学习中文。", "target_lang": "fr"})
+        self.assertEqual(response.status_code, 200)
+        page = response.data.decode("utf-8")
+        self.assertIn("fr:他们在学习中文。", page)
+        self.assertIn("fr:学习", page)
+        # Words and the sentence all went through the client's cache and rate limit
+        self.assertGreater(self.client.stats()["cache_misses"], 1)
+
+    def test_empty_text_is_rejected(self):
+        response = self.app.post("/api/breakdown/stream", json={"text": " "})
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,319 @@
+# text_analysis.py
+import re
+from collections import Counter
+from functools import lru_cache
+
+from transliteration import (
+    analyze_chinese_syntax,
+    get_grammatical_classes_from_pos,
+    get_pinyin_for_word,
+    is_punctuation,
+    transliterate,
+    transliterate_many,
+)
+
+# Language character ranges for detection
+LANGUAGE_CHAR_RANGES = {
+    "korean": [(0xAC00, 0xD7AF)],  # Hangul syllables
+    "arabic": [(0x0600, 0x06FF)],  # Basic Arabic
+    "russian": [(0x0400, 0x04FF)],  # Cyrillic
+    "hindi": [(0x0900, 0x097F)],  # Devanagari (Hindi)
+    "japanese": [
+        (0x3040, 0x309F),  # Hiragana
+        (0x30A0, 0x30FF),  # Katakana
+        (0x4E00, 0x9FFF),  # Kanji/Chinese characters
+    ],
+    "chinese": [(0x4E00, 0x9FFF)],  # Chinese characters
+}
+
+# Language priority for ambiguous characters (Chinese/Japanese share Kanji)
+LANGUAGE_PRIORITY = ["chinese", "japanese", "korean", "hindi", "arabic", "russian"]
+
+# Language code mapping for translation
+LANGUAGE_CODE_MAP = {
+    "japanese": "ja",
+    "chinese": "zh-CN",
+    "korean": "ko",
+    "hindi": "hi",
+    "arabic": "ar",
+    "russian": "ru",
+}
+
+# Target languages (languages we translate TO)
+TARGET_LANGUAGES = [
+    {"code": "en", "name": "English", "direction": "ltr"},
+    {"code": "es", "name": "Spanish", "direction": "ltr"},
+    {"code": "fr", "name": "French", "direction": "ltr"},
+    {"code": "de", "name": "German", "direction": "ltr"},
+    {"code": "it", "name": "Italian", "direction": "ltr"},
+    {"code": "pt", "name": "Portuguese", "direction": "ltr"},
+    {"code": "ru", "name": "Russian", "direction": "ltr"},
+    {"code": "ja", "name": "Japanese", "direction": "ltr"},
+    {"code": "ko", "name": "Korean", "direction": "ltr"},
+    {"code": "zh-CN", "name": "Chinese (Simplified)", "direction": "ltr"},
+    {"code": "ar", "name": "Arabic", "direction": "rtl"},
+    {"code": "he", "name": "Hebrew", "direction": "rtl"},
+    {"code": "fa", "name": "Persian", "direction": "rtl"},
+    {"code": "ur", "name": "Urdu", "direction": "rtl"},
+    {"code": "hi", "name": "Hindi", "direction": "ltr"},
+    {"code": "tr", "name": "Turkish", "direction": "ltr"},
+    {"code": "nl", "name": "Dutch", "direction": "ltr"},
+    {"code": "sv", "name": "Swedish", "direction": "ltr"},
+    {"code": "pl", "name": "Polish", "direction": "ltr"},
+    {"code": "vi", "name": "Vietnamese", "direction": "ltr"},
+    {"code": "th", "name": "Thai", "direction": "ltr"},
+    {"code": "id", "name": "Indonesian", "direction": "ltr"},
+]
+
+
+def detect_language_char(char):
+    """Detect which language a character belongs to"""
+    char_code = ord(char)
+
+    # Skip common punctuation and whitespace
+    if char in " .,!?。，！？、」「『』（）《》-—–…":
+        return "punctuation"
+
+    for lang, ranges in LANGUAGE_CHAR_RANGES.items():
+        for start, end in ranges:
+            if start <= char_code <= end:
+                return lang
+
+    return "latin"  # Default to latin for unrecognized characters
+
+
+def detect_language_text(text):
+    """Detect the primary language of a text block"""
+    if not text.strip():
+        return "unknown"
+
+    char_languages = []
+    for char in text:
+        lang = detect_language_char(char)
+        if lang not in ["punctuation", "latin"]:
+            char_languages.append(lang)
+
+    if not char_languages:
+        return "latin"  # No special characters found, treat as latin
+
+    # Count language occurrences
+    lang_counts = Counter(char_languages)
+
+    # Handle Chinese/Japanese ambiguity with better heuristics
+    if "japanese" in lang_counts and "chinese" in lang_counts:
+        # If there are Japanese-specific characters, prioritize Japanese
+        if contains_japanese_specific_chars(text):
+            return "japanese"
+        # Default to the majority
+        elif lang_counts["japanese"] > lang_counts["chinese"]:
+            return "japanese"
+        else:
+            return "chinese"
+
+    # For single language or clear majority
+    primary_lang = lang_counts.most_common(1)[0][0]
+
+    # Double-check Chinese/Japanese if detected
+    if (
+        primary_lang == "japanese"
+        and not contains_japanese_specific_chars(text)
+        and contains_chinese_specific_patterns(text)
+    ):
+        return "chinese"
+    elif primary_lang == "chinese" and contains_japanese_specific_chars(text):
+        return "japanese"
+
+    return primary_lang
+
+
+def contains_japanese_specific_chars(text):
+    """Check for Japanese-specific characters"""
+    # Hiragana and Katakana are uniquely Japanese
+    hiragana_range = (0x3040, 0x309F)
+    katakana_range = (0x30A0, 0x30FF)
+    # Japanese punctuation and symbols
+    japanese_punct = "・「」『』〜"
+
+    for char in text:
+        code = ord(char)
+        if (
+            hiragana_range[0] <= code <= hiragana_range[1]
+            or katakana_range[0] <= code <= katakana_range[1]
+            or char in japanese_punct
+        ):
+            return True
+    return False
+
+
+def contains_chinese_specific_patterns(text):
+    """Check for Chinese-specific patterns"""
+    # Chinese punctuation
+    chinese_punct = "。，！？《》【】"
+    # Common Chinese characters not typically used in Japanese
+    chinese_specific_chars = "这那为个说国们着么"
+
+    if any(punct in text for punct in chinese_punct):
+        return True
+
+    if any(char in text for char in chinese_specific_chars):
+        return True
+
+    return False
+
+
+def split_into_sentences(text):
+    """Split text into sentences; CJK full stops end one even without a following space"""
+    sentences = re.split(r"(?<=[.!?])\s+|(?<=[。！？])\s*", text)
+    return [sentence.strip() for sentence in sentences if sentence.strip()]
+
+
+def should_process_word(word):
+    """Check if word should be processed (not space/punctuation)"""
+    if not word.strip():
+        return False
+    if is_punctuation(word):
+        return False
+    if word.isspace():
+        return False
+    return True
+
+
+def get_language_direction(lang_code):
+    """Get text direction for language"""
+    # Check if it's a detected language name
+    if lang_code in LANGUAGE_CHAR_RANGES:
+        if lang_code in ["arabic"]:
+            return "rtl"
+        return "ltr"
+
+    # Check target languages
+    lang = next((l for l in TARGET_LANGUAGES if l["code"] == lang_code), None)
+    return lang["direction"] if lang else "ltr"
+
+
+def target_language_name(lang_code):
+    return next((lang["name"] for lang in TARGET_LANGUAGES if lang["code"] == lang_code), lang_code)
+
+
+def transliterate_batch(texts, languages=None):
+    """
+    Transliterations of many texts, each in its language hint or, without one,
+    its detected language. Texts are grouped by language so every engine runs
+    once over its whole group.
+
+    Returns:
+        [(transliteration, language)] in the order of texts
+    """
+    languages = languages or [None] * len(texts)
+    groups = {}
+    for index, (text, language) in enumerate(zip(texts, languages)):
+        groups.setdefault(language or detect_language_text(text), []).append(index)
+
+    results = [None] * len(texts)
+    for language, indexes in groups.items():
+        transliterations = transliterate_many([texts[index] for index in indexes], language)
+        for index, transliteration in zip(indexes, transliterations):
+            results[index] = (transliteration, language)
+    return results
+
+
+@lru_cache(maxsize=None)
+def japanese_segmenter():
+    """One pykakasi instance per process, shared by every request"""
+    import pykakasi
+
+    return pykakasi.kakasi()
+
+
+def unprocessed_item(word, **extra):
+    return {"word": word, "translation": "", "transliteration": "", "processable": False, **extra}
+
+
+def segment_japanese(text):
+    """pykakasi segments with their Hepburn romaji"""
+    items = []
+    for item in japanese_segmenter().convert(text):
+        original = item.get("orig", "")
+        if not should_process_word(original):
+            items.append(unprocessed_item(original))
+            continue
+        items.append(
+            {
+                "word": original,
+                "translation": "",
+                "transliteration": item.get("hepburn", ""),
+                "processable": True,
+            }
+        )
+    return items
+
+
+def segment_chinese(text):
+    """jieba words with pinyin, syntax class and grammatical class"""
+    import jieba.posseg as pseg
+
+    items = []
+    for word, pos in pseg.cut(text):
+        if not should_process_word(word):
+            items.append(unprocessed_item(word, syntax="", pos="punct", grammatical_class=""))
+            continue
+        syntax_analysis = analyze_chinese_syntax(word)
+        items.append(
+            {
+                "word": word,
+                "translation": "",
+                "transliteration": get_pinyin_for_word(word),
+                "syntax": syntax_analysis[0][1] if syntax_analysis else "",
+                "pos": pos,
+                "grammatical_class": get_grammatical_classes_from_pos(pos),
+                "processable": True,
+            }
+        )
+    return items
+
+
+def segment_other(text, detected_lang):
+    """Whitespace tokens, each transliterated on its own"""
+    items = []
+    # Tokenize while preserving spaces and punctuation
+    for token in re.findall(r"\S+|\s+", text):
+        if not should_process_word(token):
+            items.append(unprocessed_item(token))
+            continue
+        try:
+            transliteration_result = transliterate(token, detected_lang)
+            if detected_lang == "korean" and isinstance(transliteration_result, list):
+                transliteration = " ".join([trans for char, trans in transliteration_result])
+            else:
+                transliteration = str(transliteration_result)
+        except Exception as e:
+            transliteration = f"[Error: {str(e)}]"
+        items.append(
+            {
+                "word": token,
+                "translation": "",
+                "transliteration": transliteration,
+                "processable": True,
+            }
+        )
+    return items
+
+
+def segment_sentence(text, detected_lang):
+    """
+    Word breakdown of a sentence without translations.
+
+    Items carry "word", "transliteration", "processable" and an empty
+    "translation" for the caller to fill in; Chinese items add "syntax", "pos"
+    and "grammatical_class".
+    """
+    if detected_lang == "chinese":
+        return segment_chinese(text)
+    if detected_lang == "japanese":
+        try:
+            return segment_japanese(text)
+        except Exception as e:
+            print(f"Error in Japanese processing: {e}")
+            # Fallback: simple word splitting
+            return segment_other(text, "ja")
+    return segment_other(text, detected_lang)
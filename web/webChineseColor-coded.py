@@ -1,13 +1,27 @@
-import time
+import os
+import sys
 
 import jieba
 import jieba.posseg as pseg
 import pykakasi
-from deep_translator import GoogleTranslator
 from flask import Flask, render_template, request
 from pypinyin import Style, pinyin
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from transliteration.metrics import instrument_flask_app, stage_timer
+from transliteration.translation_client import get_translation_client
+from web.response_cache import cached_view, open_response_cache, skip_response_cache
+
 app = Flask(__name__)
+response_cache = open_response_cache()
+instrument_flask_app(
+    app,
+    stats=lambda: {
+        "response_cache": response_cache.stats(),
+        "translation_client": get_translation_client().stats(),
+    },
+)
 
 # Initialize analyzers
 kks = pykakasi.kakasi()
@@ -151,58 +165,54 @@ def analyze_chinese_syntax(text):
 
 
 def get_translator():
-    # Initialize translator with retry logic
-    max_retries = 3
-    for i in range(max_retries):
-        try:
-            translator = GoogleTranslator()
-            # Test the translator
-            translator.translate("test", src="en", dest="es")
-            return translator
-        except:
-            if i < max_retries - 1:
-                time.sleep(1)  # wait before retrying
-                continue
-            raise Exception("Failed to initialize translator after multiple attempts")
+    # One rate-limited, caching client per process, shared by all requests
+    return get_translation_client()
 
 
-def process_chinese(text):
-    translator = get_translator()
+def translate_words(words, text):
+    """
+    Translates the full text and every word (punctuation excluded) in one
+    concurrent batch, each distinct word once.
 
-    # Get full text translation
-    try:
-        full_translation = translator.translate(text, src="zh-cn", dest="en")
-    except Exception as e:
-        print(f"Full translation failed: {str(e)}")
+    Returns:
+        (translations aligned with words, full_translation)
+    """
+    wanted = [word for word in words if word.strip() and not is_punctuation(word)]
+    # Failed translations come back as None
+    translated = get_translator().translate_many(wanted + [text], "en", fallback=lambda _: None)
+
+    full_translation = translated[text]
+    if full_translation is None:
         full_translation = "Translation unavailable"
 
+    # Failed words fall back to the original word
+    translations = []
+    for word in words:
+        if word not in translated:
+            translations.append("")  # No translation for punctuation
+        else:
+            translations.append(translated[word] if translated[word] is not None else word)
+    return translations, full_translation
+
+
+def process_chinese(text):
     # Use POS-based syntax analysis
-    syntax_analysis = analyze_chinese_syntax(text)
+    with stage_timer("segment", "chinese"):
+        syntax_analysis = analyze_chinese_syntax(text)
     words = [item[0] for item in syntax_analysis]
     syntax_categories = [item[1] for item in syntax_analysis]
     pos_tags = [item[2] for item in syntax_analysis]
 
     pinyin_result = []
-    for word in words:
-        if is_punctuation(word):
-            pinyin_result.append("")  # No pinyin for punctuation
-        else:
-            pinyin_result.append(" ".join([p[0] for p in pinyin(word, style=Style.TONE)]))
-
-    translations = []
+    with stage_timer("transliterate", "chinese"):
+        for word in words:
+            if is_punctuation(word):
+                pinyin_result.append("")  # No pinyin for punctuation
+            else:
+                pinyin_result.append(" ".join([p[0] for p in pinyin(word, style=Style.TONE)]))
 
-    for word in words:
-        if is_punctuation(word):
-            translations.append("")  # No translation for punctuation
-        else:
-            try:
-                # Add delay to avoid rate limiting
-                time.sleep(0.1)
-                translation = translator.translate(word, src="zh-cn", dest="en")
-                translations.append(translation)
-            except Exception as e:
-                print(f"Translation failed for '{word}': {str(e)}")
-                translations.append(word)  # Fallback to original word if translation fails
+    with stage_timer("translate", "en"):
+        translations, full_translation = translate_words(words, text)
 
     result = []
     for word, pinyin_word, translation, syntax, pos in zip(
@@ -226,18 +236,10 @@ def process_chinese(text):
 
 
 def process_japanese(text):
-    translator = get_translator()
-
-    # Get full text translation
-    try:
-        full_translation = translator.translate(text)
-    except Exception as e:
-        print(f"Full translation failed: {str(e)}")
-        full_translation = "Translation unavailable"
-
     # Use pykakasi for both segmentation AND transliteration (consistent approach)
     try:
-        analyzed = kks.convert(text)
+        with stage_timer("transliterate", "japanese"):
+            analyzed = kks.convert(text)
         
         words = []
         romaji = []
@@ -256,20 +258,8 @@ def process_japanese(text):
         romaji = [""] * len(words)
 
     # Get word translations
-    translations = []
-    for word in words:
-        if is_punctuation(word) or word.isspace():
-            translations.append("")
-            continue
-            
-        try:
-            # Add delay to avoid rate limiting
-            time.sleep(0.5)
-            translation = translator.translate(word)
-            translations.append(translation)
-        except Exception as e:
-            print(f"Translation failed for '{word}': {str(e)}")
-            translations.append(word)  # Fallback to original word
+    with stage_timer("translate", "en"):
+        translations, full_translation = translate_words(words, text)
 
     # Build result
     result = []
@@ -290,6 +280,7 @@ def process_japanese(text):
 
 
 @app.route("/", methods=["GET", "POST"])
+@cached_view(response_cache)
 def index():
     if request.method == "POST":
         text = request.form["text"]
@@ -314,15 +305,17 @@ def index():
                     if not item['is_punctuation']:
                         table_data.append(item)
 
-            return render_template(
-                "color-coded-chinese.html",
-                sentences=sentences,
-                table_data=table_data,
-                original_text=text,
-                lang_name=lang_name,
-                full_translation=full_translation,
-            )
+            with stage_timer("render"):
+                return render_template(
+                    "color-coded-chinese.html",
+                    sentences=sentences,
+                    table_data=table_data,
+                    original_text=text,
+                    lang_name=lang_name,
+                    full_translation=full_translation,
+                )
         except Exception as e:
+            skip_response_cache()
             return render_template("color-coded-chinese.html", error=f"An error occurred: {str(e)}")
 
     return render_template("color-coded-chinese.html")
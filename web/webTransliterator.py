@@ -1,349 +1,68 @@
-import re
-
-from deep_translator import GoogleTranslator
-from flask import Flask, jsonify, render_template, request
-
-from transliteration import (
-    analyze_chinese_syntax,
-    get_grammatical_classes_from_pos,
-    get_pinyin_annotations,
-    get_pinyin_for_word,
-    is_punctuation,
-    transliterate,
+import os
+
+from flask import Flask, Response, jsonify, render_template, request
+
+from transliteration import transliterate
+from transliteration.metrics import instrument_flask_app, stage_timer
+from transliteration.translation_client import get_translation_client
+from web.response_cache import cached_view, open_response_cache, skip_response_cache
+from web.streaming import (
+    SSE_HEADERS,
+    SSE_MIMETYPE,
+    completed_translations,
+    sse_event,
+    stream_request_data,
+)
+from web.text_analysis import (
+    TARGET_LANGUAGES,
+    detect_language_text,
+    get_language_direction,
+    segment_sentence,
+    split_into_sentences,
+    target_language_name,
+    transliterate_batch,
 )
 
 app = Flask(__name__)
+# Repeated texts (demo paragraphs, pasted subtitle lines) are answered from here
+response_cache = open_response_cache()
 
-# Language character ranges for detection
-LANGUAGE_CHAR_RANGES = {
-    "korean": [(0xAC00, 0xD7AF)],  # Hangul syllables
-    "arabic": [(0x0600, 0x06FF)],   # Basic Arabic
-    "russian": [(0x0400, 0x04FF)],  # Cyrillic
-    "hindi": [(0x0900, 0x097F)],    # Devanagari (Hindi)
-    "japanese": [
-        (0x3040, 0x309F),  # Hiragana
-        (0x30A0, 0x30FF),  # Katakana  
-        (0x4E00, 0x9FFF),  # Kanji/Chinese characters
-    ],
-    "chinese": [(0x4E00, 0x9FFF)],  # Chinese characters
-}
-
-# Language priority for ambiguous characters (Chinese/Japanese share Kanji)
-LANGUAGE_PRIORITY = ["chinese", "japanese", "korean", "hindi", "arabic", "russian"]
-
-# Language code mapping for translation
-LANGUAGE_CODE_MAP = {
-    "japanese": "ja",
-    "chinese": "zh-CN", 
-    "korean": "ko",
-    "hindi": "hi",
-    "arabic": "ar",
-    "russian": "ru"
-}
-
-# Target languages (languages we translate TO)
-TARGET_LANGUAGES = [
-    {"code": "en", "name": "English", "direction": "ltr"},
-    {"code": "es", "name": "Spanish", "direction": "ltr"},
-    {"code": "fr", "name": "French", "direction": "ltr"},
-    {"code": "de", "name": "German", "direction": "ltr"},
-    {"code": "it", "name": "Italian", "direction": "ltr"},
-    {"code": "pt", "name": "Portuguese", "direction": "ltr"},
-    {"code": "ru", "name": "Russian", "direction": "ltr"},
-    {"code": "ja", "name": "Japanese", "direction": "ltr"},
-    {"code": "ko", "name": "Korean", "direction": "ltr"},
-    {"code": "zh-CN", "name": "Chinese (Simplified)", "direction": "ltr"},
-    {"code": "ar", "name": "Arabic", "direction": "rtl"},
-    {"code": "he", "name": "Hebrew", "direction": "rtl"},
-    {"code": "fa", "name": "Persian", "direction": "rtl"},
-    {"code": "ur", "name": "Urdu", "direction": "rtl"},
-    {"code": "hi", "name": "Hindi", "direction": "ltr"},
-    {"code": "tr", "name": "Turkish", "direction": "ltr"},
-    {"code": "nl", "name": "Dutch", "direction": "ltr"},
-    {"code": "sv", "name": "Swedish", "direction": "ltr"},
-    {"code": "pl", "name": "Polish", "direction": "ltr"},
-    {"code": "vi", "name": "Vietnamese", "direction": "ltr"},
-    {"code": "th", "name": "Thai", "direction": "ltr"},
-    {"code": "id", "name": "Indonesian", "direction": "ltr"}
-]
-
-def detect_language_char(char):
-    """Detect which language a character belongs to"""
-    char_code = ord(char)
-    
-    # Skip common punctuation and whitespace
-    if char in ' .,!?。，！？、」「『』（）《》-—–…':
-        return "punctuation"
-    
-    for lang, ranges in LANGUAGE_CHAR_RANGES.items():
-        for start, end in ranges:
-            if isinstance(start, tuple):  # Multiple ranges
-                for r_start, r_end in ranges:
-                    if r_start <= char_code <= r_end:
-                        return lang
-            else:  # Single range
-                if start <= char_code <= end:
-                    return lang
-    
-    return "latin"  # Default to latin for unrecognized characters
-
-def detect_language_text(text):
-    """Detect the primary language of a text block"""
-    if not text.strip():
-        return "unknown"
-    
-    char_languages = []
-    for char in text:
-        lang = detect_language_char(char)
-        if lang not in ["punctuation", "latin"]:
-            char_languages.append(lang)
-    
-    if not char_languages:
-        return "latin"  # No special characters found, treat as latin
-    
-    # Count language occurrences
-    from collections import Counter
-    lang_counts = Counter(char_languages)
-    
-    # Handle Chinese/Japanese ambiguity with better heuristics
-    if "japanese" in lang_counts and "chinese" in lang_counts:
-        # If there are Japanese-specific characters, prioritize Japanese
-        if contains_japanese_specific_chars(text):
-            return "japanese"
-        # Default to the majority
-        elif lang_counts["japanese"] > lang_counts["chinese"]:
-            return "japanese"
-        else:
-            return "chinese"
-    
-    # For single language or clear majority
-    primary_lang = lang_counts.most_common(1)[0][0]
-    
-    # Double-check Chinese/Japanese if detected
-    if primary_lang == "japanese" and not contains_japanese_specific_chars(text) and contains_chinese_specific_patterns(text):
-        return "chinese"
-    elif primary_lang == "chinese" and contains_japanese_specific_chars(text):
-        return "japanese"
-    
-    return primary_lang
-
-def contains_japanese_specific_chars(text):
-    """Check for Japanese-specific characters"""
-    # Hiragana and Katakana are uniquely Japanese
-    hiragana_range = (0x3040, 0x309F)
-    katakana_range = (0x30A0, 0x30FF)
-    # Japanese punctuation and symbols
-    japanese_punct = "・「」『』〜"
-    
-    for char in text:
-        code = ord(char)
-        if (hiragana_range[0] <= code <= hiragana_range[1] or 
-            katakana_range[0] <= code <= katakana_range[1] or
-            char in japanese_punct):
-            return True
-    return False
-
-def contains_chinese_specific_patterns(text):
-    """Check for Chinese-specific patterns"""
-    # Chinese punctuation
-    chinese_punct = "。，！？《》【】"
-    # Common Chinese characters not typically used in Japanese
-    chinese_specific_chars = "这那为个说国们着么"
-    
-    if any(punct in text for punct in chinese_punct):
-        return True
-    
-    if any(char in text for char in chinese_specific_chars):
-        return True
-    
-    return False
-
-def split_into_sentences(text):
-    """Split text into sentences"""
-    sentences = re.split(r'(?<=[.!?。！？])\s+', text)
-    return [sentence.strip() for sentence in sentences if sentence.strip()]
+# Request latency per route and GET /metrics (Prometheus text, or ?format=json)
+instrument_flask_app(app, stats=lambda: {
+    "response_cache": response_cache.stats(),
+    "translation_client": get_translation_client().stats(),
+})
 
-def should_process_word(word):
-    """Check if word should be processed (not space/punctuation)"""
-    if not word.strip():
-        return False
-    if is_punctuation(word):
-        return False
-    if word.isspace():
-        return False
-    return True
+# Most texts in one /api/transliterate/batch request
+MAX_BATCH_TEXTS = int(os.environ.get("TRANSLITERATION_MAX_BATCH_TEXTS", 500))
 
 def process_word_breakdown(text, detected_lang, target_lang):
     """Process text for word-by-word breakdown with translation and transliteration"""
-    if detected_lang == "chinese":
-        return process_chinese_breakdown(text, target_lang)
-    elif detected_lang == "japanese":
-        return process_japanese_breakdown(text, target_lang)
-    else:
-        return process_other_language_breakdown(text, detected_lang, target_lang)
-
-def process_japanese_breakdown(text, target_lang):
-    """Process Japanese text using pykakasi segmentation for both transliteration and translation"""
-    result = []
-    
-    try:
-        import pykakasi
-        kks = pykakasi.kakasi()
-        analyzed = kks.convert(text)
-        
-        for item in analyzed:
-            original = item.get("orig", "")
-            romaji = item.get("hepburn", "")
-            
-            if not should_process_word(original):
-                # Add non-processable items directly
-                result.append({
-                    "word": original,
-                    "translation": "",
-                    "transliteration": "",
-                    "processable": False
-                })
-                continue
-            
-            # Get translation for the segmented word
-            try:
-                translation = GoogleTranslator(source="ja", target=target_lang).translate(original)
-            except Exception as e:
-                translation = f"[Error: {str(e)}]"
-            
-            result.append({
-                "word": original,
-                "translation": translation,
-                "transliteration": romaji,
-                "processable": True
-            })
-            
-    except Exception as e:
-        print(f"Error in Japanese processing: {e}")
-        # Fallback: simple word splitting
-        return process_other_language_breakdown(text, "ja", target_lang)
-    
-    return result
-
-def process_chinese_breakdown(text, target_lang):
-    """Process Chinese text with detailed breakdown"""
-    result = []
-    
-    # Use jieba for Chinese word segmentation
-    import jieba.posseg as pseg
-    words = list(pseg.cut(text))
-    
-    for word, pos in words:
-        if not should_process_word(word):
-            # Add non-processable items directly
-            result.append({
-                "word": word,
-                "translation": "",
-                "transliteration": "",
-                "syntax": "",
-                "pos": "punct",
-                "grammatical_class": "",
-                "processable": False
-            })
-        else:
-            # Get translation
-            try:
-                translation = GoogleTranslator(source="zh-CN", target=target_lang).translate(word)
-            except Exception as e:
-                translation = f"[Error: {str(e)}]"
-            
-            # Get pinyin transliteration
-            transliteration = get_pinyin_for_word(word)
-            
-            # Get syntax and grammatical class
-            syntax_analysis = analyze_chinese_syntax(word)
-            if syntax_analysis:
-                syntax = syntax_analysis[0][1] if len(syntax_analysis) > 0 else ""
-                grammatical_class = get_grammatical_classes_from_pos(pos)
-            else:
-                syntax = ""
-                grammatical_class = get_grammatical_classes_from_pos(pos)
-            
-            result.append({
-                "word": word,
-                "translation": translation,
-                "transliteration": transliteration,
-                "syntax": syntax,
-                "pos": pos,
-                "grammatical_class": grammatical_class,
-                "processable": True
-            })
-    
-    return result
-
-def process_other_language_breakdown(text, detected_lang, target_lang):
-    """Process other languages word by word"""
-    result = []
-    
-    # Tokenize while preserving spaces and punctuation
-    tokens = re.findall(r'\S+|\s+', text)
-    
-    for token in tokens:
-        if not should_process_word(token):
-            # Add spaces and punctuation directly
-            result.append({
-                "word": token,
-                "translation": "",
-                "transliteration": "",
-                "processable": False
-            })
-            continue
-        
-        # Get translation
-        try:
-            source_code = LANGUAGE_CODE_MAP.get(detected_lang, detected_lang)
-            translation = GoogleTranslator(source=source_code, target=target_lang).translate(token)
-        except Exception as e:
-            translation = f"[Error: {str(e)}]"
-        
-        # Get transliteration
-        try:
-            transliteration_result = transliterate(token, detected_lang)
-            
-            if detected_lang == "korean" and isinstance(transliteration_result, list):
-                transliteration = " ".join([trans for char, trans in transliteration_result])
-            else:
-                transliteration = str(transliteration_result)
-                
-        except Exception as e:
-            transliteration = f"[Error: {str(e)}]"
-        
-        result.append({
-            "word": token,
-            "translation": translation,
-            "transliteration": transliteration,
-            "processable": True
-        })
+    with stage_timer("segment", detected_lang):
+        result = segment_sentence(text, detected_lang)
+    
+    # Every distinct word at once, through the shared rate-limited, caching client
+    words = [item["word"] for item in result if item["processable"]]
+    with stage_timer("translate", target_lang):
+        translations = get_translation_client().translate_many(
+            words, target_lang, fallback=lambda word: "[Error: translation failed]"
+        )
+    for item in result:
+        if item["processable"]:
+            item["translation"] = translations[item["word"]]
     
     return result
 
 def translate_full_sentence(text, detected_lang, target_lang):
     """Translate full sentence"""
-    try:
-        source_code = LANGUAGE_CODE_MAP.get(detected_lang, detected_lang)
-        translated = GoogleTranslator(source=source_code, target=target_lang).translate(text)
-        return translated
-    except Exception as e:
-        return f"Translation error: {str(e)}"
-
-def get_language_direction(lang_code):
-    """Get text direction for language"""
-    # Check if it's a detected language name
-    if lang_code in LANGUAGE_CHAR_RANGES:
-        if lang_code in ["arabic"]:
-            return "rtl"
-        return "ltr"
-    
-    # Check target languages
-    lang = next((l for l in TARGET_LANGUAGES if l["code"] == lang_code), None)
-    return lang["direction"] if lang else "ltr"
+    with stage_timer("translate", target_lang):
+        translations = get_translation_client().translate_many(
+            [text], target_lang, fallback=lambda sentence: "Translation error: translation failed"
+        )
+    return translations[text]
 
 @app.route("/", methods=["GET", "POST"])
+@cached_view(response_cache)
 def transliterator():
     input_text = ""
     result = None
@@ -356,14 +75,16 @@ def transliterator():
         if input_text.strip() and selected_target_lang:
             try:
                 # Detect language from input text
-                detected_lang = detect_language_text(input_text)
+                with stage_timer("detect_language"):
+                    detected_lang = detect_language_text(input_text)
                 
                 sentences = split_into_sentences(input_text)
                 sentence_results = []
                 
                 for sentence in sentences:
                     # Detect language for each sentence (in case of mixed content)
-                    sentence_lang = detect_language_text(sentence)
+                    with stage_timer("detect_language"):
+                        sentence_lang = detect_language_text(sentence)
                     word_breakdown = process_word_breakdown(sentence, sentence_lang, selected_target_lang)
                     full_translation = translate_full_sentence(sentence, sentence_lang, selected_target_lang)
                     
@@ -378,13 +99,14 @@ def transliterator():
                     "detected_language": detected_lang,
                     "target_language": selected_target_lang,
                     "detected_language_name": detected_lang.title(),
-                    "target_language_name": next((lang["name"] for lang in TARGET_LANGUAGES if lang["code"] == selected_target_lang), selected_target_lang),
+                    "target_language_name": target_language_name(selected_target_lang),
                     "text_direction": get_language_direction(detected_lang),
                     "sentences": sentence_results
                 }
                 
             except Exception as e:
                 print(f"Error processing text: {str(e)}")
+                skip_response_cache()
                 result = {
                     "error": str(e),
                     "detected_language": "unknown",
@@ -393,15 +115,84 @@ def transliterator():
                     "sentences": []
                 }
 
-    return render_template(
-        "translator2transliteration.html", 
-        input_text=input_text, 
-        result=result,
-        target_languages=TARGET_LANGUAGES,
-        selected_target_lang=selected_target_lang
-    )
+    with stage_timer("render"):
+        return render_template(
+            "translator2transliteration.html", 
+            input_text=input_text, 
+            result=result,
+            target_languages=TARGET_LANGUAGES,
+            selected_target_lang=selected_target_lang
+        )
+
+def breakdown_events(text, target_lang):
+    """
+    Server-Sent Events for a word breakdown, in the order results become available.
+
+    "meta" (languages, direction) comes first. Each sentence is then sent as
+    "sentence" as soon as it is segmented and transliterated, with empty
+    translations; its word and sentence translations are already requested at
+    that point. "translation" events ({index, word} or {index, full_translation})
+    follow as the translations finish, and "done" ends the stream.
+    """
+    client = get_translation_client()
+    detected_lang = detect_language_text(text)
+    yield sse_event("meta", {
+        "detected_language": detected_lang,
+        "target_language": target_lang,
+        "detected_language_name": detected_lang.title(),
+        "target_language_name": target_language_name(target_lang),
+        "text_direction": get_language_direction(detected_lang),
+    })
+
+    pending = {}
+    for index, sentence in enumerate(split_into_sentences(text)):
+        sentence_lang = detect_language_text(sentence)
+        word_breakdown = segment_sentence(sentence, sentence_lang)
+        yield sse_event("sentence", {
+            "index": index,
+            "original": sentence,
+            "word_breakdown": word_breakdown,
+            "detected_language": sentence_lang,
+        })
+        words = dict.fromkeys(item["word"] for item in word_breakdown if item["processable"])
+        for word in words:
+            pending[client.submit(word, target_lang)] = (index, word)
+        pending[client.submit(sentence, target_lang)] = (index, None)
+
+    for (index, word), translation, error in completed_translations(pending):
+        if word is None:
+            full_translation = translation if error is None else f"Translation error: {str(error)}"
+            yield sse_event("translation", {"index": index, "full_translation": full_translation})
+        else:
+            translation = translation if error is None else f"[Error: {str(error)}]"
+            yield sse_event("translation", {"index": index, "word": word, "translation": translation})
+
+    yield sse_event("done", {})
+
+@app.route("/api/breakdown/stream", methods=["GET", "POST"])
+def api_breakdown_stream():
+    """Word breakdown as Server-Sent Events; see breakdown_events"""
+    data = stream_request_data(request)
+    text = data.get("text", "")
+    target_lang = data.get("target_lang") or "en"
+
+    if not text.strip():
+        return jsonify({"error": "Text is required"}), 400
+
+    return Response(breakdown_events(text, target_lang), mimetype=SSE_MIMETYPE, headers=SSE_HEADERS)
+
+def transliteration_events(text, detected_lang):
+    """Server-Sent Events: one "transliteration" per sentence ({index, original, transliteration}), then "done"."""
+    for index, sentence in enumerate(split_into_sentences(text)):
+        try:
+            transliteration = str(transliterate(sentence, detected_lang))
+        except Exception as e:
+            transliteration = f"[Error: {str(e)}]"
+        yield sse_event("transliteration", {"index": index, "original": sentence, "transliteration": transliteration})
+    yield sse_event("done", {"detected_language": detected_lang})
 
 @app.route("/api/transliterate", methods=["POST"])
+@cached_view(response_cache)
 def api_transliterate():
     """API endpoint for transliteration only"""
     data = request.json
@@ -410,9 +201,14 @@ def api_transliterate():
     if not text:
         return jsonify({"error": "Text is required"}), 400
     
-    try:
+    with stage_timer("detect_language"):
         detected_lang = detect_language_text(text)
-        result = transliterate(text, detected_lang)
+    if data.get("stream") or SSE_MIMETYPE in request.headers.get("Accept", ""):
+        return Response(transliteration_events(text, detected_lang), mimetype=SSE_MIMETYPE, headers=SSE_HEADERS)
+
+    try:
+        with stage_timer("transliterate", detected_lang):
+            result = transliterate(text, detected_lang)
         return jsonify({
             "transliteration": str(result),
             "detected_language": detected_lang
@@ -420,5 +216,31 @@ def api_transliterate():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/api/transliterate/batch", methods=["POST"])
+@cached_view(response_cache)
+def api_transliterate_batch():
+    """Many texts per request: {"texts", "languages"? or "language"?} -> {"results"} in order"""
+    data = request.json or {}
+    texts = data.get("texts")
+
+    if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+        return jsonify({"error": "'texts' must be a list of strings"}), 400
+    if len(texts) > MAX_BATCH_TEXTS:
+        return jsonify({"error": f"A batch is limited to {MAX_BATCH_TEXTS} texts"}), 413
+
+    languages = data.get("languages") or [data.get("language")] * len(texts)
+    if not isinstance(languages, list) or len(languages) != len(texts):
+        return jsonify({"error": "'languages' must have one entry (or null) per text"}), 400
+
+    try:
+        with stage_timer("transliterate_batch"):
+            results = transliterate_batch(texts, languages)
+        return jsonify({"results": [
+            {"transliteration": str(result), "detected_language": language}
+            for result, language in results
+        ]})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 if __name__ == "__main__":
     app.run(debug=True, port=5009)
\ No newline at end of file
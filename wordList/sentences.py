@@ -2,13 +2,19 @@
 import csv
 import random
 from datetime import datetime
-import subprocess
 import os
-import uuid
+import sys
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from subtitles.epub_writer import blocks_to_chapters, build_epubs, inline_html
 
-def generate_epubs(csv_file_path, output_dir="output", date=None, dictionary_name="Dictionary"):
+
+def generate_epubs(
+    csv_file_path, output_dir="output", date=None, dictionary_name="Dictionary", max_workers=1
+):
     os.makedirs(output_dir, exist_ok=True)
+    css_path = "/home/zaya/Downloads/Zayas/ZayasTransliteration/web/static/styles3.css"
+    jobs = []
 
     if date is None:
         date = datetime.today().strftime("%Y-%m-%d")
@@ -42,70 +48,33 @@ def generate_epubs(csv_file_path, output_dir="output", date=None, dictionary_nam
             is_translated = version == "-en"
             base_name = f"{dictionary_name}-{language}{version}"
 
-            metadata = f"""---
-title:
-  - type: main
-    text: {dictionary_name} {lang_names[language]}{' with English' if is_translated else ''}
-  - type: subtitle
-    text: Vocabulary Builder
-creator:
-  - role: author
-    text: Zaya Barrini
-  - role: editor
-    text: Zaya Barrini
-date: {date}
-cover-image: /home/zaya/Downloads/Zayas/zayaweb/static/css/img/Bing/bing{random_number}.png
-identifier:
-  - scheme: UUID
-    text: {str(uuid.uuid4())}
-publisher: Zaya's Language Press
-rights: © {datetime.today().year} Zaya Barrini, CC BY-NC
-language: {language}
-ibooks:
-  version: 1.3.4
-...
-
-"""
-            md_content = [metadata]
-
+            blocks = []
             for row in rows:
                 if not row.get("en", "").strip():
                     continue
 
                 # Add the sentence in the target language
                 if is_translated:
-                    sentence = f"{row['en']} \n\n {row[language]} \n\n"
-                else:
-                    sentence = f"{row[language]}\n\n"
-
-                md_content.append(sentence)
-
-            md_filename = os.path.join(output_dir, f"{base_name}.md")
-            with open(md_filename, "w", encoding="utf-8") as md_file:
-                md_file.writelines(md_content)
-
-            epub_filename = os.path.join(output_dir, f"{base_name}.epub")
-            css_path = "/home/zaya/Downloads/Zayas/ZayasTransliteration/web/static/styles3.css"
-
-            pandoc_cmd = [
-                "pandoc",
-                "-s",
-                md_filename,
-                "-o",
-                epub_filename,
-                "--toc",
-                "--toc-depth=2",
-                f"--css={css_path}",
-                f"--epub-cover-image=/home/zaya/Downloads/Zayas/zayaweb/static/css/img/Bing/bing{random_number}.png",
-            ]
-
-            try:
-                subprocess.run(pandoc_cmd, check=True)
-                print(f"Successfully created {epub_filename}")
-                os.remove(md_filename)
-                print(f"Removed temporary file: {md_filename}")
-            except subprocess.CalledProcessError as e:
-                print(f"Error converting to EPUB: {e}")
+                    blocks.append(("p", inline_html(row["en"].strip())))
+                if (row.get(language) or "").strip():
+                    blocks.append(("p", inline_html(row[language].strip())))
+
+            title = f"{dictionary_name} {lang_names[language]}{' with English' if is_translated else ''}"
+            jobs.append(
+                {
+                    "output_path": os.path.join(output_dir, f"{base_name}.epub"),
+                    "chapters": blocks_to_chapters(blocks, title),
+                    "title": title,
+                    "subtitle": "Vocabulary Builder",
+                    "language": language,
+                    "date": date,
+                    "css_path": css_path,
+                    "cover_image": f"/home/zaya/Downloads/Zayas/zayaweb/static/css/img/Bing/bing{random_number}.png",
+                }
+            )
+
+    for epub_filename in build_epubs(jobs, max_workers):
+        print(f"Successfully created {epub_filename}")
 
 
 if __name__ == "__main__":
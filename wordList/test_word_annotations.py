@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import word_annotations
+from word_annotations import (
+    annotate_column,
+    chinese_pinyin,
+    open_annotation_cache,
+    read_csv_columns,
+    unique_words,
+)
+
+
+class CountingEngine:
+    """Stand-in annotation engine that records every word it is given"""
+
+    def __init__(self):
+        self.words = []
+
+    def __call__(self, word):
+        self.words.append(word)
+        return word.upper()
+
+
+class TestWordAnnotations(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.engine = CountingEngine()
+        patcher = mock.patch.dict(word_annotations.ENGINES, {"upper": self.engine})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_read_csv_columns(self):
+        csv_path = os.path.join(self.test_dir, "words.csv")
+        with open(csv_path, "w", encoding="utf-8") as f:
+            f.write("Chinese,English\n你好,hello\n\n谢谢\n你好,hi\n")
+
+        self.assertEqual(
+            read_csv_columns(csv_path),
+            {"Chinese": ["你好", "谢谢", "你好"], "English": ["hello", "", "hi"]},
+        )
+
+    def test_repeated_words_are_annotated_once(self):
+        values = [" 你好", "谢谢", "", "# Lesson 1", "你好 ", "谢谢"]
+        self.assertEqual(unique_words(values), ["你好", "谢谢"])
+
+        annotations = annotate_column(values, ["upper"])
+        self.assertEqual(annotations, {"upper": {"你好": "你好", "谢谢": "谢谢"}})
+        self.assertEqual(self.engine.words, ["你好", "谢谢"])
+
+    def test_cache_cold_and_warm(self):
+        cache_path = os.path.join(self.test_dir, "annotations.db")
+        values = ["good", "night", "good"]
+
+        with open_annotation_cache(cache_path) as cache:
+            cold = annotate_column(values, ["upper"], cache=cache)
+            self.assertEqual(cache.stats(), {"entries": 2, "hits": 0, "misses": 2})
+        self.assertEqual(self.engine.words, ["good", "night"])
+
+        # A second run with the same cache file never calls the engine
+        self.engine.words.clear()
+        with open_annotation_cache(cache_path) as cache:
+            warm = annotate_column(values, ["upper"], cache=cache)
+            self.assertEqual(cache.stats(), {"entries": 2, "hits": 2, "misses": 0})
+        self.assertEqual(warm, cold)
+        self.assertEqual(self.engine.words, [])
+
+    def test_chinese_pinyin(self):
+        self.assertEqual(chinese_pinyin("你好"), "nǐ hǎo")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,15 +1,44 @@
 # CsvRT.py
-import csv
 import random
 from datetime import datetime
-import subprocess
 import os
-import uuid
-from pypinyin import pinyin, Style  # For Chinese transliteration
-import pykakasi  # For Japanese romanization
+import sys
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from subtitles.epub_writer import blocks_to_chapters, build_epubs, word_list_blocks
+from word_annotations import annotate_column, open_annotation_cache, read_csv_columns
 
-def generate_epubs(csv_file_path, output_dir="output", date=None, dictionary_name="Dictionary"):
+# Engine giving the reading shown above each word
+READING_ENGINES = {"ch": "pinyin", "ja": "romaji"}
+
+
+def word_list_items(columns, language, is_translated, readings):
+    """("line", text) and ("word", ruby html) items of one language for word_list_blocks"""
+    for en_text, text in zip(columns["en"], columns[language]):
+        if text == "" or text.startswith("#"):
+            yield "line", en_text
+            continue
+
+        word = text.strip()
+        if word:
+            # Pinyin for Chinese, romaji for Japanese, annotated once per distinct word
+            reading = readings[word]
+            if is_translated:
+                content = f'<ruby>{word}<rt class="translation">{en_text.strip()}</rt><rt>{reading}</rt></ruby>'
+            else:
+                content = f"<ruby>{word}<rt>{reading}</rt></ruby>"
+
+            yield "word", content
+
+
+def generate_epubs(
+    csv_file_path,
+    output_dir="output",
+    date=None,
+    dictionary_name="Dictionary",
+    max_workers=1,
+    cache_path=None,
+):
     """
     Generate EPUB dictionaries from a CSV file.
 
@@ -18,28 +47,32 @@ def generate_epubs(csv_file_path, output_dir="output", date=None, dictionary_nam
         output_dir (str): Output directory for EPUB files
         date (str): Date string in YYYY-MM-DD format (optional)
         dictionary_name (str): Name of the dictionary to use in titles
+        max_workers (int): Processes annotating words and building the EPUBs in parallel
+        cache_path (str): SQLite file keeping readings between runs (optional,
+            defaults to $WORDLIST_ANNOTATION_CACHE)
     """
     os.makedirs(output_dir, exist_ok=True)
+    css_path = "/home/zaya/Downloads/Zayas/ZayasTransliteration/web/static/styles4.css"
+    jobs = []
 
     if date is None:
         date = datetime.today().strftime("%Y-%m-%d")
 
-    # Initialize Japanese romanization converter
-    kakasi = pykakasi.kakasi()
-    kakasi.setMode("H", "a")  # Hiragana to romaji
-    kakasi.setMode("K", "a")  # Katakana to romaji
-    kakasi.setMode("J", "a")  # Kanji to romaji
-    kakasi.setMode("r", "Hepburn")  # Use Hepburn romanization
-    kakasi.setMode("s", True)  # Add space between words
-    kakasi.setMode("C", True)  # Capitalize first letter
-    converter = kakasi.getConverter()
+    columns = read_csv_columns(csv_file_path)
+    columns.setdefault("en", [""] * len(next(iter(columns.values()), [])))
 
-    with open(csv_file_path, "r", encoding="utf-8") as csvfile:
-        reader = csv.DictReader(csvfile)
-        rows = list(reader)
+    with open_annotation_cache(cache_path) as cache:
+        readings = {
+            language: annotate_column(
+                columns[language], [engine], cache=cache, max_workers=max_workers
+            )[engine]
+            for language, engine in READING_ENGINES.items()
+            if language in columns
+        }
+        print(f"Annotation cache: {cache.stats()}")
 
     for language in ["ja", "ch"]:
-        if not any(row.get(language, "").strip() for row in rows):
+        if not any(text.strip() for text in columns.get(language, [])):
             continue
         lang_names = {
             "de": "German",
@@ -64,104 +97,27 @@ def generate_epubs(csv_file_path, output_dir="output", date=None, dictionary_nam
             is_translated = version == "-en"
             base_name = f"{dictionary_name}-{language}{version}-trans"
 
-            metadata = f"""---
-title:
-  - type: main
-    text: {dictionary_name} {lang_names[language]}{' with English-trans' if is_translated else ''}
-  - type: subtitle
-    text: Vocabulary Builder
-creator:
-  - role: author
-    text: Zaya Barrini
-  - role: editor
-    text: Zaya Barrini
-date: {date}
-cover-image: /home/zaya/Downloads/Zayas/zayaweb/static/css/img/Bing/bing{random_number}.png
-identifier:
-  - scheme: UUID
-    text: {str(uuid.uuid4())}
-publisher: Zaya's Language Press
-rights: © {datetime.today().year} Zaya Barrini, CC BY-NC
-language: {language}
-ibooks:
-  version: 1.3.4
-...
-"""
-            md_content = [metadata]
-            words = []
-
-            for row in rows:
-                if (
-                    row[language] is None
-                    or row[language] == ""
-                    or str(row[language]).startswith("#")
-                ):
-                    md_content.append(f"\n{row['en']}\n\n")
-                    continue
-
-                if language in row and row[language].strip():
-                    if language == "ch":  # Special handling for Chinese
-                        chinese_word = row[language].strip()
-                        # Generate pinyin transliteration
-                        pinyin_word = " ".join(
-                            [p[0] for p in pinyin(chinese_word, style=Style.TONE)]
-                        )
-
-                        if is_translated:
-                            content = f'<ruby>{chinese_word}<rt class="translation">{row["en"].strip()}</rt><rt>{pinyin_word}</rt></ruby>'
-                        else:
-                            content = f"<ruby>{chinese_word}<rt>{pinyin_word}</rt></ruby>"
-                    elif language == "ja":  # Special handling for Japanese
-                        japanese_word = row[language].strip()
-                        # Generate romaji transliteration
-                        romaji_word = converter.do(japanese_word)
-
-                        if is_translated:
-                            content = f'<ruby>{japanese_word}<rt class="translation">{row["en"].strip()}</rt><rt>{romaji_word}</rt></ruby>'
-                        else:
-                            content = f"<ruby>{japanese_word}<rt>{romaji_word}</rt></ruby>"
-                    else:  # Other languages
-                        if is_translated:
-                            content = (
-                                f'<ruby>{row[language].strip()}<rt>{row["en"].strip()}</rt></ruby>'
-                            )
-                        else:
-                            content = row[language].strip()
-
-                    words.append(content)
-
-                    if len(words) % 10 == 0:
-                        md_content.append(", ".join(words[-10:]) + "\n\n")
-
-            if words:
-                md_content.append(", ".join(words[-(len(words) % 10) :]) + "\n")
-
-            md_filename = os.path.join(output_dir, f"{base_name}.md")
-            with open(md_filename, "w", encoding="utf-8") as md_file:
-                md_file.writelines(md_content)
-
-            epub_filename = os.path.join(output_dir, f"{base_name}.epub")
-            css_path = "/home/zaya/Downloads/Zayas/ZayasTransliteration/web/static/styles4.css"
-
-            pandoc_cmd = [
-                "pandoc",
-                "-s",
-                md_filename,
-                "-o",
-                epub_filename,
-                "--toc",
-                "--toc-depth=2",
-                f"--css={css_path}",
-                f"--epub-cover-image=/home/zaya/Downloads/Zayas/zayaweb/static/css/img/Bing/bing{random_number}.png",
-            ]
-
-            try:
-                subprocess.run(pandoc_cmd, check=True)
-                print(f"Successfully created {epub_filename}")
-                os.remove(md_filename)
-                print(f"Removed temporary file: {md_filename}")
-            except subprocess.CalledProcessError as e:
-                print(f"Error converting to EPUB: {e}")
+            title = f"{dictionary_name} {lang_names[language]}{' with English-trans' if is_translated else ''}"
+            jobs.append(
+                {
+                    "output_path": os.path.join(output_dir, f"{base_name}.epub"),
+                    "chapters": blocks_to_chapters(
+                        word_list_blocks(
+                            word_list_items(columns, language, is_translated, readings[language])
+                        ),
+                        title,
+                    ),
+                    "title": title,
+                    "subtitle": "Vocabulary Builder",
+                    "language": language,
+                    "date": date,
+                    "css_path": css_path,
+                    "cover_image": f"/home/zaya/Downloads/Zayas/zayaweb/static/css/img/Bing/bing{random_number}.png",
+                }
+            )
+
+    for epub_filename in build_epubs(jobs, max_workers):
+        print(f"Successfully created {epub_filename}")
 
 
 if __name__ == "__main__":
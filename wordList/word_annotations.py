@@ -0,0 +1,242 @@
+# word_annotations.py
+import csv
+import os
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import jieba.posseg as pseg
+from pypinyin import Style, pinyin
+
+# Unique words handed to one engine call (and to one worker process)
+CHUNK_SIZE = 5000
+# Below this many unannotated words a process pool costs more than it saves
+PARALLEL_MIN_WORDS = 20000
+
+# Complete exclusion set for punctuation
+PUNCTUATION = {
+    " ", ".", ",", "!", "?", "。", "，", "！", "？", "、",
+    "「", "」", "『", "』", "（", "）", "《", "》", "“", "”",
+    "‘", "’", "…", "—", "：", ":", "；", ";", "～", "°", "º",
+}  # fmt: skip
+
+
+def read_csv_columns(csv_file_path, delimiter=","):
+    """
+    Reads a CSV file with a header row into {column: [values]} in one pass.
+
+    Short rows are padded with "", so every column has one value per row.
+    """
+    with open(csv_file_path, "r", encoding="utf-8") as csvfile:
+        reader = csv.reader(csvfile, delimiter=delimiter)
+        header = next(reader, [])
+        columns = {name: [] for name in header}
+        lists = [columns[name] for name in header]
+        for row in reader:
+            if not row:
+                continue
+            for values, value in zip(lists, row):
+                values.append(value)
+            for values in lists[len(row) :]:
+                values.append("")
+    return columns
+
+
+def unique_words(values):
+    """Distinct stripped, non-empty values that are not "#" headers, in first-seen order"""
+    words = dict.fromkeys(value.strip() for value in values)
+    return [word for word in words if word and not word.startswith("#")]
+
+
+def pos_to_syntax(pos):
+    """Maps a jieba part-of-speech tag to the syntax class used by the CSS"""
+    if pos.startswith("v"):  # Verbs (v, vd, vn, etc.)
+        return "V"
+    elif pos.startswith("n"):  # Nouns
+        return "N"
+    elif pos.startswith("a"):  # Adjectives
+        return "ADJ"
+    elif pos.startswith("d"):  # Adverbs
+        return "ADV"
+    elif pos in ["r", "nh", "nr"]:  # Pronouns, names
+        return "PRON"
+    elif pos in ["c", "p", "cc"]:  # Conjunctions, prepositions
+        return "CONJ" if pos in ["c", "cc"] else "PREP"
+    elif pos in ["m", "q"]:  # Numbers, quantifiers
+        return "NUM"
+    elif pos in ["u", "y", "e"]:  # Auxiliary, modal particles
+        return "PART"
+    else:
+        return "X"
+
+
+def chinese_syntax(word):
+    """Syntax class of a Chinese word from the first token jieba finds in it"""
+    if word in PUNCTUATION:
+        return "PUNCT"
+    token = next(iter(pseg.cut(word)), None)
+    if token is None:
+        return "X"
+    return pos_to_syntax(token.flag)
+
+
+def chinese_pinyin(word):
+    try:
+        return " ".join([p[0] for p in pinyin(word, style=Style.TONE)])
+    except Exception:
+        return ""  # Fallback for words that can't be transliterated
+
+
+@lru_cache(maxsize=None)
+def japanese_converter():
+    """pykakasi converter to capitalized Hepburn romaji, one per process"""
+    import pykakasi  # For Japanese romanization
+
+    kakasi = pykakasi.kakasi()
+    kakasi.setMode("H", "a")  # Hiragana to romaji
+    kakasi.setMode("K", "a")  # Katakana to romaji
+    kakasi.setMode("J", "a")  # Kanji to romaji
+    kakasi.setMode("r", "Hepburn")  # Use Hepburn romanization
+    kakasi.setMode("s", True)  # Add space between words
+    kakasi.setMode("C", True)  # Capitalize first letter
+    return kakasi.getConverter()
+
+
+def japanese_romaji(word):
+    return japanese_converter().do(word)
+
+
+ENGINES = {
+    "syntax": chinese_syntax,
+    "pinyin": chinese_pinyin,
+    "romaji": japanese_romaji,
+}
+
+
+def annotate_words(engine, words):
+    """Annotations of words by one engine, in order; runs in worker processes"""
+    annotate = ENGINES[engine]
+    return [annotate(word) for word in words]
+
+
+class AnnotationCache:
+    """
+    Persistent (engine, word) -> annotation store.
+
+    Entries live in SQLite at db_path (None keeps them in memory only) and are
+    loaded on open, so a warm run never touches jieba, pypinyin or pykakasi.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._entries = {}  # engine -> {word: annotation}
+
+        self._conn = None
+        if db_path:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS annotations (
+                    engine TEXT,
+                    word TEXT,
+                    annotation TEXT,
+                    PRIMARY KEY (engine, word)
+                )
+            """
+            )
+            self._conn.commit()
+            for engine, word, annotation in self._conn.execute(
+                "SELECT engine, word, annotation FROM annotations"
+            ):
+                self._entries.setdefault(engine, {})[word] = annotation
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._entries.values())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def get_many(self, engine, words):
+        """{word: annotation} for the cached words among words"""
+        entries = self._entries.get(engine, {})
+        found = {word: entries[word] for word in words if word in entries}
+        self.hits += len(found)
+        self.misses += len(words) - len(found)
+        return found
+
+    def add_many(self, engine, annotations):
+        """Remembers a {word: annotation} dict for engine"""
+        with self._lock:
+            self._entries.setdefault(engine, {}).update(annotations)
+            if self._conn is not None and annotations:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO annotations (engine, word, annotation) "
+                    "VALUES (?, ?, ?)",
+                    [(engine, word, annotation) for word, annotation in annotations.items()],
+                )
+                self._conn.commit()
+
+    def stats(self):
+        return {"entries": len(self), "hits": self.hits, "misses": self.misses}
+
+
+def open_annotation_cache(db_path=None):
+    """AnnotationCache at db_path, or at $WORDLIST_ANNOTATION_CACHE when set"""
+    db_path = db_path or os.environ.get("WORDLIST_ANNOTATION_CACHE")
+    return AnnotationCache(db_path)
+
+
+def annotate_unique(engine, words, cache=None, max_workers=1, chunk_size=CHUNK_SIZE):
+    """
+    Annotates a list of distinct words with one engine.
+
+    Cached words are reused; the rest are annotated chunk by chunk, across
+    max_workers processes when there are enough of them, and added to the cache.
+
+    Returns:
+        {word: annotation} for every word
+    """
+    annotations = cache.get_many(engine, words) if cache is not None else {}
+    missing = [word for word in words if word not in annotations]
+    chunks = [missing[i : i + chunk_size] for i in range(0, len(missing), chunk_size)]
+
+    if max_workers > 1 and len(missing) >= PARALLEL_MIN_WORDS:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(annotate_words, [engine] * len(chunks), chunks))
+    else:
+        results = [annotate_words(engine, chunk) for chunk in chunks]
+
+    fresh = {}
+    for chunk, result in zip(chunks, results):
+        fresh.update(zip(chunk, result))
+    if cache is not None:
+        cache.add_many(engine, fresh)
+    annotations.update(fresh)
+    return annotations
+
+
+def annotate_column(values, engines, cache=None, max_workers=1):
+    """
+    Annotates a CSV column once per distinct word.
+
+    Returns:
+        {engine: {word: annotation}} keyed by the stripped values
+    """
+    words = unique_words(values)
+    return {
+        engine: annotate_unique(engine, words, cache=cache, max_workers=max_workers)
+        for engine in engines
+    }
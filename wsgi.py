@@ -1,4 +1,5 @@
-from app import app
+# WSGI entry for the legacy Flask transliterator; the ASGI service lives in app.py
+from web.webTransliterator import app
 
 if __name__ == "__main__":
-    app.run()
\ No newline at end of file
+    app.run()